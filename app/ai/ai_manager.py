@@ -3,9 +3,15 @@ from app.security.vault_manager import VaultManager
 from app.ai.base_ai_provider import BaseAIProvider
 from app.ai.openai_provider import OpenAIProvider
 from app.ai.local_ai_provider import LocalAIProvider
-import hashlib
+from app.ai.response_cache import ResponseCache, make_cache_key
+from app.ai.job_queue import AIJobQueue, PRIORITY_INTERACTIVE
+from app.ai.semantic_cache import SemanticCache
+from app.db.database import DB_FILE
+import asyncio
 import logging
 
+SEMANTIC_CACHE_DIR = DB_FILE.parent / "ai_semantic_cache"
+
 # A mapping of provider names to their classes
 SUPPORTED_PROVIDERS = {
     OpenAIProvider.get_provider_name(): OpenAIProvider,
@@ -16,9 +22,9 @@ class AIManager:
     _instance = None
 
     @classmethod
-    def initialize(cls, settings_manager: SettingsManager, vault_manager: VaultManager):
+    def initialize(cls, settings_manager: SettingsManager, vault_manager: VaultManager, cache_conn=None):
         if cls._instance is None:
-            cls._instance = cls(settings_manager, vault_manager)
+            cls._instance = cls(settings_manager, vault_manager, cache_conn)
 
     @classmethod
     def get_instance(cls):
@@ -26,7 +32,7 @@ class AIManager:
             raise Exception("AIManager singleton not initialized. Call initialize() first.")
         return cls._instance
 
-    def __init__(self, settings_manager: SettingsManager, vault_manager: VaultManager):
+    def __init__(self, settings_manager: SettingsManager, vault_manager: VaultManager, cache_conn=None):
         if self.__class__._instance is not None:
             raise Exception("This class is a singleton! Use get_instance() to get the instance.")
         
@@ -34,13 +40,25 @@ class AIManager:
         self.vault_manager = vault_manager
         self._provider_instance: BaseAIProvider | None = None
         
-        # Cache configuration
-        self._response_cache = {}
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # Response cache: memory LRU backed by the ai_response_cache table. It is written from
+        # the job queue's worker threads, so it should get a connection of its own (cache_conn)
         self._cache_enabled = True  # Default to enabled
-        self._cache_size = 100  # Default cache size
+        self._response_cache = ResponseCache(
+            cache_conn or settings_manager.conn,
+            memory_max_bytes=settings_manager.get_ai_cache_memory_mb() * 1024 * 1024,
+            disk_max_bytes=settings_manager.get_ai_cache_disk_mb() * 1024 * 1024,
+            ttl_seconds=settings_manager.get_ai_cache_ttl_days() * 24 * 3600,
+        )
         
+        # Optional tier answering paraphrased prompts (embeddings + nearest neighbour)
+        self._semantic_cache = None
+        self.set_semantic_cache(settings_manager.get_ai_semantic_cache_enabled(),
+                                settings_manager.get_ai_semantic_cache_threshold())
+
+        # Requests submitted from the UI run here: bounded workers, priorities and
+        # single-flight deduplication of identical prompts
+        self.job_queue = AIJobQueue(self._run_job, workers=settings_manager.get_ai_concurrency())
+
         self._load_provider()
 
     def _load_provider(self):
@@ -101,10 +119,30 @@ class AIManager:
             max_tokens: Maximum tokens for generation
             
         Returns:
-            SHA256 hash of the prompt and parameters
+            SHA256 hash of the prompt, parameters, provider and model
         """
-        content = f"{prompt}:{max_tokens}"
-        return hashlib.sha256(content.encode()).hexdigest()
+        return make_cache_key(prompt, max_tokens, *self._get_cache_scope())
+
+    def _get_cache_scope(self) -> tuple[str, str]:
+        """(provider, model) a cached response belongs to."""
+        return self.settings_manager.get_ai_provider() or "", self.settings_manager.get_ai_model() or "default"
+
+    def _require_provider(self) -> BaseAIProvider:
+        """Returns the current provider or raises PermissionError explaining why there is none."""
+        provider = self.get_current_provider()
+        if provider is None:
+            provider_name = self.settings_manager.get_ai_provider()
+            if not provider_name:
+                raise PermissionError("No AI provider has been configured in the settings.")
+            elif self.vault_manager.is_locked():
+                raise PermissionError("The Vault is locked. Please unlock it to use AI features.")
+            else:
+                raise PermissionError(f"AI Provider '{provider_name}' could not be loaded. Check API key and configuration.")
+        return provider
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embeddings of texts from the current provider (used by the semantic cache and the retrieval index)."""
+        return self._require_provider().embed(texts)
 
     def generate_text(self, prompt: str, max_tokens: int = 1500) -> str:
         """
@@ -121,61 +159,204 @@ class AIManager:
             PermissionError: If no provider is configured or available.
             Exception: For any errors during generation.
         """
-        # Check cache first
+        # Check cache first (memory, then disk, then similar prompts)
         if self._cache_enabled:
             cache_key = self._get_cache_key(prompt, max_tokens)
-            if cache_key in self._response_cache:
-                self._cache_hits += 1
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
                 logging.debug(f"Cache hit for prompt (key: {cache_key[:8]}...)")
-                return self._response_cache[cache_key]
-            self._cache_misses += 1
+                return cached
+            cached, embedding = self._semantic_lookup(prompt, max_tokens)
+            if cached is not None:
+                return cached
         
-        provider = self.get_current_provider()
-        if provider is None:
-            provider_name = self.settings_manager.get_ai_provider()
-            if not provider_name:
-                raise PermissionError("No AI provider has been configured in the settings.")
-            elif self.vault_manager.is_locked():
-                raise PermissionError("The Vault is locked. Please unlock it to use AI features.")
-            else:
-                raise PermissionError(f"AI Provider '{provider_name}' could not be loaded. Check API key and configuration.")
+        provider = self._require_provider()
 
         # Generate response
         response = provider.generate_text(prompt, max_tokens=max_tokens)
         
         # Store in cache
         if self._cache_enabled:
-            # Implement simple FIFO eviction if cache is full
-            if len(self._response_cache) >= self._cache_size:
-                # Remove oldest entry
-                oldest_key = next(iter(self._response_cache))
-                del self._response_cache[oldest_key]
-                logging.debug(f"Cache full, evicted oldest entry")
-            self._response_cache[cache_key] = response
+            self._response_cache.put(cache_key, *self._get_cache_scope(), response)
+            self._semantic_store(embedding, cache_key, max_tokens)
             logging.debug(f"Cached response (key: {cache_key[:8]}...)")
         
         return response
 
+    def _semantic_scope(self, max_tokens: int) -> str:
+        return "\0".join((*self._get_cache_scope(), str(max_tokens)))
+
+    def _semantic_lookup(self, prompt: str, max_tokens: int):
+        """
+        Returns (cached answer of a similar prompt or None, prompt embedding or None).
+        The embedding is handed back so the new answer can be indexed without embedding twice.
+        """
+        if self._semantic_cache is None:
+            return None, None
+        try:
+            embedding = self._semantic_cache.embed_prompt(prompt)
+        except Exception as e:
+            logging.debug(f"Semantic cache skipped, prompt could not be embedded: {e}")
+            return None, None
+        match = self._semantic_cache.lookup(embedding, self._semantic_scope(max_tokens))
+        if match is None:
+            return None, embedding
+        key, similarity = match
+        cached = self._response_cache.get(key, record_stats=False)
+        if cached is None:
+            self._semantic_cache.discard_stale(key, similarity)
+            return None, embedding
+        logging.debug(f"Semantic cache hit (similarity {similarity:.3f}, key: {key[:8]}...)")
+        return cached, embedding
+
+    def _semantic_store(self, embedding, cache_key: str, max_tokens: int):
+        if self._semantic_cache is not None and embedding is not None:
+            self._semantic_cache.add(embedding, cache_key, self._semantic_scope(max_tokens))
+
+    def set_semantic_cache(self, enabled: bool, threshold: float | None = None):
+        """Turns the semantic tier on or off and sets its similarity threshold (0-1)."""
+        if not enabled:
+            self._semantic_cache = None
+        elif self._semantic_cache is None:
+            self._semantic_cache = SemanticCache(
+                SEMANTIC_CACHE_DIR, self.embed,
+                threshold=threshold if threshold is not None else self.settings_manager.get_ai_semantic_cache_threshold())
+        elif threshold is not None:
+            self._semantic_cache.threshold = threshold
+
+    def stream_text(self, prompt: str, max_tokens: int = 1500, cancel_event=None):
+        """
+        Generates text with the current provider, yielding chunks as they arrive.
+
+        A cached response is yielded as a single chunk. The assembled text of a stream
+        that completes is stored in the cache; a cancelled or failed stream is not.
+
+        Args:
+            prompt: The input prompt for the AI.
+            max_tokens: The maximum number of tokens for the output.
+            cancel_event: Optional threading.Event that closes the stream once set.
+
+        Raises:
+            PermissionError: If no provider is configured or available.
+            Exception: For any errors during generation.
+        """
+        cache_key, embedding = None, None
+        if self._cache_enabled:
+            cache_key = self._get_cache_key(prompt, max_tokens)
+            cached = self._response_cache.get(cache_key)
+            if cached is None:
+                cached, embedding = self._semantic_lookup(prompt, max_tokens)
+            if cached is not None:
+                yield cached
+                return
+
+        provider = self._require_provider()
+        chunks = []
+        for chunk in provider.stream_text(prompt, max_tokens=max_tokens, cancel_event=cancel_event):
+            chunks.append(chunk)
+            yield chunk
+
+        if cache_key is not None and chunks and not (cancel_event is not None and cancel_event.is_set()):
+            self._response_cache.put(cache_key, *self._get_cache_scope(), "".join(chunks).strip())
+            self._semantic_store(embedding, cache_key, max_tokens)
+
+    async def agenerate_many(self, prompts: list[str], max_tokens: int = 1500, concurrency: int | None = None) -> list:
+        """
+        Generates a response for every prompt concurrently (see BaseAIProvider.agenerate_many).
+        Cached prompts are answered without a request and new responses are cached.
+
+        Args:
+            prompts: The input prompts.
+            max_tokens: The maximum number of tokens per output.
+            concurrency: Maximum requests in flight; defaults to the ai_concurrency setting.
+
+        Returns:
+            One entry per prompt, in order: the generated text or the exception raised for it.
+
+        Raises:
+            PermissionError: If no provider is configured or available.
+        """
+        results = [None] * len(prompts)
+        missing = [] # (index, cache key) of prompts that need a request
+        for index, prompt in enumerate(prompts):
+            cache_key = self._get_cache_key(prompt, max_tokens) if self._cache_enabled else None
+            cached = self._response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                missing.append((index, cache_key))
+        if not missing:
+            return results
+
+        provider = self._require_provider()
+        concurrency = concurrency or self.settings_manager.get_ai_concurrency()
+        generated = await provider.agenerate_many([prompts[index] for index, _ in missing],
+                                                  max_tokens=max_tokens, concurrency=concurrency)
+        for (index, cache_key), response in zip(missing, generated):
+            results[index] = response
+            if cache_key and isinstance(response, str):
+                self._response_cache.put(cache_key, *self._get_cache_scope(), response)
+        return results
+
+    def generate_many(self, prompts: list[str], max_tokens: int = 1500, concurrency: int | None = None) -> list:
+        """Blocking wrapper of agenerate_many, meant to run in a single worker thread."""
+        return asyncio.run(self.agenerate_many(prompts, max_tokens=max_tokens, concurrency=concurrency))
+
+    def get_latency_stats(self) -> dict:
+        """Request latency summary of the current provider (count, avg/p50/p95 of ttfb and total)."""
+        provider = self._provider_instance
+        return provider.get_latency_stats() if provider is not None else {}
+
+    def _run_job(self, job):
+        return self.stream_text(job.prompt, job.max_tokens, cancel_event=job.cancel_event)
+
+    def submit(self, prompt: str, max_tokens: int = 1500, priority: int = PRIORITY_INTERACTIVE, on_chunk=None):
+        """
+        Queues a streamed generation and returns its AIJobHandle (result(), cancel(),
+        add_done_callback()). An identical prompt already queued or running is not sent
+        again: the new handle shares its chunks and result.
+
+        Args:
+            prompt: The input prompt for the AI.
+            max_tokens: The maximum number of tokens for the output.
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND (lower runs first).
+            on_chunk: Optional callback(text) for each chunk, called on a worker thread.
+
+        Raises:
+            AIQueueFullError: If too many requests are already waiting.
+        """
+        key = make_cache_key(prompt, max_tokens, *self._get_cache_scope())
+        return self.job_queue.submit(key, prompt, max_tokens, priority=priority, on_chunk=on_chunk)
+
+    def get_queue_stats(self) -> dict:
+        """Queue depth, counters (submitted, coalesced, completed, failed, cancelled) and wait/run times."""
+        return self.job_queue.stats()
+
     def clear_cache(self):
-        """Clear the response cache and reset statistics."""
+        """Clear the response cache (memory and disk) and reset statistics."""
         self._response_cache.clear()
-        self._cache_hits = 0
-        self._cache_misses = 0
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
         logging.info("AI response cache cleared")
 
     def get_cache_stats(self) -> dict:
         """Get cache statistics.
         
         Returns:
-            Dictionary with cache hits, misses, size, and hit rate
+            Dictionary with total hits, misses, size (entries in memory) and hit rate,
+            plus hits, entries and bytes per tier (memory_*, disk_*) and the semantic
+            tier's stats under 'semantic' (None when disabled)
         """
-        total = self._cache_hits + self._cache_misses
-        hit_rate = (self._cache_hits / total * 100) if total > 0 else 0
+        stats = self._response_cache.stats()
+        hits = stats['memory_hits'] + stats['disk_hits']
+        total = hits + stats['misses']
+        hit_rate = (hits / total * 100) if total > 0 else 0
         return {
-            'hits': self._cache_hits,
-            'misses': self._cache_misses,
-            'size': len(self._response_cache),
-            'hit_rate': round(hit_rate, 2)
+            'hits': hits,
+            'size': stats['memory_entries'],
+            'hit_rate': round(hit_rate, 2),
+            **stats,
+            'semantic': self._semantic_cache.stats() if self._semantic_cache is not None else None,
         }
 
     def set_cache_enabled(self, enabled: bool):
@@ -189,20 +370,17 @@ class AIManager:
             self.clear_cache()
         logging.info(f"AI cache {'enabled' if enabled else 'disabled'}")
 
-    def set_cache_size(self, size: int):
-        """Set the maximum cache size.
+    def set_cache_limits(self, memory_mb: int | None = None, disk_mb: int | None = None, ttl_days: int | None = None):
+        """Set the cache budgets and TTL, evicting entries that no longer fit.
         
         Args:
-            size: Maximum number of cached responses
+            memory_mb: Memory budget of the in-process LRU, in MB
+            disk_mb: Budget of the compressed disk tier, in MB
+            ttl_days: Days a cached response stays valid
         """
-        if size < 1:
-            size = 1
-        self._cache_size = size
-        
-        # Trim cache if new size is smaller
-        while len(self._response_cache) > self._cache_size:
-            oldest_key = next(iter(self._response_cache))
-            del self._response_cache[oldest_key]
-        
-        logging.info(f"AI cache size set to {size}")
-
+        self._response_cache.set_limits(
+            memory_max_bytes=max(memory_mb, 1) * 1024 * 1024 if memory_mb is not None else None,
+            disk_max_bytes=max(disk_mb, 1) * 1024 * 1024 if disk_mb is not None else None,
+            ttl_seconds=max(ttl_days, 1) * 24 * 3600 if ttl_days is not None else None,
+        )
+        logging.info(f"AI cache limits set (memory {memory_mb} MB, disk {disk_mb} MB, TTL {ttl_days} days)")
@@ -1,5 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
 
+from app.ai.transport import DEFAULT_CONCURRENCY, gather_limited
+
 class BaseAIProvider(ABC):
     """
     Abstract base class for all AI providers.
@@ -24,6 +27,55 @@ class BaseAIProvider(ABC):
         """
         raise NotImplementedError
 
+    def stream_text(self, prompt: str, max_tokens: int = 150, cancel_event=None):
+        """
+        Generates text incrementally, yielding chunks as the model produces them.
+
+        Args:
+            prompt: The input text to the AI model.
+            max_tokens: The maximum number of tokens to generate.
+            cancel_event: Optional threading.Event; once set, the stream is closed
+                and no more chunks are yielded.
+
+        Yields:
+            Pieces of the generated text, in order.
+
+        Providers without a streaming API yield the whole response as one chunk.
+        """
+        yield self.generate_text(prompt, max_tokens=max_tokens)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Returns one embedding vector per text (used by the semantic cache).
+
+        Raises:
+            NotImplementedError: If the provider has no embeddings endpoint.
+        """
+        raise NotImplementedError(f"{self.get_provider_name()} does not provide embeddings.")
+
+    async def agenerate_many(self, prompts: list[str], max_tokens: int = 150,
+                             concurrency: int = DEFAULT_CONCURRENCY) -> list:
+        """
+        Generates a response for every prompt, running at most `concurrency` requests at once.
+
+        Returns:
+            One entry per prompt, in order: the generated text, or the exception raised for it.
+
+        Providers without an async client run generate_text in worker threads.
+        """
+        return await gather_limited(
+            lambda prompt: asyncio.to_thread(self.generate_text, prompt, max_tokens=max_tokens),
+            prompts, concurrency)
+
+    def generate_many(self, prompts: list[str], max_tokens: int = 150, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+        """Blocking wrapper of agenerate_many, for callers without an event loop (e.g. a QThread)."""
+        return asyncio.run(self.agenerate_many(prompts, max_tokens=max_tokens, concurrency=concurrency))
+
+    def get_latency_stats(self) -> dict:
+        """Request latency summary (see LatencyTracker.get_stats); empty if the provider is not timed."""
+        latency = getattr(self, 'latency', None)
+        return latency.get_stats() if latency is not None else {}
+
     @staticmethod
     def get_provider_name() -> str:
         """
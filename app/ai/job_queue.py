@@ -0,0 +1,236 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+from app.ai.transport import percentile
+
+PRIORITY_INTERACTIVE = 0 # User waiting on the answer (assistant actions)
+PRIORITY_BACKGROUND = 10 # Batch or speculative work
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+METRICS_WINDOW = 200
+
+class AIQueueFullError(RuntimeError):
+    """Raised by AIJobQueue.submit when max_pending jobs are already waiting."""
+
+class AIJobHandle:
+    """
+    One caller's view of a job. Identical prompts submitted while a job is queued or running
+    share that job, each through its own handle: cancelling a handle only detaches that caller,
+    and the request itself is cancelled when no handle is left.
+    """
+
+    def __init__(self, job, on_chunk=None, coalesced=False):
+        self.job = job
+        self.future = Future()
+        self.on_chunk = on_chunk
+        self.coalesced = coalesced # True if this handle joined a job submitted by another caller
+        self._delivery_lock = threading.Lock() # Keeps replayed and live chunks in order
+
+    def result(self, timeout=None) -> str:
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback):
+        """callback(handle) runs once the job finishes, fails or this handle is cancelled (from any thread)."""
+        self.future.add_done_callback(lambda _future: callback(self))
+
+    def cancel(self):
+        self.job.queue._detach(self)
+
+class AIJob:
+    def __init__(self, queue, key, prompt, max_tokens, priority):
+        self.queue = queue
+        self.key = key
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.priority = priority
+        self.handles = []
+        self.chunks = [] # Kept so late joiners receive the text streamed so far
+        self.cancel_event = threading.Event()
+        self.state = 'queued' # queued, running, done
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+
+class AIJobQueue:
+    """
+    Bounded pool of worker threads running AI requests by priority (lower value first, FIFO
+    within a priority), with single-flight deduplication: a job whose key matches one that
+    is queued or running is not sent again but shares its result and streamed chunks.
+
+    run(job) must return an iterable of text chunks and stop early once job.cancel_event is
+    set. Chunk callbacks and done callbacks are invoked on the worker threads.
+    """
+
+    def __init__(self, run, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.run = run
+        self.max_pending = max_pending
+        self._heap = [] # (priority, sequence, job); entries of jobs that started or were cancelled are skipped
+        self._sequence = itertools.count()
+        self._inflight = {} # key -> job (queued or running)
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._running = 0
+        self._closed = False
+        self._counters = {'submitted': 0, 'coalesced': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+        self._timings = deque(maxlen=METRICS_WINDOW) # (wait ms, run ms)
+        self._threads = [threading.Thread(target=self._work, name=f"ai-job-worker-{i}", daemon=True)
+                         for i in range(max(workers, 1))]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, prompt, max_tokens, priority=PRIORITY_INTERACTIVE, on_chunk=None) -> AIJobHandle:
+        """
+        Queues a request, or joins the queued/running job with the same key.
+        Raises AIQueueFullError if max_pending jobs are waiting and a new job would be needed.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AI job queue is shut down.")
+            self._counters['submitted'] += 1
+            job = self._inflight.get(key)
+            if job is not None:
+                self._counters['coalesced'] += 1
+                handle = AIJobHandle(job, on_chunk, coalesced=True)
+                handle._delivery_lock.acquire()
+                job.handles.append(handle)
+                chunks = list(job.chunks)
+                if job.state == 'queued' and priority < job.priority:
+                    # Re-queue at the higher priority; the old heap entry becomes stale
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._sequence), job))
+                    self._has_work.notify()
+            else:
+                if self._pending_count() >= self.max_pending:
+                    self._counters['submitted'] -= 1
+                    raise AIQueueFullError(f"Too many pending AI requests ({self.max_pending}).")
+                job = AIJob(self, key, prompt, max_tokens, priority)
+                handle = AIJobHandle(job, on_chunk)
+                handle._delivery_lock.acquire()
+                job.handles.append(handle)
+                chunks = []
+                self._inflight[key] = job
+                heapq.heappush(self._heap, (priority, next(self._sequence), job))
+                self._has_work.notify()
+        try:
+            if on_chunk is not None:
+                for chunk in chunks:
+                    on_chunk(chunk)
+        finally:
+            handle._delivery_lock.release()
+        return handle
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._inflight.values() if job.state == 'queued')
+
+    def _detach(self, handle):
+        with self._lock:
+            job = handle.job
+            if handle not in job.handles or job.state == 'done':
+                return
+            job.handles.remove(handle)
+            if not job.handles:
+                job.cancel_event.set()
+                if job.state == 'queued':
+                    job.state = 'done'
+                    self._counters['cancelled'] += 1
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+        handle.future.cancel()
+
+    def _next_job(self):
+        with self._lock:
+            while True:
+                while self._heap:
+                    priority, _, job = heapq.heappop(self._heap)
+                    if job.state == 'queued' and priority == job.priority:
+                        job.state = 'running'
+                        job.started_at = time.monotonic()
+                        self._running += 1
+                        return job
+                if self._closed:
+                    return None
+                self._has_work.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            error, text = None, None
+            try:
+                for chunk in self.run(job):
+                    with self._lock:
+                        job.chunks.append(chunk)
+                        listeners = [h for h in job.handles if h.on_chunk is not None]
+                    for handle in listeners:
+                        with handle._delivery_lock:
+                            try:
+                                handle.on_chunk(chunk)
+                            except Exception as e:
+                                logging.error(f"Error in AI chunk callback: {e}", exc_info=True)
+                text = "".join(job.chunks)
+            except Exception as e:
+                error = e
+            self._finish(job, text, error)
+
+    def _finish(self, job, text, error):
+        finished_at = time.monotonic()
+        with self._lock:
+            self._running -= 1
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            job.state = 'done'
+            handles = list(job.handles)
+            if job.cancel_event.is_set() and not handles:
+                self._counters['cancelled'] += 1
+            elif error is not None:
+                self._counters['failed'] += 1
+            else:
+                self._counters['completed'] += 1
+            self._timings.append(((job.started_at - job.enqueued_at) * 1000, (finished_at - job.started_at) * 1000))
+        for handle in handles:
+            try:
+                if error is not None:
+                    handle.future.set_exception(error)
+                else:
+                    handle.future.set_result(text)
+            except InvalidStateError:
+                pass # Cancelled by its caller in the meantime
+
+    def stats(self) -> dict:
+        """
+        Queue depth (queued per priority, running) and counters, plus queue wait and run time
+        (avg and p95, in ms) of the last METRICS_WINDOW jobs.
+        """
+        with self._lock:
+            queued = [job for job in self._inflight.values() if job.state == 'queued']
+            stats = dict(self._counters)
+            stats.update({
+                'queued': len(queued),
+                'queued_interactive': sum(1 for job in queued if job.priority <= PRIORITY_INTERACTIVE),
+                'queued_background': sum(1 for job in queued if job.priority > PRIORITY_INTERACTIVE),
+                'running': self._running,
+                'workers': len(self._threads),
+            })
+            timings = list(self._timings)
+        for index, name in ((0, 'wait'), (1, 'run')):
+            values = [t[index] for t in timings]
+            stats[f'{name}_avg_ms'] = round(sum(values) / len(values), 2) if values else 0
+            stats[f'{name}_p95_ms'] = round(percentile(values, 0.95), 2) if values else 0
+        return stats
+
+    def shutdown(self, cancel_pending=True):
+        """Stops the workers once the running jobs end; queued jobs are cancelled if cancel_pending."""
+        with self._lock:
+            self._closed = True
+            pending = [job for job in self._inflight.values() if job.state == 'queued'] if cancel_pending else []
+            self._has_work.notify_all()
+        for job in pending:
+            for handle in list(job.handles):
+                handle.cancel()
+        for thread in self._threads:
+            thread.join(timeout=5)
@@ -1,5 +1,8 @@
 import requests
+import urllib3
 from app.ai.base_ai_provider import BaseAIProvider
+from app.ai.sse import iter_chat_deltas
+from app.ai.transport import DEFAULT_CONCURRENCY, HTTPTransport, gather_limited, iter_response_lines
 import json
 import logging
 
@@ -7,27 +10,26 @@ class LocalAIProvider(BaseAIProvider):
     """
     Provider for local LLMs compatible with OpenAI API (e.g., LM Studio, Ollama).
     """
-    def __init__(self, api_key="lm-studio", base_url="http://localhost:1234/v1", timeout=30):
+    def __init__(self, api_key="lm-studio", base_url="http://localhost:1234/v1", timeout=30,
+                 embedding_model="text-embedding-nomic-embed-text-v1.5"):
         # API Key is often not needed for local servers but kept for compatibility
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
+        self.embedding_model = embedding_model
+        # Keep-alive connection pool shared by every request of this provider
+        self.transport = HTTPTransport(self.base_url, headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }, timeout=timeout)
+        self.latency = self.transport.latency
 
     @staticmethod
     def get_provider_name():
         return "Local AI (LM Studio/Ollama)"
 
-    def generate_text(self, prompt: str, max_tokens: int = 1500) -> str:
-        """
-        Generates text using the local LLM server.
-        """
-        url = f"{self.base_url}/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
+    def _build_payload(self, prompt: str, max_tokens: int, stream: bool) -> dict:
+        """Body of a chat completion request."""
         payload = {
             "messages": [
                 {"role": "system", "content": "Eres un asistente ejecutivo eficiente y profesional. Tu objetivo es ayudar al usuario a procesar información, resumir textos y mejorar la redacción. Responde siempre en español de manera concisa."},
@@ -35,29 +37,95 @@ class LocalAIProvider(BaseAIProvider):
             ],
             "temperature": 0.7,
             "max_tokens": max_tokens,
-            "stream": False
+            "stream": stream
         }
+        return payload
+
+    @staticmethod
+    def _parse_completion(data: dict) -> str:
+        if 'choices' in data and len(data['choices']) > 0:
+            return data['choices'][0]['message']['content'].strip()
+        raise ValueError("No se recibió respuesta del modelo local.")
+
+    def generate_text(self, prompt: str, max_tokens: int = 1500) -> str:
+        """
+        Generates text using the local LLM server.
+        Errors are raised instead of returned as text, so a failure is never cached or shown as an answer.
+        """
+        payload = self._build_payload(prompt, max_tokens, stream=False)
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+            response = self.transport.post_json("chat/completions", payload)
             response.raise_for_status()
-            
-            data = response.json()
-            if 'choices' in data and len(data['choices']) > 0:
-                return data['choices'][0]['message']['content'].strip()
-            else:
-                return "Error: No se recibió respuesta del modelo local."
+            return self._parse_completion(response.json())
 
         except requests.exceptions.Timeout:
-            error_msg = f"Error: La solicitud excedió el tiempo límite de {self.timeout} segundos. Intenta aumentar el timeout en Configuración o verifica que el servidor local esté respondiendo."
+            error_msg = f"La solicitud excedió el tiempo límite de {self.timeout} segundos. Intenta aumentar el timeout en Configuración o verifica que el servidor local esté respondiendo."
             logging.error(error_msg)
-            return error_msg
+            raise TimeoutError(error_msg)
         except requests.exceptions.ConnectionError:
-            error_msg = "Error: No se pudo conectar con el servidor de IA Local. Asegúrate de que LM Studio u Ollama estén ejecutándose en el puerto 1234."
+            error_msg = "No se pudo conectar con el servidor de IA Local. Asegúrate de que LM Studio u Ollama estén ejecutándose en el puerto 1234."
             logging.error(error_msg)
-            return error_msg
+            raise ConnectionError(error_msg)
         except Exception as e:
-            error_msg = f"Error al generar texto: {str(e)}"
-            logging.error(error_msg, exc_info=True)
-            return error_msg
+            logging.error(f"Error al generar texto: {e}", exc_info=True)
+            raise
+
+    def stream_text(self, prompt: str, max_tokens: int = 1500, cancel_event=None):
+        """
+        Streams the completion from the local server (SSE, "stream": true).
+        Chunks are yielded as soon as they arrive. The read timeout applies between chunks,
+        not to the whole answer, and bounds how long a silent stream can hold a worker: a
+        cancellation is noticed on the next line received (keep-alive comments included).
+        Errors are raised instead of returned as text, so a failed stream is never taken for
+        a response.
+        """
+        payload = self._build_payload(prompt, max_tokens, stream=True)
+        connected = False
+        try:
+            # Leaving the block closes the response: a finished stream returns its connection to
+            # the pool, a cancelled one is dropped, which stops generation on the server
+            with self.transport.stream_json("chat/completions", payload, headers={"Accept": "text/event-stream"}) as response:
+                connected = True
+                response.raise_for_status()
+                response.encoding = "utf-8" # SSE is always UTF-8; requests would assume Latin-1 for text/*
+                for chunk in iter_chat_deltas(self._lines_until_cancelled(response, cancel_event)):
+                    yield chunk
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                urllib3.exceptions.ReadTimeoutError, urllib3.exceptions.ProtocolError) as e:
+            if connected:
+                if isinstance(e, (urllib3.exceptions.ReadTimeoutError, requests.exceptions.Timeout)):
+                    raise TimeoutError(f"El servidor de IA Local dejó de responder durante {self.timeout} segundos.")
+                raise ConnectionError("El servidor de IA Local cerró la conexión antes de terminar la respuesta.")
+            if isinstance(e, requests.exceptions.Timeout):
+                raise TimeoutError(f"La solicitud excedió el tiempo límite de {self.timeout} segundos.")
+            raise ConnectionError("No se pudo conectar con el servidor de IA Local. Asegúrate de que LM Studio u Ollama estén ejecutándose en el puerto 1234.")
+
+    @staticmethod
+    def _lines_until_cancelled(response, cancel_event):
+        for line in iter_response_lines(response):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield line
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts with the server's /embeddings endpoint (the embedding model loaded in LM Studio/Ollama)."""
+        response = self.transport.post_json("embeddings", {"input": texts, "model": self.embedding_model})
+        response.raise_for_status()
+        data = sorted(response.json()['data'], key=lambda item: item.get('index', 0))
+        return [item['embedding'] for item in data]
+
+    async def agenerate_many(self, prompts: list[str], max_tokens: int = 1500,
+                             concurrency: int = DEFAULT_CONCURRENCY) -> list:
+        """
+        Runs the prompts concurrently over one httpx.AsyncClient (at most `concurrency`
+        requests and keep-alive connections at once). Failures are returned as exceptions
+        in the prompt's position instead of error text.
+        """
+        async with self.transport.async_session(max_connections=concurrency) as session:
+            async def generate(prompt):
+                response = await session.post_json("chat/completions", self._build_payload(prompt, max_tokens, stream=False))
+                response.raise_for_status()
+                return self._parse_completion(response.json())
 
+            return await gather_limited(generate, prompts, concurrency)
@@ -1,17 +1,24 @@
 import openai
+import logging
+import time
 from app.ai.base_ai_provider import BaseAIProvider
+from app.ai.transport import LatencyTracker
 
 class OpenAIProvider(BaseAIProvider):
     """
     Concrete implementation of the AI provider for OpenAI.
     """
     PROVIDER_NAME = "OpenAI"
+    EMBEDDING_MODEL = "text-embedding-3-small"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, timeout: float = 60):
         if not api_key:
             raise ValueError("API key for OpenAI cannot be empty.")
         self.api_key = api_key
-        self.client = openai.OpenAI(api_key=self.api_key)
+        # The client keeps a pooled keep-alive httpx connection; it is thread-safe, so
+        # agenerate_many's worker threads share it
+        self.client = openai.OpenAI(api_key=self.api_key, timeout=timeout)
+        self.latency = LatencyTracker()
 
     @staticmethod
     def get_provider_name() -> str:
@@ -36,6 +43,7 @@ class OpenAIProvider(BaseAIProvider):
             raise PermissionError("OpenAI API key is not configured.")
 
         try:
+            start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=model,
                 messages=[
@@ -47,6 +55,8 @@ class OpenAIProvider(BaseAIProvider):
                 stop=None,
                 temperature=0.7,
             )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.latency.record(elapsed_ms, elapsed_ms, 200)
             if response.choices:
                 return response.choices[0].message.content.strip()
             else:
@@ -55,3 +65,44 @@ class OpenAIProvider(BaseAIProvider):
             # Log the error or handle it as needed
             print(f"An error occurred with the OpenAI API: {e}")
             raise
+
+    def stream_text(self, prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 1500, cancel_event=None):
+        """
+        Streams the completion from the OpenAI API (stream=True, delivered as SSE).
+        Closing the stream on cancellation drops the HTTP connection.
+        """
+        if not self.api_key:
+            raise PermissionError("OpenAI API key is not configured.")
+
+        start = time.perf_counter()
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            n=1,
+            stop=None,
+            temperature=0.7,
+            stream=True,
+        )
+        ttfb_ms = (time.perf_counter() - start) * 1000
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    yield content
+        except Exception as e:
+            logging.error(f"An error occurred with the OpenAI API stream: {e}")
+            raise
+        finally:
+            stream.close()
+            self.latency.record(ttfb_ms, (time.perf_counter() - start) * 1000, 200, kind="stream")
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts with the OpenAI embeddings API."""
+        response = self.client.embeddings.create(model=self.EMBEDDING_MODEL, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
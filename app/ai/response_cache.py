@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+DEFAULT_MEMORY_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Responses larger than this share of the memory budget go to disk only, so one huge
+# answer cannot flush every other entry out of memory
+MEMORY_ENTRY_SHARE = 4
+COMPRESSION_LEVEL = 6
+
+def make_cache_key(prompt: str, max_tokens: int, provider: str, model: str) -> str:
+    """SHA-256 of everything that determines a response."""
+    content = "\0".join((provider, model, str(max_tokens), prompt))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache of AI responses.
+
+    The memory tier is an LRU bounded by the UTF-8 size of the responses. The disk tier is
+    the ai_response_cache table: zlib-compressed payloads, a TTL on the creation time and a
+    byte budget enforced by evicting the least recently used rows. A disk hit is promoted to
+    memory, so repeated requests are served from memory within a session and from disk
+    across sessions. Safe to use from worker threads; give it a connection of its own so
+    its writes do not interleave with the UI thread's transactions.
+    """
+
+    def __init__(self, conn, memory_max_bytes=DEFAULT_MEMORY_MAX_BYTES, disk_max_bytes=DEFAULT_DISK_MAX_BYTES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, clock=time.time):
+        self.conn = conn
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._memory = OrderedDict() # key -> response
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- Memory tier ---
+
+    def _remember(self, key: str, response: str):
+        size = len(response.encode('utf-8'))
+        if size > self.memory_max_bytes // MEMORY_ENTRY_SHARE:
+            return
+        self._forget(key)
+        self._memory[key] = response
+        self._memory_bytes += size
+        self._trim_memory()
+
+    def _forget(self, key: str):
+        response = self._memory.pop(key, None)
+        if response is not None:
+            self._memory_bytes -= len(response.encode('utf-8'))
+
+    def _trim_memory(self):
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, response = self._memory.popitem(last=False)
+            self._memory_bytes -= len(response.encode('utf-8'))
+
+    # --- Disk tier ---
+
+    def _disk_get(self, key: str, now: float) -> str | None:
+        row = self.conn.execute("SELECT payload, created_at FROM ai_response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_seconds:
+            with self.conn:
+                self.conn.execute("DELETE FROM ai_response_cache WHERE key = ?", (key,))
+            return None
+        try:
+            response = zlib.decompress(row[0]).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as e:
+            logging.warning(f"Discarding corrupted AI cache entry {key[:8]}...: {e}")
+            with self.conn:
+                self.conn.execute("DELETE FROM ai_response_cache WHERE key = ?", (key,))
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE ai_response_cache SET last_access = ? WHERE key = ?", (now, key))
+        return response
+
+    def _disk_put(self, key: str, provider: str, model: str, response: str, now: float):
+        payload = zlib.compress(response.encode('utf-8'), COMPRESSION_LEVEL)
+        if len(payload) > self.disk_max_bytes:
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ai_response_cache (key, provider, model, payload, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, payload, len(payload), now, now)
+            )
+            self._trim_disk(now)
+
+    def _trim_disk(self, now: float):
+        """Drops expired rows, then the least recently used ones until the table fits its budget (no commit)."""
+        self.conn.execute("DELETE FROM ai_response_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        excess = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_response_cache").fetchone()[0] - self.disk_max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.conn.execute("SELECT key, size FROM ai_response_cache ORDER BY last_access"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM ai_response_cache WHERE key = ?", evicted)
+
+    # --- Public API ---
+
+    def get(self, key: str, record_stats: bool = True) -> str | None:
+        """Looks key up in memory, then on disk. record_stats=False leaves the hit/miss counters alone."""
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += record_stats
+                return response
+            response = self._disk_get(key, self.clock())
+            if response is None:
+                self.misses += record_stats
+                return None
+            self.disk_hits += record_stats
+            self._remember(key, response)
+            return response
+
+    def put(self, key: str, provider: str, model: str, response: str):
+        with self._lock:
+            self._remember(key, response)
+            self._disk_put(key, provider, model, response, self.clock())
+
+    def clear(self):
+        """Empties both tiers and resets the statistics."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            with self.conn:
+                self.conn.execute("DELETE FROM ai_response_cache")
+            self.reset_stats()
+
+    def set_limits(self, memory_max_bytes=None, disk_max_bytes=None, ttl_seconds=None):
+        """Changes the budgets and TTL, evicting right away whatever no longer fits."""
+        with self._lock:
+            if memory_max_bytes is not None:
+                self.memory_max_bytes = memory_max_bytes
+                self._trim_memory()
+            if disk_max_bytes is not None:
+                self.disk_max_bytes = disk_max_bytes
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            with self.conn:
+                self._trim_disk(self.clock())
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries, disk_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_response_cache").fetchone()
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+            }
@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 5000
+VECTORS_FILE = "vectors.npy"
+ENTRIES_FILE = "entries.jsonl"
+INITIAL_CAPACITY = 64
+LOG_COMPACT_FACTOR = 2 # The entries log is rewritten once it has this many lines per live row
+
+class SemanticCache:
+    """
+    Finds cached answers for prompts that mean the same as an earlier one.
+
+    Prompts are embedded with embed(texts) -> list of vectors. The vectors are normalized
+    and kept as rows of one float32 matrix in vectors.npy, memory-mapped for reads and
+    writes. A lookup is one matrix-vector product: the best cosine similarity among rows of
+    the same scope (provider, model, max_tokens) wins if it reaches the threshold. Rows
+    only point to exact-cache keys; the answers stay in the exact cache, and a row whose
+    answer was evicted there is dropped on its next hit. Past max_entries the oldest rows
+    are dropped.
+
+    The matrix has spare rows and doubles in size when they run out, so adding a prompt
+    writes one row in place. Row assignments are appended to entries.jsonl, which is
+    replayed on load and compacted once mostly made of stale lines.
+    """
+
+    def __init__(self, directory, embed, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = str(directory)
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._reset_rows(0)
+        self.reset_stats()
+        self._load()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0
+        self._hit_similarity_total = 0.0
+        self._embeds = 0
+        self._embed_ms_total = 0.0
+        self._search_ms_total = 0.0
+
+    # --- Persistence ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _reset_rows(self, capacity):
+        self._vectors = None # (capacity, D) float32 memmap
+        self._keys = [None] * capacity # Exact-cache key of each row, None if free
+        self._scopes = [None] * capacity
+        self._scope_codes = np.full(capacity, -1, dtype=np.int32) # -1 if free
+        self._scope_ids = {}
+        self._rows = {} # Exact-cache key -> row, oldest first
+        self._log_lines = 0
+
+    def _load(self):
+        try:
+            vectors = np.load(self._path(VECTORS_FILE), mmap_mode='r+')
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable semantic cache: {e}")
+            return
+        if vectors.ndim != 2:
+            logging.warning("Discarding semantic cache: unexpected shape")
+            return
+        self._reset_rows(len(vectors))
+        self._vectors = vectors
+        try:
+            with open(self._path(ENTRIES_FILE), encoding="utf-8") as f:
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        row = entry['row']
+                    except (ValueError, KeyError, TypeError):
+                        continue # Torn last line after a crash
+                    if not 0 <= row < len(vectors):
+                        continue
+                    if entry.get('key') is None:
+                        self._free_row(row)
+                    else:
+                        self._assign_row(row, entry['key'], entry['scope'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not read the semantic cache entries: {e}")
+        self._compact_log_if_needed()
+
+    def _assign_row(self, row, key, scope):
+        if key in self._rows:
+            self._free_row(self._rows[key])
+        self._free_row(row)
+        self._keys[row], self._scopes[row] = key, scope
+        self._scope_codes[row] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        self._rows[key] = row
+
+    def _free_row(self, row):
+        key = self._keys[row]
+        if key is not None:
+            del self._rows[key]
+            self._keys[row] = self._scopes[row] = None
+            self._scope_codes[row] = -1
+
+    def _allocate_row(self, dimensions: int) -> int:
+        """Returns a free row, doubling (or creating) the matrix file when none is left."""
+        free = np.flatnonzero(self._scope_codes == -1)
+        if len(free):
+            return int(free[0])
+        old_capacity = len(self._keys)
+        capacity = max(INITIAL_CAPACITY, old_capacity * 2)
+        os.makedirs(self.directory, exist_ok=True)
+        # Copy into a bigger file and swap; both maps are closed before the swap (Windows)
+        tmp_path = self._path(VECTORS_FILE + ".tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dimensions))
+        if self._vectors is not None:
+            grown[:old_capacity] = self._vectors
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self._path(VECTORS_FILE))
+        self._vectors = np.load(self._path(VECTORS_FILE), mmap_mode='r+')
+        self._keys += [None] * (capacity - old_capacity)
+        self._scopes += [None] * (capacity - old_capacity)
+        self._scope_codes = np.concatenate([self._scope_codes, np.full(capacity - old_capacity, -1, dtype=np.int32)])
+        return old_capacity
+
+    def _append_log(self, entries):
+        with open(self._path(ENTRIES_FILE), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        self._log_lines += len(entries)
+        self._compact_log_if_needed()
+
+    def _compact_log_if_needed(self):
+        if self._log_lines <= LOG_COMPACT_FACTOR * len(self._rows) + INITIAL_CAPACITY:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_entries = self._path(ENTRIES_FILE + ".tmp")
+        with open(tmp_entries, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({'row': row, 'key': key, 'scope': self._scopes[row]}) + "\n"
+                         for key, row in self._rows.items())
+        os.replace(tmp_entries, self._path(ENTRIES_FILE))
+        self._log_lines = len(self._rows)
+
+    def _remove_files(self):
+        self._reset_rows(0) # Closes the memory map first
+        for name in (VECTORS_FILE, ENTRIES_FILE):
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    # --- Lookup ---
+
+    def embed_prompt(self, prompt: str) -> np.ndarray:
+        """Normalized float32 embedding of prompt."""
+        start = time.perf_counter()
+        vector = np.asarray(self.embed([prompt])[0], dtype=np.float32)
+        with self._lock:
+            self._embeds += 1
+            self._embed_ms_total += (time.perf_counter() - start) * 1000
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector: np.ndarray, scope: str) -> tuple[str, float] | None:
+        """Returns (exact-cache key, similarity) of the closest row in scope at or above the threshold."""
+        with self._lock:
+            self.lookups += 1
+            start = time.perf_counter()
+            match = None
+            scope_id = self._scope_ids.get(scope)
+            if self._vectors is not None and scope_id is not None and self._vectors.shape[1] == len(vector):
+                similarities = self._vectors @ vector
+                similarities[self._scope_codes != scope_id] = -np.inf
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    match = (self._keys[best], float(similarities[best]))
+            self._search_ms_total += (time.perf_counter() - start) * 1000
+            if match is not None:
+                self.hits += 1
+                self._hit_similarity_total += match[1]
+            return match
+
+    def discard_stale(self, key: str, similarity: float):
+        """Drops a row whose answer is no longer in the exact cache and takes back its hit."""
+        with self._lock:
+            self.hits -= 1
+            self._hit_similarity_total -= similarity
+            row = self._rows.get(key)
+            if row is None:
+                return
+            self._free_row(row)
+            try:
+                self._append_log([{'row': row, 'key': None}])
+            except OSError as e:
+                logging.error(f"Could not save the semantic cache: {e}")
+
+    def add(self, vector: np.ndarray, key: str, scope: str):
+        """Stores a prompt embedding pointing to the exact-cache key of its answer and persists the row."""
+        with self._lock:
+            vector = np.asarray(vector, dtype=np.float32)
+            if self._vectors is not None and self._vectors.shape[1] != len(vector):
+                # The embedding model changed: old vectors are not comparable
+                self._remove_files()
+            if key in self._rows:
+                return
+            log = []
+            while self._rows and len(self._rows) >= self.max_entries:
+                row = next(iter(self._rows.values()))
+                self._free_row(row)
+                log.append({'row': row, 'key': None})
+            try:
+                row = self._allocate_row(len(vector))
+                # The vector is flushed before its entry is logged: a crash in between only leaks a free row
+                self._vectors[row] = vector
+                self._vectors.flush()
+                self._assign_row(row, key, scope)
+                log.append({'row': row, 'key': key, 'scope': scope})
+                self._append_log(log)
+            except OSError as e:
+                logging.error(f"Could not save the semantic cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._remove_files()
+        self.reset_stats()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.lookups
+            return {
+                'entries': len(self._rows),
+                'lookups': lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'avg_hit_similarity': round(self._hit_similarity_total / self.hits, 4) if self.hits else 0,
+                'embed_avg_ms': round(self._embed_ms_total / self._embeds, 2) if self._embeds else 0,
+                'search_avg_ms': round(self._search_ms_total / lookups, 3) if lookups else 0,
+                'threshold': self.threshold,
+            }
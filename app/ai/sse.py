@@ -0,0 +1,45 @@
+import json
+
+SSE_DONE = "[DONE]"
+
+def iter_sse_data(lines):
+    """
+    Yields the data of each Server-Sent Event from an iterable of decoded lines.
+    Multi-line data fields are joined with newlines; comments and other fields are ignored.
+    """
+    data = []
+    for line in lines:
+        if line is None:
+            continue
+        line = line.rstrip("\r")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+def iter_chat_deltas(lines):
+    """
+    Yields the text deltas of an OpenAI-compatible chat completion stream
+    ({"choices": [{"delta": {"content": ...}}]} events, ending with [DONE]).
+    """
+    for data in iter_sse_data(lines):
+        if data == SSE_DONE:
+            return
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if 'error' in event:
+            raise RuntimeError(event['error'].get('message', event['error']) if isinstance(event['error'], dict) else event['error'])
+        choices = event.get('choices') or []
+        content = (choices[0].get('delta') or {}).get('content') if choices else None
+        if content:
+            yield content
@@ -0,0 +1,165 @@
+import asyncio
+import codecs
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONCURRENCY = 4
+LATENCY_WINDOW = 200 # Timings kept per transport
+STREAM_READ_SIZE = 8192
+STREAM_CONNECT_TIMEOUT = 5 # Seconds; the read timeout (between chunks) is the transport's timeout
+
+def iter_response_lines(response, read_size=STREAM_READ_SIZE):
+    """
+    Yields the decoded lines of a streamed response as soon as their bytes arrive.
+    requests' iter_lines waits until its chunk_size buffer is full (or, with chunk_size=None,
+    until EOF when the body is not chunk-encoded), which holds short SSE events back.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    pending = ""
+    while True:
+        data = response.raw.read1(read_size, decode_content=True)
+        if not data:
+            break
+        lines = (pending + decoder.decode(data)).split("\n")
+        pending = lines.pop()
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def _ms_since(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class LatencyTracker:
+    """
+    Keeps the timings of the last LATENCY_WINDOW requests. Each entry has the time to the
+    response headers (ttfb_ms), the total time until the body was read or the stream closed
+    (total_ms), the HTTP status and whether the request was streamed or async.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._timings = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ttfb_ms: float, total_ms: float, status: int | None, kind: str = "sync"):
+        with self._lock:
+            self._timings.append({'ttfb_ms': round(ttfb_ms, 2), 'total_ms': round(total_ms, 2),
+                                  'status': status, 'kind': kind, 'at': time.time()})
+
+    def get_timings(self) -> list[dict]:
+        with self._lock:
+            return list(self._timings)
+
+    def get_stats(self) -> dict:
+        """Returns count plus average, p50 and p95 of ttfb_ms and total_ms (0 when empty)."""
+        timings = self.get_timings()
+        stats = {'count': len(timings)}
+        for field in ('ttfb_ms', 'total_ms'):
+            values = [t[field] for t in timings]
+            name = field[:-3]
+            stats[f'{name}_avg_ms'] = round(sum(values) / len(values), 2) if values else 0
+            stats[f'{name}_p50_ms'] = percentile(values, 0.5) if values else 0
+            stats[f'{name}_p95_ms'] = percentile(values, 0.95) if values else 0
+        return stats
+
+class HTTPTransport:
+    """
+    HTTP client of one provider. Synchronous calls share a keep-alive requests.Session, so
+    consecutive generations reuse the open connection instead of reconnecting. async_session()
+    gives an httpx.AsyncClient for running many requests concurrently. Every request is timed
+    in self.latency.
+    """
+
+    def __init__(self, base_url: str, headers: dict | None = None, timeout: float = 30, pool_size: int = DEFAULT_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.latency = LatencyTracker()
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def post_json(self, path: str, payload: dict, timeout: float | None = None) -> requests.Response:
+        """POSTs payload as JSON and reads the whole response."""
+        start = time.perf_counter()
+        response = self.session.post(self.url(path), json=payload, timeout=timeout or self.timeout)
+        self.latency.record(response.elapsed.total_seconds() * 1000, _ms_since(start), response.status_code)
+        return response
+
+    @contextmanager
+    def stream_json(self, path: str, payload: dict, timeout: float | None = None, headers: dict | None = None):
+        """
+        POSTs payload and yields the response unread (stream=True). The response is closed
+        on exit, which releases or drops the connection.
+        """
+        start = time.perf_counter()
+        response = self.session.post(self.url(path), json=payload, stream=True, headers=headers,
+                                     timeout=(STREAM_CONNECT_TIMEOUT, timeout or self.timeout))
+        ttfb_ms = _ms_since(start)
+        try:
+            yield response
+        finally:
+            response.close()
+            self.latency.record(ttfb_ms, _ms_since(start), response.status_code, kind="stream")
+
+    @asynccontextmanager
+    async def async_session(self, max_connections: int = DEFAULT_CONCURRENCY):
+        """
+        An AsyncTransportSession for the current event loop, keeping up to max_connections
+        connections alive while the block runs. httpx clients are bound to one loop, so a
+        session is opened per batch instead of being shared with the synchronous path.
+        """
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+        async def mark_headers(response):
+            response.request.extensions['headers_at'] = time.perf_counter()
+
+        async with httpx.AsyncClient(base_url=self.base_url, headers=self.headers, timeout=self.timeout,
+                                     limits=limits, event_hooks={'response': [mark_headers]}) as client:
+            yield AsyncTransportSession(client, self.latency)
+
+    def close(self):
+        self.session.close()
+
+class AsyncTransportSession:
+    """Timed requests over an httpx.AsyncClient (see HTTPTransport.async_session)."""
+
+    def __init__(self, client: httpx.AsyncClient, latency: LatencyTracker):
+        self.client = client
+        self.latency = latency
+
+    async def post_json(self, path: str, payload: dict) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.post(path.lstrip('/'), json=payload)
+        headers_at = response.request.extensions.get('headers_at', time.perf_counter())
+        self.latency.record((headers_at - start) * 1000, _ms_since(start), response.status_code, kind="async")
+        return response
+
+async def gather_limited(func, items, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """
+    Awaits func(item) for every item with at most `concurrency` running at once.
+    Returns the results in item order; a failed item gives its exception instead of a result.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
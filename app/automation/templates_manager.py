@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
 class TemplatesManager:
     def __init__(self, conn):
@@ -8,12 +8,12 @@ class TemplatesManager:
 
     def get_all_templates(self):
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM templates ORDER BY created_at DESC")
+        cursor.execute("SELECT * FROM templates ORDER BY created_at_ms DESC")
         return [dict(row) for row in cursor.fetchall()]
 
     def add_template(self, title, content, category="General"):
         try:
-            created_at = datetime.now().isoformat()
+            created_at = datetime.now(timezone.utc).isoformat()
             cursor = self.conn.cursor()
             cursor.execute("""
                 INSERT INTO templates (title, content, category, created_at)
@@ -9,6 +9,7 @@ from app.db.reminders_manager import RemindersManager
 from app.security.vault_manager import VaultManager
 from app.services.service_manager import ServiceManager
 from app.search.search_manager import SearchManager
+from app.search.retrieval_index import RetrievalIndex
 from app.services_layer.kanban_service import KanbanService
 from app.services_layer.notes_service import NotesService
 from app.services_layer.checklist_service import ChecklistService
@@ -35,6 +36,9 @@ class DIContainer:
         self.vault_manager = None
         self.service_manager = None
         self.search_manager = None
+        self.ai_cache_conn = None
+        self.retrieval_conn = None
+        self.retrieval_index = None
         self.notes_manager = None
         self.kanban_manager = None
         self.checklist_manager = None
@@ -98,12 +102,32 @@ class DIContainer:
 
         # 5. AI Manager (depends on Settings and Vault)
         # 5. AI Manager (depends on Settings and Vault)
-        AIManager.initialize(self.settings_manager, self.vault_manager)
+        self.ai_cache_conn = get_db_connection(self.db_path)
+        AIManager.initialize(self.settings_manager, self.vault_manager, cache_conn=self.ai_cache_conn)
+        # Notes and cards retrievable by the assistant. It syncs on background threads,
+        # so it gets its own connection
+        self.retrieval_conn = get_db_connection(self.db_path)
+        self.retrieval_index = RetrievalIndex(self.retrieval_conn, embed=self._embed_notes)
 
         # 6. Automation Managers
         self.rules_manager = RulesManager(self.conn)
         self.templates_manager = TemplatesManager(self.conn)
 
+    def _embed_notes(self, texts):
+        """Embeddings for the retrieval index, only with the provider the user agreed to send notes to."""
+        if not self.settings_manager.is_ai_notes_indexing_enabled():
+            raise PermissionError("Notes indexing has not been enabled for the current AI provider.")
+        return AIManager.get_instance().embed(texts)
+
     def close(self):
+        if self.metrics_manager:
+            self.metrics_manager.shutdown() # Write buffered usage before the connection goes away
+        if self.ai_cache_conn:
+            # Running AI jobs write their answers to the cache; let them end before closing it
+            AIManager.get_instance().job_queue.shutdown()
+        if self.retrieval_conn:
+            self.retrieval_conn.close()
+        if self.ai_cache_conn:
+            self.ai_cache_conn.close()
         if self.conn:
             self.conn.close()
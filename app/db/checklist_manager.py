@@ -33,6 +33,7 @@ class ChecklistManager:
                     'text': row['item_text'],
                     'is_checked': row['is_checked'],
                     'due_at': row['item_due_at'],
+                    'due_at_ms': row['item_due_at_ms'],
                     'is_notified': row['item_is_notified'],
                     'pre_notified_at': row['item_pre_notified_at']
                 }
@@ -45,7 +46,7 @@ class ChecklistManager:
         cursor.execute("""
             SELECT 
                 c.id, c.name, c.kanban_card_id,
-                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
+                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.due_at_ms AS item_due_at_ms, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
             FROM checklists c
             LEFT JOIN checklist_items ci ON c.id = ci.checklist_id
             ORDER BY c.id DESC, ci.id ASC
@@ -59,7 +60,7 @@ class ChecklistManager:
         cursor.execute("""
             SELECT 
                 c.id, c.name, c.kanban_card_id,
-                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
+                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.due_at_ms AS item_due_at_ms, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
             FROM checklists c
             LEFT JOIN checklist_items ci ON c.id = ci.checklist_id
             WHERE c.id = ?
@@ -153,7 +154,7 @@ class ChecklistManager:
         cursor.execute("""
             SELECT 
                 c.id, c.name, c.kanban_card_id,
-                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
+                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.due_at_ms AS item_due_at_ms, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
             FROM checklists c
             LEFT JOIN checklist_items ci ON c.id = ci.checklist_id
             WHERE c.kanban_card_id = ?
@@ -173,7 +174,7 @@ class ChecklistManager:
         cursor.execute("""
             SELECT 
                 c.id, c.name, c.kanban_card_id,
-                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
+                ci.id AS item_id, ci.text AS item_text, ci.is_checked, ci.due_at AS item_due_at, ci.due_at_ms AS item_due_at_ms, ci.is_notified AS item_is_notified, ci.pre_notified_at AS item_pre_notified_at
             FROM checklists c
             LEFT JOIN checklist_items ci ON c.id = ci.checklist_id
             WHERE c.kanban_card_id IS NULL
@@ -185,13 +186,11 @@ class ChecklistManager:
     def get_items_due_between(self, start_date, end_date):
         """Retrieves all checklist items due between two dates."""
         cursor = self.conn.cursor()
-        start_date_utc_str = time_utils.to_utc(start_date).isoformat()
-        end_date_utc_str = time_utils.to_utc(end_date).isoformat()
         cursor.execute("""
             SELECT * FROM checklist_items 
-            WHERE due_at BETWEEN ? AND ? AND is_checked = 0
-            ORDER BY due_at ASC
-        """, (start_date_utc_str, end_date_utc_str))
+            WHERE due_at_ms BETWEEN ? AND ? AND is_checked = 0
+            ORDER BY due_at_ms ASC
+        """, (time_utils.to_epoch_ms(start_date), time_utils.to_epoch_ms(end_date)))
         rows = cursor.fetchall()
         return [dict(row) for row in rows] if rows else []
 
@@ -200,42 +199,21 @@ class ChecklistManager:
         all_items = []
         for offset_minutes in pre_notification_offsets_minutes:
             cursor = self.conn.cursor()
-            now = datetime.datetime.now()
-            now_utc = time_utils.to_utc(now)
-            pre_due_time_utc = now_utc + datetime.timedelta(minutes=offset_minutes)
-
-            now_str = now_utc.isoformat()
-            pre_due_time_str = pre_due_time_utc.isoformat()
+            now_ms = time_utils.now_epoch_ms()
+            pre_due_ms = now_ms + offset_minutes * 60 * 1000
 
             cursor.execute("""
-                SELECT id, text, due_at FROM checklist_items 
-                WHERE due_at > ? AND due_at <= ? AND is_checked = 0 AND pre_notified_at IS NULL
-            """, (now_str, pre_due_time_str))
-            
-            items = []
-            for row in cursor.fetchall():
-                item = dict(row)
-                if item['due_at']:
-                    utc_dt = datetime.datetime.fromisoformat(item['due_at'])
-                    item['due_at'] = time_utils.from_utc(utc_dt).isoformat()
-                items.append(item)
-            all_items.extend(items)
+                SELECT id, text, due_at, due_at_ms FROM checklist_items 
+                WHERE due_at_ms > ? AND due_at_ms <= ? AND is_checked = 0 AND pre_notified_at IS NULL
+            """, (now_ms, pre_due_ms))
+            all_items.extend(dict(row) for row in cursor.fetchall())
         return all_items
 
     def get_actual_due_checklist_items(self):
         """Retrieves all due and not notified checklist items."""
         cursor = self.conn.cursor()
-        now_utc = time_utils.to_utc(datetime.datetime.now()).isoformat()
         cursor.execute("""
-            SELECT id, text, due_at, pre_notified_at FROM checklist_items 
-            WHERE due_at <= ? AND is_checked = 0 AND is_notified = 0
-        """, (now_utc,))
-        
-        items = []
-        for row in cursor.fetchall():
-            item = dict(row)
-            if item['due_at']:
-                utc_dt = datetime.datetime.fromisoformat(item['due_at'])
-                item['due_at'] = time_utils.from_utc(utc_dt).isoformat()
-            items.append(item)
-        return items
\ No newline at end of file
+            SELECT id, text, due_at, due_at_ms, pre_notified_at FROM checklist_items 
+            WHERE due_at_ms <= ? AND is_checked = 0 AND is_notified = 0
+        """, (time_utils.now_epoch_ms(),))
+        return [dict(row) for row in cursor.fetchall()]
@@ -1,3 +1,5 @@
+import base64
+import logging
 import sqlite3
 import os
 from pathlib import Path
@@ -15,6 +17,83 @@ else:
     # Development mode: Use project root
     DB_FILE = Path(__file__).resolve().parent.parent.parent / 'database.db'
 
+# ISO-8601 timestamp columns that get a normalized companion column ``<column>_ms``
+# holding UTC epoch milliseconds. The companions are VIRTUAL generated columns, so
+# SQLite keeps them in sync on every write (whatever the offset format of the text)
+# and only their indexes store the values.
+EPOCH_MS_COLUMNS = {
+    "notes": ["created_at", "updated_at"],
+    "kanban_cards": ["created_at", "started_at", "finished_at", "due_date", "start_date", "end_date"],
+    "checklist_items": ["due_at"],
+    "reminders": ["due_at"],
+    "reminder_occurrences": ["due_at"],
+    "templates": ["created_at"],
+}
+
+def epoch_ms_sql(column: str) -> str:
+    """Returns an SQL expression converting an ISO-8601 timestamp column to UTC epoch milliseconds."""
+    return f"CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)"
+
+def _ensure_epoch_ms_columns(cursor: sqlite3.Cursor) -> None:
+    """Adds the missing ``*_ms`` generated columns and their indexes (migration safe)."""
+    for table, columns in EPOCH_MS_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_xinfo({table});")
+        existing = {c[1] for c in cursor.fetchall()}
+        for column in columns:
+            ms_column = f"{column}_ms"
+            if ms_column not in existing:
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {ms_column} INTEGER "
+                    f"GENERATED ALWAYS AS ({epoch_ms_sql(column)}) VIRTUAL;"
+                )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{ms_column} ON {table}({ms_column});")
+
+# Usage rollup tables maintained by MetricsManager.flush(): table -> SQL expression
+# giving the period start (YYYY-MM-DD) of a usage_metrics.day value.
+USAGE_ROLLUP_TABLES = {
+    "usage_metrics_weekly": "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')", # Monday
+    "usage_metrics_monthly": "date(day, 'start of month')",
+}
+
+def _ensure_usage_rollups(cursor: sqlite3.Cursor) -> None:
+    """Creates the usage rollup tables, back-filling them from usage_metrics when new."""
+    for table, period_sql in USAGE_ROLLUP_TABLES.items():
+        is_new = not cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                period_start TEXT NOT NULL,
+                service_id INTEGER NOT NULL,
+                milliseconds INTEGER NOT NULL,
+                PRIMARY KEY (period_start, service_id),
+                FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE CASCADE
+            ) WITHOUT ROWID;
+            """
+        )
+        if is_new:
+            cursor.execute(
+                f"INSERT INTO {table} (period_start, service_id, milliseconds) "
+                f"SELECT {period_sql}, service_id, SUM(milliseconds) FROM usage_metrics GROUP BY 1, 2"
+            )
+
+    is_new = not cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage_metrics_by_service'").fetchone()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS usage_metrics_by_service (
+            service_id INTEGER PRIMARY KEY,
+            milliseconds INTEGER NOT NULL,
+            first_day TEXT NOT NULL,
+            last_day TEXT NOT NULL,
+            FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE CASCADE
+        );
+        """
+    )
+    if is_new:
+        cursor.execute(
+            "INSERT INTO usage_metrics_by_service (service_id, milliseconds, first_day, last_day) "
+            "SELECT service_id, SUM(milliseconds), MIN(day), MAX(day) FROM usage_metrics GROUP BY service_id"
+        )
+
 def get_db_connection(db_file_path: str | None = None) -> sqlite3.Connection:
     """Create and return a SQLite connection.
 
@@ -33,6 +112,122 @@ def get_db_connection(db_file_path: str | None = None) -> sqlite3.Connection:
     conn.execute("PRAGMA journal_mode=WAL;")
     return conn
 
+def _ensure_usage_metrics_unique_day(cursor: sqlite3.Cursor) -> None:
+    """Creates the UNIQUE(service_id, day) index used by the metrics UPSERT, merging duplicate rows first."""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_usage_metrics_service_day'"
+    ).fetchone()
+    if exists:
+        return
+    cursor.execute("""
+        UPDATE usage_metrics
+        SET milliseconds = (SELECT SUM(m2.milliseconds) FROM usage_metrics m2
+                            WHERE m2.service_id = usage_metrics.service_id AND m2.day = usage_metrics.day)
+        WHERE id IN (SELECT MIN(id) FROM usage_metrics GROUP BY service_id, day HAVING COUNT(*) > 1)
+    """)
+    cursor.execute("DELETE FROM usage_metrics WHERE id NOT IN (SELECT MIN(id) FROM usage_metrics GROUP BY service_id, day)")
+    cursor.execute("CREATE UNIQUE INDEX idx_usage_metrics_service_day ON usage_metrics(service_id, day);")
+
+# Documents indexed by RetrievalIndex: source name -> (table, columns holding its text)
+RETRIEVAL_SOURCES = {"note": ("notes", "content"), "card": ("kanban_cards", "title, description")}
+
+def _ensure_retrieval_index(cursor: sqlite3.Cursor) -> None:
+    """Creates the retrieval chunk tables and the retrieval_queue change feed, queuing existing documents when new."""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'retrieval_queue'"
+    ).fetchone()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS retrieval_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,  -- drained in order; later changes get higher ids
+            source TEXT NOT NULL,
+            doc_id INTEGER NOT NULL
+        );
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS retrieval_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,  -- order of the chunk within its document
+            content TEXT NOT NULL,
+            vector_row INTEGER  -- row of the embedding in vectors.npy, NULL until embedded
+        );
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_retrieval_chunks_doc ON retrieval_chunks(source, doc_id);")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_retrieval_chunks_pending ON retrieval_chunks(id) WHERE vector_row IS NULL;"
+    )
+    cursor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS retrieval_chunks_fts USING fts5("
+        "content, content='retrieval_chunks', content_rowid='id', tokenize='porter unicode61');"
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS retrieval_chunks_after_insert AFTER INSERT ON retrieval_chunks BEGIN
+            INSERT INTO retrieval_chunks_fts(rowid, content) VALUES (new.id, new.content);
+        END;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS retrieval_chunks_after_delete AFTER DELETE ON retrieval_chunks BEGIN
+            INSERT INTO retrieval_chunks_fts(retrieval_chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END;
+        """
+    )
+    for source, (table, columns) in RETRIEVAL_SOURCES.items():
+        # Only text edits are queued: moving a card between columns does not re-embed it
+        for event, clause, row in (("insert", "INSERT", "new"), ("update", f"UPDATE OF {columns}", "new"),
+                                   ("delete", "DELETE", "old")):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_retrieval_after_{event} AFTER {clause} ON {table} BEGIN
+                    INSERT INTO retrieval_queue(source, doc_id) VALUES ('{source}', {row}.id);
+                END;
+                """
+            )
+        if not exists:
+            cursor.execute(f"INSERT INTO retrieval_queue(source, doc_id) SELECT '{source}', id FROM {table};")
+
+def _ensure_packed_credentials(cursor: sqlite3.Cursor) -> None:
+    """
+    Converts the old credentials layout (base64 TEXT in enc_blob/nonce/salt, optional version
+    column) to one packed BLOB per secret (see app.security.vault.pack_credential).
+    The id PRIMARY KEY index covers the id listings, so they never read the blobs.
+
+    Rows that cannot be decoded (malformed or partially written) are moved, untouched,
+    to credentials_quarantine instead of stopping the application from starting.
+    """
+    cursor.execute("PRAGMA table_info(credentials);")
+    columns = {c[1] for c in cursor.fetchall()}
+    if "enc_blob" not in columns:
+        return
+    from app.security.vault import pack_credential, FORMAT_LEGACY_SCRYPT
+    version_column = "version" if "version" in columns else str(FORMAT_LEGACY_SCRYPT)
+    rows = cursor.execute(f"SELECT id, enc_blob, nonce, salt, {version_column} FROM credentials").fetchall()
+    packed, quarantined = [], []
+    for row in rows:
+        try:
+            salt, nonce, enc_data = (base64.b64decode(value) for value in (row[3], row[2], row[1]))
+            packed.append((row[0], pack_credential(row[4], salt, nonce, enc_data)))
+        except (ValueError, TypeError) as e: # binascii.Error is a ValueError
+            logging.error(f"Quarantining unreadable credential '{row[0]}': {e}")
+            quarantined.append(tuple(row))
+    if quarantined:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS credentials_quarantine "
+            "(id TEXT, enc_blob BLOB, nonce BLOB, salt BLOB, version INTEGER);"
+        )
+        cursor.executemany("INSERT INTO credentials_quarantine VALUES (?, ?, ?, ?, ?)", quarantined)
+    cursor.execute("CREATE TABLE credentials_packed (id TEXT PRIMARY KEY, data BLOB NOT NULL);")
+    cursor.executemany("INSERT INTO credentials_packed (id, data) VALUES (?, ?)", packed)
+    cursor.execute("DROP TABLE credentials;")
+    cursor.execute("ALTER TABLE credentials_packed RENAME TO credentials;")
+
 def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
     """Create the full database schema if it does not exist.
 
@@ -156,6 +351,26 @@ def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
             END;
             """
         )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS kanban_cards_after_delete AFTER DELETE ON kanban_cards BEGIN
+                DELETE FROM kanban_cards_fts WHERE rowid = old.id;
+            END;
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS kanban_cards_after_update AFTER UPDATE OF title, description ON kanban_cards BEGIN
+                DELETE FROM kanban_cards_fts WHERE rowid = old.id;
+                INSERT INTO kanban_cards_fts(rowid, title, description) VALUES (new.id, COALESCE(new.title, ''), COALESCE(new.description, ''));
+            END;
+            """
+        )
+
+        # -----------------------------------------------------------------
+        # Retrieval index over notes and Kanban cards (chunks, FTS and change feed)
+        # -----------------------------------------------------------------
+        _ensure_retrieval_index(cursor)
 
         # -----------------------------------------------------------------
         # Security / Vault tables
@@ -164,9 +379,17 @@ def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
             """
             CREATE TABLE IF NOT EXISTS credentials (
                 id TEXT PRIMARY KEY,
-                enc_blob BLOB NOT NULL,
-                nonce BLOB NOT NULL,
-                salt BLOB NOT NULL
+                data BLOB NOT NULL
+            );
+            """
+        )
+        _ensure_packed_credentials(cursor)
+        # Vault-wide key material (master key salt...), one row per item
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vault_config (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL
             );
             """
         )
@@ -185,6 +408,31 @@ def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
             );
             """
         )
+        # Append-only session log: epoch-ms start and duration as plain integers
+        # (rowid table, no AUTOINCREMENT) to keep rows small.
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usage_sessions (
+                id INTEGER PRIMARY KEY,
+                service_id INTEGER NOT NULL,
+                start_ms INTEGER NOT NULL,
+                duration_ms INTEGER NOT NULL,
+                FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE CASCADE
+            );
+            """
+        )
+        # Unread count time series (one row per change reported by a service)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS unread_samples (
+                id INTEGER PRIMARY KEY,
+                service_id INTEGER NOT NULL,
+                ts_ms INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE CASCADE
+            );
+            """
+        )
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS settings (
@@ -229,7 +477,31 @@ def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
                 due_at TEXT NOT NULL,
                 is_completed INTEGER NOT NULL DEFAULT 0,
                 is_notified INTEGER NOT NULL DEFAULT 0,
-                pre_notified_at TEXT
+                pre_notified_at TEXT,
+                rrule TEXT,
+                materialized_until TEXT
+            );
+            """
+        )
+        # Migration for recurrence columns
+        cursor.execute("PRAGMA table_info(reminders);")
+        rem_cols = {c[1] for c in cursor.fetchall()}
+        for col in ["rrule", "materialized_until"]:
+            if col not in rem_cols:
+                cursor.execute(f"ALTER TABLE reminders ADD COLUMN {col} TEXT;")
+
+        # Materialized occurrences of recurring reminders (bounded rolling window)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reminder_occurrences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                reminder_id INTEGER NOT NULL,
+                due_at TEXT NOT NULL,
+                is_completed INTEGER NOT NULL DEFAULT 0,
+                is_notified INTEGER NOT NULL DEFAULT 0,
+                pre_notified_at TEXT,
+                UNIQUE (reminder_id, due_at),
+                FOREIGN KEY (reminder_id) REFERENCES reminders (id) ON DELETE CASCADE
             );
             """
         )
@@ -274,15 +546,49 @@ def create_schema(existing_conn: sqlite3.Connection | None = None) -> None:
             """
         )
 
+        # -----------------------------------------------------------------
+        # AI response cache (disk tier of AIManager's cache)
+        # -----------------------------------------------------------------
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ai_response_cache (
+                key TEXT PRIMARY KEY,  -- sha256 of prompt, max_tokens, provider and model
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                payload BLOB NOT NULL,  -- zlib-compressed UTF-8 response
+                size INTEGER NOT NULL,  -- bytes of payload
+                created_at REAL NOT NULL,  -- epoch seconds, for the TTL
+                last_access REAL NOT NULL  -- epoch seconds, for LRU eviction
+            );
+            """
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_access ON ai_response_cache(last_access);")
+
+        # -----------------------------------------------------------------
+        # Usage rollups (weekly, monthly and per-service totals)
+        # -----------------------------------------------------------------
+        _ensure_usage_rollups(cursor)
+
+        # -----------------------------------------------------------------
+        # Normalized epoch-ms timestamp columns (used by range queries and sorts)
+        # -----------------------------------------------------------------
+        _ensure_epoch_ms_columns(cursor)
+
         # -----------------------------------------------------------------
         # Indexes for performance (optional but recommended)
         # -----------------------------------------------------------------
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_kanban_cards_column_id ON kanban_cards(column_id);")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_checklists_kanban_card_id ON checklists(kanban_card_id);")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_checklist_items_checklist_id ON checklist_items(checklist_id);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_metrics_service_id ON usage_metrics(service_id);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_due_at ON reminders(due_at);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_checklist_items_due_at ON checklist_items(due_at);")
+        _ensure_usage_metrics_unique_day(cursor)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_metrics_day ON usage_metrics(day);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_sessions_start_ms ON usage_sessions(start_ms);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_unread_samples_ts_ms ON unread_samples(ts_ms);")
+        # Superseded by the *_due_at_ms indexes
+        cursor.execute("DROP INDEX IF EXISTS idx_reminders_due_at;")
+        cursor.execute("DROP INDEX IF EXISTS idx_checklist_items_due_at;")
+        # Superseded by the UNIQUE(service_id, day) index
+        cursor.execute("DROP INDEX IF EXISTS idx_usage_metrics_service_id;")
 
         conn.commit()
     finally:
@@ -35,7 +35,7 @@ class KanbanManager:
 
     def get_cards_by_column(self, column_id):
         """Retrieves all cards for a given Kanban column."""
-        cards = self.conn.execute("SELECT id, column_id, title, description, created_at, started_at, finished_at, assignee, due_date, start_date, end_date FROM kanban_cards WHERE column_id = ? ORDER BY created_at", (column_id,)).fetchall()
+        cards = self.conn.execute("SELECT id, column_id, title, description, created_at, started_at, finished_at, assignee, due_date, start_date, end_date, started_at_ms, finished_at_ms, due_date_ms FROM kanban_cards WHERE column_id = ? ORDER BY created_at_ms", (column_id,)).fetchall()
         return cards
 
     def move_card(self, card_id, new_column_id):
@@ -93,7 +93,8 @@ class KanbanManager:
 
     def generate_kanban_report(self):
         cursor = self.conn.cursor()
-        cursor.execute("SELECT kc.id, kc.title, kc.description, kco.name as column_name, kc.due_date, kc.assignee, kc.created_at, kc.started_at, kc.finished_at FROM kanban_cards kc JOIN kanban_columns kco ON kc.column_id = kco.id")
+        cursor.execute("SELECT kc.id, kc.title, kc.description, kco.name as column_name, kc.due_date, kc.assignee, kc.created_at, kc.started_at, kc.finished_at, "
+                       "kc.due_date_ms, kc.created_at_ms, kc.started_at_ms, kc.finished_at_ms FROM kanban_cards kc JOIN kanban_columns kco ON kc.column_id = kco.id")
         cards_data = cursor.fetchall()
         report = []
         for card in cards_data:
@@ -106,7 +107,11 @@ class KanbanManager:
                 "assigned_to": card[5],
                 "created_at": card[6],
                 "started_at": card[7],
-                "finished_at": card[8]
+                "finished_at": card[8],
+                "due_date_ms": card[9],
+                "created_at_ms": card[10],
+                "started_at_ms": card[11],
+                "finished_at_ms": card[12]
             })
         return report
 
@@ -116,7 +121,7 @@ class KanbanManager:
             SELECT 
                 kc.id, kc.column_id, kc.title, kc.description, kc.created_at, 
                 kc.started_at, kc.finished_at, kc.due_date, kc.start_date, kc.end_date,
-                kco.name AS column_name
+                kc.due_date_ms, kco.name AS column_name
             FROM kanban_cards kc
             JOIN kanban_columns kco ON kc.column_id = kco.id
             ORDER BY kc.id DESC
@@ -124,8 +129,11 @@ class KanbanManager:
         return cards
 
     def get_cards_due_between(self, start_date, end_date):
-        """Retrieves cards with a due date between the given dates."""
-        cards = self.conn.execute("SELECT title, due_date, assignee FROM kanban_cards WHERE due_date BETWEEN ? AND ?", (start_date, end_date)).fetchall()
+        """Retrieves cards with a due date between the given dates (datetimes, dates, ISO strings or epoch ms)."""
+        cards = self.conn.execute(
+            "SELECT title, due_date, due_date_ms, assignee FROM kanban_cards WHERE due_date_ms BETWEEN ? AND ? ORDER BY due_date_ms",
+            (time_utils.to_epoch_ms(start_date), time_utils.to_epoch_ms(end_date))
+        ).fetchall()
         return cards
 
     def get_all_kanban_cards_for_gantt(self):
@@ -16,7 +16,7 @@ class NotesManager:
 
     def get_all_notes(self):
         """Retrieves all notes from the database, newest first."""
-        notes = self.conn.execute("SELECT * FROM notes ORDER BY created_at DESC").fetchall()
+        notes = self.conn.execute("SELECT * FROM notes ORDER BY created_at_ms DESC").fetchall()
         return notes
 
     def delete_note(self, note_id):
@@ -26,5 +26,6 @@ class NotesManager:
 
     def update_note(self, note_id, new_content):
         """Updates the content of an existing note."""
-        self.conn.execute("UPDATE notes SET content = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (new_content, note_id))
+        current_utc_time = time_utils.to_utc(datetime.datetime.now()).isoformat()
+        self.conn.execute("UPDATE notes SET content = ?, updated_at = ? WHERE id = ?", (new_content, current_utc_time, note_id))
         self.conn.commit()
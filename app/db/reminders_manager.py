@@ -1,5 +1,7 @@
 import datetime
+import logging
 from app.utils import time_utils
+from app.utils import recurrence_utils
 from app.db.kanban_manager import KanbanManager
 from app.db.checklist_manager import ChecklistManager
 
@@ -13,17 +15,28 @@ class RemindersManager:
         """Retrieves all items with a due date from reminders, Kanban cards, and checklist items."""
         all_items = []
 
-        # 1. Get Reminders
+        # 1. Get Reminders (recurring ones are listed through their materialized occurrences)
         reminders = self.get_all_reminders()
         for reminder in reminders:
-            if reminder['due_at']:
+            if reminder['due_at'] and not reminder['rrule']:
                 all_items.append({
                     'type': 'Recordatorio',
                     'text': reminder['text'],
                     'due_at': reminder['due_at'],
+                    'due_at_ms': reminder['due_at_ms'],
                     'source_id': reminder['id'],
                     'is_completed': reminder['is_completed']
                 })
+        for occurrence in self.get_reminder_occurrences():
+            all_items.append({
+                'type': 'Recordatorio',
+                'text': occurrence['text'],
+                'due_at': occurrence['due_at'],
+                'due_at_ms': occurrence['due_at_ms'],
+                'source_id': occurrence['reminder_id'],
+                'occurrence_id': occurrence['id'],
+                'is_completed': occurrence['is_completed']
+            })
 
         # 2. Get Kanban Cards
         kanban_cards = self.kanban_manager.get_all_cards()
@@ -33,6 +46,7 @@ class RemindersManager:
                     'type': 'Kanban',
                     'text': card['title'],
                     'due_at': card['due_date'],
+                    'due_at_ms': card['due_date_ms'],
                     'source_id': card['id'],
                     'is_completed': card['column_name'] == 'Done' # Consider 'Done' as completed
                 })
@@ -46,81 +60,192 @@ class RemindersManager:
                         'type': 'Checklist',
                         'text': item['text'],
                         'due_at': item['due_at'],
+                        'due_at_ms': item['due_at_ms'],
                         'source_id': item['id'],
                         'is_completed': item['is_checked']
                     })
         
         # Sort all items by due date
-        all_items.sort(key=lambda x: x['due_at'])
+        all_items.sort(key=lambda x: x['due_at_ms'] or 0)
         
         return all_items
 
-    def create_reminder(self, text, due_at):
-        """Creates a new reminder."""
+    def create_reminder(self, text, due_at, rrule=None):
+        """Creates a new reminder. If *rrule* is given, *due_at* is the first occurrence (DTSTART).
+        Raises ValueError if *rrule* cannot be parsed."""
         cursor = self.conn.cursor()
         due_at_utc_str = time_utils.to_utc(due_at).isoformat() if isinstance(due_at, datetime.datetime) else due_at
+        rrule = self._checked_rrule(rrule)
         cursor.execute(
-            "INSERT INTO reminders (text, due_at) VALUES (?, ?)",
-            (text, due_at_utc_str)
+            "INSERT INTO reminders (text, due_at, rrule) VALUES (?, ?, ?)",
+            (text, due_at_utc_str, rrule)
         )
         self.conn.commit()
         new_id = cursor.lastrowid
+        if rrule:
+            self._materialize_reminder(new_id)
         return new_id
 
     def get_all_reminders(self):
         """Retrieves all reminders, ordered by due date."""
-        reminders = self.conn.execute("SELECT id, text, due_at, is_completed FROM reminders ORDER BY due_at ASC").fetchall()
+        reminders = self.conn.execute("SELECT id, text, due_at, due_at_ms, is_completed, rrule FROM reminders ORDER BY due_at_ms ASC").fetchall()
         return [dict(row) for row in reminders]
 
     def get_reminder(self, reminder_id):
         """Retrieves a single reminder by its ID."""
-        reminder = self.conn.execute("SELECT id, text, due_at, is_completed FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        reminder = self.conn.execute("SELECT id, text, due_at, due_at_ms, is_completed, rrule FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
         return dict(reminder) if reminder else None
 
+    # --- Recurrence ---
+
+    def get_reminder_occurrences(self, reminder_id=None):
+        """Retrieves the materialized occurrences of recurring reminders, ordered by due date."""
+        query = """
+            SELECT o.id, o.reminder_id, r.text, o.due_at, o.due_at_ms, o.is_completed, o.is_notified, o.pre_notified_at
+            FROM reminder_occurrences o
+            JOIN reminders r ON r.id = o.reminder_id
+        """
+        params = ()
+        if reminder_id is not None:
+            query += " WHERE o.reminder_id = ?"
+            params = (reminder_id,)
+        query += " ORDER BY o.due_at_ms ASC"
+        return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def update_occurrence(self, occurrence_id, is_completed=None, is_notified=None, pre_notified_at=None):
+        """Updates the state of a single occurrence of a recurring reminder."""
+        updates = []
+        params = []
+        if is_completed is not None:
+            updates.append("is_completed = ?")
+            params.append(is_completed)
+        if is_notified is not None:
+            updates.append("is_notified = ?")
+            params.append(is_notified)
+        if pre_notified_at is not None:
+            pre_notified_at_utc_str = time_utils.to_utc(pre_notified_at).isoformat() if isinstance(pre_notified_at, datetime.datetime) else pre_notified_at
+            updates.append("pre_notified_at = ?")
+            params.append(pre_notified_at_utc_str)
+
+        if updates:
+            params.append(occurrence_id)
+            self.conn.execute(f"UPDATE reminder_occurrences SET {', '.join(updates)} WHERE id = ?", tuple(params))
+            self.conn.commit()
+
+    def roll_recurrence_window(self, window_days=recurrence_utils.RECURRENCE_WINDOW_DAYS):
+        """Extends the materialized window of every recurring reminder up to now + *window_days*
+        and prunes occurrences that fell behind the window. Returns the number of new occurrences."""
+        now_utc = time_utils.to_utc(datetime.datetime.now())
+        horizon_str = (now_utc + datetime.timedelta(days=window_days)).isoformat()
+        rows = self.conn.execute(
+            "SELECT id FROM reminders WHERE rrule IS NOT NULL AND is_completed = 0 "
+            "AND (materialized_until IS NULL OR materialized_until < ?)",
+            (horizon_str,)
+        ).fetchall()
+
+        created = 0
+        for row in rows:
+            created += self._materialize_reminder(row['id'], window_days, commit=False)
+
+        cutoff_ms = time_utils.to_epoch_ms(now_utc - datetime.timedelta(days=window_days))
+        self.conn.execute("DELETE FROM reminder_occurrences WHERE due_at_ms < ?", (cutoff_ms,))
+        self.conn.commit()
+        return created
+
+    def _materialize_reminder(self, reminder_id, window_days=recurrence_utils.RECURRENCE_WINDOW_DAYS, commit=True):
+        """Inserts the occurrences of one recurring reminder between its last materialized
+        point and now + *window_days*. Past occurrences older than a day are not back-filled."""
+        reminder = self.conn.execute(
+            "SELECT due_at, rrule, materialized_until FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+        if not reminder or not reminder['rrule']:
+            return 0
+
+        now_utc = time_utils.to_utc(datetime.datetime.now())
+        horizon = now_utc + datetime.timedelta(days=window_days)
+        dtstart = datetime.datetime.fromisoformat(reminder['due_at'])
+        window_start = datetime.datetime.fromisoformat(reminder['materialized_until']) if reminder['materialized_until'] else dtstart
+        window_start = max(time_utils.to_utc(window_start), now_utc - datetime.timedelta(days=1))
+
+        try:
+            occurrences = recurrence_utils.expand_occurrences(reminder['rrule'], time_utils.to_utc(dtstart), window_start, horizon)
+        except (ValueError, TypeError) as e:
+            logging.error(f"Invalid recurrence rule for reminder {reminder_id}: {e}")
+            return 0
+
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            "INSERT OR IGNORE INTO reminder_occurrences (reminder_id, due_at) VALUES (?, ?)",
+            [(reminder_id, occurrence.isoformat()) for occurrence in occurrences]
+        )
+        cursor.execute("UPDATE reminders SET materialized_until = ? WHERE id = ?", (horizon.isoformat(), reminder_id))
+        if commit:
+            self.conn.commit()
+        return len(occurrences)
+
+    @staticmethod
+    def _checked_rrule(rrule):
+        """Normalized rule, or None for a one-shot reminder. Raises ValueError if it cannot be parsed."""
+        rrule = recurrence_utils.normalize_rrule(rrule)
+        if rrule and not recurrence_utils.validate_rrule(rrule):
+            raise ValueError(f"Invalid recurrence rule: {rrule}")
+        return rrule
+
+    def _reset_materialization(self, reminder_id):
+        """
+        Drops the occurrences of the old schedule so they are regenerated from the current rule.
+        Completed occurrences are kept as history. Materialization restarts from now, so no
+        occurrence of the new schedule is created in the past (it would fire right away).
+        """
+        self.conn.execute("DELETE FROM reminder_occurrences WHERE reminder_id = ? AND is_completed = 0", (reminder_id,))
+        self.conn.execute("UPDATE reminders SET materialized_until = ? WHERE id = ?",
+                          (time_utils.to_utc(datetime.datetime.now()).isoformat(), reminder_id))
+
     # ... (rest of the methods remain the same)
 
     def get_actual_due_reminders(self):
         """Retrieves all due and not notified reminders."""
         cursor = self.conn.cursor()
-        now_utc = time_utils.to_utc(datetime.datetime.now()).isoformat()
-        cursor.execute("SELECT id, text, due_at, pre_notified_at FROM reminders WHERE due_at <= ? AND is_completed = 0 AND is_notified = 0", (now_utc,))
-        reminders = []
-        for row in cursor.fetchall():
-            reminder = dict(row)
-            if reminder['due_at']:
-                utc_dt = datetime.datetime.fromisoformat(reminder['due_at'])
-                reminder['due_at'] = time_utils.from_utc(utc_dt).isoformat()
-            reminders.append(reminder)
-        return reminders
+        now_ms = time_utils.now_epoch_ms()
+        cursor.execute("""
+            SELECT id, NULL AS occurrence_id, text, due_at, due_at_ms, pre_notified_at FROM reminders
+            WHERE due_at_ms <= ? AND is_completed = 0 AND is_notified = 0 AND rrule IS NULL
+            UNION ALL
+            SELECT r.id, o.id AS occurrence_id, r.text, o.due_at, o.due_at_ms, o.pre_notified_at
+            FROM reminder_occurrences o JOIN reminders r ON r.id = o.reminder_id
+            WHERE o.due_at_ms <= ? AND o.is_completed = 0 AND o.is_notified = 0 AND r.is_completed = 0
+        """, (now_ms, now_ms))
+        return [dict(row) for row in cursor.fetchall()]
 
     def get_pre_due_reminders(self, pre_notification_offsets_minutes):
         """Retrieves reminders that are due within the pre-notification offsets and have not been pre-notified."""
         all_reminders = []
         for offset_minutes in pre_notification_offsets_minutes:
             cursor = self.conn.cursor()
-            now = datetime.datetime.now()
-            now_utc = time_utils.to_utc(now)
-            pre_due_time_utc = now_utc + datetime.timedelta(minutes=offset_minutes)
-
-            now_str = now_utc.isoformat()
-            pre_due_time_str = pre_due_time_utc.isoformat()
-
-            cursor.execute("SELECT id, text, due_at FROM reminders WHERE due_at > ? AND due_at <= ? AND is_completed = 0 AND pre_notified_at IS NULL", (now_str, pre_due_time_str))
-            reminders = []
-            for row in cursor.fetchall():
-                reminder = dict(row)
-                if reminder['due_at']:
-                    utc_dt = datetime.datetime.fromisoformat(reminder['due_at'])
-                    reminder['due_at'] = time_utils.from_utc(utc_dt).isoformat()
-                reminders.append(reminder)
-            all_reminders.extend(reminders)
+            now_ms = time_utils.now_epoch_ms()
+            pre_due_ms = now_ms + offset_minutes * 60 * 1000
+
+            cursor.execute("""
+                SELECT id, NULL AS occurrence_id, text, due_at, due_at_ms FROM reminders
+                WHERE due_at_ms > ? AND due_at_ms <= ? AND is_completed = 0 AND pre_notified_at IS NULL AND rrule IS NULL
+                UNION ALL
+                SELECT r.id, o.id AS occurrence_id, r.text, o.due_at, o.due_at_ms
+                FROM reminder_occurrences o JOIN reminders r ON r.id = o.reminder_id
+                WHERE o.due_at_ms > ? AND o.due_at_ms <= ? AND o.is_completed = 0 AND o.pre_notified_at IS NULL AND r.is_completed = 0
+            """, (now_ms, pre_due_ms, now_ms, pre_due_ms))
+            all_reminders.extend(dict(row) for row in cursor.fetchall())
         return all_reminders
 
-    def update_reminder(self, reminder_id, text=None, due_at=None, is_completed=None, is_notified=None, pre_notified_at=None):
-        """Updates a reminder."""
+    def update_reminder(self, reminder_id, text=None, due_at=None, is_completed=None, is_notified=None, pre_notified_at=None, rrule=None):
+        """Updates a reminder. Pass ``rrule=''`` to turn a recurring reminder into a one-shot one.
+        Raises ValueError if *rrule* cannot be parsed."""
         cursor = self.conn.cursor()
+        current = self.get_reminder(reminder_id)
+        if rrule is not None:
+            rrule = self._checked_rrule(rrule) or ''
         updates = []
         params = []
+        schedule_changed = False
         if text is not None:
             updates.append("text = ?")
             params.append(text)
@@ -128,6 +253,7 @@ class RemindersManager:
             due_at_utc_str = time_utils.to_utc(due_at).isoformat() if isinstance(due_at, datetime.datetime) else due_at
             updates.append("due_at = ?")
             params.append(due_at_utc_str)
+            schedule_changed = current is not None and time_utils.to_epoch_ms(due_at_utc_str) != current['due_at_ms']
         if is_completed is not None:
             updates.append("is_completed = ?")
             params.append(is_completed)
@@ -139,10 +265,22 @@ class RemindersManager:
             updates.append("pre_notified_at = ?")
             params.append(pre_notified_at_utc_str)
 
+        if rrule is not None:
+            updates.append("rrule = ?")
+            params.append(rrule or None)
+            schedule_changed = schedule_changed or (current is not None and (rrule or None) != current['rrule'])
+
         if updates:
             params.append(reminder_id)
             cursor.execute(f"UPDATE reminders SET {', '.join(updates)} WHERE id = ?", tuple(params))
+            if schedule_changed:
+                # Regenerate the occurrences from the new schedule (text-only edits keep them)
+                self._reset_materialization(reminder_id)
+                if rrule == '':
+                    cursor.execute("DELETE FROM reminder_occurrences WHERE reminder_id = ?", (reminder_id,))
             self.conn.commit()
+            if schedule_changed:
+                self._materialize_reminder(reminder_id)
 
     def delete_reminder(self, reminder_id):
         """Deletes a reminder."""
@@ -151,6 +289,14 @@ class RemindersManager:
         self.conn.commit()
 
     def get_reminders_due_between(self, start_date, end_date):
-        """Retrieves reminders with a due date between the given dates."""
-        reminders = self.conn.execute("SELECT text, due_at FROM reminders WHERE due_at BETWEEN ? AND ?", (start_date, end_date)).fetchall()
-        return reminders
\ No newline at end of file
+        """Retrieves reminders with a due date between the given dates (datetimes, dates, ISO strings or epoch ms)."""
+        start_ms = time_utils.to_epoch_ms(start_date)
+        end_ms = time_utils.to_epoch_ms(end_date)
+        reminders = self.conn.execute("""
+            SELECT text, due_at, due_at_ms FROM reminders WHERE due_at_ms BETWEEN ? AND ? AND rrule IS NULL
+            UNION ALL
+            SELECT r.text, o.due_at, o.due_at_ms FROM reminder_occurrences o JOIN reminders r ON r.id = o.reminder_id
+            WHERE o.due_at_ms BETWEEN ? AND ?
+            ORDER BY due_at_ms
+        """, (start_ms, end_ms, start_ms, end_ms)).fetchall()
+        return reminders
@@ -19,6 +19,7 @@ class SettingsManager:
             raise Exception("This class is a singleton! Use get_instance() to get the instance.")
         self.conn = conn
         self._settings_cache = {} # Internal cache
+        self._listeners = [] # Callbacks notified as callback(key, value) after a change
 
     def get_setting(self, key, default=None):
         """Retrieves a setting from the database or cache."""
@@ -40,6 +41,18 @@ class SettingsManager:
         cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
         self.conn.commit()
         self._settings_cache[key] = str(value) # Update the cache with the new value
+        for listener in list(self._listeners):
+            listener(key, str(value))
+
+    def add_listener(self, callback):
+        """Registers a callback(key, value) invoked after any setting is saved."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregisters a callback previously added with add_listener()."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
 
     def get_pre_notification_offset(self):
         """Retrieves the global pre-notification offsets in minutes."""
@@ -141,6 +154,99 @@ class SettingsManager:
     def set_long_break_duration(self, duration):
         self.set_setting("long_break_duration", duration)
 
+    # --- Web View Lifecycle Settings ---
+    def get_max_live_webviews(self):
+        """Retrieves how many service web views may stay loaded (active or frozen) at once."""
+        value = self.get_setting("max_live_webviews")
+        return int(value) if value else 5
+
+    def set_max_live_webviews(self, count):
+        self.set_setting("max_live_webviews", count)
+
+    def get_webview_freeze_minutes(self):
+        """Retrieves the idle minutes after which a background web view is frozen."""
+        value = self.get_setting("webview_freeze_minutes")
+        return int(value) if value else 5
+
+    def set_webview_freeze_minutes(self, minutes):
+        self.set_setting("webview_freeze_minutes", minutes)
+
+    def get_webview_discard_minutes(self):
+        """Retrieves the idle minutes after which a background web view is discarded."""
+        value = self.get_setting("webview_discard_minutes")
+        return int(value) if value else 60
+
+    def set_webview_discard_minutes(self, minutes):
+        self.set_setting("webview_discard_minutes", minutes)
+
+    def get_webview_cache_type(self):
+        """Retrieves the HTTP cache type of service profiles: 'disk', 'memory' or 'none'."""
+        return self.get_setting("webview_cache_type", "disk")
+
+    def set_webview_cache_type(self, cache_type):
+        self.set_setting("webview_cache_type", cache_type)
+
+    def get_webview_cache_size_mb(self):
+        """Retrieves the maximum HTTP cache size of each service profile, in MB."""
+        value = self.get_setting("webview_cache_size_mb")
+        return int(value) if value else 256
+
+    def set_webview_cache_size_mb(self, size_mb):
+        self.set_setting("webview_cache_size_mb", size_mb)
+
+    def get_webview_cache_total_mb(self):
+        """Retrieves the budget for the HTTP caches of all service profiles together, in MB."""
+        value = self.get_setting("webview_cache_total_mb")
+        return int(value) if value else 1024
+
+    def set_webview_cache_total_mb(self, size_mb):
+        self.set_setting("webview_cache_total_mb", size_mb)
+
+    def get_prewarm_service_count(self):
+        """Retrieves how many of the most used services are pre-loaded at startup (0 disables it)."""
+        value = self.get_setting("prewarm_service_count")
+        return int(value) if value else 3
+
+    def set_prewarm_service_count(self, count):
+        self.set_setting("prewarm_service_count", count)
+
+    def get_prewarm_concurrency(self):
+        """Retrieves how many services may be pre-loaded at the same time."""
+        value = self.get_setting("prewarm_concurrency")
+        return int(value) if value else 2
+
+    def set_prewarm_concurrency(self, count):
+        self.set_setting("prewarm_concurrency", count)
+
+    def get_pinned_service_ids(self):
+        """Retrieves the ids of services that are never frozen or discarded."""
+        value = self.get_setting("pinned_service_ids")
+        return {int(service_id) for service_id in value.split(",") if service_id} if value else set()
+
+    def set_service_pinned(self, service_id, pinned):
+        """Adds or removes a service from the pinned set."""
+        pinned_ids = self.get_pinned_service_ids()
+        if pinned:
+            pinned_ids.add(int(service_id))
+        else:
+            pinned_ids.discard(int(service_id))
+        self.set_setting("pinned_service_ids", ",".join(str(i) for i in sorted(pinned_ids)))
+
+    def get_content_filter_enabled(self):
+        """Retrieves whether trackers and ads are blocked in service web views."""
+        return self.get_setting("content_filter_enabled", "True") == "True"
+
+    def set_content_filter_enabled(self, enabled):
+        self.set_setting("content_filter_enabled", bool(enabled))
+
+    def get_service_allowed_domains(self, service_id):
+        """Retrieves the domains that are never blocked for a service."""
+        value = self.get_setting(f"content_filter_allow_{service_id}")
+        return [domain for domain in value.split(",") if domain] if value else []
+
+    def set_service_allowed_domains(self, service_id, domains):
+        self.set_setting(f"content_filter_allow_{service_id}", ",".join(d.strip().lower() for d in domains if d.strip()))
+
     def get_todo_color(self):
         """Retrieves the color for 'To Do' status."""
         color = self.get_setting("todo_color")
@@ -202,3 +308,62 @@ class SettingsManager:
     def set_ai_model(self, model_name: str):
         """Saves the name of the configured AI model."""
         self.set_setting("ai_model", model_name)
+
+    def get_ai_cache_memory_mb(self) -> int:
+        """Retrieves the memory budget of the AI response cache, in MB."""
+        value = self.get_setting("ai_cache_memory_mb")
+        return int(value) if value else 8
+
+    def set_ai_cache_memory_mb(self, size_mb: int):
+        self.set_setting("ai_cache_memory_mb", size_mb)
+
+    def get_ai_cache_disk_mb(self) -> int:
+        """Retrieves the disk budget of the AI response cache (compressed), in MB."""
+        value = self.get_setting("ai_cache_disk_mb")
+        return int(value) if value else 64
+
+    def set_ai_cache_disk_mb(self, size_mb: int):
+        self.set_setting("ai_cache_disk_mb", size_mb)
+
+    def get_ai_cache_ttl_days(self) -> int:
+        """Retrieves how many days a cached AI response stays valid."""
+        value = self.get_setting("ai_cache_ttl_days")
+        return int(value) if value else 30
+
+    def set_ai_cache_ttl_days(self, days: int):
+        self.set_setting("ai_cache_ttl_days", days)
+
+    def get_ai_concurrency(self) -> int:
+        """Retrieves how many AI requests may run at the same time in batch actions."""
+        value = self.get_setting("ai_concurrency")
+        return int(value) if value else 4
+
+    def set_ai_concurrency(self, count: int):
+        self.set_setting("ai_concurrency", count)
+
+    def get_ai_semantic_cache_enabled(self) -> bool:
+        """Retrieves whether paraphrased prompts may be answered from the cache (needs an embeddings endpoint)."""
+        return self.get_setting("ai_semantic_cache_enabled", "False") == "True"
+
+    def set_ai_semantic_cache_enabled(self, enabled: bool):
+        self.set_setting("ai_semantic_cache_enabled", bool(enabled))
+
+    def get_ai_semantic_cache_threshold(self) -> float:
+        """Retrieves the cosine similarity from which a cached answer is reused for a different prompt."""
+        value = self.get_setting("ai_semantic_cache_threshold")
+        return float(value) if value else 0.92
+
+    def set_ai_semantic_cache_threshold(self, threshold: float):
+        self.set_setting("ai_semantic_cache_threshold", threshold)
+
+    def get_ai_notes_indexing_provider(self) -> str:
+        """Retrieves the AI provider the user agreed to send notes and cards to for indexing ('' if none)."""
+        return self.get_setting("ai_notes_indexing_provider") or ""
+
+    def set_ai_notes_indexing_provider(self, provider_name: str):
+        self.set_setting("ai_notes_indexing_provider", provider_name or "")
+
+    def is_ai_notes_indexing_enabled(self) -> bool:
+        """Whether notes and cards may be embedded with the current provider (switching providers asks again)."""
+        provider = self.get_ai_provider()
+        return bool(provider) and self.get_ai_notes_indexing_provider() == provider
@@ -1,6 +1,12 @@
 import datetime
+import numpy as np
 # from app.db.database import get_db_connection # No longer needed directly
 from app.services.service_manager import ServiceManager # Import the class
+from app.metrics import session_analytics
+from app.utils import time_utils
+
+# Sessions older than this are dropped from usage_sessions; their time is already in usage_metrics
+SESSION_RETENTION_DAYS = 90
 
 class MetricsManager:
     _master_instance = None # Use a different name to avoid confusion with _instance
@@ -10,6 +16,10 @@ class MetricsManager:
         self.service_manager = ServiceManager(self.conn) # Instantiate ServiceManager
         self.active_service_id = None
         self.session_start_time = None
+        self._service_ids = {} # service name -> id cache, replaces per-switch lookups
+        self._pending_usage = {} # (service_id, day) -> milliseconds not yet written
+        self._pending_sessions = [] # (service_id, start_ms, duration_ms) not yet written
+        self._pending_unread_samples = [] # (service_id, ts_ms, count) not yet written
         self._ensure_internal_services_exist()
 
     @classmethod
@@ -38,24 +48,42 @@ class MetricsManager:
         for name, url, icon in internal_tools:
             if not self.service_manager.get_service_by_name(name):
                 self.service_manager.add_service(name, url, icon, is_internal=True)
+        self.refresh_service_cache()
+
+    def refresh_service_cache(self):
+        """Reloads the service name -> id cache (call after services are added, renamed or deleted)."""
+        rows = self.conn.execute("SELECT id, name FROM services").fetchall()
+        self._service_ids = {row[1]: row[0] for row in rows}
 
     def start_tracking(self, service_name: str):
         """Starts tracking usage for a given service/tool name."""
-        self.stop_tracking_current() # Ensure previous session is logged
-
-        service = self.service_manager.get_service_by_name(service_name)
-        if service:
-            self.active_service_id = service['id']
-            self.session_start_time = datetime.datetime.now()
-        else:
+        service_id = self._service_ids.get(service_name)
+        if service_id is None:
+            # Unknown name: the service may have been added after the cache was built
+            self.refresh_service_cache()
+            service_id = self._service_ids.get(service_name)
+        if service_id is None:
+            self.stop_tracking_current()
             print(f"Warning: Service '{service_name}' not found for tracking.")
+            return
+        self.start_tracking_service(service_id)
+
+    def start_tracking_service(self, service_id: int):
+        """Starts tracking usage for a service by id."""
+        self.stop_tracking_current() # Ensure previous session is logged
+        self.active_service_id = service_id
+        self.session_start_time = datetime.datetime.now()
 
     def stop_tracking_current(self):
         """Stops tracking the current active service and logs the duration."""
         if self.active_service_id is not None and self.session_start_time is not None:
             duration = datetime.datetime.now() - self.session_start_time
             milliseconds = int(duration.total_seconds() * 1000)
-            
+
+            # Every session goes to the event log, even short ones (they count as switches)
+            self._pending_sessions.append(
+                (self.active_service_id, time_utils.to_epoch_ms(self.session_start_time), max(milliseconds, 0))
+            )
             if milliseconds > 1000: # Only log if duration is more than 1 second
                 self._log_usage(self.active_service_id, milliseconds)
 
@@ -63,31 +91,92 @@ class MetricsManager:
         self.session_start_time = None
 
     def _log_usage(self, service_id: int, milliseconds: int):
-        """Logs the usage data to the database."""
-        cursor = self.conn.cursor()
-        today_str = datetime.date.today().isoformat() # YYYY-MM-DD
-
-        # Check if an entry for today already exists for this service
-        cursor.execute(
-            "SELECT id, milliseconds FROM usage_metrics WHERE service_id = ? AND day = ?",
-            (service_id, today_str)
-        )
-        existing_entry = cursor.fetchone()
-
-        if existing_entry:
-            # Update existing entry
-            new_milliseconds = existing_entry['milliseconds'] + milliseconds
-            cursor.execute(
-                "UPDATE usage_metrics SET milliseconds = ? WHERE id = ?",
-                (new_milliseconds, existing_entry['id'])
-            )
-        else:
-            # Insert new entry
-            cursor.execute(
-                "INSERT INTO usage_metrics (service_id, milliseconds, day) VALUES (?, ?, ?)",
-                (service_id, milliseconds, today_str)
-            )
-        self.conn.commit()
+        """Adds usage to the in-memory accumulator; written to disk by flush()."""
+        key = (service_id, datetime.date.today().isoformat()) # YYYY-MM-DD
+        self._pending_usage[key] = self._pending_usage.get(key, 0) + milliseconds
+
+    def flush(self):
+        """Writes the accumulated usage (one UPSERT per service/day) and session log in a single transaction."""
+        if not self._pending_usage and not self._pending_sessions and not self._pending_unread_samples:
+            return
+        pending, self._pending_usage = self._pending_usage, {}
+        sessions, self._pending_sessions = self._pending_sessions, []
+        unread_samples, self._pending_unread_samples = self._pending_unread_samples, []
+
+        # Fold the daily deltas into the rollup periods
+        weekly, monthly, by_service = {}, {}, {}
+        for (service_id, day), milliseconds in pending.items():
+            date_obj = datetime.date.fromisoformat(day)
+            week_key = (self._period_start(date_obj, 'week').isoformat(), service_id)
+            month_key = (self._period_start(date_obj, 'month').isoformat(), service_id)
+            weekly[week_key] = weekly.get(week_key, 0) + milliseconds
+            monthly[month_key] = monthly.get(month_key, 0) + milliseconds
+            total, first_day, last_day = by_service.get(service_id, (0, day, day))
+            by_service[service_id] = (total + milliseconds, min(first_day, day), max(last_day, day))
+
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO usage_sessions (service_id, start_ms, duration_ms) VALUES (?, ?, ?)", sessions
+                )
+                self.conn.executemany(
+                    "INSERT INTO unread_samples (service_id, ts_ms, count) VALUES (?, ?, ?)", unread_samples
+                )
+                self.conn.executemany(
+                    """
+                    INSERT INTO usage_metrics (service_id, day, milliseconds) VALUES (?, ?, ?)
+                    ON CONFLICT(service_id, day) DO UPDATE SET milliseconds = milliseconds + excluded.milliseconds
+                    """,
+                    [(service_id, day, milliseconds) for (service_id, day), milliseconds in pending.items()]
+                )
+                for table, deltas in (("usage_metrics_weekly", weekly), ("usage_metrics_monthly", monthly)):
+                    self.conn.executemany(
+                        f"""
+                        INSERT INTO {table} (period_start, service_id, milliseconds) VALUES (?, ?, ?)
+                        ON CONFLICT(period_start, service_id) DO UPDATE SET milliseconds = milliseconds + excluded.milliseconds
+                        """,
+                        [(period_start, service_id, milliseconds) for (period_start, service_id), milliseconds in deltas.items()]
+                    )
+                self.conn.executemany(
+                    """
+                    INSERT INTO usage_metrics_by_service (service_id, milliseconds, first_day, last_day) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(service_id) DO UPDATE SET
+                        milliseconds = milliseconds + excluded.milliseconds,
+                        first_day = MIN(first_day, excluded.first_day),
+                        last_day = MAX(last_day, excluded.last_day)
+                    """,
+                    [(service_id, *values) for service_id, values in by_service.items()]
+                )
+        except Exception as e:
+            # Keep the data for the next attempt
+            for key, milliseconds in pending.items():
+                self._pending_usage[key] = self._pending_usage.get(key, 0) + milliseconds
+            self._pending_sessions[:0] = sessions
+            self._pending_unread_samples[:0] = unread_samples
+            print(f"Error flushing usage metrics: {e}")
+
+    def compact_sessions(self, retention_days: int = SESSION_RETENTION_DAYS):
+        """
+        Drops session events and unread count samples older than retention_days. Session
+        durations were already summed into usage_metrics (and the rollups) when flushed.
+        Returns the number of sessions removed.
+        """
+        self.flush()
+        cutoff_ms = time_utils.now_epoch_ms() - retention_days * session_analytics.DAY_MS
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM usage_sessions WHERE start_ms < ?", (cutoff_ms,))
+            self.conn.execute("DELETE FROM unread_samples WHERE ts_ms < ?", (cutoff_ms,))
+        return cursor.rowcount
+
+    def record_unread_counts(self, counts: dict):
+        """Queues {service_id: count} unread samples (only changes are reported by the aggregator)."""
+        now_ms = time_utils.now_epoch_ms()
+        self._pending_unread_samples.extend((service_id, now_ms, count) for service_id, count in counts.items())
+
+    def shutdown(self):
+        """Logs the active session and writes any pending usage. Call before closing the connection."""
+        self.stop_tracking_current()
+        self.flush()
 
     def get_usage_report(self, day_str: str = None):
         """
@@ -98,6 +187,7 @@ class MetricsManager:
         if day_str is None:
             day_str = datetime.date.today().isoformat()
 
+        self.flush()
         cursor = self.conn.cursor()
         cursor.execute("""
             SELECT s.name, m.milliseconds
@@ -115,18 +205,169 @@ class MetricsManager:
         Retrieves usage metrics for the last 7 days.
         Returns a dict mapping date string to total milliseconds.
         """
-        today = datetime.date.today()
-        start_date = today - datetime.timedelta(days=6)
-        start_date_str = start_date.isoformat()
-        
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT day, SUM(milliseconds)
-            FROM usage_metrics
-            WHERE day >= ?
-            GROUP BY day
-            ORDER BY day ASC
-        """, (start_date_str,))
-        
-        rows = cursor.fetchall()
+        return self.get_usage_trend(7, granularity='day')
+
+    # --- Range queries (served from the rollup tables) ---
+
+    @staticmethod
+    def _period_start(date_obj: datetime.date, granularity: str) -> datetime.date:
+        """Returns the first day of the day/week (Monday)/month containing date_obj."""
+        if granularity == 'week':
+            return date_obj - datetime.timedelta(days=date_obj.weekday())
+        if granularity == 'month':
+            return date_obj.replace(day=1)
+        return date_obj
+
+    @staticmethod
+    def granularity_for_range(days: int) -> str:
+        """Picks the coarsest bucket that still gives a readable trend for a range of N days."""
+        if days <= 31:
+            return 'day'
+        if days <= 120:
+            return 'week'
+        return 'month'
+
+    def _range_source(self, days: int, granularity: str | None = None):
+        """Returns (table, period column, first period) covering the last N days."""
+        granularity = granularity or self.granularity_for_range(days)
+        first_day = datetime.date.today() - datetime.timedelta(days=days - 1)
+        start = self._period_start(first_day, granularity).isoformat()
+        if granularity == 'week':
+            return "usage_metrics_weekly", "period_start", start
+        if granularity == 'month':
+            return "usage_metrics_monthly", "period_start", start
+        return "usage_metrics", "day", start
+
+    def get_usage_trend(self, days: int = 30, service_id: int | None = None, granularity: str | None = None):
+        """
+        Retrieves total usage per period for the last N days, optionally for one service.
+        The granularity (day/week/month) defaults to granularity_for_range(days); ranges are
+        aligned to whole periods so only pre-aggregated rows are read.
+        Returns a dict mapping period start (YYYY-MM-DD) to milliseconds, in ascending order.
+        """
+        self.flush()
+        table, period_column, start = self._range_source(days, granularity)
+        query = f"SELECT {period_column}, SUM(milliseconds) FROM {table} WHERE {period_column} >= ?"
+        params = [start]
+        if service_id is not None:
+            query += " AND service_id = ?"
+            params.append(service_id)
+        query += f" GROUP BY {period_column} ORDER BY {period_column} ASC"
+        rows = self.conn.execute(query, params).fetchall()
         return {row[0]: row[1] for row in rows}
+
+    def get_usage_breakdown(self, days: int = 30, granularity: str | None = None):
+        """
+        Retrieves usage per service for the last N days (aligned to whole periods).
+        Returns a list of dicts: [{'service_id': int, 'service_name': str, 'milliseconds': int}, ...]
+        """
+        self.flush()
+        table, period_column, start = self._range_source(days, granularity)
+        rows = self.conn.execute(f"""
+            SELECT s.id, s.name, SUM(m.milliseconds) AS total
+            FROM {table} m
+            JOIN services s ON m.service_id = s.id
+            WHERE m.{period_column} >= ?
+            GROUP BY s.id
+            ORDER BY total DESC
+        """, (start,)).fetchall()
+        return [{'service_id': row[0], 'service_name': row[1], 'milliseconds': row[2]} for row in rows]
+
+    def get_service_totals(self):
+        """
+        Retrieves all-time usage per service.
+        Returns a list of dicts: [{'service_id', 'service_name', 'milliseconds', 'first_day', 'last_day'}, ...]
+        """
+        self.flush()
+        rows = self.conn.execute("""
+            SELECT s.id, s.name, t.milliseconds, t.first_day, t.last_day
+            FROM usage_metrics_by_service t
+            JOIN services s ON t.service_id = s.id
+            ORDER BY t.milliseconds DESC
+        """).fetchall()
+        return [{'service_id': row[0], 'service_name': row[1], 'milliseconds': row[2],
+                 'first_day': row[3], 'last_day': row[4]} for row in rows]
+
+    def get_service_priority(self, days: int = 30):
+        """
+        Ranks user (web) services by recent usage, then by all-time usage.
+        Returns a list of dicts: [{'service_id', 'url', 'profile_path', 'recent_ms', 'total_ms'}, ...]
+        """
+        self.flush()
+        start = self._period_start(datetime.date.today() - datetime.timedelta(days=days - 1), 'week').isoformat()
+        rows = self.conn.execute("""
+            SELECT s.id, s.url, s.profile_path,
+                   COALESCE((SELECT SUM(w.milliseconds) FROM usage_metrics_weekly w
+                             WHERE w.service_id = s.id AND w.period_start >= ?), 0) AS recent_ms,
+                   COALESCE(t.milliseconds, 0) AS total_ms
+            FROM services s
+            LEFT JOIN usage_metrics_by_service t ON t.service_id = s.id
+            WHERE s.is_internal = 0 AND s.is_active = 1
+            ORDER BY recent_ms DESC, total_ms DESC, s.name
+        """, (start,)).fetchall()
+        return [{'service_id': row[0], 'url': row[1], 'profile_path': row[2],
+                 'recent_ms': row[3], 'total_ms': row[4]} for row in rows]
+
+    # --- Session analytics ---
+
+    def _load_sessions(self, days: int):
+        """Returns (local start ms, duration ms, service ids) numpy arrays for the last N days."""
+        self.flush()
+        cutoff_ms = time_utils.now_epoch_ms() - days * session_analytics.DAY_MS
+        rows = self.conn.execute(
+            "SELECT start_ms, duration_ms, service_id FROM usage_sessions WHERE start_ms >= ? ORDER BY start_ms",
+            (cutoff_ms,)
+        ).fetchall()
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        columns = np.array(rows, dtype=np.int64)
+        start_local_ms = time_utils.epoch_ms_to_local_datetime64(columns[:, 0]).astype(np.int64)
+        return start_local_ms, columns[:, 1], columns[:, 2]
+
+    def get_hourly_heatmap(self, days: int = 30, service_id: int | None = None):
+        """
+        Retrieves time spent per weekday and hour (configured timezone) over the last N days.
+        Returns a 7x24 numpy array of milliseconds; row 0 is Monday.
+        """
+        start_local_ms, duration_ms, service_ids = self._load_sessions(days)
+        if service_id is not None:
+            mask = service_ids == service_id
+            start_local_ms, duration_ms = start_local_ms[mask], duration_ms[mask]
+        return session_analytics.hourly_heatmap(start_local_ms, duration_ms)
+
+    def get_switch_frequency(self, days: int = 30):
+        """
+        Retrieves how often the user switched between services/tools over the last N days.
+        Returns {'per_day': {'YYYY-MM-DD': count}, 'per_hour': [24 counts], 'average_per_day': float}.
+        """
+        start_local_ms, _, service_ids = self._load_sessions(days)
+        per_day, per_hour = session_analytics.switch_counts(start_local_ms, service_ids)
+        epoch = datetime.date(1970, 1, 1)
+        per_day = {(epoch + datetime.timedelta(days=day)).isoformat(): count for day, count in per_day.items()}
+        return {
+            'per_day': per_day,
+            'per_hour': per_hour.tolist(),
+            'average_per_day': sum(per_day.values()) / len(per_day) if per_day else 0.0,
+        }
+
+    def get_message_volume(self, days: int = 30, service_id: int | None = None):
+        """
+        Estimates incoming messages per day over the last N days from the unread count samples.
+        Returns a dict mapping date string (YYYY-MM-DD) to message count, in ascending order.
+        """
+        self.flush()
+        cutoff_ms = time_utils.now_epoch_ms() - days * session_analytics.DAY_MS
+        query = "SELECT service_id, ts_ms, count FROM unread_samples WHERE ts_ms >= ?"
+        params = [cutoff_ms]
+        if service_id is not None:
+            query += " AND service_id = ?"
+            params.append(service_id)
+        rows = self.conn.execute(query, params).fetchall()
+        if not rows:
+            return {}
+        columns = np.array(rows, dtype=np.int64)
+        ts_local_ms = time_utils.epoch_ms_to_local_datetime64(columns[:, 1]).astype(np.int64)
+        per_day = session_analytics.unread_increments_per_day(columns[:, 0], ts_local_ms, columns[:, 2])
+        epoch = datetime.date(1970, 1, 1)
+        return {(epoch + datetime.timedelta(days=day)).isoformat(): count for day, count in sorted(per_day.items())}
@@ -0,0 +1,91 @@
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+try:
+    import psutil
+except ImportError: # The monitor stays idle
+    psutil = None
+
+SAMPLE_INTERVAL_MS = 5000
+WINDOW_SAMPLES = 60 # 5 minutes at the default interval
+MIN_SAMPLES_FOR_POLICY = 3 # Avoid acting on a single spike
+
+class ResourceMonitor(QObject):
+    """
+    Samples CPU and resident memory of each service's renderer process.
+
+    pid_provider() returns {service_id: renderer pid} (0 or None for views without a process,
+    e.g. discarded ones). Every interval the monitor reads each process with psutil and keeps
+    the last WINDOW_SAMPLES (timestamp, cpu %, rss bytes) per service. cpu_percent is measured
+    since the previous sample, so reads never block.
+    """
+    sampled = pyqtSignal()
+
+    def __init__(self, pid_provider, parent=None, interval_ms=SAMPLE_INTERVAL_MS):
+        super().__init__(parent)
+        self.pid_provider = pid_provider
+        self._processes = {} # pid -> psutil.Process (keeps the CPU time baseline)
+        self._samples = {} # service_id -> deque of (monotonic time, cpu percent, rss bytes)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        if psutil is not None:
+            self.timer.start(interval_ms)
+
+    def _process(self, pid):
+        process = self._processes.get(pid)
+        if process is None:
+            process = psutil.Process(pid)
+            process.cpu_percent(None) # First call only sets the baseline
+            self._processes[pid] = process
+            return process, False
+        return process, True
+
+    def sample(self, now=None):
+        if psutil is None:
+            return
+        now = time.monotonic() if now is None else now
+        pids = {service_id: pid for service_id, pid in self.pid_provider().items() if pid}
+        for service_id, pid in pids.items():
+            try:
+                process, has_baseline = self._process(pid)
+                if not has_baseline:
+                    continue
+                with process.oneshot():
+                    cpu = process.cpu_percent(None)
+                    rss = process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._processes.pop(pid, None)
+                continue
+            self._samples.setdefault(service_id, deque(maxlen=WINDOW_SAMPLES)).append((now, cpu, rss))
+
+        # Forget processes and services that went away (discarded or deleted views)
+        live_pids = set(pids.values())
+        for pid in [pid for pid in self._processes if pid not in live_pids]:
+            del self._processes[pid]
+        for service_id in [s for s in self._samples if s not in pids]:
+            del self._samples[service_id]
+        self.sampled.emit()
+
+    def get_usage(self, service_id):
+        """
+        Returns {'cpu_last', 'cpu_avg', 'rss_last', 'rss_peak', 'samples'} over the window,
+        or None if the service has no samples yet.
+        """
+        samples = self._samples.get(service_id)
+        if not samples:
+            return None
+        cpus = [cpu for _, cpu, _ in samples]
+        rss = [value for _, _, value in samples]
+        return {'cpu_last': cpus[-1], 'cpu_avg': sum(cpus) / len(cpus),
+                'rss_last': rss[-1], 'rss_peak': max(rss), 'samples': len(samples)}
+
+    def get_all_usage(self):
+        """Returns {service_id: usage} for every sampled service (see get_usage)."""
+        return {service_id: self.get_usage(service_id) for service_id in self._samples}
+
+    def is_cpu_heavy(self, service_id, threshold_percent):
+        """True if the service's average CPU over the window is at or above threshold_percent."""
+        usage = self.get_usage(service_id)
+        return (usage is not None and usage['samples'] >= MIN_SAMPLES_FOR_POLICY
+                and usage['cpu_avg'] >= threshold_percent)
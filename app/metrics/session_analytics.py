@@ -0,0 +1,74 @@
+import numpy as np
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+def hourly_heatmap(start_local_ms, duration_ms):
+    """
+    Distributes session durations over a 7x24 (weekday x hour) grid of milliseconds.
+    start_local_ms are local wall-clock epoch milliseconds (see time_utils.epoch_ms_to_local_datetime64).
+    Sessions spanning several hours are split at the hour boundaries. Monday is row 0.
+    """
+    starts = np.asarray(start_local_ms, dtype=np.int64)
+    ends = starts + np.asarray(duration_ms, dtype=np.int64)
+    grid = np.zeros((7, 24), dtype=np.int64)
+    if starts.size == 0:
+        return grid
+
+    first_hour = starts // HOUR_MS
+    last_hour = (np.maximum(ends, starts + 1) - 1) // HOUR_MS
+    hours_per_session = last_hour - first_hour + 1
+
+    # One row per (session, hour touched by the session)
+    session_index = np.repeat(np.arange(starts.size), hours_per_session)
+    row_offsets = np.cumsum(hours_per_session) - hours_per_session
+    hour_index = first_hour[session_index] + (np.arange(session_index.size) - row_offsets[session_index])
+    overlap = (np.minimum(ends[session_index], (hour_index + 1) * HOUR_MS)
+               - np.maximum(starts[session_index], hour_index * HOUR_MS))
+
+    weekday = (hour_index // 24 + 3) % 7 # 1970-01-01 was a Thursday
+    np.add.at(grid, (weekday, hour_index % 24), overlap)
+    return grid
+
+def switch_counts(start_local_ms, service_ids):
+    """
+    Counts context switches (a session whose service differs from the previous one).
+    Returns (switches per local day as {day_index: count}, switches per hour of day as an array of 24).
+    day_index is the number of days since 1970-01-01 in local time.
+    """
+    starts = np.asarray(start_local_ms, dtype=np.int64)
+    services = np.asarray(service_ids, dtype=np.int64)
+    if starts.size < 2:
+        return {}, np.zeros(24, dtype=np.int64)
+
+    order = np.argsort(starts, kind='stable')
+    starts, services = starts[order], services[order]
+    switch_starts = starts[1:][services[1:] != services[:-1]]
+
+    days, counts = np.unique(switch_starts // DAY_MS, return_counts=True)
+    per_hour = np.bincount((switch_starts // HOUR_MS) % 24, minlength=24)
+    return dict(zip(days.tolist(), counts.tolist())), per_hour
+
+def unread_increments_per_day(service_ids, ts_local_ms, counts):
+    """
+    Estimates incoming message volume from unread count samples: the positive jumps
+    between consecutive samples of the same service, summed per local day.
+    The first sample of each service is only a baseline. Returns {day_index: messages}.
+    """
+    services = np.asarray(service_ids, dtype=np.int64)
+    stamps = np.asarray(ts_local_ms, dtype=np.int64)
+    values = np.asarray(counts, dtype=np.int64)
+    if services.size < 2:
+        return {}
+
+    order = np.lexsort((stamps, services)) # by service, then time
+    services, stamps, values = services[order], stamps[order], values[order]
+    same_service = services[1:] == services[:-1]
+    increments = np.where(same_service, np.maximum(values[1:] - values[:-1], 0), 0)
+
+    mask = increments > 0
+    if not mask.any():
+        return {}
+    unique_days, inverse = np.unique((stamps[1:] // DAY_MS)[mask], return_inverse=True)
+    totals = np.bincount(inverse, weights=increments[mask])
+    return {int(day): int(total) for day, total in zip(unique_days, totals)}
@@ -0,0 +1,327 @@
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+from app.db.database import DB_FILE, RETRIEVAL_SOURCES
+
+RETRIEVAL_INDEX_DIR = DB_FILE.parent / "retrieval_index"
+VECTORS_FILE = "vectors.npy"
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30 # Words repeated at the start of the next chunk, so no sentence is cut off from its context
+SYNC_BATCH_DOCS = 200
+EMBED_BATCH = 32
+INITIAL_CAPACITY = 256
+DEFAULT_TOP_K = 5
+DEFAULT_ALPHA = 0.5 # Weight of the cosine similarity; the rest goes to bm25
+CANDIDATES = 50 # Chunks taken from each ranking before they are merged
+DEFAULT_CONTEXT_CHARS = 4000
+SOURCE_LABELS = {"note": "Nota", "card": "Tarjeta"}
+
+def chunk_text(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """Splits text into windows of at most `words` words, consecutive windows sharing `overlap` words."""
+    tokens = text.split()
+    if not tokens:
+        return []
+    step = max(1, words - overlap)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(" ".join(tokens[start:start + words]))
+        if start + words >= len(tokens):
+            break
+    return chunks
+
+def fts_query(text: str) -> str | None:
+    """OR of the quoted words of text (3+ characters), safe to pass to MATCH."""
+    words = dict.fromkeys(w for w in re.findall(r"\w+", text.lower()) if len(w) >= 3)
+    return " OR ".join(f'"{w}"' for w in words) or None
+
+def build_grounded_prompt(question: str, results: list[dict], max_chars: int = DEFAULT_CONTEXT_CHARS) -> str:
+    """Prompt answering question from the retrieved chunks, keeping the context within max_chars."""
+    context, used = [], 0
+    for result in results:
+        entry = f"[{SOURCE_LABELS.get(result['source'], result['source'])} {result['doc_id']}] {result['content']}"
+        if used + len(entry) > max_chars:
+            break
+        context.append(entry)
+        used += len(entry)
+    if not context:
+        return question
+    return ("Responde a la pregunta usando el siguiente contexto extraído de mis notas y tarjetas Kanban. "
+            "Si el contexto no basta para responder, dilo.\n\n"
+            "Contexto:\n" + "\n\n".join(context) + f"\n\nPregunta: {question}")
+
+class RetrievalIndex:
+    """
+    Finds the chunks of notes and Kanban cards most relevant to a question.
+
+    Documents are split into overlapping word windows stored in retrieval_chunks, whose
+    retrieval_chunks_fts table gives bm25 scores. Each chunk is embedded with
+    embed(texts) -> list of vectors; the normalized vectors are rows of one float32 matrix
+    kept in vectors.npy and memory-mapped for reads and writes, and vector_row links a
+    chunk to its row. Rows of deleted chunks are reused.
+
+    Triggers on notes and kanban_cards append every change to retrieval_queue; sync()
+    drains it, re-chunking only the documents that changed, then embeds the chunks still
+    without a vector. Chunks whose embedding failed are still found by bm25 and are
+    embedded on a later sync. Safe to use from worker threads; give it a connection of its
+    own, since its transactions must not interleave with those of the UI thread.
+    """
+
+    def __init__(self, conn, directory=RETRIEVAL_INDEX_DIR, embed=None):
+        self.conn = conn
+        self.directory = str(directory)
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._vectors = None # (capacity, D) float32 memmap
+        self._row_chunks = np.zeros(0, dtype=np.int64) # Chunk id of each row, -1 if free
+        self._loaded = False # Loaded on first use, once the schema exists
+
+    # --- Vector storage ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+
+    def _load(self):
+        try:
+            self._vectors = np.load(self._path(VECTORS_FILE), mmap_mode='r+')
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable retrieval vectors: {e}")
+        if self._vectors is not None and self._vectors.ndim != 2:
+            logging.warning("Discarding retrieval vectors: unexpected shape")
+            self._vectors = None
+        capacity = len(self._vectors) if self._vectors is not None else 0
+        rows = self.conn.execute("SELECT id, vector_row FROM retrieval_chunks WHERE vector_row IS NOT NULL").fetchall()
+        if any(row >= capacity for _, row in rows):
+            # The matrix was lost or cut short: embed everything again
+            self._reset_vectors()
+            return
+        self._row_chunks = np.full(capacity, -1, dtype=np.int64)
+        for chunk_id, row in rows:
+            self._row_chunks[row] = chunk_id
+
+    def _reset_vectors(self):
+        """Forgets every embedding; the next sync embeds all chunks again."""
+        self._vectors = None
+        self._row_chunks = np.zeros(0, dtype=np.int64)
+        with self.conn:
+            self.conn.execute("UPDATE retrieval_chunks SET vector_row = NULL WHERE vector_row IS NOT NULL")
+        try:
+            os.remove(self._path(VECTORS_FILE))
+        except FileNotFoundError:
+            pass
+
+    def _allocate_rows(self, count: int, dimensions: int) -> np.ndarray:
+        """Returns count free rows, growing (or creating) the matrix file when needed."""
+        free = np.flatnonzero(self._row_chunks == -1)
+        if len(free) >= count:
+            return free[:count]
+        old_capacity = len(self._row_chunks)
+        capacity = max(INITIAL_CAPACITY, old_capacity)
+        while capacity - old_capacity + len(free) < count:
+            capacity *= 2
+        os.makedirs(self.directory, exist_ok=True)
+        # Copy into a bigger file and swap; both maps are closed before the swap (Windows)
+        tmp_path = self._path(VECTORS_FILE + ".tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dimensions))
+        if self._vectors is not None:
+            grown[:old_capacity] = self._vectors
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self._path(VECTORS_FILE))
+        self._vectors = np.load(self._path(VECTORS_FILE), mmap_mode='r+')
+        self._row_chunks = np.concatenate([self._row_chunks, np.full(capacity - old_capacity, -1, dtype=np.int64)])
+        return np.flatnonzero(self._row_chunks == -1)[:count]
+
+    # --- Indexing ---
+
+    def _document_text(self, source: str, doc_id: int) -> str | None:
+        table, columns = RETRIEVAL_SOURCES[source]
+        row = self.conn.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return None
+        return "\n".join(value for value in row if value)
+
+    def _apply_changes(self, limit: int) -> int:
+        """Re-chunks the documents of the oldest `limit` queued changes; returns how many changes were drained."""
+        changes = self.conn.execute(
+            "SELECT id, source, doc_id FROM retrieval_queue ORDER BY id LIMIT ?", (limit,)).fetchall()
+        if not changes:
+            return 0
+        freed = []
+        with self.conn:
+            for source, doc_id in dict.fromkeys((source, doc_id) for _, source, doc_id in changes):
+                if source not in RETRIEVAL_SOURCES:
+                    continue
+                freed += [row for (row,) in self.conn.execute(
+                    "SELECT vector_row FROM retrieval_chunks WHERE source = ? AND doc_id = ? AND vector_row IS NOT NULL",
+                    (source, doc_id))]
+                self.conn.execute("DELETE FROM retrieval_chunks WHERE source = ? AND doc_id = ?", (source, doc_id))
+                text = self._document_text(source, doc_id)
+                if text:
+                    self.conn.executemany(
+                        "INSERT INTO retrieval_chunks (source, doc_id, position, content) VALUES (?, ?, ?, ?)",
+                        [(source, doc_id, position, chunk) for position, chunk in enumerate(chunk_text(text))])
+            # By id: a change queued meanwhile stays for the next sync
+            self.conn.executemany("DELETE FROM retrieval_queue WHERE id = ?", [(change[0],) for change in changes])
+        # Freed rows become reusable only once the deletions are committed
+        self._row_chunks[freed] = -1
+        return len(changes)
+
+    def _embed_pending(self) -> int:
+        """Embeds up to EMBED_BATCH chunks without a vector; returns how many were embedded."""
+        pending = self.conn.execute(
+            "SELECT id, content FROM retrieval_chunks WHERE vector_row IS NULL ORDER BY id LIMIT ?",
+            (EMBED_BATCH,)).fetchall()
+        if not pending:
+            return 0
+        vectors = np.asarray(self.embed([content for _, content in pending]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        if self._vectors is not None and self._vectors.shape[1] != vectors.shape[1]:
+            # The embedding model changed: old vectors are not comparable
+            self._reset_vectors()
+        rows = self._allocate_rows(len(pending), vectors.shape[1])
+        # Vectors are flushed before the rows are recorded: a crash in between only leaks free rows
+        self._vectors[rows] = vectors
+        self._vectors.flush()
+        chunk_ids = [chunk_id for chunk_id, _ in pending]
+        with self.conn:
+            self.conn.executemany("UPDATE retrieval_chunks SET vector_row = ? WHERE id = ?",
+                                  zip(rows.tolist(), chunk_ids))
+        self._row_chunks[rows] = chunk_ids
+        return len(pending)
+
+    def sync(self, with_embeddings: bool = True) -> dict:
+        """
+        Applies the queued changes, then embeds pending chunks unless with_embeddings is
+        False (chunking and keyword search are local; embedding sends text to the provider).
+        Returns {'changes', 'embedded'}.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            changes = 0
+            while True:
+                drained = self._apply_changes(SYNC_BATCH_DOCS)
+                if not drained:
+                    break
+                changes += drained
+            embedded = 0
+            if with_embeddings and self.embed is not None:
+                try:
+                    while True:
+                        count = self._embed_pending()
+                        if not count:
+                            break
+                        embedded += count
+                except Exception as e:
+                    logging.warning(f"Retrieval index: embedding failed, chunks stay keyword-only for now: {e}")
+            return {'changes': changes, 'embedded': embedded}
+
+    def rebuild(self):
+        """Drops every chunk and vector and queues all notes and cards again (applied by the next sync)."""
+        with self._lock:
+            self._ensure_loaded()
+            with self.conn:
+                self.conn.execute("DELETE FROM retrieval_chunks")
+                for source, (table, _) in RETRIEVAL_SOURCES.items():
+                    self.conn.execute(f"INSERT INTO retrieval_queue (source, doc_id) SELECT ?, id FROM {table}", (source,))
+            self._reset_vectors()
+
+    # --- Retrieval ---
+
+    def _lexical_scores(self, query: str) -> dict:
+        """bm25 of the best CANDIDATES chunks, scaled so the best one scores 1."""
+        match = fts_query(query)
+        if match is None:
+            return {}
+        rows = self.conn.execute(
+            "SELECT rowid, bm25(retrieval_chunks_fts) FROM retrieval_chunks_fts "
+            "WHERE retrieval_chunks_fts MATCH ? ORDER BY rank LIMIT ?", (match, CANDIDATES)).fetchall()
+        if not rows:
+            return {}
+        best = min(score for _, score in rows) # bm25 is negative: lower is better
+        return {chunk_id: score / best if best else 0.0 for chunk_id, score in rows}
+
+    def _similarities(self, query: str, lexical: dict) -> dict:
+        """Cosine similarity of the best CANDIDATES rows and of the lexical candidates, by chunk id."""
+        live = self._row_chunks != -1
+        if self.embed is None or not live.any():
+            return {}
+        try:
+            vector = np.asarray(self.embed([query])[0], dtype=np.float32)
+        except Exception as e:
+            logging.warning(f"Retrieval index: query embedding failed, using keywords only: {e}")
+            return {}
+        norm = np.linalg.norm(vector)
+        if not norm or len(vector) != self._vectors.shape[1]:
+            return {}
+        similarities = self._vectors @ (vector / norm)
+        similarities[~live] = -np.inf
+        count = min(CANDIDATES, int(live.sum()))
+        best_rows = np.argpartition(-similarities, count - 1)[:count]
+        result = {int(self._row_chunks[row]): float(similarities[row]) for row in best_rows}
+        rows_by_chunk = {int(chunk_id): row for row, chunk_id in zip(np.flatnonzero(live), self._row_chunks[live])}
+        for chunk_id in lexical:
+            if chunk_id not in result and chunk_id in rows_by_chunk:
+                result[chunk_id] = float(similarities[rows_by_chunk[chunk_id]])
+        return result
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K, alpha: float = DEFAULT_ALPHA) -> list[dict]:
+        """
+        Top k chunks for query by alpha * cosine similarity + (1 - alpha) * scaled bm25.
+
+        Returns:
+            list of dicts with source ('note' or 'card'), doc_id, position, content, score,
+            similarity and lexical, best first.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            lexical = self._lexical_scores(query)
+            semantic = self._similarities(query, lexical)
+            scores = {chunk_id: alpha * max(semantic.get(chunk_id, 0.0), 0.0) + (1 - alpha) * lexical.get(chunk_id, 0.0)
+                      for chunk_id in lexical.keys() | semantic.keys()}
+            best = sorted(scores, key=scores.get, reverse=True)[:k]
+            if not best:
+                return []
+            placeholders = ",".join("?" * len(best))
+            rows = {row[0]: row for row in self.conn.execute(
+                f"SELECT id, source, doc_id, position, content FROM retrieval_chunks WHERE id IN ({placeholders})", best)}
+            return [{
+                'source': rows[chunk_id][1],
+                'doc_id': rows[chunk_id][2],
+                'position': rows[chunk_id][3],
+                'content': rows[chunk_id][4],
+                'score': round(scores[chunk_id], 4),
+                'similarity': round(semantic.get(chunk_id, 0.0), 4),
+                'lexical': round(lexical.get(chunk_id, 0.0), 4),
+            } for chunk_id in best if chunk_id in rows]
+
+    def grounded_prompt(self, question: str, k: int = DEFAULT_TOP_K, max_chars: int = DEFAULT_CONTEXT_CHARS) -> str:
+        """Syncs the index and returns question wrapped with its top k chunks (blocking: call off the UI thread)."""
+        self.sync()
+        return build_grounded_prompt(question, self.search(question, k), max_chars)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            chunks, embedded = self.conn.execute(
+                "SELECT COUNT(*), COUNT(vector_row) FROM retrieval_chunks").fetchone()
+            queued = self.conn.execute("SELECT COUNT(*) FROM retrieval_queue").fetchone()[0]
+            return {
+                'chunks': chunks,
+                'embedded': embedded,
+                'queued_changes': queued,
+                'capacity': len(self._row_chunks),
+                'dimensions': self._vectors.shape[1] if self._vectors is not None else 0,
+            }
@@ -1,12 +1,10 @@
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidTag
 import os
-import base64
-
-# from app.db.database import get_db_connection # No longer needed directly by methods
 
 # Scrypt parameters as per blueprint
 SCRYPT_N = 2**15
@@ -14,6 +12,40 @@ SCRYPT_R = 8
 SCRYPT_P = 1
 KEY_LENGTH = 32 # AES-256
 
+# Row formats (first byte of credentials.data)
+FORMAT_LEGACY_SCRYPT = 1 # key = scrypt(passphrase, per-secret salt): one scrypt per access
+FORMAT_HKDF = 2 # key = HKDF-SHA256(data key, per-secret salt, secret id); scrypt runs once per unlock
+
+TEST_SECRET_ID = '_vault_test_'
+# vault_config rows. Envelope scheme: a random data key (DEK) encrypts the secrets and only
+# the DEK is encrypted ("wrapped") with the key derived from the passphrase (KEK).
+KEK_SALT_KEY = 'kek_salt'
+WRAPPED_DEK_KEY = 'wrapped_dek' # nonce + AES-GCM(KEK, DEK) + tag
+MASTER_SALT_KEY = 'master_salt' # Pre-envelope vaults: the passphrase-derived key was the data key
+HKDF_INFO_PREFIX = b"infomensajero/vault/secret/"
+DEK_AAD = b"infomensajero/vault/dek"
+ROTATION_BATCH_SIZE = 100
+
+SALT_LENGTH = 16
+NONCE_LENGTH = 12
+
+def pack_credential(version: int, salt: bytes, nonce: bytes, enc_data: bytes) -> bytes:
+    """Packs a secret row: version byte | salt (16) | nonce (12) | ciphertext + tag."""
+    if len(salt) != SALT_LENGTH or len(nonce) != NONCE_LENGTH:
+        raise ValueError("Invalid salt or nonce length.")
+    return bytes((version,)) + salt + nonce + enc_data
+
+def unpack_credential(data: bytes) -> tuple[int, bytes, bytes, bytes]:
+    """Returns (version, salt, nonce, ciphertext + tag) from a packed row."""
+    header = 1 + SALT_LENGTH + NONCE_LENGTH
+    if len(data) < header + 16:
+        raise ValueError("Packed credential is too short.")
+    return data[0], data[1:1 + SALT_LENGTH], data[1 + SALT_LENGTH:header], data[header:]
+
+def zeroize(buffer: bytearray):
+    """Overwrites key material in place. Best effort: copies made by the crypto library are not reachable."""
+    buffer[:] = bytes(len(buffer))
+
 class Vault:
     def __init__(self, conn):
         self.conn = conn
@@ -29,65 +61,211 @@ class Vault:
         )
         return kdf.derive(passphrase.encode('utf-8'))
 
-    def save_secret(self, secret_id: str, plaintext: str, passphrase: str):
-        """Encrypts and saves a secret to the database."""
-        salt = os.urandom(16) # Generate a random salt for KDF
-        key = self._derive_key(passphrase, salt)
-        nonce = os.urandom(12) # AES-GCM recommended nonce size is 12 bytes
+    def _derive_secret_key(self, data_key: bytearray, salt: bytes, secret_id: str) -> bytes:
+        """Per-secret key: HKDF of the data key, bound to the secret's salt and id."""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=KEY_LENGTH,
+            salt=salt,
+            info=HKDF_INFO_PREFIX + secret_id.encode('utf-8'),
+            backend=default_backend()
+        )
+        return hkdf.derive(bytes(data_key))
 
-        cipher = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend())
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(plaintext.encode('utf-8')) + encryptor.finalize()
+    # --- Key envelope ---
 
-        # Store encrypted data, nonce, salt, and tag
-        enc_blob = base64.b64encode(ciphertext + encryptor.tag).decode('utf-8')
-        nonce_b64 = base64.b64encode(nonce).decode('utf-8')
-        salt_b64 = base64.b64encode(salt).decode('utf-8')
+    def _get_config(self, key: str) -> bytes | None:
+        row = self.conn.execute("SELECT value FROM vault_config WHERE key = ?", (key,)).fetchone()
+        return bytes(row[0]) if row else None
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO credentials (id, enc_blob, nonce, salt) VALUES (?, ?, ?, ?)",
-            (secret_id, enc_blob, nonce_b64, salt_b64)
-        )
-        self.conn.commit()
+    def _set_config(self, key: str, value: bytes):
+        self.conn.execute("INSERT OR REPLACE INTO vault_config (key, value) VALUES (?, ?)", (key, value))
 
-    def get_secret(self, secret_id: str, passphrase: str) -> str | None:
-        """Retrieves and decrypts a secret from the database."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT enc_blob, nonce, salt FROM credentials WHERE id = ?", (secret_id,))
-        row = cursor.fetchone()
+    def derive_master_key(self, passphrase: str, salt: bytes) -> bytearray:
+        """Stretches the passphrase (scrypt) into a key-encryption key."""
+        return bytearray(self._derive_key(passphrase, salt))
 
-        if not row:
-            return None # Secret not found
+    def _store_wrapped_data_key(self, data_key: bytearray, passphrase: str):
+        """Wraps the data key with a key derived from passphrase under a fresh salt (no commit)."""
+        salt = os.urandom(16)
+        kek = self.derive_master_key(passphrase, salt)
+        nonce = os.urandom(12)
+        encryptor = Cipher(algorithms.AES(bytes(kek)), modes.GCM(nonce), backend=default_backend()).encryptor()
+        encryptor.authenticate_additional_data(DEK_AAD)
+        wrapped = encryptor.update(bytes(data_key)) + encryptor.finalize()
+        zeroize(kek)
+        self._set_config(KEK_SALT_KEY, salt)
+        self._set_config(WRAPPED_DEK_KEY, nonce + wrapped + encryptor.tag)
+        self.conn.execute("DELETE FROM vault_config WHERE key = ?", (MASTER_SALT_KEY,))
 
-        enc_blob_b64, nonce_b64, salt_b64 = row['enc_blob'], row['nonce'], row['salt']
+    def _unwrap_data_key(self, passphrase: str) -> bytearray | None:
+        salt, blob = self._get_config(KEK_SALT_KEY), self._get_config(WRAPPED_DEK_KEY)
+        kek = self.derive_master_key(passphrase, salt)
+        nonce, wrapped, tag = blob[:12], blob[12:-16], blob[-16:]
+        try:
+            decryptor = Cipher(algorithms.AES(bytes(kek)), modes.GCM(nonce, tag), backend=default_backend()).decryptor()
+            decryptor.authenticate_additional_data(DEK_AAD)
+            return bytearray(decryptor.update(wrapped) + decryptor.finalize())
+        except InvalidTag:
+            return None # Incorrect passphrase
+        finally:
+            zeroize(kek)
 
-        enc_data_with_tag = base64.b64decode(enc_blob_b64)
-        nonce = base64.b64decode(nonce_b64)
-        salt = base64.b64decode(salt_b64)
+    def create_vault(self, passphrase: str) -> bytearray:
+        """Starts a new vault: a random data key wrapped by the passphrase, plus the test secret."""
+        data_key = bytearray(os.urandom(KEY_LENGTH))
+        with self.conn:
+            self._store_wrapped_data_key(data_key, passphrase)
+            self._write_secret(TEST_SECRET_ID, 'ok', data_key)
+        return data_key
 
-        key = self._derive_key(passphrase, salt)
+    def open_vault(self, passphrase: str) -> bytearray | None:
+        """
+        Returns the data key of an existing (format 2) vault, or None if the passphrase is wrong.
+        A vault from before the envelope scheme keeps its passphrase-derived key as data key;
+        it is wrapped on the first unlock, so no secret needs re-encrypting.
+        """
+        if self._get_config(WRAPPED_DEK_KEY) is not None:
+            return self._unwrap_data_key(passphrase)
+        master_salt = self._get_config(MASTER_SALT_KEY)
+        if master_salt is None:
+            return None
+        data_key = self.derive_master_key(passphrase, master_salt)
+        if self.get_secret(TEST_SECRET_ID, data_key) != 'ok':
+            zeroize(data_key)
+            return None
+        with self.conn:
+            self._store_wrapped_data_key(data_key, passphrase)
+        return data_key
+
+    # --- Encryption helpers ---
 
+    @staticmethod
+    def _encrypt(key: bytes, plaintext: str) -> tuple[bytes, bytes]:
+        """Returns (nonce, ciphertext + tag)."""
+        nonce = os.urandom(12) # AES-GCM recommended nonce size is 12 bytes
+        cipher = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend())
+        encryptor = cipher.encryptor()
+        ciphertext = encryptor.update(plaintext.encode('utf-8')) + encryptor.finalize()
+        return nonce, ciphertext + encryptor.tag
+
+    @staticmethod
+    def _decrypt(key: bytes, nonce: bytes, enc_data_with_tag: bytes) -> str | None:
         # Separate ciphertext and tag
         ciphertext = enc_data_with_tag[:-16] # GCM tag is 16 bytes
         tag = enc_data_with_tag[-16:]
-
         try:
             cipher = Cipher(algorithms.AES(key), modes.GCM(nonce, tag), backend=default_backend())
             decryptor = cipher.decryptor()
             plaintext = decryptor.update(ciphertext) + decryptor.finalize()
             return plaintext.decode('utf-8')
         except InvalidTag:
-            # Incorrect passphrase or corrupted data
+            # Incorrect key or corrupted data
             return None
         except Exception as e:
             print(f"Error decrypting secret: {e}")
             return None
 
+    def _pack_secret(self, secret_id: str, plaintext: str, data_key: bytearray) -> bytes:
+        """Encrypts a secret with its HKDF subkey and returns the packed row."""
+        salt = os.urandom(SALT_LENGTH) # Per-secret HKDF salt
+        nonce, enc_data = self._encrypt(self._derive_secret_key(data_key, salt, secret_id), plaintext)
+        return pack_credential(FORMAT_HKDF, salt, nonce, enc_data)
+
+    def _write_secret(self, secret_id: str, plaintext: str, data_key: bytearray):
+        """Encrypts a secret and writes the row (no commit)."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO credentials (id, data) VALUES (?, ?)",
+            (secret_id, self._pack_secret(secret_id, plaintext, data_key))
+        )
+
+    def _read_row(self, secret_id: str):
+        """Returns (version, salt, nonce, enc_data) or None."""
+        row = self.conn.execute("SELECT data FROM credentials WHERE id = ?", (secret_id,)).fetchone()
+        return unpack_credential(bytes(row[0])) if row else None
+
+    # --- Secrets ---
+
+    def save_secret(self, secret_id: str, plaintext: str, data_key: bytearray):
+        """Encrypts and saves a secret to the database."""
+        with self.conn:
+            self._write_secret(secret_id, plaintext, data_key)
+
+    def get_secret(self, secret_id: str, data_key: bytearray) -> str | None:
+        """Retrieves and decrypts a secret from the database."""
+        row = self._read_row(secret_id)
+        if not row:
+            return None # Secret not found
+        version, salt, nonce, enc_data = row
+        if version != FORMAT_HKDF:
+            print(f"Secret '{secret_id}' has not been migrated to the current vault format.")
+            return None
+        return self._decrypt(self._derive_secret_key(data_key, salt, secret_id), nonce, enc_data)
+
+    def get_all_secrets(self, data_key: bytearray) -> list[tuple[str, str]]:
+        """Decrypts every user secret in one query. Returns [(secret_id, plaintext)] ordered by id."""
+        secrets = []
+        for row in self.conn.execute("SELECT id, data FROM credentials WHERE id != ? ORDER BY id", (TEST_SECRET_ID,)):
+            version, salt, nonce, enc_data = unpack_credential(bytes(row['data']))
+            plaintext = None
+            if version == FORMAT_HKDF:
+                plaintext = self._decrypt(self._derive_secret_key(data_key, salt, row['id']), nonce, enc_data)
+            if plaintext is None:
+                raise ValueError(f"Secret '{row['id']}' could not be decrypted.")
+            secrets.append((row['id'], plaintext))
+        return secrets
+
+    def save_secrets(self, secrets, data_key: bytearray, replace: bool = True) -> int:
+        """
+        Encrypts and writes many (secret_id, plaintext) pairs in a single transaction.
+        With replace=False existing secrets are kept. Returns the number of rows written
+        (skipped existing secrets are not counted).
+        """
+        rows = [(secret_id, self._pack_secret(secret_id, plaintext, data_key))
+                for secret_id, plaintext in secrets if secret_id != TEST_SECRET_ID]
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self.conn:
+            cursor = self.conn.executemany(f"{verb} INTO credentials (id, data) VALUES (?, ?)", rows)
+        return cursor.rowcount
+
+    def get_test_secret_version(self) -> int | None:
+        """Format of the test secret, or None for a new vault."""
+        row = self.conn.execute("SELECT substr(data, 1, 1) FROM credentials WHERE id = ?", (TEST_SECRET_ID,)).fetchone()
+        return row[0][0] if row else None
+
+    def get_legacy_secret(self, secret_id: str, passphrase: str) -> str | None:
+        """Decrypts a format 1 row (scrypt with the row's own salt)."""
+        row = self._read_row(secret_id)
+        if not row or row[0] != FORMAT_LEGACY_SCRYPT:
+            return None
+        _, salt, nonce, enc_data = row
+        return self._decrypt(self._derive_key(passphrase, salt), nonce, enc_data)
+
+    def migrate_legacy_secrets(self, passphrase: str) -> bytearray | None:
+        """
+        Converts a format 1 vault: creates a wrapped data key and re-encrypts every legacy row
+        with its HKDF subkey, all in one transaction (a failure leaves the vault untouched).
+        Returns the data key, or None if the passphrase is wrong.
+        """
+        if self.get_legacy_secret(TEST_SECRET_ID, passphrase) != 'ok':
+            return None
+        data_key = bytearray(os.urandom(KEY_LENGTH))
+        legacy_ids = [row['id'] for row in self.conn.execute(
+            "SELECT id FROM credentials WHERE substr(data, 1, 1) = ?", (bytes((FORMAT_LEGACY_SCRYPT,)),))]
+        with self.conn:
+            self._store_wrapped_data_key(data_key, passphrase)
+            for secret_id in legacy_ids:
+                plaintext = self.get_legacy_secret(secret_id, passphrase)
+                if plaintext is None:
+                    print(f"Skipping secret '{secret_id}': it could not be decrypted with the vault passphrase.")
+                    continue
+                self._write_secret(secret_id, plaintext, data_key)
+        return data_key
+
     def get_all_secret_ids(self) -> list[str]:
         """Retrieves all secret IDs from the database, excluding internal ones."""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT id FROM credentials WHERE id != '_vault_test_' ORDER BY id")
+        cursor.execute("SELECT id FROM credentials WHERE id != ? ORDER BY id", (TEST_SECRET_ID,))
         rows = cursor.fetchall()
         return [row['id'] for row in rows]
 
@@ -98,16 +276,58 @@ class Vault:
         rows = cursor.fetchall()
         return [row['id'] for row in rows]
 
-    def change_passphrase(self, old_passphrase: str, new_passphrase: str):
-        """Re-encrypts all secrets with a new passphrase."""
-        secret_ids = self.get_all_secrets_for_reencryption()
-        for secret_id in secret_ids:
-            plaintext = self.get_secret(secret_id, old_passphrase)
-            if plaintext is not None:
-                self.save_secret(secret_id, plaintext, new_passphrase)
+    def change_passphrase(self, data_key: bytearray, new_passphrase: str):
+        """Re-wraps the data key with the new passphrase: one row, one transaction, whatever the vault size."""
+        with self.conn:
+            self._store_wrapped_data_key(data_key, new_passphrase)
+
+    def rotate_data_key(self, data_key: bytearray, passphrase: str, batch_size: int = ROTATION_BATCH_SIZE,
+                        progress=None) -> bytearray:
+        """
+        Replaces the data key: secrets are re-encrypted in batches of batch_size (keyset
+        pagination, so memory stays bounded) and the new key is wrapped with passphrase.
+        Everything happens in one transaction. progress(done, total) is called per batch.
+        passphrase must be the vault's current one: it is checked against the wrapped key
+        first, so a typo cannot lock the user out. Legacy rows that the migration could not
+        decrypt are left as they are. Returns the new data key.
+        """
+        current_key = self._unwrap_data_key(passphrase) if self._get_config(WRAPPED_DEK_KEY) else None
+        matches = current_key is not None and current_key == data_key
+        if current_key is not None:
+            zeroize(current_key)
+        if not matches:
+            raise ValueError("Incorrect vault passphrase; data key not rotated.")
+
+        current_format = bytes((FORMAT_HKDF,))
+        new_data_key = bytearray(os.urandom(KEY_LENGTH))
+        try:
+            total = self.conn.execute(
+                "SELECT COUNT(*) FROM credentials WHERE substr(data, 1, 1) = ?", (current_format,)).fetchone()[0]
+            done, last_id = 0, ""
+            with self.conn:
+                while True:
+                    ids = [row['id'] for row in self.conn.execute(
+                        "SELECT id FROM credentials WHERE id > ? AND substr(data, 1, 1) = ? ORDER BY id LIMIT ?",
+                        (last_id, current_format, batch_size))]
+                    if not ids:
+                        break
+                    for secret_id in ids:
+                        plaintext = self.get_secret(secret_id, data_key)
+                        if plaintext is None:
+                            raise ValueError(f"Secret '{secret_id}' could not be decrypted; data key not rotated.")
+                        self._write_secret(secret_id, plaintext, new_data_key)
+                    done += len(ids)
+                    last_id = ids[-1]
+                    if progress:
+                        progress(done, total)
+                self._store_wrapped_data_key(new_data_key, passphrase)
+        except BaseException:
+            zeroize(new_data_key)
+            raise
+        return new_data_key
 
     def delete_secret(self, secret_id: str):
         """Deletes a secret from the database."""
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM credentials WHERE id = ?", (secret_id,))
-        self.conn.commit()
\ No newline at end of file
+        self.conn.commit()
@@ -0,0 +1,191 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+from cryptography.exceptions import InvalidTag
+
+from app.security.vault import SCRYPT_N, SCRYPT_R, SCRYPT_P, KEY_LENGTH, SALT_LENGTH, NONCE_LENGTH
+
+# Archive layout:
+#   header: MAGIC | format version (1) | salt (16) | scrypt n, r, p (">IBB")
+#   records: payload length (">I") | final flag (1) | nonce (12) | AES-GCM(archive key, payload) + tag
+# Each record's AAD is the header plus the record index and final flag, so records cannot be
+# reordered, dropped, moved between archives or cut short without failing authentication.
+MAGIC = b"IMVAULT\x00"
+ARCHIVE_VERSION = 1
+ARCHIVE_EXTENSION = ".imvault"
+_PARAMS = struct.Struct(">IBB")
+_RECORD = struct.Struct(">IB")
+_HEADER_LENGTH = len(MAGIC) + 1 + SALT_LENGTH + _PARAMS.size
+TAG_LENGTH = 16
+
+CHUNK_SECRETS = 256 # Secrets per record
+PARALLEL_MIN_CHUNKS = 4 # Below this, starting worker threads costs more than it saves
+MAX_RECORD_BYTES = 64 * 1024 * 1024
+# Upper bounds of the scrypt parameters accepted from an archive header, which is read
+# before the passphrase can be checked: n = 2**20, r = 16 already needs 2 GiB of memory
+MAX_SCRYPT_N = 2 ** 20
+MAX_SCRYPT_R = 16
+MAX_SCRYPT_P = 4
+
+# --- Work run in the thread pool ---
+
+def _derive_archive_key(passphrase: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    kdf = Scrypt(salt=salt, length=KEY_LENGTH, n=n, r=r, p=p, backend=default_backend())
+    return kdf.derive(passphrase.encode('utf-8'))
+
+def _record_aad(header: bytes, index: int, final: bool) -> bytes:
+    return header + struct.pack(">Q?", index, final)
+
+def _seal_record(job) -> bytes:
+    key, header, index, final, payload = job
+    nonce = os.urandom(NONCE_LENGTH)
+    sealed = AESGCM(key).encrypt(nonce, payload, _record_aad(header, index, final))
+    return _RECORD.pack(len(sealed), final) + nonce + sealed
+
+def _open_record(job) -> bytes | None:
+    key, header, index, final, nonce, sealed = job
+    try:
+        return AESGCM(key).decrypt(nonce, sealed, _record_aad(header, index, final))
+    except InvalidTag:
+        return None
+
+# --- Payload encoding: (u16 id length | id | u32 value length | value)* ---
+
+def _encode_secrets(secrets) -> bytes:
+    parts = []
+    for secret_id, plaintext in secrets:
+        id_bytes, value = secret_id.encode('utf-8'), plaintext.encode('utf-8')
+        parts.append(struct.pack(">H", len(id_bytes)) + id_bytes + struct.pack(">I", len(value)) + value)
+    return b"".join(parts)
+
+def _decode_secrets(payload: bytes) -> list[tuple[str, str]]:
+    secrets, offset = [], 0
+    while offset < len(payload):
+        (id_length,) = struct.unpack_from(">H", payload, offset)
+        offset += 2
+        secret_id = payload[offset:offset + id_length].decode('utf-8')
+        offset += id_length
+        (value_length,) = struct.unpack_from(">I", payload, offset)
+        offset += 4
+        secrets.append((secret_id, payload[offset:offset + value_length].decode('utf-8')))
+        offset += value_length
+    return secrets
+
+# --- Thread pool ---
+
+def _start_pool(chunk_count: int) -> ThreadPoolExecutor | None:
+    """
+    A pool for archives large enough to benefit. Threads, not processes: AES-GCM and scrypt
+    release the GIL, and the key and plaintexts never leave this process.
+    """
+    if chunk_count < PARALLEL_MIN_CHUNKS or (os.cpu_count() or 1) < 2:
+        return None
+    return ThreadPoolExecutor(max_workers=min(os.cpu_count(), chunk_count), thread_name_prefix="vault-archive")
+
+def _derive_in_background(pool, passphrase, salt, n, r, p):
+    """Returns a zero-argument callable giving the key; in the pool, scrypt overlaps the caller's work."""
+    if pool is None:
+        key = _derive_archive_key(passphrase, salt, n, r, p)
+        return lambda: key
+    return pool.submit(_derive_archive_key, passphrase, salt, n, r, p).result
+
+# --- Export / import ---
+
+def export_secrets(secrets, passphrase: str, out_file, progress=None) -> int:
+    """
+    Writes (secret_id, plaintext) pairs to out_file (binary, write mode) as one encrypted
+    archive stream protected by passphrase. Records are encrypted in a thread pool when
+    there are enough of them. progress(done, total) is called per record written.
+    Returns the number of secrets exported.
+    """
+    secrets = list(secrets)
+    chunks = [secrets[i:i + CHUNK_SECRETS] for i in range(0, len(secrets), CHUNK_SECRETS)] or [[]]
+    salt = os.urandom(SALT_LENGTH)
+    header = MAGIC + bytes((ARCHIVE_VERSION,)) + salt + _PARAMS.pack(SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+    pool = _start_pool(len(chunks))
+    try:
+        key_result = _derive_in_background(pool, passphrase, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        payloads = [_encode_secrets(chunk) for chunk in chunks]
+        key = key_result()
+        jobs = [(key, header, index, index == len(payloads) - 1, payload) for index, payload in enumerate(payloads)]
+        records = pool.map(_seal_record, jobs) if pool else map(_seal_record, jobs)
+        out_file.write(header)
+        for index, record in enumerate(records, 1):
+            out_file.write(record)
+            if progress:
+                progress(index, len(jobs))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return len(secrets)
+
+def _read_exact(in_file, length: int) -> bytes:
+    data = in_file.read(length)
+    if len(data) != length:
+        raise ValueError("Vault archive is truncated.")
+    return data
+
+def _read_records(in_file):
+    """Returns [(final, nonce, sealed)] up to and including the final record."""
+    records = []
+    while True:
+        length, final = _RECORD.unpack(_read_exact(in_file, _RECORD.size))
+        if length < TAG_LENGTH or length > MAX_RECORD_BYTES:
+            raise ValueError("Vault archive is corrupted.")
+        nonce = _read_exact(in_file, NONCE_LENGTH)
+        records.append((bool(final), nonce, _read_exact(in_file, length)))
+        if final:
+            break
+    if in_file.read(1):
+        raise ValueError("Vault archive has data after its last record.")
+    return records
+
+def import_secrets(passphrase: str, in_file, progress=None) -> list[tuple[str, str]]:
+    """
+    Reads and authenticates a whole archive written by export_secrets. Nothing is returned
+    unless every record decrypts, so a wrong passphrase or a damaged file never yields a
+    partial import. progress(done, total) is called per record decrypted.
+    Returns [(secret_id, plaintext)]. Raises ValueError on a bad passphrase or file.
+    """
+    header = in_file.read(_HEADER_LENGTH)
+    if len(header) != _HEADER_LENGTH or not header.startswith(MAGIC):
+        raise ValueError("Not a vault archive.")
+    if header[len(MAGIC)] != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported vault archive version: {header[len(MAGIC)]}.")
+    salt = header[len(MAGIC) + 1:len(MAGIC) + 1 + SALT_LENGTH]
+    n, r, p = _PARAMS.unpack(header[-_PARAMS.size:])
+    # Checked before scrypt runs: a crafted header must not demand unbounded memory or CPU
+    if not (2 <= n <= MAX_SCRYPT_N and n & (n - 1) == 0 and 1 <= r <= MAX_SCRYPT_R and 1 <= p <= MAX_SCRYPT_P):
+        raise ValueError("Vault archive has unsupported key derivation parameters.")
+
+    records = _read_records(in_file)
+    pool = _start_pool(len(records))
+    try:
+        key = _derive_in_background(pool, passphrase, salt, n, r, p)()
+        jobs = [(key, header, index, final, nonce, sealed) for index, (final, nonce, sealed) in enumerate(records)]
+        secrets = []
+        for index, payload in enumerate(pool.map(_open_record, jobs) if pool else map(_open_record, jobs), 1):
+            if payload is None:
+                raise ValueError("Incorrect archive passphrase or corrupted archive.")
+            secrets.extend(_decode_secrets(payload))
+            if progress:
+                progress(index, len(jobs))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return secrets
+
+def export_to_file(secrets, passphrase: str, path: str, progress=None) -> int:
+    """export_secrets() into a new file at path."""
+    with open(path, "wb") as out_file:
+        return export_secrets(secrets, passphrase, out_file, progress=progress)
+
+def import_from_file(passphrase: str, path: str, progress=None) -> list[tuple[str, str]]:
+    """import_secrets() from the archive file at path."""
+    with open(path, "rb") as in_file:
+        return import_secrets(passphrase, in_file, progress=progress)
@@ -1,6 +1,5 @@
-from cryptography.exceptions import InvalidTag
-
-from app.security.vault import Vault
+from app.security.vault import Vault, FORMAT_LEGACY_SCRYPT, zeroize
+from app.security.vault_archive import export_to_file, import_from_file
 
 class VaultManager:
     def __init__(self, conn):
@@ -8,58 +7,60 @@ class VaultManager:
             raise ValueError("Database connection cannot be None.")
         self._conn = conn
         self._vault = Vault(self._conn)
-        self._master_passphrase = None
+        self._data_key = None # bytearray, unwrapped once per unlock and zeroized on lock()
+        self._running_tasks = 0 # Exports/imports in progress; the vault cannot be locked meanwhile
 
     def is_locked(self) -> bool:
-        """Check if the vault is currently locked (i.e., no master passphrase set)."""
-        return self._master_passphrase is None
+        """Check if the vault is currently locked (i.e., no data key in memory)."""
+        return self._data_key is None
 
     def unlock(self, passphrase: str) -> bool:
         """Tries to unlock the vault with the given passphrase.
 
-        It does this by trying to decrypt a known test secret. If it succeeds,
-        the passphrase is correct and is stored for the session.
+        The passphrase is stretched once into a key that unwraps the vault's data key,
+        which is kept for the session. Vaults in the old per-secret scrypt format are
+        migrated on the first successful unlock.
         """
-        # Check if the test secret exists in the database
-        cursor = self._conn.cursor()
-        cursor.execute("SELECT 1 FROM credentials WHERE id = '_vault_test_'")
-        test_secret_exists = cursor.fetchone() is not None
-
-        if not test_secret_exists:
-            # This is a new vault, create the test secret and unlock
-            self._vault.save_secret('_vault_test_', 'ok', passphrase)
-            self._master_passphrase = passphrase
+        try:
+            version = self._vault.get_test_secret_version()
+            if version is None:
+                # This is a new vault, create its data key and the test secret
+                data_key = self._vault.create_vault(passphrase)
+            elif version == FORMAT_LEGACY_SCRYPT:
+                data_key = self._vault.migrate_legacy_secrets(passphrase)
+            else:
+                data_key = self._vault.open_vault(passphrase)
+        except Exception as e:
+            print(f"Error unlocking vault: {e}")
+            return False
+        if data_key is None:
+            # Incorrect passphrase
+            return False
+        if self.is_busy():
+            # Same passphrase, same data key: keep the one the running task relies on
+            zeroize(data_key)
             return True
-        else:
-            # Test secret exists, try to decrypt it to verify the passphrase
-            try:
-                test_secret_value = self._vault.get_secret('_vault_test_', passphrase)
-                if test_secret_value == 'ok':
-                    self._master_passphrase = passphrase
-                    return True
-                else:
-                    # Decryption failed or returned something other than 'ok'
-                    return False
-            except InvalidTag:
-                # Incorrect passphrase
-                return False
-            except Exception:
-                # Other errors during decryption
-                return False
+        self.lock()
+        self._data_key = data_key
+        return True
 
     def lock(self):
-        """Locks the vault by clearing the master passphrase from memory."""
-        self._master_passphrase = None
+        """Locks the vault by zeroizing the data key held in memory. Refused while a task is running."""
+        if self.is_busy():
+            raise PermissionError("Vault is busy with an export or import.")
+        if self._data_key is not None:
+            zeroize(self._data_key)
+        self._data_key = None
 
     def save_secret(self, secret_id: str, plaintext: str):
         if self.is_locked():
             raise PermissionError("Vault is locked.")
-        self._vault.save_secret(secret_id, plaintext, self._master_passphrase)
+        self._vault.save_secret(secret_id, plaintext, self._data_key)
 
     def get_secret(self, secret_id: str) -> str | None:
         if self.is_locked():
             raise PermissionError("Vault is locked.")
-        return self._vault.get_secret(secret_id, self._master_passphrase)
+        return self._vault.get_secret(secret_id, self._data_key)
 
     def get_all_secret_ids(self) -> list[str]:
         if self.is_locked():
@@ -75,9 +76,57 @@ class VaultManager:
         if self.is_locked():
             # This should not happen if unlock is called before, but as a safeguard
             raise PermissionError("Vault is locked. Unlock with old passphrase first.")
-        
-        # Re-encrypt all secrets with the new passphrase
-        self._vault.change_passphrase(old_passphrase, new_passphrase)
-        
-        # Update the in-memory master passphrase
-        self._master_passphrase = new_passphrase
+
+        # Only the data key is re-wrapped (old_passphrase was verified by unlock)
+        self._vault.change_passphrase(self._data_key, new_passphrase)
+
+    def rotate_data_key(self, passphrase: str, progress=None):
+        """
+        Re-encrypts every secret under a new data key (e.g. after a suspected key leak).
+        Raises ValueError, leaving the vault untouched, if passphrase is not the current one.
+        """
+        if self.is_locked():
+            raise PermissionError("Vault is locked.")
+        if self.is_busy():
+            raise PermissionError("Vault is busy with an export or import.")
+        new_data_key = self._vault.rotate_data_key(self._data_key, passphrase, progress=progress)
+        self.lock()
+        self._data_key = new_data_key
+
+    def begin_task(self):
+        """Marks an export/import as running: lock() is refused until end_task()."""
+        if self.is_locked():
+            raise PermissionError("Vault is locked.")
+        self._running_tasks += 1
+
+    def end_task(self):
+        self._running_tasks = max(self._running_tasks - 1, 0)
+
+    def is_busy(self) -> bool:
+        return self._running_tasks > 0
+
+    def get_all_secrets(self) -> list[tuple[str, str]]:
+        """Returns every user secret as [(secret_id, plaintext)] ordered by id."""
+        if self.is_locked():
+            raise PermissionError("Vault is locked.")
+        return self._vault.get_all_secrets(self._data_key)
+
+    def save_secrets(self, secrets, replace: bool = True) -> int:
+        """Writes many (secret_id, plaintext) pairs in one transaction. Returns the number of secrets written."""
+        if self.is_locked():
+            raise PermissionError("Vault is locked.")
+        return self._vault.save_secrets(secrets, self._data_key, replace=replace)
+
+    def export_vault(self, path: str, archive_passphrase: str, progress=None) -> int:
+        """Writes every secret to an encrypted archive at path. Returns the number of secrets exported."""
+        return export_to_file(self.get_all_secrets(), archive_passphrase, path, progress=progress)
+
+    def import_vault(self, path: str, archive_passphrase: str, replace: bool = True, progress=None) -> int:
+        """
+        Adds the secrets of an archive to the vault in one transaction; the archive is fully
+        authenticated first. Existing secrets with the same id are replaced unless replace is False.
+        Returns the number of secrets written.
+        """
+        if self.is_locked():
+            raise PermissionError("Vault is locked.")
+        return self.save_secrets(import_from_file(archive_passphrase, path, progress=progress), replace=replace)
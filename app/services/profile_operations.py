@@ -0,0 +1,107 @@
+import os
+import shutil
+
+from app.utils.profile_storage import profile_cache_path
+
+try:
+    import fcntl
+except ImportError: # Windows: no FICLONE, files are copied
+    fcntl = None
+
+# Linux ioctl that makes dst share src's extents (btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src into dst. Returns False where the filesystem cannot do it."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+
+def clone_file(src, dst, use_reflink=True):
+    """Clones one file, preferring a reflink and falling back to a regular copy. Returns the method used."""
+    if use_reflink and _reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+def _files_below(path):
+    files = []
+    for root, _dirs, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return files
+
+def clone_profile_cache(source_profile_path, target_profile_path, progress=None):
+    """
+    Seeds a new profile with the HTTP and code caches of an existing one, so another instance
+    of a service starts with its scripts and assets already on disk. Cookies, logins and site
+    data are not copied: the new instance is meant for a different account.
+
+    Files are reflinked when the filesystem supports it (no extra space, instant) and copied
+    otherwise. Hardlinks are never used: Chromium updates cache entries in place, which would
+    corrupt the source profile's cache. progress(done, total) is called after each file.
+    Returns {'files': int, 'bytes': int, 'reflink': int, 'copy': int}.
+    """
+    source_cache = profile_cache_path(source_profile_path)
+    target_cache = profile_cache_path(target_profile_path)
+    files = _files_below(source_cache) if os.path.isdir(source_cache) else []
+    stats = {'files': 0, 'bytes': 0, 'reflink': 0, 'copy': 0}
+    use_reflink = True
+    for index, src in enumerate(files, 1):
+        dst = os.path.join(target_cache, os.path.relpath(src, source_cache))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            method = clone_file(src, dst, use_reflink)
+            stats['bytes'] += os.path.getsize(dst)
+        except OSError:
+            continue # Entry removed by Chromium while cloning; the cache tolerates gaps
+        # One failed reflink means the filesystem does not support it: stop trying
+        use_reflink = method == "reflink"
+        stats[method] += 1
+        stats['files'] += 1
+        if progress:
+            progress(index, len(files))
+    os.makedirs(target_profile_path, exist_ok=True)
+    return stats
+
+def remove_profile(profile_path, progress=None):
+    """Deletes a profile directory. progress(done, total) is called per top-level entry."""
+    if not os.path.exists(profile_path):
+        return False
+    entries = os.listdir(profile_path)
+    for index, name in enumerate(entries, 1):
+        path = os.path.join(profile_path, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if progress:
+            progress(index, len(entries))
+    shutil.rmtree(profile_path)
+    return True
+
+def rename_profile(old_profile_path, new_profile_path, progress=None):
+    """
+    Moves a profile directory. A rename on the same filesystem is atomic; across filesystems
+    shutil.move copies and then deletes the source.
+    """
+    if not os.path.exists(old_profile_path) or old_profile_path == new_profile_path:
+        return False
+    if os.path.exists(new_profile_path):
+        raise FileExistsError(f"Profile directory already exists: {new_profile_path}")
+    shutil.move(old_profile_path, new_profile_path)
+    if progress:
+        progress(1, 1)
+    return True
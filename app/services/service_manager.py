@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import sqlite3 # Keep for IntegrityError
@@ -5,18 +6,69 @@ import shutil # Added for rmtree
 
 CATALOG_FILE = os.path.join(os.path.dirname(__file__), "catalog.json")
 PROFILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "profiles")
+# Settings key holding the hash of the catalog last synced into the services table
+CATALOG_HASH_SETTING = "catalog_hash"
+
+_catalog_cache = None
 
 class ServiceManager:
     def __init__(self, conn):
         self.conn = conn
 
+    @staticmethod
+    def _read_catalog():
+        """
+        Returns the cached catalog entry ({'mtime_ns', 'size', 'hash', 'services'}), re-reading the
+        file only when its mtime or size changed, and re-parsing it only when its content hash changed.
+        """
+        global _catalog_cache
+        try:
+            stat = os.stat(CATALOG_FILE)
+        except OSError:
+            _catalog_cache = None
+            return {'mtime_ns': None, 'size': None, 'hash': None, 'services': []}
+        cached = _catalog_cache
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached
+        with open(CATALOG_FILE, 'rb') as f:
+            content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        if cached and cached['hash'] == content_hash: # Touched but unchanged
+            services = cached['services']
+        else:
+            services = json.loads(content.decode('utf-8'))
+        _catalog_cache = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': content_hash, 'services': services}
+        return _catalog_cache
+
     @staticmethod
     def load_catalog():
-        """Loads the service catalog from JSON file."""
-        if not os.path.exists(CATALOG_FILE):
-            return []
-        with open(CATALOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        """Loads the service catalog (cached; the service dicts are shared, do not modify them)."""
+        return list(ServiceManager._read_catalog()['services'])
+
+    @staticmethod
+    def catalog_hash():
+        """SHA-256 of catalog.json's content, or None if it is missing."""
+        return ServiceManager._read_catalog()['hash']
+
+    def sync_unread_scripts(self, catalog_hash=None):
+        """
+        Brings the unread_script of existing services up to date with the catalog ("WhatsApp (Work)"
+        uses the "WhatsApp" script) in a single executemany transaction, recording catalog_hash in the
+        same transaction. Returns the number of services updated.
+        """
+        catalog_scripts = {service['name']: service.get('unread_script') for service in self.load_catalog()}
+        updates = []
+        for service in self.get_all_services():
+            base_service_name = service['name'].split(' (')[0]
+            if base_service_name in catalog_scripts and service['unread_script'] != catalog_scripts[base_service_name]:
+                updates.append((catalog_scripts[base_service_name], service['id']))
+        with self.conn:
+            if updates:
+                self.conn.executemany("UPDATE services SET unread_script = ? WHERE id = ?", updates)
+            if catalog_hash is not None:
+                self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                  (CATALOG_HASH_SETTING, catalog_hash))
+        return len(updates)
 
     def get_all_services(self):
         """Retrieves all added services from the database."""
@@ -33,8 +85,7 @@ class ServiceManager:
         cursor = self.conn.cursor()
 
         # Create a unique profile path for the service
-        profile_name = f"service_{name.lower().replace(' ', '_')}"
-        profile_path = os.path.join(PROFILES_DIR, profile_name)
+        profile_path = self.profile_path_for_name(name)
         
         # Ensure the profiles directory exists
         if not os.path.exists(PROFILES_DIR):
@@ -66,8 +117,16 @@ class ServiceManager:
         service = self.conn.execute("SELECT id, name, url, icon, profile_path, is_internal, unread_script FROM services WHERE profile_path = ?", (profile_path,)).fetchone()
         return service
 
-    def delete_service(self, service_id):
-        """Deletes a service from the database and removes its profile directory."""
+    @staticmethod
+    def profile_path_for_name(name):
+        """Returns the profile directory used for a service name."""
+        return os.path.join(PROFILES_DIR, f"service_{name.lower().replace(' ', '_')}")
+
+    def delete_service(self, service_id, remove_profile=True):
+        """
+        Deletes a service from the database and, unless remove_profile is False, its profile directory.
+        Returns the profile path so callers can remove the directory themselves (e.g. on a worker thread).
+        """
         cursor = self.conn.cursor()
 
         # Get profile path before deleting from DB
@@ -79,12 +138,18 @@ class ServiceManager:
         self.conn.commit()
 
         # Remove profile directory if it exists
-        if profile_path and os.path.exists(profile_path):
+        if remove_profile and profile_path and os.path.exists(profile_path):
             try:
                 shutil.rmtree(profile_path)
                 print(f"Removed profile directory: {profile_path}")
             except OSError as e:
                 print(f"Error removing profile directory {profile_path}: {e}")
+        return profile_path
+
+    def set_service_name(self, service_id, new_name, new_profile_path):
+        """Updates a service's name and profile path in the database only."""
+        self.conn.execute("UPDATE services SET name = ?, profile_path = ? WHERE id = ?", (new_name, new_profile_path, service_id))
+        self.conn.commit()
 
     def update_service_name(self, service_id, new_name):
         """Updates a service's name and renames its profile directory."""
@@ -95,12 +160,8 @@ class ServiceManager:
         row = cursor.fetchone()
         if not row: return False
 
-        old_name = row['name']
         old_profile_path = row['profile_path']
-
-        # Generate new profile path
-        new_profile_name = f"service_{new_name.lower().replace(' ', '_')}"
-        new_profile_path = os.path.join(PROFILES_DIR, new_profile_name)
+        new_profile_path = self.profile_path_for_name(new_name)
 
         # Rename directory on file system
         if os.path.exists(old_profile_path) and old_profile_path != new_profile_path:
@@ -111,9 +172,7 @@ class ServiceManager:
                 print(f"Error renaming profile directory: {e}")
                 return False
 
-        # Update DB
-        cursor.execute("UPDATE services SET name = ?, profile_path = ? WHERE id = ?", (new_name, new_profile_path, service_id))
-        self.conn.commit()
+        self.set_service_name(service_id, new_name, new_profile_path)
         return service_id
 
     def get_service_by_id(self, service_id):
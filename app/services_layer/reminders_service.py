@@ -17,17 +17,28 @@ class RemindersService:
         """Retrieves all items with a due date from reminders, Kanban cards, and checklist items."""
         all_items = []
 
-        # 1. Get Reminders
+        # 1. Get Reminders (recurring ones are listed through their materialized occurrences)
         reminders = self.get_all_reminders()
         for reminder in reminders:
-            if reminder['due_at']:
+            if reminder['due_at'] and not reminder['rrule']:
                 all_items.append({
                     'type': 'Recordatorio',
                     'text': reminder['text'],
                     'due_at': reminder['due_at'],
+                    'due_at_ms': reminder['due_at_ms'],
                     'source_id': reminder['id'],
                     'is_completed': reminder['is_completed']
                 })
+        for occurrence in self.reminders_manager.get_reminder_occurrences():
+            all_items.append({
+                'type': 'Recordatorio',
+                'text': occurrence['text'],
+                'due_at': occurrence['due_at'],
+                'due_at_ms': occurrence['due_at_ms'],
+                'source_id': occurrence['reminder_id'],
+                'occurrence_id': occurrence['id'],
+                'is_completed': occurrence['is_completed']
+            })
 
         # 2. Get Kanban Cards
         kanban_cards = self.kanban_service.get_all_cards()
@@ -37,6 +48,7 @@ class RemindersService:
                     'type': 'Kanban',
                     'text': card['title'],
                     'due_at': card['due_date'],
+                    'due_at_ms': card['due_date_ms'],
                     'source_id': card['id'],
                     'is_completed': card['column_name'] == 'Done'
                 })
@@ -50,17 +62,18 @@ class RemindersService:
                         'type': 'Checklist',
                         'text': item['text'],
                         'due_at': item['due_at'],
+                        'due_at_ms': item['due_at_ms'],
                         'source_id': item['id'],
                         'is_completed': item['is_checked']
                     })
         
-        all_items.sort(key=lambda x: x['due_at'])
+        all_items.sort(key=lambda x: x['due_at_ms'] or 0)
         
         return all_items
 
-    def create_reminder(self, text, due_at):
-        """Creates a new reminder."""
-        return self.reminders_manager.create_reminder(text, due_at)
+    def create_reminder(self, text, due_at, rrule=None):
+        """Creates a new reminder, optionally recurring according to an RRULE."""
+        return self.reminders_manager.create_reminder(text, due_at, rrule)
 
     def get_all_reminders(self):
         """Retrieves all reminders."""
@@ -78,9 +91,17 @@ class RemindersService:
         """Retrieves reminders that are due within the pre-notification offsets."""
         return self.reminders_manager.get_pre_due_reminders(pre_notification_offsets_minutes)
 
-    def update_reminder(self, reminder_id, text=None, due_at=None, is_completed=None, is_notified=None, pre_notified_at=None):
+    def update_reminder(self, reminder_id, text=None, due_at=None, is_completed=None, is_notified=None, pre_notified_at=None, rrule=None):
         """Updates a reminder."""
-        self.reminders_manager.update_reminder(reminder_id, text, due_at, is_completed, is_notified, pre_notified_at)
+        self.reminders_manager.update_reminder(reminder_id, text, due_at, is_completed, is_notified, pre_notified_at, rrule)
+
+    def update_occurrence(self, occurrence_id, is_completed=None, is_notified=None, pre_notified_at=None):
+        """Updates a single occurrence of a recurring reminder."""
+        self.reminders_manager.update_occurrence(occurrence_id, is_completed, is_notified, pre_notified_at)
+
+    def roll_recurrence_window(self):
+        """Materializes upcoming occurrences of recurring reminders and prunes old ones."""
+        return self.reminders_manager.roll_recurrence_window()
 
     def delete_reminder(self, reminder_id):
         """Deletes a reminder."""
@@ -93,11 +114,12 @@ class RemindersService:
     def get_agenda_item_for_reminder(self, reminder_id):
         """Retrieves a single reminder and formats it as an agenda item."""
         reminder = self.get_reminder(reminder_id)
-        if reminder and reminder['due_at']:
+        if reminder and reminder['due_at'] and not reminder['rrule']:
             return {
                 'type': 'Recordatorio',
                 'text': reminder['text'],
                 'due_at': reminder['due_at'],
+                'due_at_ms': reminder['due_at_ms'],
                 'source_id': reminder['id'],
                 'is_completed': reminder['is_completed']
             }
@@ -0,0 +1,40 @@
+from PyQt6.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+
+from app.utils.content_blocking import DomainMatcher
+
+ResourceType = QWebEngineUrlRequestInfo.ResourceType
+RESOURCE_KINDS = {
+    ResourceType.ResourceTypeScript: 'script',
+    ResourceType.ResourceTypeImage: 'image',
+    ResourceType.ResourceTypeFavicon: 'image',
+    ResourceType.ResourceTypeStylesheet: 'stylesheet',
+    ResourceType.ResourceTypeSubFrame: 'subframe',
+    ResourceType.ResourceTypeXhr: 'xhr',
+    ResourceType.ResourceTypePing: 'xhr',
+}
+
+class ContentFilterInterceptor(QWebEngineUrlRequestInterceptor):
+    """
+    Blocks requests to blocklisted hosts (trackers, ads) for one service profile.
+    Top-level navigations are never blocked, and hosts in the service's allow-list
+    always pass. Blocked requests are recorded in a shared BlockCounter.
+    """
+    def __init__(self, service_id, blocklist, counter, allowed_domains=(), parent=None):
+        super().__init__(parent)
+        self.service_id = service_id
+        self.blocklist = blocklist
+        self.counter = counter
+        self.set_allowed_domains(allowed_domains)
+
+    def set_allowed_domains(self, domains):
+        self.allowlist = DomainMatcher(domains)
+
+    def interceptRequest(self, info):
+        resource_type = info.resourceType()
+        if resource_type == ResourceType.ResourceTypeMainFrame:
+            return
+        host = info.requestUrl().host()
+        if not host or not self.blocklist.matches(host) or self.allowlist.matches(host):
+            return
+        info.block(True)
+        self.counter.record(self.service_id, RESOURCE_KINDS.get(resource_type, 'other'))
@@ -1,8 +1,9 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QSplitter, QStackedWidget, QToolBar, QLineEdit, QDialog, QPushButton
+from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QSplitter, QStackedWidget, QToolBar, QLineEdit, QDialog, QPushButton, QScrollArea
 from PyQt6.QtGui import QAction
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon
 import os
+import threading
 
 from app.ui.sidebar import Sidebar
 from app.db.reminders_manager import RemindersManager
@@ -18,6 +19,9 @@ from app.services.service_manager import ServiceManager
 from app.security.vault_manager import VaultManager
 from app.search.search_manager import SearchManager
 from app.ui.webview_manager import WebViewManager
+from app.ui.unread_aggregator import UnreadAggregator
+from app.ui.service_prewarmer import ServicePrewarmer
+from app.utils.profile_storage import trim_profile_caches
 from app.ui.shortcut_manager import ShortcutManager
 from app.ui.notification_manager import NotificationManager
 from app.ui.workspace_manager import WorkspaceManager
@@ -48,6 +52,7 @@ class MainWindow(QMainWindow):
         self.settings_manager_instance = container.settings_manager
         self.service_manager_instance = container.service_manager
         self.search_manager_instance = container.search_manager
+        self.retrieval_index = container.retrieval_index
         self.kanban_manager_instance = container.kanban_manager
         self.notes_manager_instance = container.notes_manager
         self.checklist_manager_instance = container.checklist_manager
@@ -86,6 +91,8 @@ class MainWindow(QMainWindow):
 
         # 5. Instantiate remaining component managers
         self.webview_manager = WebViewManager(self.web_view_stack, self.service_manager_instance, self)
+        self.unread_aggregator = UnreadAggregator(self)
+        self.service_prewarmer = ServicePrewarmer(self.webview_manager, self.metrics_manager, self.settings_manager_instance, self)
         services = {
             'notes': self.notes_service_instance, 'kanban': self.kanban_service_instance,
             'checklist': self.checklist_service_instance, 'reminders': self.reminders_service_instance,
@@ -109,8 +116,27 @@ class MainWindow(QMainWindow):
         self._connect_signals()
 
         # 8. Final Setup
-        self.workspace_manager.show_welcome_page()
-        self.metrics_manager.start_tracking("Bienvenida")
+        self.workspace_manager.show_welcome_page() # Starts tracking "Bienvenida" via currentChanged
+
+        # Usage metrics are accumulated in memory and written periodically
+        self.metrics_flush_timer = QTimer(self)
+        self.metrics_flush_timer.timeout.connect(self.metrics_manager.flush)
+        self.metrics_flush_timer.start(60000) # Flush every minute
+        # Old session events are compacted away (their totals live in usage_metrics)
+        self.metrics_compaction_timer = QTimer(self)
+        self.metrics_compaction_timer.timeout.connect(self.metrics_manager.compact_sessions)
+        self.metrics_compaction_timer.start(3600000) # Every hour
+        QTimer.singleShot(0, self.metrics_manager.compact_sessions)
+        # HTTP caches of services that are not loaded are kept within the configured budget
+        self.cache_trim_timer = QTimer(self)
+        self.cache_trim_timer.timeout.connect(self.trim_profile_caches)
+        self.cache_trim_timer.start(3600000) # Every hour
+        # Edited notes and cards are re-indexed in the background for the assistant
+        self.retrieval_sync_timer = QTimer(self)
+        self.retrieval_sync_timer.timeout.connect(self.sync_retrieval_index)
+        self.retrieval_sync_timer.start(300000) # Every 5 minutes
+        # Most used services are loaded in the background once the window is idle
+        self.service_prewarmer.start_when_idle()
 
     def _setup_toolbar(self):
         self.toolbar = self.addToolBar("Barra de Herramientas Principal")
@@ -211,7 +237,7 @@ class MainWindow(QMainWindow):
             
             self.ai_dock = QDockWidget("Asistente Ejecutivo", self)
             self.ai_dock.setAllowedAreas(Qt.DockWidgetArea.RightDockWidgetArea | Qt.DockWidgetArea.LeftDockWidgetArea)
-            self.ai_widget = ExecutiveAssistantWidget(self)
+            self.ai_widget = ExecutiveAssistantWidget(self, retrieval_index=self.retrieval_index)
             self.ai_dock.setWidget(self.ai_widget)
             self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.ai_dock)
         
@@ -232,14 +258,22 @@ class MainWindow(QMainWindow):
         dialog.setWindowTitle("Tablero de Productividad")
         dialog.setMinimumSize(800, 600)
         layout = QVBoxLayout(dialog)
-        dashboard = MetricsDashboard(self.metrics_manager)
-        layout.addWidget(dashboard)
+        dashboard = MetricsDashboard(self.metrics_manager, webview_lifecycle=self.webview_manager.lifecycle_manager,
+                                     profile_storage=self.webview_manager.get_profile_storage_usage,
+                                     blocked_requests=self.webview_manager.get_blocked_request_stats,
+                                     resource_usage=self.webview_manager.get_resource_usage)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(dashboard)
+        layout.addWidget(scroll_area)
         dialog.exec()
 
     def _connect_signals(self):
         # Sidebar signals
         self.sidebar.service_selected.connect(self.webview_manager.load_service)
         self.sidebar.service_deleted.connect(self.handle_service_deleted)
+        self.sidebar.service_view_release_requested.connect(self.release_service_view)
+        self.sidebar.service_renamed.connect(lambda _service_id: self.metrics_manager.refresh_service_cache())
         self.sidebar.show_notes_requested.connect(self.workspace_manager.show_notes_tools)
         self.sidebar.show_kanban_requested.connect(self.workspace_manager.show_kanban_tools)
         self.sidebar.show_gantt_chart_requested.connect(self.workspace_manager.show_gantt_chart_tools)
@@ -249,15 +283,67 @@ class MainWindow(QMainWindow):
         self.sidebar.show_vault_requested.connect(self.workspace_manager.show_vault_tools)
         self.sidebar.show_audio_player_requested.connect(self.workspace_manager.show_audio_player_tools)
         
+        # Unread counts: coalesced per frame, then badges, tray total and metrics time series
+        self.unread_aggregator.counts_changed.connect(self.sidebar.set_service_unread_counts)
+        self.unread_aggregator.counts_changed.connect(self.metrics_manager.record_unread_counts)
+        self.unread_aggregator.total_changed.connect(self.notification_manager.set_unread_total)
+
         # WebViewManager signals
-        self.webview_manager.unread_status_changed.connect(self.sidebar.set_service_unread_status)
+        self.webview_manager.unread_reported.connect(self.unread_aggregator.report)
         self.webview_manager.notification_requested.connect(self.notification_manager.show_notification)
         
         # Pomodoro signals
         self.pomodoro_widget.pomodoro_finished.connect(self.handle_pomodoro_finished)
 
-    def closeEvent(self, event):
+        # Usage tracking follows whatever is shown in the main stack
+        self.web_view_stack.currentChanged.connect(self._track_current_workspace)
+
+    def _track_current_workspace(self, index):
+        """Starts usage tracking for the widget now shown in the main stack."""
+        widget = self.web_view_stack.widget(index)
+        if widget is None:
+            self.metrics_manager.stop_tracking_current()
+            return
+        service_id = widget.property('service_id')
+        if service_id:
+            self.metrics_manager.start_tracking_service(service_id)
+            return
+        tool_names = {
+            'welcome_widget': "Bienvenida", 'notes_widget': "Notas", 'kanban_widget': "Kanban",
+            'gantt_chart_widget': "Gantt", 'checklist_widget': "Checklist", 'agenda_widget': "Recordatorios",
+            'rss_reader_widget': "Lector RSS", 'vault_widget': "Bóveda", 'search_results_widget': "Búsqueda",
+            'audio_player_widget': "Reproductor de Audio",
+        }
+        for attr, name in tool_names.items():
+            if getattr(self.workspace_manager, attr, None) is widget:
+                self.metrics_manager.start_tracking(name)
+                return
         self.metrics_manager.stop_tracking_current()
+
+    def trim_profile_caches(self):
+        """Trims HTTP caches of services that are not loaded, on a background thread."""
+        settings = self.settings_manager_instance
+        profile_paths = [service['profile_path'] for service in self.service_manager_instance.get_user_services()]
+        total_mb = settings.get_webview_cache_total_mb()
+        profile_mb = settings.get_webview_cache_size_mb() or total_mb # 0 = size chosen by Chromium
+        args = (profile_paths, profile_mb * 1024 * 1024, total_mb * 1024 * 1024,
+                self.webview_manager.get_live_profile_paths) # Asked again before each deletion
+        threading.Thread(target=trim_profile_caches, args=args, daemon=True).start()
+
+    def sync_retrieval_index(self):
+        """
+        Applies queued note and card changes to the retrieval index, on a background thread.
+        Text is only sent to the AI provider for embeddings once the user enabled it in the assistant.
+        """
+        with_embeddings = self.settings_manager_instance.is_ai_notes_indexing_enabled()
+        threading.Thread(target=self.retrieval_index.sync, args=(with_embeddings,), daemon=True).start()
+
+    def closeEvent(self, event):
+        self.metrics_flush_timer.stop()
+        self.metrics_compaction_timer.stop()
+        self.cache_trim_timer.stop()
+        self.retrieval_sync_timer.stop()
+        self.metrics_manager.shutdown()
         super().closeEvent(event)
 
     def open_unified_settings_dialog(self):
@@ -291,11 +377,20 @@ class MainWindow(QMainWindow):
         results = self.search_manager_instance.search_all(query)
         self.workspace_manager.show_search_results(results, query)
 
-    def handle_service_deleted(self, service_id):
+    def release_service_view(self, service_id, on_released=None):
+        """
+        Closes a service's web view (and its profile) so its profile directory can be moved or deleted.
+        on_released() runs once the profile is gone.
+        """
         current_view = self.web_view_stack.currentWidget()
         if hasattr(current_view, 'property') and current_view.property('service_id') == service_id:
             self.workspace_manager.show_welcome_page()
-        self.webview_manager.remove_webview_for_service(service_id)
+        self.webview_manager.remove_webview_for_service(service_id, on_released)
+
+    def handle_service_deleted(self, service_id):
+        self.release_service_view(service_id)
+        self.metrics_manager.refresh_service_cache()
+        self.unread_aggregator.remove_service(service_id)
 
     def handle_pomodoro_finished(self, mode):
         # Evaluate rules for 'pomodoro_finished' trigger
@@ -1,6 +1,7 @@
+import logging
 import os
-from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSlot
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSlot, Qt
+from PyQt6.QtGui import QIcon, QPainter, QColor, QFont
 from PyQt6.QtWidgets import QSystemTrayIcon
 
 # Need to import time_utils for check_for_notifications
@@ -16,18 +17,62 @@ class NotificationManager(QObject):
 
         self._setup_tray_icon()
         self._setup_notification_timer()
+        self._setup_recurrence_timer()
 
     def _setup_tray_icon(self):
         self.tray_icon = QSystemTrayIcon(self.parent())
         icon_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'icon.ico'))
-        self.tray_icon.setIcon(QIcon(icon_path))
+        self.base_icon = QIcon(icon_path)
+        self.unread_total = 0
+        self.tray_icon.setIcon(self.base_icon)
+        self.tray_icon.setToolTip("InfoMensajero")
         self.tray_icon.show()
 
+    def set_unread_total(self, total):
+        """Shows the total unread count of all services on the tray icon."""
+        if total == self.unread_total:
+            return
+        self.unread_total = total
+        if not total:
+            self.tray_icon.setIcon(self.base_icon)
+            self.tray_icon.setToolTip("InfoMensajero")
+            return
+
+        pixmap = self.base_icon.pixmap(32, 32)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(QColor("#e74c3c"))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawEllipse(12, 0, 20, 20)
+        font = QFont()
+        font.setPixelSize(12)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(12, 0, 20, 20, Qt.AlignmentFlag.AlignCenter, str(total) if total < 100 else "99+")
+        painter.end()
+        self.tray_icon.setIcon(QIcon(pixmap))
+        self.tray_icon.setToolTip(f"InfoMensajero - {total} sin leer")
+
     def _setup_notification_timer(self):
         self.notification_timer = QTimer(self)
         self.notification_timer.timeout.connect(self.check_for_notifications)
         self.notification_timer.start(10000) # Check every 10 seconds
 
+    def _setup_recurrence_timer(self):
+        # Recurring reminders are expanded into a bounded window that rolls forward in the background
+        self.recurrence_timer = QTimer(self)
+        self.recurrence_timer.timeout.connect(self.roll_recurrence_window)
+        self.recurrence_timer.start(60 * 60 * 1000) # Every hour
+        QTimer.singleShot(0, self.roll_recurrence_window)
+
+    def roll_recurrence_window(self):
+        """Extends the materialized occurrences of recurring reminders."""
+        try:
+            self.reminders_service.roll_recurrence_window()
+        except Exception as e:
+            logging.error(f"Error rolling recurrence window: {e}")
+
     def show_notification(self, title, message):
         """Displays a system tray notification."""
         self.tray_icon.showMessage(title, message, QSystemTrayIcon.MessageIcon.Information, 5000)
@@ -41,18 +86,25 @@ class NotificationManager(QObject):
 
         # Check for pre-due reminders
         for reminder in self.reminders_service.get_pre_due_reminders(pre_notification_offsets_minutes):
-            self.show_notification("Recordatorio Próximo", f"'{reminder['text']}' vence pronto ({reminder['due_at']})")
-            self.reminders_service.update_reminder(reminder['id'], pre_notified_at=time_utils.to_utc(time_utils.datetime_from_qdatetime(time_utils.get_current_qdatetime())).isoformat())
+            self.show_notification("Recordatorio Próximo", f"'{reminder['text']}' vence pronto ({time_utils.format_epoch_ms(reminder['due_at_ms'])})")
+            pre_notified_at = time_utils.to_utc(time_utils.datetime_from_qdatetime(time_utils.get_current_qdatetime())).isoformat()
+            if reminder.get('occurrence_id'):
+                self.reminders_service.update_occurrence(reminder['occurrence_id'], pre_notified_at=pre_notified_at)
+            else:
+                self.reminders_service.update_reminder(reminder['id'], pre_notified_at=pre_notified_at)
 
         # Check for pre-due checklist items
         for item in self.checklist_service.get_pre_due_checklist_items(pre_notification_offsets_minutes):
-            self.show_notification("Tarea de Checklist Próxima", f"'{item['text']}' vence pronto ({item['due_at']})")
+            self.show_notification("Tarea de Checklist Próxima", f"'{item['text']}' vence pronto ({time_utils.format_epoch_ms(item['due_at_ms'])})")
             self.checklist_service.update_checklist_item(item['id'], pre_notified_at=time_utils.to_utc(time_utils.datetime_from_qdatetime(time_utils.get_current_qdatetime())).isoformat())
 
         # Check for due reminders
         for reminder in self.reminders_service.get_actual_due_reminders():
             self.show_notification("Recordatorio", reminder['text'])
-            self.reminders_service.update_reminder(reminder['id'], is_notified=1)
+            if reminder.get('occurrence_id'):
+                self.reminders_service.update_occurrence(reminder['occurrence_id'], is_notified=1)
+            else:
+                self.reminders_service.update_reminder(reminder['id'], is_notified=1)
 
         # Check for due checklist items
         for item in self.checklist_service.get_actual_due_checklist_items():
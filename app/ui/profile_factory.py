@@ -0,0 +1,28 @@
+import os
+from PyQt6.QtWebEngineCore import QWebEngineProfile
+
+from app.utils.profile_storage import profile_cache_path
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+HttpCacheType = QWebEngineProfile.HttpCacheType
+CACHE_TYPES = {
+    'disk': HttpCacheType.DiskHttpCache,
+    'memory': HttpCacheType.MemoryHttpCache,
+    'none': HttpCacheType.NoCache,
+}
+
+def create_service_profile(profile_path, settings_manager, parent=None):
+    """
+    Builds the QWebEngineProfile of a service. Site data is stored in profile_path and the
+    HTTP cache in its own sub-directory with the configured type and size, so a service
+    start only downloads what changed since the last session.
+    """
+    profile = QWebEngineProfile(os.path.basename(profile_path), parent)
+    profile.setPersistentStoragePath(profile_path)
+    profile.setCachePath(profile_cache_path(profile_path))
+    profile.setHttpCacheType(CACHE_TYPES.get(settings_manager.get_webview_cache_type(), HttpCacheType.DiskHttpCache))
+    profile.setHttpCacheMaximumSize(settings_manager.get_webview_cache_size_mb() * 1024 * 1024)
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.AllowPersistentCookies)
+    profile.setHttpUserAgent(USER_AGENT)
+    return profile
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+
+class ProfileTaskWorker(QThread):
+    """
+    Runs a profile_operations function (clone, rename, delete) off the UI thread.
+    The function receives a progress(done, total) callback, forwarded as a signal.
+    """
+    progress = pyqtSignal(int, int) # done, total
+    succeeded = pyqtSignal(object) # return value of the task
+    error = pyqtSignal(str)
+
+    def __init__(self, task, *args, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.task(*self.args, progress=self.progress.emit)
+            self.succeeded.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
+
+def run_profile_task(parent, label, task, *args, on_success=None, on_error=None):
+    """
+    Starts a ProfileTaskWorker with a progress dialog (shown only if the task takes a while).
+    on_success(result) runs on the UI thread. A failure is shown to the user, then
+    on_error(message) runs on the UI thread (e.g. to roll back). Returns the worker.
+    """
+    dialog = QProgressDialog(label, None, 0, 0, parent)
+    dialog.setWindowTitle("Perfiles de Servicio")
+    dialog.setMinimumDuration(500)
+    dialog.setAutoClose(True)
+
+    worker = ProfileTaskWorker(task, *args, parent=parent)
+
+    def update_progress(done, total):
+        dialog.setMaximum(total)
+        dialog.setValue(done)
+
+    def report_error(message):
+        dialog.reset()
+        QMessageBox.warning(parent, "Perfiles de Servicio", f"No se pudo completar la operación.\n\n{message}")
+        if on_error is not None:
+            on_error(message)
+
+    def finish():
+        dialog.reset()
+        dialog.deleteLater()
+
+    worker.progress.connect(update_progress)
+    if on_success is not None:
+        worker.succeeded.connect(on_success)
+    worker.error.connect(report_error)
+    worker.finished.connect(finish)
+    worker.finished.connect(worker.deleteLater)
+    worker.start()
+    return worker
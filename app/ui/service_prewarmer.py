@@ -0,0 +1,76 @@
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Delay after the main window becomes idle before the first background load starts
+PREWARM_START_DELAY_MS = 3000
+# A load that has not finished after this long frees its slot anyway
+PREWARM_LOAD_TIMEOUT_MS = 30000
+
+class ServicePrewarmer(QObject):
+    """
+    Loads the most used services in the background after startup so that the first
+    click on them is instant. Pinned services go first, then services ranked by
+    usage history; at most `concurrency` pages load at the same time.
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, webview_manager, metrics_manager, settings_manager, parent=None):
+        super().__init__(parent)
+        self.webview_manager = webview_manager
+        self.metrics_manager = metrics_manager
+        self.settings_manager = settings_manager
+        self._queue = deque()
+        self._in_flight = {} # view -> timeout QTimer
+        self._started = False
+
+    def start_when_idle(self, delay_ms=PREWARM_START_DELAY_MS):
+        """Schedules pre-warming once the event loop is idle (after the window is shown)."""
+        # singleShot(0) runs once pending startup events are processed; the extra delay
+        # keeps the first paint and the initial tool free of background page loads.
+        QTimer.singleShot(0, lambda: QTimer.singleShot(delay_ms, self.start))
+
+    def _select_services(self):
+        count = self.settings_manager.get_prewarm_service_count()
+        # Leave one live slot for whatever the user opens first
+        count = min(count, self.settings_manager.get_max_live_webviews() - 1)
+        if count <= 0:
+            return []
+        pinned_ids = self.settings_manager.get_pinned_service_ids()
+        ranked = [s for s in self.metrics_manager.get_service_priority()
+                  if s['service_id'] in pinned_ids or s['recent_ms'] or s['total_ms']]
+        ranked.sort(key=lambda s: s['service_id'] not in pinned_ids) # stable: pinned first
+        return ranked[:count]
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        try:
+            self._queue.extend(self._select_services())
+        except Exception as e:
+            print(f"Error selecting services to pre-load: {e}")
+        self._fill_slots()
+
+    def _fill_slots(self):
+        concurrency = max(1, self.settings_manager.get_prewarm_concurrency())
+        while self._queue and len(self._in_flight) < concurrency:
+            service = self._queue.popleft()
+            view = self.webview_manager.prewarm_service(service['url'], service['profile_path'])
+            if view is None:
+                continue # Already opened by the user (or unknown)
+            timeout = QTimer(self)
+            timeout.setSingleShot(True)
+            timeout.timeout.connect(lambda v=view: self._on_load_done(v))
+            timeout.start(PREWARM_LOAD_TIMEOUT_MS)
+            self._in_flight[view] = timeout
+            view.loadFinished.connect(lambda ok, v=view: self._on_load_done(v))
+        if not self._queue and not self._in_flight:
+            self.finished.emit()
+
+    def _on_load_done(self, view):
+        timeout = self._in_flight.pop(view, None)
+        if timeout is None:
+            return # Already handled (timeout or a later navigation)
+        timeout.stop()
+        timeout.deleteLater()
+        self._fill_slots()
@@ -1,16 +1,22 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QDialog, QMenu
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QDialog, QMenu, QInputDialog
 from PyQt6.QtCore import pyqtSignal as Signal, Qt
 from PyQt6.QtGui import QIcon, QAction
 from app.services.service_manager import ServiceManager # Changed import
+from app.db.settings_manager import SettingsManager
 from app.ui.add_service_dialog import AddServiceDialog
 from app.ui.edit_service_name_dialog import EditServiceNameDialog
 from app.ui.select_service_dialog import SelectServiceDialog
+from app.ui.profile_task_worker import run_profile_task
+from app.services import profile_operations
 
 from app.ui.icon_manager import IconManager
 
 class Sidebar(QWidget):
     service_selected = Signal(str, str) # Signal to emit URL and profile_path
     service_deleted = Signal(int) # Signal to emit service_id when a service is deleted
+    service_view_release_requested = Signal(int, object) # service_id, callback run once its web view and profile are closed
+    service_renamed = Signal(int)
     show_notes_requested = Signal() # New signal to show NotesWidget
     show_kanban_requested = Signal() # New signal to show KanbanWidget
     show_gantt_chart_requested = Signal() # New signal to show GanttChartWidget
@@ -23,7 +29,8 @@ class Sidebar(QWidget):
     def __init__(self, service_manager_instance, parent=None):
         super().__init__(parent)
         self.service_manager = service_manager_instance # Store instance
-        self._unread_statuses = {} # {service_id: True/False}
+        self._unread_counts = {} # {service_id: unread count}
+        self._service_buttons = {} # {service_id: (button, service name)}
         self.icon_manager = IconManager()
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(5, 5, 5, 5)
@@ -109,7 +116,8 @@ class Sidebar(QWidget):
 
         services = self.service_manager.get_user_services()
 
-        self._unread_statuses = {s['id']: self._unread_statuses.get(s['id'], False) for s in services} # Preserve existing unread statuses
+        self._unread_counts = {s['id']: self._unread_counts.get(s['id'], 0) for s in services} # Preserve existing unread counts
+        self._service_buttons = {}
 
         for service in services:
             btn = QPushButton(service['name'])
@@ -126,9 +134,8 @@ class Sidebar(QWidget):
             btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
             btn.customContextMenuRequested.connect(lambda pos, b=btn: self.show_service_context_menu(pos, b))
 
-            # Apply unread style if applicable
-            if self._unread_statuses.get(service['id'], False):
-                btn.setProperty('class', 'unread') # Apply CSS class
+            self._service_buttons[service['id']] = (btn, service['name'])
+            self._apply_unread_badge(service['id'])
 
             url = service['url']
             profile_path = service['profile_path']
@@ -151,6 +158,17 @@ class Sidebar(QWidget):
         edit_action.triggered.connect(lambda checked, s_id=service_id: self.edit_service_name_from_ui(s_id))
         menu.addAction(edit_action)
 
+        settings_manager = SettingsManager.get_instance()
+        pin_action = QAction("Mantener Siempre Activo", self)
+        pin_action.setCheckable(True)
+        pin_action.setChecked(service_id in settings_manager.get_pinned_service_ids())
+        pin_action.triggered.connect(lambda checked, s_id=service_id: settings_manager.set_service_pinned(s_id, checked))
+        menu.addAction(pin_action)
+
+        allow_action = QAction("Dominios Permitidos...", self)
+        allow_action.triggered.connect(lambda checked, s_id=service_id: self.edit_allowed_domains_from_ui(s_id))
+        menu.addAction(allow_action)
+
         delete_action = QAction("Eliminar Servicio", self)
         delete_action.setIcon(self.icon_manager.get_icon("trash", size=14, color="#333"))
         delete_action.triggered.connect(lambda checked, s_id=service_id: self.delete_service_from_ui(s_id))
@@ -167,8 +185,20 @@ class Sidebar(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             name, url, icon = dialog.get_service_data()
             if name and url:
-                self.service_manager.add_service(name, url, icon)
-                self.load_services() # Refresh the service list
+                new_id = self.service_manager.add_service(name, url, icon, unread_script=service_details['unread_script'])
+                new_service = self.service_manager.get_service_by_id(new_id) if new_id else None
+                if not new_service: return
+
+                def clone_failed(_message):
+                    # Roll back the new instance: its row and whatever was cloned before the error
+                    self.service_manager.delete_service(new_id, remove_profile=False)
+                    run_profile_task(self, "Eliminando el perfil del servicio...", profile_operations.remove_profile,
+                                     new_service['profile_path'])
+
+                # The new instance starts with the existing instance's cached scripts and assets
+                run_profile_task(self, "Preparando la nueva instancia...", profile_operations.clone_profile_cache,
+                                 service_details['profile_path'], new_service['profile_path'],
+                                 on_success=lambda _stats: self.load_services(), on_error=clone_failed)
 
     def edit_service_name_from_ui(self, service_id):
         service_details = self.service_manager.get_service_by_id(service_id)
@@ -178,15 +208,66 @@ class Sidebar(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_name = dialog.get_new_name()
             if new_name and new_name != service_details['name']:
-                self.service_manager.update_service_name(service_id, new_name)
-                self.load_services() # Refresh the service list
+                old_profile_path = service_details['profile_path']
+                new_profile_path = self.service_manager.profile_path_for_name(new_name)
+
+                def rename_done(_renamed):
+                    self.service_manager.set_service_name(service_id, new_name, new_profile_path)
+                    self.load_services() # Refresh the service list
+                    self.service_renamed.emit(service_id)
+
+                def rename_failed(_message):
+                    # The row keeps the old name and path unless the directory did get moved
+                    if not os.path.exists(old_profile_path) and os.path.exists(new_profile_path):
+                        rename_done(True)
+                    else:
+                        self.load_services()
+
+                def start_rename():
+                    run_profile_task(self, "Renombrando el perfil del servicio...", profile_operations.rename_profile,
+                                     old_profile_path, new_profile_path, on_success=rename_done, on_error=rename_failed)
+
+                # Chromium holds the profile's files until the view and its profile are destroyed
+                self.service_view_release_requested.emit(service_id, start_rename)
+
+    def edit_allowed_domains_from_ui(self, service_id):
+        """Edits the domains the content filter never blocks for a service (one per line)."""
+        settings_manager = SettingsManager.get_instance()
+        current = "\n".join(settings_manager.get_service_allowed_domains(service_id))
+        text, ok = QInputDialog.getMultiLineText(
+            self, "Dominios Permitidos",
+            "Dominios que nunca se bloquean en este servicio (uno por línea):", current)
+        if ok:
+            settings_manager.set_service_allowed_domains(service_id, text.split())
 
     def delete_service_from_ui(self, service_id):
-        self.service_manager.delete_service(service_id)
+        profile_path = self.service_manager.delete_service(service_id, remove_profile=False)
+        SettingsManager.get_instance().set_service_pinned(service_id, False)
         self.load_services() # Refresh the service list
-        self.service_deleted.emit(service_id) # Notify MainWindow to remove webview
+
+        def remove_profile():
+            if profile_path:
+                run_profile_task(self, "Eliminando el perfil del servicio...", profile_operations.remove_profile,
+                                 profile_path)
+
+        self.service_view_release_requested.emit(service_id, remove_profile)
+        self.service_deleted.emit(service_id) # Notify MainWindow to update metrics and badges
+
+    def _apply_unread_badge(self, service_id):
+        """Updates one service button's text and unread style from its count."""
+        btn, name = self._service_buttons[service_id]
+        count = self._unread_counts.get(service_id, 0)
+        btn.setText(f"{name} ({count})" if count else name)
+        btn.setProperty('class', 'unread' if count else '') # Apply CSS class
+        btn.style().unpolish(btn)
+        btn.style().polish(btn)
+
+    def set_service_unread_counts(self, counts):
+        """Applies {service_id: count} updates, repainting only the affected buttons."""
+        for service_id, count in counts.items():
+            if service_id in self._unread_counts and self._unread_counts[service_id] != count:
+                self._unread_counts[service_id] = count
+                self._apply_unread_badge(service_id)
 
     def set_service_unread_status(self, service_id, has_unread):
-        if service_id in self._unread_statuses:
-            self._unread_statuses[service_id] = has_unread
-            self.load_services() # Refresh UI to apply/remove unread style
+        self.set_service_unread_counts({service_id: int(bool(has_unread))})
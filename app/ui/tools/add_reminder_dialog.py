@@ -1,6 +1,7 @@
-from PyQt6.QtWidgets import QFormLayout, QLineEdit, QDateEdit, QTimeEdit, QHBoxLayout, QMessageBox
+from PyQt6.QtWidgets import QFormLayout, QLineEdit, QDateEdit, QTimeEdit, QHBoxLayout, QMessageBox, QComboBox
 from PyQt6.QtCore import QDateTime
 from app.utils import time_utils
+from app.utils import recurrence_utils
 from app.ui.base_dialog import BaseDialog
 
 class AddReminderDialog(BaseDialog):
@@ -22,6 +23,11 @@ class AddReminderDialog(BaseDialog):
         due_layout.addWidget(self.due_time_edit)
         form_layout.addRow("Fecha y Hora de Vencimiento:", due_layout)
 
+        self.recurrence_combo = QComboBox()
+        for label, rrule in recurrence_utils.RECURRENCE_PRESETS.items():
+            self.recurrence_combo.addItem(label, rrule)
+        form_layout.addRow("Repetir:", self.recurrence_combo)
+
         self.add_content(form_layout)
         self.reminder_text_input.setFocus()
 
@@ -30,6 +36,10 @@ class AddReminderDialog(BaseDialog):
         if not text:
             QMessageBox.warning(self, "Error de Entrada", "El texto del recordatorio no puede estar vacío.")
             return
+        rrule = self.getRecurrenceRule()
+        if rrule and not recurrence_utils.validate_rrule(rrule):
+            QMessageBox.warning(self, "Error de Entrada", f"La regla de repetición no es válida: {rrule}")
+            return
         self.accept()
 
     def getReminderData(self):
@@ -38,3 +48,7 @@ class AddReminderDialog(BaseDialog):
         time = self.due_time_edit.time()
         due_at = QDateTime(date, time)
         return text, due_at
+
+    def getRecurrenceRule(self):
+        """Returns the selected RRULE string, or None for a one-shot reminder."""
+        return self.recurrence_combo.currentData()
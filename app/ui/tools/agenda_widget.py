@@ -38,7 +38,7 @@ class AgendaWidget(QWidget):
         list_item.setSizeHint(item_widget.sizeHint())
         
         # Store ID and type for later retrieval
-        list_item.setData(Qt.ItemDataRole.UserRole, {'id': item_data['source_id'], 'type': item_data['type']})
+        list_item.setData(Qt.ItemDataRole.UserRole, {'id': item_data['source_id'], 'type': item_data['type'], 'occurrence_id': item_data.get('occurrence_id')})
 
         if row is not None:
             self.agenda_list.insertItem(row, list_item)
@@ -48,12 +48,12 @@ class AgendaWidget(QWidget):
         self.agenda_list.setItemWidget(list_item, item_widget)
         return list_item
 
-    def _find_list_item(self, source_id):
-        """Finds a QListWidgetItem by its source_id."""
+    def _find_list_item(self, source_id, item_type='Recordatorio'):
+        """Finds a QListWidgetItem by its source_id and type."""
         for i in range(self.agenda_list.count()):
             item = self.agenda_list.item(i)
             data = item.data(Qt.ItemDataRole.UserRole)
-            if data and data.get('id') == source_id:
+            if data and data.get('id') == source_id and data.get('type') == item_type:
                 return item
         return None
 
@@ -65,28 +65,20 @@ class AgendaWidget(QWidget):
 
         checkbox = QCheckBox()
         checkbox.setChecked(item_data['is_completed'])
-        if item_data['type'] == 'Recordatorio':
+        if item_data.get('occurrence_id'):
+            checkbox.stateChanged.connect(lambda state, occurrence_id=item_data['occurrence_id']: self.toggle_occurrence_completed(occurrence_id, state))
+        elif item_data['type'] == 'Recordatorio':
             checkbox.stateChanged.connect(lambda state, source_id=item_data['source_id']: self.toggle_reminder_completed(source_id, state))
         else:
             checkbox.setEnabled(False)
 
         layout.addWidget(checkbox)
 
-        due_at_str = item_data['due_at']
-        formatted_due_at = ""
-        if due_at_str:
-            try:
-                utc_dt = QDateTime.fromString(due_at_str, Qt.DateFormat.ISODate)
-                if not utc_dt.isValid():
-                    utc_dt = QDateTime.fromString(due_at_str, "yyyy-MM-ddTHH:mm:ss.zzzZ")
-                
-                if utc_dt.isValid():
-                    local_dt = utc_dt.toLocalTime()
-                    formatted_due_at = local_dt.toString(time_utils.convert_strftime_to_qt_format(self.settings_manager.get_datetime_format()))
-            except Exception as e:
-                print(f"Error parsing due_at in AgendaWidget: {due_at_str}, Error: {e}")
+        formatted_due_at = time_utils.format_epoch_ms(item_data.get('due_at_ms'))
 
         text = f"[{item_data['type']}] {item_data['text']} - {formatted_due_at}"
+        if item_data.get('occurrence_id'):
+            text += " (recurrente)"
         label = QLabel(text)
         layout.addWidget(label)
 
@@ -115,12 +107,19 @@ class AgendaWidget(QWidget):
 
         current_text = reminder['text']
         current_due_at = QDateTime.fromString(reminder['due_at'], Qt.DateFormat.ISODate)
-        dialog = EditReminderDialog(current_text, current_due_at, self)
+        dialog = EditReminderDialog(current_text, current_due_at, self, current_rrule=reminder['rrule'])
         
         if dialog.exec():
             new_text, new_due_at = dialog.getReminderData()
             new_due_at_iso = time_utils.qdatetime_to_utc_iso(new_due_at)
-            self.reminders_service.update_reminder(reminder_id, text=new_text, due_at=new_due_at_iso)
+            new_rrule = dialog.getRecurrenceRule()
+            self.reminders_service.update_reminder(reminder_id, text=new_text, due_at=new_due_at_iso, rrule=new_rrule or '')
+
+            if reminder['rrule'] or new_rrule:
+                # Recurring reminders appear once per occurrence, so rebuild the list
+                self.load_agenda_items()
+                self.agenda_updated.emit()
+                return
             
             # Instead of full reload, update the specific item
             list_item = self._find_list_item(reminder_id)
@@ -140,7 +139,7 @@ class AgendaWidget(QWidget):
         if dialog.exec():
             text, due_at = dialog.getReminderData()
             due_at_iso = time_utils.qdatetime_to_utc_iso(due_at)
-            new_id = self.reminders_service.create_reminder(text, due_at_iso)
+            new_id = self.reminders_service.create_reminder(text, due_at_iso, dialog.getRecurrenceRule())
             
             # Instead of full reload, just add the new item
             # This is less efficient as it re-queries, but safer for sorted lists
@@ -155,11 +154,12 @@ class AgendaWidget(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             self.reminders_service.delete_reminder(reminder_id)
             
-            # Instead of full reload, remove the specific item
+            # Instead of full reload, remove the specific items (one per occurrence if recurring)
             list_item = self._find_list_item(reminder_id)
-            if list_item:
+            while list_item:
                 row = self.agenda_list.row(list_item)
                 self.agenda_list.takeItem(row)
+                list_item = self._find_list_item(reminder_id)
             
             self.agenda_updated.emit()
 
@@ -178,4 +178,9 @@ class AgendaWidget(QWidget):
                 font.setStrikeOut(bool(is_completed))
                 label.setFont(font)
 
-        self.agenda_updated.emit()
\ No newline at end of file
+        self.agenda_updated.emit()
+
+    def toggle_occurrence_completed(self, occurrence_id, state):
+        is_completed = 1 if state == Qt.CheckState.Checked.value else 0
+        self.reminders_service.update_occurrence(occurrence_id, is_completed=is_completed)
+        self.agenda_updated.emit()
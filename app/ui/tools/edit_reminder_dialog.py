@@ -1,9 +1,10 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QFormLayout, QLineEdit, QDateEdit, QTimeEdit, QHBoxLayout, QDialogButtonBox, QMessageBox
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QFormLayout, QLineEdit, QDateEdit, QTimeEdit, QHBoxLayout, QDialogButtonBox, QMessageBox, QComboBox
 from PyQt6.QtCore import QDateTime
 from app.utils import time_utils
+from app.utils import recurrence_utils
 
 class EditReminderDialog(QDialog):
-    def __init__(self, current_text, current_due_date, parent=None):
+    def __init__(self, current_text, current_due_date, parent=None, current_rrule=None):
         super().__init__(parent)
         self.setWindowTitle("Editar Recordatorio")
         self.layout = QVBoxLayout(self)
@@ -25,6 +26,19 @@ class EditReminderDialog(QDialog):
         due_layout.addWidget(self.due_time_edit)
         self.form_layout.addRow("Fecha y Hora de Vencimiento:", due_layout)
 
+        self.recurrence_combo = QComboBox()
+        for label, rrule in recurrence_utils.RECURRENCE_PRESETS.items():
+            self.recurrence_combo.addItem(label, rrule)
+        current_rrule = recurrence_utils.normalize_rrule(current_rrule)
+        if current_rrule:
+            index = self.recurrence_combo.findData(current_rrule)
+            if index == -1:
+                # Custom rule created elsewhere (e.g. imported): keep it selectable
+                self.recurrence_combo.addItem(current_rrule, current_rrule)
+                index = self.recurrence_combo.count() - 1
+            self.recurrence_combo.setCurrentIndex(index)
+        self.form_layout.addRow("Repetir:", self.recurrence_combo)
+
         self.layout.addLayout(self.form_layout)
 
         self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -37,6 +51,10 @@ class EditReminderDialog(QDialog):
         if not text:
             QMessageBox.warning(self, "Error de Entrada", "El texto del recordatorio no puede estar vacío.")
             return
+        rrule = self.getRecurrenceRule()
+        if rrule and not recurrence_utils.validate_rrule(rrule):
+            QMessageBox.warning(self, "Error de Entrada", f"La regla de repetición no es válida: {rrule}")
+            return
         self.accept()
 
     def getReminderData(self):
@@ -45,3 +63,7 @@ class EditReminderDialog(QDialog):
         time = self.due_time_edit.time()
         due_at = QDateTime(date, time)
         return text, due_at
+
+    def getRecurrenceRule(self):
+        """Returns the selected RRULE string, or None for a one-shot reminder."""
+        return self.recurrence_combo.currentData()
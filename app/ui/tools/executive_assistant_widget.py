@@ -1,29 +1,75 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QPushButton, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QPushButton, QCheckBox,
                              QLabel, QComboBox, QHBoxLayout, QProgressBar, QMessageBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+from concurrent.futures import CancelledError
+import threading
 from app.ai.ai_manager import AIManager
+from app.ai.job_queue import AIQueueFullError
 from app.ui.icon_manager import IconManager
 
-class AIWorker(QThread):
+STREAM_FLUSH_MS = 50 # Chunks are appended to the output at most this often
+
+class AIJobBridge(QObject):
+    """
+    Carries the chunks and outcome of an AIManager job from the queue's worker threads to
+    the UI thread (signals across threads are queued by Qt).
+    """
+    chunk = pyqtSignal(str)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, prompt, max_tokens):
-        super().__init__()
+    def __init__(self, prompt, max_tokens, prepare=None, parent=None):
+        super().__init__(parent)
         self.prompt = prompt
         self.max_tokens = max_tokens
-        self.ai_manager = AIManager.get_instance()
+        self.prepare = prepare # Optional prepare(prompt) -> final prompt, run off the UI thread
+        self.handle = None
+        self._cancelled = False
+        self._lock = threading.Lock() # cancel() and the submission from the prepare thread
+
+    def start(self):
+        """Submits the job; connect the signals first."""
+        if self.prepare is None:
+            self._submit(self.prompt)
+        else:
+            threading.Thread(target=self._prepare_and_submit, daemon=True).start()
 
-    def run(self):
+    def _submit(self, prompt):
+        self.handle = AIManager.get_instance().submit(prompt, self.max_tokens, on_chunk=self.chunk.emit)
+        self.handle.add_done_callback(self._done)
+
+    def _prepare_and_submit(self):
         try:
-            response = self.ai_manager.generate_text(self.prompt, self.max_tokens)
-            self.finished.emit(response)
+            prompt = self.prepare(self.prompt)
+            with self._lock:
+                if not self._cancelled:
+                    self._submit(prompt)
+                    return
+            self.finished.emit("")
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def cancel(self):
+        """Detaches from the job, keeping the text received so far; the request stops if nobody else shares it."""
+        with self._lock:
+            self._cancelled = True
+            handle = self.handle
+        if handle is not None:
+            handle.cancel()
+
+    def _done(self, handle):
+        try:
+            self.finished.emit(handle.result())
+        except CancelledError:
+            self.finished.emit("")
         except Exception as e:
             self.error.emit(str(e))
 
 class ExecutiveAssistantWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, retrieval_index=None):
         super().__init__(parent)
+        self.retrieval_index = retrieval_index
         self.icon_manager = IconManager()
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(10, 10, 10, 10)
@@ -75,6 +121,14 @@ class ExecutiveAssistantWidget(QWidget):
         self.input_text.setStyleSheet("background-color: #3a3a3a; color: #f0f0f0; border: 1px solid #555; border-radius: 4px;")
         self.layout.addWidget(self.input_text)
 
+        # Questions can be answered from the most relevant chunks of the user's notes and cards
+        self.use_notes_checkbox = QCheckBox("Usar mis notas y tarjetas")
+        self.use_notes_checkbox.setToolTip("Añade a la pregunta los fragmentos más relevantes de tus notas y tarjetas Kanban.")
+        self.use_notes_checkbox.setVisible(retrieval_index is not None)
+        self.use_notes_checkbox.setChecked(AIManager.get_instance().settings_manager.is_ai_notes_indexing_enabled())
+        self.use_notes_checkbox.toggled.connect(self.on_use_notes_toggled)
+        self.layout.addWidget(self.use_notes_checkbox)
+
         # Generate Button
         self.btn_generate = QPushButton("Procesar con IA")
         self.btn_generate.setIcon(self.icon_manager.get_icon("robot", size=16))
@@ -91,7 +145,13 @@ class ExecutiveAssistantWidget(QWidget):
             }
         """)
         self.btn_generate.clicked.connect(self.start_generation)
-        self.layout.addWidget(self.btn_generate)
+        self.btn_stop = QPushButton("Detener")
+        self.btn_stop.clicked.connect(self.stop_generation)
+        self.btn_stop.hide()
+        generate_layout = QHBoxLayout()
+        generate_layout.addWidget(self.btn_generate, 1)
+        generate_layout.addWidget(self.btn_stop)
+        self.layout.addLayout(generate_layout)
 
         # Progress Bar
         self.progress_bar = QProgressBar()
@@ -108,11 +168,40 @@ class ExecutiveAssistantWidget(QWidget):
         self.output_text.setStyleSheet("background-color: #3a3a3a; color: #f0f0f0; border: 1px solid #555; border-radius: 4px;")
         self.layout.addWidget(self.output_text)
 
+        # Streamed chunks are buffered and appended in batches
+        self.worker = None
+        self._pending_chunks = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(STREAM_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush_chunks)
+
         # Connect Quick Actions
         self.btn_summarize.clicked.connect(lambda: self.set_preset_prompt("Resumir"))
         self.btn_improve.clicked.connect(lambda: self.set_preset_prompt("Mejorar"))
         self.btn_extract.clicked.connect(lambda: self.set_preset_prompt("Extraer"))
 
+    def on_use_notes_toggled(self, checked):
+        """Asks before notes and cards are sent to the AI provider; unchecking stops embedding them."""
+        settings = AIManager.get_instance().settings_manager
+        if not checked:
+            settings.set_ai_notes_indexing_provider("")
+            return
+        provider = settings.get_ai_provider()
+        if not provider:
+            QMessageBox.warning(self, "Sin proveedor de IA", "Configura primero un proveedor de IA en los ajustes.")
+            self.use_notes_checkbox.setChecked(False)
+            return
+        if settings.get_ai_notes_indexing_provider() == provider:
+            return
+        answer = QMessageBox.question(
+            self, "Usar mis notas y tarjetas",
+            f"Para responder con tus notas y tarjetas Kanban, su texto se enviará al proveedor de IA "
+            f"«{provider}» para indexarlo y como contexto de tus preguntas.\n\n¿Quieres activarlo?")
+        if answer == QMessageBox.StandardButton.Yes:
+            settings.set_ai_notes_indexing_provider(provider)
+        else:
+            self.use_notes_checkbox.setChecked(False)
+
     def set_preset_prompt(self, action):
         text = self.input_text.toPlainText().strip()
         if not text:
@@ -129,6 +218,8 @@ class ExecutiveAssistantWidget(QWidget):
         self.start_generation(prompt_override=prompt)
 
     def start_generation(self, prompt_override=None):
+        if self.worker is not None:
+            return
         prompt = prompt_override if prompt_override else self.input_text.toPlainText().strip()
         
         if not prompt:
@@ -136,22 +227,65 @@ class ExecutiveAssistantWidget(QWidget):
             return
 
         self.btn_generate.setEnabled(False)
+        self.btn_stop.show()
         self.progress_bar.show()
         self.output_text.clear()
+        self._pending_chunks = []
 
-        self.worker = AIWorker(prompt, max_tokens=2000)
+        # Presets process the pasted text; only free questions are grounded on the notes
+        prepare = None
+        settings = AIManager.get_instance().settings_manager
+        if (self.retrieval_index is not None and self.use_notes_checkbox.isChecked() and not prompt_override
+                and settings.is_ai_notes_indexing_enabled()):
+            prepare = self.retrieval_index.grounded_prompt
+        self.worker = AIJobBridge(prompt, max_tokens=2000, prepare=prepare, parent=self)
+        self.worker.chunk.connect(self.on_chunk)
         self.worker.finished.connect(self.on_generation_finished)
         self.worker.error.connect(self.on_generation_error)
-        self.worker.start()
+        self.flush_timer.start()
+        try:
+            self.worker.start()
+        except AIQueueFullError as e:
+            self.on_generation_error(str(e))
+
+    def stop_generation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_chunk(self, chunk):
+        self._pending_chunks.append(chunk)
+
+    def flush_chunks(self):
+        """Appends the buffered chunks with a single edit."""
+        if not self._pending_chunks:
+            return
+        text = "".join(self._pending_chunks)
+        self._pending_chunks = []
+        scrollbar = self.output_text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.output_text.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
     def on_generation_finished(self, response):
-        self.output_text.setPlainText(response)
+        self.flush_chunks()
         self.cleanup_worker()
 
     def on_generation_error(self, error_msg):
-        self.output_text.setPlainText(f"Error: {error_msg}")
+        self.flush_chunks()
+        if self.output_text.toPlainText():
+            self.output_text.append(f"\n\nError: {error_msg}")
+        else:
+            self.output_text.setPlainText(f"Error: {error_msg}")
         self.cleanup_worker()
 
     def cleanup_worker(self):
+        self.flush_timer.stop()
+        if self.worker is not None:
+            self.worker.deleteLater()
+            self.worker = None
         self.btn_generate.setEnabled(True)
+        self.btn_stop.hide()
         self.progress_bar.hide()
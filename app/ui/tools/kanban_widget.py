@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QListWidget, QListWidgetItem, QLineEdit, QDialog, QMenu, QGroupBox, QPushButton, QMessageBox, QFileDialog
-from PyQt6.QtCore import Qt, QSize, QDateTime, pyqtSignal as Signal
+from PyQt6.QtCore import Qt, QSize, pyqtSignal as Signal
 from PyQt6.QtGui import QColor, QFont, QAction
 
 from app.services_layer.kanban_service import KanbanService
@@ -137,18 +137,10 @@ class KanbanWidget(QWidget):
         for card in cards:
             assignee_value = card['assignee'] if card['assignee'] else "N/A"
             
-            due_date_value = "N/A"
-            if card['due_date']:
-                utc_dt = QDateTime.fromString(card['due_date'], Qt.DateFormat.ISODate)
-                local_dt = utc_dt.toLocalTime()
-                due_date_value = local_dt.toString("dd/MM/yyyy HH:mm")
-
-            def format_datetime(dt_str):
-                if not dt_str: return "N/A"
-                # Convert ISO string to QDateTime, then to Python datetime in local timezone, then format
-                qdt = QDateTime.fromString(dt_str, Qt.DateFormat.ISODate)
-                dt_obj = time_utils.datetime_from_qdatetime(qdt)
-                return time_utils.format_datetime(dt_obj)
+            due_date_value = time_utils.format_epoch_ms(card['due_date_ms'], "%d/%m/%Y %H:%M") or "N/A"
+
+            def format_datetime(epoch_ms):
+                return time_utils.format_epoch_ms(epoch_ms) or "N/A"
 
             if column_name == "Por Hacer":
                 item_text = (
@@ -159,14 +151,14 @@ class KanbanWidget(QWidget):
                 item_text = (
                     f"{card['title']}\n"
                     f"Entregar: {assignee_value} | {due_date_value}\n"
-                    f"Iniciado: {format_datetime(card['started_at'])}"
+                    f"Iniciado: {format_datetime(card['started_at_ms'])}"
                 )
             else: # Assuming other columns are 'Done' or similar
                 item_text = (
                     f"{card['title']}\n"
                     f"Encargado: {assignee_value} {due_date_value}\n"
-                    f"Iniciada: {format_datetime(card['started_at'])}\n"
-                    f"Finalizada: {format_datetime(card['finished_at'])}"
+                    f"Iniciada: {format_datetime(card['started_at_ms'])}\n"
+                    f"Finalizada: {format_datetime(card['finished_at_ms'])}"
                 )
             item = QListWidgetItem(item_text)
             item.setData(Qt.ItemDataRole.UserRole, card['id']) # Store card_id in item data
@@ -1,9 +1,20 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QProgressBar, QScrollArea, QPushButton, QFrame)
+                             QProgressBar, QScrollArea, QPushButton, QFrame, QComboBox)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPainter, QColor, QBrush
 import datetime
 
+from app.metrics.metrics_manager import SESSION_RETENTION_DAYS
+
+# Ranges offered by the dashboard (label -> days)
+USAGE_RANGES = {
+    "Hoy": 1,
+    "Últimos 7 días": 7,
+    "Últimos 30 días": 30,
+    "Últimos 90 días": 90,
+    "Último año": 365,
+}
+
 class DailyUsageWidget(QWidget):
     def __init__(self, metrics_manager, parent=None):
         super().__init__(parent)
@@ -25,14 +36,18 @@ class DailyUsageWidget(QWidget):
         self.scroll_area.setWidget(self.content_widget)
         self.layout.addWidget(self.scroll_area)
 
-    def refresh(self):
+    def refresh(self, days=1, range_label="Hoy"):
         # Clear existing items
         for i in reversed(range(self.content_layout.count())): 
             self.content_layout.itemAt(i).widget().setParent(None)
 
-        data = self.metrics_manager.get_usage_report()
+        self.title.setText(f"Desglose por Servicio ({range_label})")
+        if days <= 1:
+            data = self.metrics_manager.get_usage_report()
+        else:
+            data = self.metrics_manager.get_usage_breakdown(days)
         if not data:
-            lbl = QLabel("No hay actividad registrada hoy.")
+            lbl = QLabel("No hay actividad registrada en este periodo.")
             lbl.setStyleSheet("color: #bdc3c7; font-style: italic;")
             self.content_layout.addWidget(lbl)
             return
@@ -81,17 +96,28 @@ class DailyUsageWidget(QWidget):
             row_layout.addWidget(progress)
             self.content_layout.addWidget(row)
 
-class WeeklyTrendWidget(QWidget):
+class UsageTrendWidget(QWidget):
     def __init__(self, metrics_manager, parent=None):
         super().__init__(parent)
         self.metrics_manager = metrics_manager
         self.setMinimumHeight(150)
         self.data = {}
+        self.granularity = 'day'
 
-    def refresh(self):
-        self.data = self.metrics_manager.get_weekly_usage()
+    def refresh(self, days=7, service_id=None):
+        days = max(days, 7) # A single day has no trend; show the week
+        self.granularity = self.metrics_manager.granularity_for_range(days)
+        self.data = self.metrics_manager.get_usage_trend(days, service_id=service_id)
         self.update()
 
+    def _period_label(self, period_start):
+        date_obj = datetime.date.fromisoformat(period_start)
+        if self.granularity == 'month':
+            return date_obj.strftime("%b")
+        if self.granularity == 'week':
+            return date_obj.strftime("%d/%m")
+        return date_obj.strftime("%a") if len(self.data) <= 7 else date_obj.strftime("%d")
+
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -101,7 +127,7 @@ class WeeklyTrendWidget(QWidget):
         
         if not self.data:
             painter.setPen(QColor("#bdc3c7"))
-            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No hay datos semanales")
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No hay datos para este periodo")
             return
 
         # Draw Bars
@@ -113,6 +139,7 @@ class WeeklyTrendWidget(QWidget):
         max_val = max(self.data.values()) if self.data.values() else 1
         
         bar_width = width / len(days) if days else width
+        label_step = max(1, int(40 / bar_width)) if bar_width > 0 else 1 # Avoid overlapping labels
         
         painter.setBrush(QBrush(QColor("#2ecc71")))
         painter.setPen(Qt.PenStyle.NoPen)
@@ -125,21 +152,160 @@ class WeeklyTrendWidget(QWidget):
             y = margin + height - bar_height - 20
             
             # Draw Bar
-            painter.drawRect(int(x), int(y), int(bar_width - 10), int(bar_height))
+            painter.drawRect(int(x), int(y), max(1, int(bar_width - 10)), int(bar_height))
             
-            # Draw Day Label
-            date_obj = datetime.date.fromisoformat(day)
-            day_label = date_obj.strftime("%a") # Mon, Tue...
+            # Draw Period Label
+            if i % label_step:
+                continue
+            day_label = self._period_label(day)
             
             painter.setPen(QColor("#f0f0f0"))
-            painter.drawText(int(x), int(margin + height - 5), int(bar_width - 10), 20, 
+            painter.drawText(int(x), int(margin + height - 5), max(40, int(bar_width - 10)), 20, 
                              Qt.AlignmentFlag.AlignCenter, day_label)
             painter.setPen(Qt.PenStyle.NoPen) # Reset pen for next bar
 
-class MetricsDashboard(QWidget):
+class MessageVolumeWidget(UsageTrendWidget):
+    """Daily incoming message estimate derived from the unread count history."""
+
+    def refresh(self, days=7, service_id=None):
+        self.granularity = 'day'
+        self.data = self.metrics_manager.get_message_volume(max(days, 7), service_id=service_id)
+        self.update()
+
+class HourlyHeatmapWidget(QWidget):
+    WEEKDAYS = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
     def __init__(self, metrics_manager, parent=None):
         super().__init__(parent)
         self.metrics_manager = metrics_manager
+        self.setMinimumHeight(170)
+        self.grid = None
+
+    def refresh(self, days=30, service_id=None):
+        self.grid = self.metrics_manager.get_hourly_heatmap(days, service_id=service_id)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2e2e2e"))
+
+        if self.grid is None or not self.grid.any():
+            painter.setPen(QColor("#bdc3c7"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No hay sesiones registradas en este periodo")
+            return
+
+        label_width, header_height = 40, 16
+        cell_width = (self.width() - label_width - 10) / 24
+        cell_height = (self.height() - header_height - 10) / 7
+        max_val = int(self.grid.max())
+
+        painter.setPen(QColor("#f0f0f0"))
+        for hour in range(0, 24, 3):
+            painter.drawText(int(label_width + hour * cell_width), 0, int(cell_width * 3), header_height,
+                             Qt.AlignmentFlag.AlignLeft, f"{hour:02d}h")
+        for weekday in range(7):
+            y = header_height + weekday * cell_height
+            painter.setPen(QColor("#f0f0f0"))
+            painter.drawText(0, int(y), label_width - 5, int(cell_height),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, self.WEEKDAYS[weekday])
+            painter.setPen(Qt.PenStyle.NoPen)
+            for hour in range(24):
+                intensity = int(self.grid[weekday, hour]) / max_val
+                color = QColor("#3a3a3a") if intensity == 0 else QColor(46, 204, 113, 60 + int(195 * intensity))
+                painter.setBrush(QBrush(color))
+                painter.drawRect(int(label_width + hour * cell_width), int(y),
+                                 max(1, int(cell_width) - 2), max(1, int(cell_height) - 2))
+
+class WebViewMemoryWidget(QLabel):
+    STATE_LABELS = {"Active": "Activos", "Frozen": "Congelados", "Discarded": "Descargados"}
+
+    def __init__(self, webview_lifecycle, parent=None):
+        super().__init__(parent)
+        self.webview_lifecycle = webview_lifecycle
+        self.setStyleSheet("color: #f0f0f0;")
+
+    def refresh(self):
+        parts = []
+        for state, entry in self.webview_lifecycle.get_memory_by_state().items():
+            text = f"{self.STATE_LABELS.get(state, state)}: {entry['count']}"
+            if entry['count'] and entry['rss_bytes'] is not None and state != "Discarded":
+                text += f" ({entry['rss_bytes'] / (1024 * 1024):.0f} MB)"
+            parts.append(text)
+        self.setText("   ·   ".join(parts))
+
+class ProfileStorageWidget(QLabel):
+    """Disk usage of each service profile: HTTP cache and site data (cookies, IndexedDB...)."""
+    MAX_ROWS = 8
+
+    def __init__(self, profile_storage, parent=None):
+        super().__init__(parent)
+        self.profile_storage = profile_storage
+        self.setStyleSheet("color: #f0f0f0;")
+
+    def refresh(self):
+        usage = self.profile_storage()
+        if not usage:
+            self.setText("Sin servicios web.")
+            return
+        mb = 1024 * 1024
+        lines = [f"{entry['name']}: caché {entry['cache_bytes'] / mb:.0f} MB · datos {entry['storage_bytes'] / mb:.0f} MB"
+                 for entry in usage[:self.MAX_ROWS]]
+        total_cache = sum(entry['cache_bytes'] for entry in usage) / mb
+        total_storage = sum(entry['storage_bytes'] for entry in usage) / mb
+        lines.append(f"Total: caché {total_cache:.0f} MB · datos {total_storage:.0f} MB")
+        self.setText("\n".join(lines))
+
+class BlockedRequestsWidget(QLabel):
+    """Trackers and ads blocked per service in this session, with the estimated traffic saved."""
+    MAX_ROWS = 8
+
+    def __init__(self, blocked_requests, parent=None):
+        super().__init__(parent)
+        self.blocked_requests = blocked_requests
+        self.setStyleSheet("color: #f0f0f0;")
+
+    def refresh(self):
+        stats = self.blocked_requests()
+        if not stats:
+            self.setText("No se han bloqueado peticiones en esta sesión.")
+            return
+        mb = 1024 * 1024
+        lines = [f"{entry['name']}: {entry['requests']} peticiones (~{entry['bytes'] / mb:.1f} MB)"
+                 for entry in stats[:self.MAX_ROWS]]
+        total_requests = sum(entry['requests'] for entry in stats)
+        total_bytes = sum(entry['bytes'] for entry in stats) / mb
+        lines.append(f"Total: {total_requests} peticiones bloqueadas (~{total_bytes:.1f} MB ahorrados)")
+        self.setText("\n".join(lines))
+
+class ResourceUsageWidget(QLabel):
+    """CPU and memory of each service's renderer process over the monitor's rolling window."""
+    MAX_ROWS = 10
+
+    def __init__(self, resource_usage, parent=None):
+        super().__init__(parent)
+        self.resource_usage = resource_usage
+        self.setStyleSheet("color: #f0f0f0;")
+
+    def refresh(self):
+        usage = self.resource_usage()
+        if not usage:
+            self.setText("Sin datos todavía (los servicios cargados se miden cada pocos segundos).")
+            return
+        mb = 1024 * 1024
+        self.setText("\n".join(
+            f"{entry['name']}: CPU {entry['cpu_avg']:.1f}% (ahora {entry['cpu_last']:.1f}%) · "
+            f"RAM {entry['rss_last'] / mb:.0f} MB (máx. {entry['rss_peak'] / mb:.0f} MB)"
+            for entry in usage[:self.MAX_ROWS]))
+
+class MetricsDashboard(QWidget):
+    def __init__(self, metrics_manager, parent=None, webview_lifecycle=None, profile_storage=None, blocked_requests=None,
+                 resource_usage=None):
+        super().__init__(parent)
+        self.metrics_manager = metrics_manager
+        self.webview_lifecycle = webview_lifecycle
+        self.profile_storage = profile_storage
+        self.blocked_requests = blocked_requests
+        self.resource_usage = resource_usage
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(20, 20, 20, 20)
         self.layout.setSpacing(20)
@@ -158,15 +324,71 @@ class MetricsDashboard(QWidget):
             QPushButton:hover { background-color: #666; }
         """)
 
+        # Range and service selectors (all ranges are served from pre-aggregated rollups)
+        self.range_combo = QComboBox()
+        self.range_combo.addItems(USAGE_RANGES.keys())
+        self.range_combo.setCurrentText("Últimos 7 días")
+        self.range_combo.currentIndexChanged.connect(self.refresh_all)
+        self.service_combo = QComboBox()
+        self.service_combo.addItem("Todos los servicios", None)
+        for service in self.metrics_manager.get_service_totals():
+            self.service_combo.addItem(service['service_name'], service['service_id'])
+        self.service_combo.currentIndexChanged.connect(self.refresh_all)
+
         header_layout.addWidget(title)
         header_layout.addStretch()
+        header_layout.addWidget(self.range_combo)
+        header_layout.addWidget(self.service_combo)
         header_layout.addWidget(btn_refresh)
         self.layout.addLayout(header_layout)
 
-        # Weekly Trend
-        self.weekly_widget = WeeklyTrendWidget(self.metrics_manager)
-        self.layout.addWidget(QLabel("Tendencia Semanal", styleSheet="font-weight: bold; color: #f0f0f0;"))
-        self.layout.addWidget(self.weekly_widget)
+        # Usage Trend
+        self.trend_widget = UsageTrendWidget(self.metrics_manager)
+        self.layout.addWidget(QLabel("Tendencia de Uso", styleSheet="font-weight: bold; color: #f0f0f0;"))
+        self.layout.addWidget(self.trend_widget)
+
+        # Hourly Heatmap and context switches (from the session log)
+        heatmap_header = QHBoxLayout()
+        heatmap_header.addWidget(QLabel("Actividad por Hora", styleSheet="font-weight: bold; color: #f0f0f0;"))
+        heatmap_header.addStretch()
+        self.switches_label = QLabel(styleSheet="color: #bdc3c7;")
+        heatmap_header.addWidget(self.switches_label)
+        self.layout.addLayout(heatmap_header)
+        self.heatmap_widget = HourlyHeatmapWidget(self.metrics_manager)
+        self.layout.addWidget(self.heatmap_widget)
+
+        # Message volume (from unread count history)
+        self.layout.addWidget(QLabel("Volumen de Mensajes", styleSheet="font-weight: bold; color: #f0f0f0;"))
+        self.message_volume_widget = MessageVolumeWidget(self.metrics_manager)
+        self.layout.addWidget(self.message_volume_widget)
+
+        # Service web view memory by lifecycle state
+        self.memory_widget = None
+        if self.webview_lifecycle is not None:
+            self.layout.addWidget(QLabel("Memoria de Servicios Web", styleSheet="font-weight: bold; color: #f0f0f0;"))
+            self.memory_widget = WebViewMemoryWidget(self.webview_lifecycle)
+            self.layout.addWidget(self.memory_widget)
+
+        # Renderer process CPU and memory per service
+        self.resource_widget = None
+        if self.resource_usage is not None:
+            self.layout.addWidget(QLabel("Consumo por Servicio", styleSheet="font-weight: bold; color: #f0f0f0;"))
+            self.resource_widget = ResourceUsageWidget(self.resource_usage)
+            self.layout.addWidget(self.resource_widget)
+
+        # Service profile disk usage (HTTP cache and site data)
+        self.storage_widget = None
+        if self.profile_storage is not None:
+            self.layout.addWidget(QLabel("Almacenamiento de Servicios Web", styleSheet="font-weight: bold; color: #f0f0f0;"))
+            self.storage_widget = ProfileStorageWidget(self.profile_storage)
+            self.layout.addWidget(self.storage_widget)
+
+        # Content filter counters (trackers and ads blocked this session)
+        self.blocked_widget = None
+        if self.blocked_requests is not None:
+            self.layout.addWidget(QLabel("Rastreadores y Anuncios Bloqueados", styleSheet="font-weight: bold; color: #f0f0f0;"))
+            self.blocked_widget = BlockedRequestsWidget(self.blocked_requests)
+            self.layout.addWidget(self.blocked_widget)
 
         # Daily Usage
         self.daily_widget = DailyUsageWidget(self.metrics_manager)
@@ -176,5 +398,20 @@ class MetricsDashboard(QWidget):
         self.refresh_all()
 
     def refresh_all(self):
-        self.weekly_widget.refresh()
-        self.daily_widget.refresh()
+        range_label = self.range_combo.currentText()
+        days = USAGE_RANGES[range_label]
+        self.trend_widget.refresh(days, service_id=self.service_combo.currentData())
+        session_days = min(days, SESSION_RETENTION_DAYS)
+        self.heatmap_widget.refresh(session_days, service_id=self.service_combo.currentData())
+        self.message_volume_widget.refresh(session_days, service_id=self.service_combo.currentData())
+        switches = self.metrics_manager.get_switch_frequency(session_days)
+        self.switches_label.setText(f"Cambios de contexto: {switches['average_per_day']:.1f} por día")
+        self.daily_widget.refresh(days, range_label)
+        if self.memory_widget is not None:
+            self.memory_widget.refresh()
+        if self.resource_widget is not None:
+            self.resource_widget.refresh()
+        if self.storage_widget is not None:
+            self.storage_widget.refresh()
+        if self.blocked_widget is not None:
+            self.blocked_widget.refresh()
@@ -1,8 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QListWidget, QListWidgetItem, QLineEdit, QDialog, QMenu, QGroupBox, QPushButton
-from PyQt6.QtCore import Qt, QDateTime, pyqtSignal as Signal
+from PyQt6.QtCore import Qt, pyqtSignal as Signal
 from PyQt6.QtGui import QAction
 from app.utils import time_utils
-from app.db.settings_manager import SettingsManager
 from app.db import database
 
 from app.services_layer.notes_service import NotesService
@@ -100,15 +99,9 @@ class NotesWidget(QWidget):
     def load_notes(self):
         self.notes_list.clear()
         notes = self.notes_service.get_all_notes()
-        for note in notes:
+        timestamps = time_utils.format_epoch_ms_batch([note['created_at_ms'] for note in notes])
+        for note, timestamp in zip(notes, timestamps):
             snippet = note['content'].split('\n')[0] # First line as snippet
-            
-            timestamp = ""
-            if note['created_at']:
-                utc_dt = QDateTime.fromString(note['created_at'], Qt.DateFormat.ISODate)
-                utc_dt.setTimeSpec(Qt.TimeSpec.UTC)
-                local_dt = utc_dt.toLocalTime()
-                timestamp = local_dt.toString(time_utils.convert_strftime_to_qt_format(SettingsManager.get_instance().get_datetime_format()))
 
             item_text = f"{snippet} ({timestamp})"
             item = QListWidgetItem(item_text)
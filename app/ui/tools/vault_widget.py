@@ -1,6 +1,29 @@
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QListWidget, QInputDialog, QMessageBox, QListWidgetItem, QMenu, QLineEdit
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QInputDialog, QMessageBox,
+                             QListWidgetItem, QMenu, QLineEdit, QFileDialog, QProgressDialog)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+
+from app.security.vault_archive import ARCHIVE_EXTENSION, export_to_file, import_from_file
+
+class VaultTaskWorker(QThread):
+    """
+    Runs the archive encryption of a vault export or import off the UI thread; the task gets a
+    progress(done, total) callback. The vault's database connection is only used on the UI thread.
+    """
+    progress = pyqtSignal(int, int) # done, total
+    succeeded = pyqtSignal(object) # task result
+    error = pyqtSignal(str)
+
+    def __init__(self, task, *args, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.args = args
+
+    def run(self):
+        try:
+            self.succeeded.emit(self.task(*self.args, progress=self.progress.emit))
+        except Exception as e:
+            self.error.emit(str(e))
 
 class VaultWidget(QWidget):
     def __init__(self, vault_manager, parent=None):
@@ -18,11 +41,22 @@ class VaultWidget(QWidget):
         self.secrets_list.customContextMenuRequested.connect(self.show_context_menu)
         self.add_secret_button = QPushButton("Añadir Nuevo Secreto")
         self.add_secret_button.clicked.connect(self.add_secret)
+        self.export_button = QPushButton("Exportar...")
+        self.export_button.clicked.connect(self.export_vault)
+        self.import_button = QPushButton("Importar...")
+        self.import_button.clicked.connect(self.import_vault)
+        self.archive_buttons = QWidget()
+        archive_layout = QHBoxLayout(self.archive_buttons)
+        archive_layout.setContentsMargins(0, 0, 0, 0)
+        archive_layout.addWidget(self.export_button)
+        archive_layout.addWidget(self.import_button)
+        self.task_worker = None
 
         self.layout.addWidget(self.status_label)
         self.layout.addWidget(self.unlock_button)
         self.layout.addWidget(self.secrets_list)
         self.layout.addWidget(self.add_secret_button)
+        self.layout.addWidget(self.archive_buttons)
 
         self.update_ui()
 
@@ -33,11 +67,13 @@ class VaultWidget(QWidget):
             self.unlock_button.show()
             self.secrets_list.hide()
             self.add_secret_button.hide()
+            self.archive_buttons.hide()
         else:
             self.status_label.hide()
             self.unlock_button.hide()
             self.secrets_list.show()
             self.add_secret_button.show()
+            self.archive_buttons.show()
             self.load_secrets()
 
     def unlock_vault(self):
@@ -102,3 +138,87 @@ class VaultWidget(QWidget):
                 self.load_secrets()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"No se pudo eliminar el secreto: {e}")
+
+    def export_vault(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar Bóveda", f"boveda{ARCHIVE_EXTENSION}",
+                                              f"Archivo de bóveda (*{ARCHIVE_EXTENSION})")
+        if not path:
+            return
+        passphrase, ok = QInputDialog.getText(self, "Exportar Bóveda", "Contraseña para el archivo:", QLineEdit.EchoMode.Password)
+        if not ok or not passphrase:
+            return
+        confirmation, ok = QInputDialog.getText(self, "Exportar Bóveda", "Repite la contraseña:", QLineEdit.EchoMode.Password)
+        if not ok:
+            return
+        if confirmation != passphrase:
+            QMessageBox.warning(self, "Error", "Las contraseñas no coinciden.")
+            return
+        try:
+            secrets = self.vault_manager.get_all_secrets()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron leer los secretos: {e}")
+            return
+        self.run_vault_task("Exportando secretos...", export_to_file, secrets, passphrase, path,
+                            on_success=lambda count: QMessageBox.information(
+                                self, "Bóveda Exportada", f"{count} secretos exportados a {path}."))
+
+    def import_vault(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importar Bóveda", "", f"Archivo de bóveda (*{ARCHIVE_EXTENSION})")
+        if not path:
+            return
+        passphrase, ok = QInputDialog.getText(self, "Importar Bóveda", "Contraseña del archivo:", QLineEdit.EchoMode.Password)
+        if not ok or not passphrase:
+            return
+        reply = QMessageBox.question(self, "Importar Bóveda",
+                                     "Los secretos con el mismo nombre se reemplazarán. ¿Continuar?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        def imported(secrets):
+            try:
+                count = self.vault_manager.save_secrets(secrets)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"No se pudieron guardar los secretos: {e}")
+                return
+            self.load_secrets()
+            QMessageBox.information(self, "Bóveda Importada", f"{count} secretos importados.")
+
+        self.run_vault_task("Importando secretos...", import_from_file, passphrase, path, on_success=imported)
+
+    def run_vault_task(self, label, task, *args, on_success=None):
+        """Runs an export/import in a VaultTaskWorker with a progress dialog. The vault stays unlocked meanwhile."""
+        if self.task_worker is not None:
+            return
+        try:
+            self.vault_manager.begin_task()
+        except PermissionError:
+            self.update_ui()
+            return
+        dialog = QProgressDialog(label, None, 0, 0, self)
+        dialog.setWindowTitle("Bóveda")
+        dialog.setMinimumDuration(300)
+        dialog.setAutoClose(True)
+        self.archive_buttons.setEnabled(False)
+
+        worker = VaultTaskWorker(task, *args, parent=self)
+
+        def update_progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+
+        def finish():
+            dialog.reset()
+            dialog.deleteLater()
+            self.archive_buttons.setEnabled(True)
+            self.task_worker = None
+            self.vault_manager.end_task()
+
+        worker.progress.connect(update_progress)
+        if on_success is not None:
+            worker.succeeded.connect(on_success)
+        worker.error.connect(lambda message: QMessageBox.critical(self, "Error", f"No se pudo completar la operación: {message}"))
+        worker.finished.connect(finish)
+        worker.finished.connect(worker.deleteLater)
+        self.task_worker = worker
+        worker.start()
@@ -89,6 +89,33 @@ class UnifiedSettingsDialog(QDialog):
         self.long_break_spinbox.setRange(1, 60)
         self.form_layout.addRow("Descanso Largo (min):", self.long_break_spinbox)
 
+        # Service web views (memory)
+        self.max_live_webviews_spin = QSpinBox()
+        self.max_live_webviews_spin.setRange(1, 50)
+        self.form_layout.addRow("Servicios cargados a la vez:", self.max_live_webviews_spin)
+
+        self.webview_freeze_spin = QSpinBox()
+        self.webview_freeze_spin.setRange(1, 240)
+        self.form_layout.addRow("Congelar servicios inactivos tras (min):", self.webview_freeze_spin)
+
+        self.webview_discard_spin = QSpinBox()
+        self.webview_discard_spin.setRange(1, 1440)
+        self.form_layout.addRow("Descargar servicios inactivos tras (min):", self.webview_discard_spin)
+
+        self.webview_cache_size_spin = QSpinBox()
+        self.webview_cache_size_spin.setRange(0, 4096)
+        self.webview_cache_size_spin.setSuffix(" MB")
+        self.webview_cache_size_spin.setSpecialValueText("Automático")
+        self.form_layout.addRow("Caché HTTP por servicio:", self.webview_cache_size_spin)
+
+        self.prewarm_count_spin = QSpinBox()
+        self.prewarm_count_spin.setRange(0, 20)
+        self.prewarm_count_spin.setSpecialValueText("Desactivado")
+        self.form_layout.addRow("Precargar servicios más usados al iniciar:", self.prewarm_count_spin)
+
+        self.content_filter_checkbox = QCheckBox("Bloquear rastreadores y anuncios en los servicios")
+        self.form_layout.addRow(self.content_filter_checkbox)
+
         # Kanban Colors
         self.todo_color_button = QPushButton()
         self.todo_color_button.clicked.connect(lambda: self.select_color(self.todo_color_button, "todo_color"))
@@ -230,6 +257,12 @@ class UnifiedSettingsDialog(QDialog):
         self.pomodoro_spinbox.setValue(self.settings_manager.get_pomodoro_duration())
         self.short_break_spinbox.setValue(self.settings_manager.get_short_break_duration())
         self.long_break_spinbox.setValue(self.settings_manager.get_long_break_duration())
+        self.max_live_webviews_spin.setValue(self.settings_manager.get_max_live_webviews())
+        self.webview_freeze_spin.setValue(self.settings_manager.get_webview_freeze_minutes())
+        self.webview_discard_spin.setValue(self.settings_manager.get_webview_discard_minutes())
+        self.prewarm_count_spin.setValue(self.settings_manager.get_prewarm_service_count())
+        self.content_filter_checkbox.setChecked(self.settings_manager.get_content_filter_enabled())
+        self.webview_cache_size_spin.setValue(self.settings_manager.get_webview_cache_size_mb())
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self._update_app_lock_ui_state()
 
@@ -273,6 +306,12 @@ class UnifiedSettingsDialog(QDialog):
         self.pomodoro_spinbox.setValue(self.settings_manager.get_pomodoro_duration())
         self.short_break_spinbox.setValue(self.settings_manager.get_short_break_duration())
         self.long_break_spinbox.setValue(self.settings_manager.get_long_break_duration())
+        self.max_live_webviews_spin.setValue(self.settings_manager.get_max_live_webviews())
+        self.webview_freeze_spin.setValue(self.settings_manager.get_webview_freeze_minutes())
+        self.webview_discard_spin.setValue(self.settings_manager.get_webview_discard_minutes())
+        self.prewarm_count_spin.setValue(self.settings_manager.get_prewarm_service_count())
+        self.content_filter_checkbox.setChecked(self.settings_manager.get_content_filter_enabled())
+        self.webview_cache_size_spin.setValue(self.settings_manager.get_webview_cache_size_mb())
 
         self.todo_color = self.settings_manager.get_todo_color()
         self.todo_color_button.setStyleSheet(f"background-color: {self.todo_color}")
@@ -361,6 +400,12 @@ class UnifiedSettingsDialog(QDialog):
             self.settings_manager.set_pomodoro_duration(self.pomodoro_spinbox.value())
             self.settings_manager.set_short_break_duration(self.short_break_spinbox.value())
             self.settings_manager.set_long_break_duration(self.long_break_spinbox.value())
+            self.settings_manager.set_max_live_webviews(self.max_live_webviews_spin.value())
+            self.settings_manager.set_webview_freeze_minutes(self.webview_freeze_spin.value())
+            self.settings_manager.set_webview_discard_minutes(self.webview_discard_spin.value())
+            self.settings_manager.set_prewarm_service_count(self.prewarm_count_spin.value())
+            self.settings_manager.set_content_filter_enabled(self.content_filter_checkbox.isChecked())
+            self.settings_manager.set_webview_cache_size_mb(self.webview_cache_size_spin.value())
 
             if self.todo_color:
                 self.settings_manager.set_todo_color(self.todo_color)
@@ -0,0 +1,67 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Reports arriving within one frame are delivered together
+COALESCE_INTERVAL_MS = 16
+
+def unread_count_from_result(value) -> int:
+    """Normalizes an unread_script result (count, boolean, numeric string or null) to a count."""
+    if value is None or isinstance(value, bool):
+        return int(bool(value))
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+    if isinstance(value, str):
+        return int(value) if value.strip().isdigit() else int(bool(value.strip()))
+    return 0
+
+class UnreadAggregator(QObject):
+    """
+    Collects per-service unread reports and publishes them once per frame.
+    Only services whose count actually changed are emitted, and the total is
+    emitted only when it changes, so badges and the tray icon repaint on change only.
+    """
+    counts_changed = pyqtSignal(dict) # {service_id: count} for the services that changed
+    total_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._counts = {}
+        self._pending = {}
+        self._total = 0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(COALESCE_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def report(self, service_id, value):
+        """Queues the latest unread value reported for a service."""
+        self._pending[service_id] = unread_count_from_result(value)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def remove_service(self, service_id):
+        """Forgets a deleted service (its badge contribution drops to zero)."""
+        self._pending.pop(service_id, None)
+        if self._counts.pop(service_id, 0):
+            self._emit_total()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        changed = {service_id: count for service_id, count in pending.items()
+                   if self._counts.get(service_id) != count}
+        if not changed:
+            return
+        self._counts.update(changed)
+        self.counts_changed.emit(changed)
+        self._emit_total()
+
+    def _emit_total(self):
+        total = sum(self._counts.values())
+        if total != self._total:
+            self._total = total
+            self.total_changed.emit(total)
+
+    def get_count(self, service_id) -> int:
+        return self._counts.get(service_id, 0)
+
+    def get_total(self) -> int:
+        return self._total
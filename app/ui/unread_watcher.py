@@ -0,0 +1,103 @@
+import json
+from PyQt6.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+# Minimum time between two evaluations of a service's unread_script inside the page
+UNREAD_DEBOUNCE_MS = 750
+
+# The watcher runs in the application world: it shares the DOM with the page but
+# not its JavaScript globals, so pages cannot see or tamper with the bridge.
+WATCHER_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld
+
+_WATCHER_TEMPLATE = """
+(function() {
+    if (window.__infoMensajeroUnreadWatcher) return;
+    window.__infoMensajeroUnreadWatcher = true;
+
+    var unreadScript = %(script)s;
+    function evaluate() {
+        try { return eval(unreadScript); } catch (e) { return null; }
+    }
+
+    new QWebChannel(qt.webChannelTransport, function(channel) {
+        var bridge = channel.objects.unreadBridge;
+        var last;
+        var timer = null;
+        function check() {
+            timer = null;
+            var value = evaluate();
+            if (value === undefined) value = null;
+            if (value !== last) {
+                last = value;
+                bridge.report(value);
+            }
+        }
+        function schedule() {
+            if (timer === null) timer = setTimeout(check, %(debounce)d);
+        }
+        // Title changes ("(3) WhatsApp") and DOM badges both show up as mutations
+        new MutationObserver(schedule).observe(document.documentElement, {
+            childList: true, subtree: true, characterData: true,
+            attributes: true, attributeFilter: ['class', 'aria-label']
+        });
+        check();
+    });
+})();
+"""
+
+def _qwebchannel_js():
+    """Returns the qwebchannel.js client library shipped with Qt WebChannel."""
+    resource = QFile(":/qtwebchannel/qwebchannel.js")
+    if not resource.open(QIODevice.OpenModeFlag.ReadOnly):
+        return ""
+    try:
+        return bytes(resource.readAll()).decode("utf-8")
+    finally:
+        resource.close()
+
+def build_watcher_script(unread_script: str, debounce_ms: int = UNREAD_DEBOUNCE_MS) -> str:
+    """Wraps a service's unread_script in a debounced MutationObserver that reports changes to the bridge."""
+    return _WATCHER_TEMPLATE % {'script': json.dumps(unread_script), 'debounce': debounce_ms}
+
+class UnreadBridge(QObject):
+    """QWebChannel object the injected watcher calls whenever the unread value changes."""
+    unread_changed = pyqtSignal(int, object) # service_id, value returned by unread_script
+
+    def __init__(self, service_id, parent=None):
+        super().__init__(parent)
+        self.service_id = service_id
+
+    @pyqtSlot("QVariant")
+    def report(self, value):
+        self.unread_changed.emit(self.service_id, value)
+
+def install_unread_watcher(page, service_id, unread_script):
+    """
+    Installs the unread watcher on a page once: qwebchannel.js at DocumentCreation and the
+    observer at DocumentReady, both re-run by Qt on every navigation. Returns the bridge.
+    The page is flagged so the lifecycle manager can keep recently used watched pages live.
+    """
+    page.setProperty('unread_watcher', True)
+    bridge = UnreadBridge(service_id, page)
+    channel = QWebChannel(page)
+    channel.registerObject("unreadBridge", bridge)
+    page.setWebChannel(channel, WATCHER_WORLD)
+
+    channel_script = QWebEngineScript()
+    channel_script.setName("qwebchannel")
+    channel_script.setSourceCode(_qwebchannel_js())
+    channel_script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+    channel_script.setWorldId(WATCHER_WORLD)
+    channel_script.setRunsOnSubFrames(False)
+
+    watcher_script = QWebEngineScript()
+    watcher_script.setName("unread_watcher")
+    watcher_script.setSourceCode(build_watcher_script(unread_script))
+    watcher_script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+    watcher_script.setWorldId(WATCHER_WORLD)
+    watcher_script.setRunsOnSubFrames(False)
+
+    page.scripts().insert(channel_script)
+    page.scripts().insert(watcher_script)
+    return bridge
@@ -0,0 +1,150 @@
+import time
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+try:
+    import psutil
+except ImportError: # Memory figures are reported as unknown
+    psutil = None
+
+LifecycleState = QWebEnginePage.LifecycleState
+
+class WebViewLifecycleManager(QObject):
+    """
+    Moves background service web views through Frozen and Discarded states.
+
+    Views are kept in LRU order. A view that has been in the background longer than the
+    configured freeze/discard times is frozen/discarded, and when more views than the
+    configured cap are loaded the least recently used ones are discarded. The current
+    view, pinned services and pages playing audio are never touched. Discarded pages
+    are reloaded by Qt Web Engine when they are shown again.
+
+    With a ResourceMonitor attached, background views whose renderer keeps using a lot of
+    CPU are frozen after BUSY_FREEZE_SECONDS instead of waiting for the freeze time.
+
+    Frozen and discarded pages run no scripts, so their unread watcher stops reporting and
+    their badge keeps the last count until the view is shown again. To keep the badges of
+    the services in use live, the WATCHED_LIVE_VIEWS most recently used views with a watcher
+    (see unread_watcher) are left out of the idle-time rules; the others are frozen and
+    discarded like any view. Pin a service to keep its badge live regardless.
+    """
+    state_changed = pyqtSignal(int, str) # service_id, state name
+
+    CHECK_INTERVAL_MS = 30000
+    BUSY_CPU_PERCENT = 20
+    BUSY_FREEZE_SECONDS = 60
+    WATCHED_LIVE_VIEWS = 3
+
+    def __init__(self, web_view_stack, settings_manager, parent=None, resource_monitor=None):
+        super().__init__(parent)
+        self.web_view_stack = web_view_stack
+        self.settings_manager = settings_manager
+        self.resource_monitor = resource_monitor
+        self._last_active = OrderedDict() # view -> monotonic time it was last shown; oldest first
+        self._current_view = None
+
+        self.web_view_stack.currentChanged.connect(self._on_current_changed)
+        self.check_timer = QTimer(self)
+        self.check_timer.timeout.connect(self.enforce)
+        self.check_timer.start(self.CHECK_INTERVAL_MS)
+
+    def register(self, view):
+        """Starts managing a service web view."""
+        self._last_active[view] = time.monotonic()
+
+    def unregister(self, view):
+        """Stops managing a web view (e.g. its service was deleted)."""
+        self._last_active.pop(view, None)
+        if self._current_view is view:
+            self._current_view = None
+
+    def _on_current_changed(self, index):
+        now = time.monotonic()
+        previous = self._current_view
+        if previous in self._last_active:
+            # Idle time is measured from the moment the view went to the background
+            self._last_active[previous] = now
+        view = self.web_view_stack.widget(index)
+        self._current_view = view if view in self._last_active else None
+        if self._current_view is not None:
+            self._last_active[view] = now
+            self._last_active.move_to_end(view)
+            self._set_state(view, LifecycleState.Active)
+
+    def _is_exempt(self, view, pinned_ids):
+        if view is self._current_view or view.isVisible():
+            return True
+        if view.property('service_id') in pinned_ids:
+            return True
+        return view.page().recentlyAudible() # Calls, music...
+
+    def _watched_views_kept_live(self):
+        """The most recently used views whose page reports unread counts."""
+        watched = [v for v in reversed(self._last_active) if v.page().property('unread_watcher')]
+        return set(watched[:self.WATCHED_LIVE_VIEWS])
+
+    def _set_state(self, view, state):
+        page = view.page()
+        if page.lifecycleState() == state:
+            return
+        page.setLifecycleState(state)
+        self.state_changed.emit(view.property('service_id') or 0, state.name)
+
+    def _is_cpu_heavy(self, view):
+        return (self.resource_monitor is not None
+                and self.resource_monitor.is_cpu_heavy(view.property('service_id'), self.BUSY_CPU_PERCENT))
+
+    def enforce(self, now=None):
+        """Applies the idle-time rules and the live view cap. Called periodically."""
+        now = time.monotonic() if now is None else now
+        freeze_after = self.settings_manager.get_webview_freeze_minutes() * 60
+        discard_after = self.settings_manager.get_webview_discard_minutes() * 60
+        max_live = self.settings_manager.get_max_live_webviews()
+        pinned_ids = self.settings_manager.get_pinned_service_ids()
+        kept_live = self._watched_views_kept_live()
+
+        for view, last_active in list(self._last_active.items()):
+            if self._is_exempt(view, pinned_ids):
+                continue
+            idle = now - last_active
+            state = view.page().lifecycleState()
+            idle_rules = view not in kept_live # Keeps their unread badges updating
+            if idle_rules and idle >= discard_after and state != LifecycleState.Discarded:
+                self._set_state(view, LifecycleState.Discarded)
+            elif state == LifecycleState.Active and ((idle_rules and idle >= freeze_after) or
+                                                      (idle >= self.BUSY_FREEZE_SECONDS and self._is_cpu_heavy(view))):
+                self._set_state(view, LifecycleState.Frozen)
+
+        # Cap on loaded (non-discarded) views, least recently used first
+        live = [v for v in self._last_active if v.page().lifecycleState() != LifecycleState.Discarded]
+        excess = len(live) - max_live
+        for view in live:
+            if excess <= 0:
+                break
+            if self._is_exempt(view, pinned_ids):
+                continue
+            self._set_state(view, LifecycleState.Discarded)
+            excess -= 1
+
+    def get_memory_by_state(self):
+        """
+        Returns {'Active'|'Frozen'|'Discarded': {'count': int, 'rss_bytes': int | None}}.
+        Memory is the resident size of each view's render process (counted once per process);
+        it is None when psutil is unavailable.
+        """
+        summary = {state.name: {'count': 0, 'rss_bytes': 0 if psutil else None} for state in LifecycleState}
+        seen_pids = set()
+        for view in self._last_active:
+            page = view.page()
+            entry = summary[page.lifecycleState().name]
+            entry['count'] += 1
+            pid = page.renderProcessPid()
+            if psutil is None or not pid or pid in seen_pids:
+                continue
+            seen_pids.add(pid)
+            try:
+                entry['rss_bytes'] += psutil.Process(pid).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return summary
@@ -1,9 +1,17 @@
 import os
-from PyQt6.QtCore import QObject, pyqtSignal, QUrl, QTimer
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, QUrl
 from PyQt6.QtGui import QDesktopServices, QAction
 from PyQt6.QtWidgets import QMenu, QApplication
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage
+from PyQt6.QtWebEngineCore import QWebEnginePage
 from PyQt6.QtWebEngineWidgets import QWebEngineView
+from app.db.settings_manager import SettingsManager
+from app.ui.webview_lifecycle import WebViewLifecycleManager
+from app.metrics.resource_monitor import ResourceMonitor
+from app.ui.profile_factory import create_service_profile
+from app.ui.content_filter import ContentFilterInterceptor
+from app.utils.content_blocking import BlockCounter, load_blocklist
+from app.utils.profile_storage import profile_storage_usage
+from app.ui.unread_watcher import install_unread_watcher
 
 class LinkHandlingPage(QWebEnginePage):
     """
@@ -97,7 +105,7 @@ class CustomWebEngineView(QWebEngineView):
 
 class WebViewManager(QObject):
     """Manages the creation, loading, and lifecycle of service web views."""
-    unread_status_changed = pyqtSignal(int, bool)
+    unread_reported = pyqtSignal(int, object) # service_id, raw unread_script result (count or boolean)
     notification_requested = pyqtSignal(str, str)
 
     def __init__(self, web_view_stack, service_manager, parent=None):
@@ -105,59 +113,137 @@ class WebViewManager(QObject):
         self.web_view_stack = web_view_stack
         self.service_manager = service_manager
         self.web_views = {}
+        # Freezes/discards background views (LRU, idle time, live view cap)
+        # CPU/RSS of each service's renderer process, also used by the suspension policy
+        self.resource_monitor = ResourceMonitor(self.get_renderer_pids, self)
+        self.lifecycle_manager = WebViewLifecycleManager(web_view_stack, SettingsManager.get_instance(), self,
+                                                         resource_monitor=self.resource_monitor)
+        # Tracker/ad blocking: one interceptor per service profile sharing the compiled blocklist
+        self.blocklist = load_blocklist()
+        self.block_counter = BlockCounter()
+        self.content_filters = {} # service_id -> (profile, ContentFilterInterceptor)
+        SettingsManager.get_instance().add_listener(self._on_setting_changed)
 
-        # Timer to periodically check for unread messages
-        self.unread_check_timer = QTimer(self)
-        self.unread_check_timer.timeout.connect(self.run_unread_check_on_current_view)
-        self.unread_check_timer.start(5000) # Check every 5 seconds
+    def load_service(self, url, profile_path):
+        view = self.web_views.get(profile_path) or self._create_view(url, profile_path)
+        if view is not None:
+            self.web_view_stack.setCurrentWidget(view)
 
-    def run_unread_check_on_current_view(self):
+    def prewarm_service(self, url, profile_path):
         """
-        Checks the unread status of the currently active web view if it's a service.
+        Creates a service view and starts loading it without showing it.
+        Returns the new view, or None if it already exists or the service is unknown.
         """
-        current_view = self.web_view_stack.currentWidget()
-        # Check if the widget is a CustomWebEngineView and has a service_id
-        if isinstance(current_view, CustomWebEngineView) and current_view.property('service_id'):
-            service_id = current_view.property('service_id')
-            self._check_unread_messages_for_service(service_id, current_view)
+        if profile_path in self.web_views:
+            return None
+        return self._create_view(url, profile_path)
 
-    def load_service(self, url, profile_path):
+    def _create_view(self, url, profile_path):
         service_details = self.service_manager.get_service_by_profile_path(profile_path)
         if not service_details:
             print(f"Error: Service details not found for profile_path: {profile_path}")
+            return None
+
+        profile = create_service_profile(profile_path, SettingsManager.get_instance(), self)
+        self._install_content_filter(profile, service_details['id'])
+        profile.downloadRequested.connect(self._handle_download_requested)
+
+        view = CustomWebEngineView()
+        page = LinkHandlingPage(profile, view)
+        page.featurePermissionRequested.connect(self.handle_permission_request)
+        view.setPage(page)
+        view.setProperty('service_id', service_details['id'])
+        self._install_unread_detection(page, service_details)
+        view.loadFinished.connect(self._on_web_view_load_finished)
+        view.setUrl(QUrl(url))
+
+        self.web_views[profile_path] = view
+        self.web_view_stack.addWidget(view)
+        self.lifecycle_manager.register(view)
+        return view
+
+    def remove_webview_for_service(self, service_id, on_released=None):
+        """
+        Closes a service's web view and its profile. on_released() runs once the profile has been
+        destroyed and Chromium no longer holds its files (right away if the service has no view).
+        """
+        # Looked up by view rather than in the DB: the service row may already be deleted
+        profile_path = next((path for path, view in self.web_views.items()
+                             if view.property('service_id') == service_id), None)
+        if profile_path is None:
+            if on_released is not None:
+                on_released()
             return
+        view_to_remove = self.web_views.pop(profile_path)
+        self.lifecycle_manager.unregister(view_to_remove)
+        self.web_view_stack.removeWidget(view_to_remove)
+        profile = view_to_remove.page().profile()
+        self.content_filters.pop(service_id, None)
+        if on_released is not None:
+            # Queued: the callback must not run inside the profile's destructor
+            profile.destroyed.connect(lambda: QTimer.singleShot(0, on_released))
+        view_to_remove.deleteLater()
+        profile.deleteLater() # Deleted after the view and its page; releases the profile's files
 
-        if profile_path in self.web_views:
-            view = self.web_views[profile_path]
-        else:
-            profile_name = os.path.basename(profile_path)
-            profile = QWebEngineProfile(profile_name, self)
-            profile.setPersistentStoragePath(profile_path)
-            profile.setHttpUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            profile.downloadRequested.connect(self._handle_download_requested)
-
-            view = CustomWebEngineView()
-            page = LinkHandlingPage(profile, view)
-            page.featurePermissionRequested.connect(self.handle_permission_request)
-            view.setPage(page)
-            view.setProperty('service_id', service_details['id'])
-            view.loadFinished.connect(self._on_web_view_load_finished)
-            view.setUrl(QUrl(url))
-            
-            self.web_views[profile_path] = view
-            self.web_view_stack.addWidget(view)
+    def _install_content_filter(self, profile, service_id):
+        settings_manager = SettingsManager.get_instance()
+        interceptor = ContentFilterInterceptor(service_id, self.blocklist, self.block_counter,
+                                               settings_manager.get_service_allowed_domains(service_id), profile)
+        self.content_filters[service_id] = (profile, interceptor)
+        if settings_manager.get_content_filter_enabled():
+            profile.setUrlRequestInterceptor(interceptor)
 
-        self.web_view_stack.setCurrentWidget(view)
+    def _on_setting_changed(self, key, value):
+        if key == "content_filter_enabled":
+            enabled = value == "True"
+            for profile, interceptor in self.content_filters.values():
+                profile.setUrlRequestInterceptor(interceptor if enabled else None)
+        elif key.startswith("content_filter_allow_"):
+            entry = self.content_filters.get(int(key.rsplit("_", 1)[1]))
+            if entry:
+                entry[1].set_allowed_domains(d for d in value.split(",") if d)
 
-    def remove_webview_for_service(self, service_id):
-        service_details = self.service_manager.get_service_by_id(service_id)
-        if not service_details: return
+    def get_blocked_request_stats(self):
+        """Returns [{'service_id', 'name', 'requests', 'bytes'}, ...] for this session, most blocked first."""
+        stats = []
+        for service_id, entry in self.block_counter.get_stats().items():
+            service = self.service_manager.get_service_by_id(service_id)
+            stats.append(dict(entry, service_id=service_id, name=service['name'] if service else str(service_id)))
+        stats.sort(key=lambda e: e['requests'], reverse=True)
+        return stats
 
-        profile_path = service_details['profile_path']
-        if profile_path in self.web_views:
-            view_to_remove = self.web_views.pop(profile_path)
-            self.web_view_stack.removeWidget(view_to_remove)
-            view_to_remove.deleteLater()
+    def get_renderer_pids(self):
+        """Returns {service_id: renderer process pid} for loaded views (0 while a view has no process)."""
+        return {view.property('service_id'): view.page().renderProcessPid() for view in self.web_views.values()}
+
+    def get_resource_usage(self):
+        """Returns [{'service_id', 'name', 'cpu_avg', 'cpu_last', 'rss_last', 'rss_peak', ...}, ...], heaviest CPU first."""
+        usage = []
+        for service_id, entry in self.resource_monitor.get_all_usage().items():
+            service = self.service_manager.get_service_by_id(service_id)
+            usage.append(dict(entry, service_id=service_id, name=service['name'] if service else str(service_id)))
+        usage.sort(key=lambda e: e['cpu_avg'], reverse=True)
+        return usage
+
+    def get_live_profile_paths(self):
+        """
+        Profile paths with a web view (their caches are in use by Chromium). A view is added
+        before its profile starts loading. Called from the cache trim thread as well.
+        """
+        return list(self.web_views)
+
+    def get_profile_storage_usage(self):
+        """
+        Returns [{'service_id', 'name', 'cache_bytes', 'storage_bytes'}, ...] for user services,
+        largest first. Walks the profile directories, so call it on demand only.
+        """
+        usage = []
+        for service in self.service_manager.get_user_services():
+            entry = profile_storage_usage(service['profile_path'])
+            entry.update(service_id=service['id'], name=service['name'])
+            usage.append(entry)
+        usage.sort(key=lambda e: e['cache_bytes'] + e['storage_bytes'], reverse=True)
+        return usage
 
     def _on_web_view_load_finished(self, ok):
         view = self.sender()
@@ -175,29 +261,16 @@ class WebViewManager(QObject):
         """
         view.page().runJavaScript(js_script_links)
 
-        service_id = view.property('service_id')
-        if service_id:
-            self._check_unread_messages_for_service(service_id, view)
-
-    def _check_unread_messages_for_service(self, service_id, view):
-        service_details = self.service_manager.get_service_by_id(service_id)
-        if not service_details: return
-
-        js_script = service_details['unread_script']
-        if js_script:
-            import weakref
-            weak_self = weakref.ref(self)
-            def safe_unread_callback(result):
-                strong_self = weak_self()
-                if strong_self:
-                    strong_self._handle_unread_result(service_id, result)
-            view.page().runJavaScript(js_script, safe_unread_callback)
+    def _install_unread_detection(self, page, service_details):
+        """Injects the push-based unread watcher; the page reports changes itself (no polling)."""
+        if service_details['unread_script']:
+            bridge = install_unread_watcher(page, service_details['id'], service_details['unread_script'])
+            bridge.unread_changed.connect(self._handle_unread_result)
         else:
-            self._handle_unread_result(service_id, False)
+            self._handle_unread_result(service_details['id'], 0)
 
-    def _handle_unread_result(self, service_id, has_unread):
-        print(f"[DEBUG] Unread status for service {service_id}: {has_unread}")
-        self.unread_status_changed.emit(service_id, bool(has_unread))
+    def _handle_unread_result(self, service_id, result):
+        self.unread_reported.emit(service_id, result)
 
     def _handle_download_requested(self, download):
         downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
@@ -59,14 +59,7 @@ class WelcomeWidget(QWidget):
             return
 
         for task in tasks:
-            formatted_due_date = ""
-            if task.get("due_date"):
-                try:
-                    # Assuming due_date is in ISO format (UTC)
-                    dt_obj = datetime.datetime.fromisoformat(task["due_date"].replace("Z", "+00:00"))
-                    formatted_due_date = time_utils.format_datetime(time_utils.from_utc(dt_obj))
-                except (ValueError, TypeError):
-                    formatted_due_date = task["due_date"] # Fallback if parsing fails
+            formatted_due_date = time_utils.format_epoch_ms(task.get("due_at_ms"))
 
             assignee_initials = ""
             if task.get("type") == "Kanban" and task.get("assignee"):
@@ -79,6 +72,9 @@ class WelcomeWidget(QWidget):
 
     def _get_tasks_for_week(self):
         start_of_week, end_of_week = time_utils.get_week_start_end()
+        # Cover the whole last day of the week
+        start_of_week = datetime.datetime.combine(start_of_week, datetime.time.min)
+        end_of_week = datetime.datetime.combine(end_of_week, datetime.time.max)
         tasks = []
 
         # Kanban cards
@@ -88,6 +84,7 @@ class WelcomeWidget(QWidget):
                 "type": "Kanban",
                 "title": card["title"],
                 "due_date": card["due_date"],
+                "due_at_ms": card["due_date_ms"],
                 "assignee": card["assignee"]
             })
 
@@ -98,6 +95,7 @@ class WelcomeWidget(QWidget):
                 "type": "Checklist",
                 "title": item["text"],
                 "due_date": item["due_at"],
+                "due_at_ms": item["due_at_ms"],
             })
 
         # Reminders
@@ -107,10 +105,11 @@ class WelcomeWidget(QWidget):
                 "type": "Recordatorio",
                 "title": reminder["text"],
                 "due_date": reminder["due_at"],
+                "due_at_ms": reminder["due_at_ms"],
             })
 
         # Sort tasks by due date
-        tasks.sort(key=lambda x: x["due_date"])
+        tasks.sort(key=lambda x: x["due_at_ms"])
 
         return tasks
 
@@ -0,0 +1,91 @@
+import os
+
+BLOCKLIST_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "services", "blocklist.txt")
+
+# Rough transfer size of a blocked request by resource type, used to estimate bytes saved
+ESTIMATED_BYTES = {
+    'script': 30000,
+    'image': 4000,
+    'xhr': 2000,
+    'stylesheet': 10000,
+    'subframe': 40000,
+    'other': 1000,
+}
+
+_TERMINAL = ""  # Label key marking the end of a blocked domain in the trie (labels are never empty)
+
+class DomainMatcher:
+    """
+    Matches hosts against a set of domains, subdomains included.
+    Domains are stored in a trie of reversed labels ("ads.example.com" -> com, example, ads),
+    so a lookup walks the host's labels once: O(len(host)) regardless of the list size.
+    """
+    def __init__(self, domains=()):
+        self._root = {}
+        self._size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain):
+        labels = domain.strip().lower().strip(".").split(".")
+        if not labels or not all(labels):
+            return
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        if _TERMINAL not in node:
+            node[_TERMINAL] = True
+            self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def matches(self, host):
+        """True if host is a listed domain or a subdomain of one."""
+        node = self._root
+        for label in reversed(host.lower().rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _TERMINAL in node:
+                return True
+        return False
+
+def parse_blocklist(lines):
+    """Yields domains from blocklist lines: plain domains or hosts-file entries; '#' starts a comment."""
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        domain = parts[-1] if len(parts) > 1 else parts[0]
+        if domain not in ("localhost", "0.0.0.0", "127.0.0.1"):
+            yield domain
+
+def load_blocklist(path=BLOCKLIST_FILE):
+    """Builds the DomainMatcher for a blocklist file (empty if the file is missing)."""
+    if not os.path.exists(path):
+        return DomainMatcher()
+    with open(path, "r", encoding="utf-8") as f:
+        return DomainMatcher(parse_blocklist(f))
+
+class BlockCounter:
+    """Per-service counters of blocked requests and estimated bytes saved."""
+    def __init__(self):
+        self._counts = {} # service_id -> [requests, bytes]
+
+    def record(self, service_id, resource_kind='other'):
+        entry = self._counts.setdefault(service_id, [0, 0])
+        entry[0] += 1
+        entry[1] += ESTIMATED_BYTES.get(resource_kind, ESTIMATED_BYTES['other'])
+
+    def get_stats(self):
+        """Returns {service_id: {'requests': int, 'bytes': int}}."""
+        return {service_id: {'requests': requests, 'bytes': saved}
+                for service_id, (requests, saved) in self._counts.items()}
+
+    def reset(self, service_id=None):
+        if service_id is None:
+            self._counts.clear()
+        else:
+            self._counts.pop(service_id, None)
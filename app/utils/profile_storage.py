@@ -0,0 +1,83 @@
+import os
+import shutil
+
+# Sub-directory of a service profile that holds its HTTP disk cache
+CACHE_DIR_NAME = "HttpCache"
+
+def _scan_directory(path: str):
+    """Returns (total size in bytes, newest file modification time) of the files below path."""
+    total = 0
+    newest = 0.0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            total += stat.st_size
+                            newest = max(newest, stat.st_mtime)
+                    except OSError:
+                        continue # File vanished while scanning (Chromium is writing)
+        except OSError:
+            continue
+    return total, newest
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the files below path (0 if it does not exist)."""
+    return _scan_directory(path)[0]
+
+def profile_cache_path(profile_path: str) -> str:
+    return os.path.join(profile_path, CACHE_DIR_NAME)
+
+def profile_storage_usage(profile_path: str) -> dict:
+    """
+    Returns {'cache_bytes': int, 'storage_bytes': int} for a service profile.
+    storage_bytes covers everything else (cookies, IndexedDB, local storage, service workers...).
+    """
+    cache_bytes = directory_size(profile_cache_path(profile_path))
+    total_bytes = directory_size(profile_path)
+    return {'cache_bytes': cache_bytes, 'storage_bytes': max(total_bytes - cache_bytes, 0)}
+
+def trim_profile_caches(profile_paths, max_profile_bytes: int, max_total_bytes: int, live_profile_paths=()):
+    """
+    Deletes HTTP caches of profiles that are not loaded: first every cache larger than
+    max_profile_bytes, then the least recently used caches until all caches together fit
+    in max_total_bytes. A cache was last used when its newest file was written (Chromium
+    writes inside sub-directories, which leaves the cache directory's own time unchanged).
+
+    Caches of live profiles are counted but never touched, since Chromium keeps them open.
+    live_profile_paths is a list or a callable returning one; a callable is asked again
+    right before each deletion, so a profile opened while trimming is left alone.
+    Only the cache is removed; logins and site data stay. Returns the number of bytes freed.
+    """
+    def is_live(profile_path):
+        paths = live_profile_paths() if callable(live_profile_paths) else live_profile_paths
+        return os.path.normpath(profile_path) in {os.path.normpath(p) for p in paths}
+
+    caches = [] # (last used, path, size, profile path)
+    for profile_path in profile_paths:
+        cache_path = profile_cache_path(profile_path)
+        if not os.path.isdir(cache_path):
+            continue
+        size, last_used = _scan_directory(cache_path)
+        caches.append((last_used, cache_path, size, profile_path))
+
+    total = sum(size for _, _, size, _ in caches)
+    freed = 0
+    caches.sort() # Least recently used first
+    oversized = [entry for entry in caches if entry[2] > max_profile_bytes]
+    for last_used, cache_path, size, profile_path in oversized + caches:
+        if not os.path.isdir(cache_path) or is_live(profile_path):
+            continue
+        if size <= max_profile_bytes and total - freed <= max_total_bytes:
+            break # Only reached in the LRU pass, once within budget
+        try:
+            shutil.rmtree(cache_path)
+            freed += size
+        except OSError as e:
+            print(f"Error trimming cache {cache_path}: {e}")
+    return freed
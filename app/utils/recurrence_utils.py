@@ -0,0 +1,54 @@
+import datetime
+from dateutil.rrule import rrulestr
+from app.utils import time_utils
+
+# How far ahead recurring reminders are materialized into reminder_occurrences
+RECURRENCE_WINDOW_DAYS = 30
+
+# Recurrence options offered in the reminder dialogs (label -> RRULE)
+RECURRENCE_PRESETS = {
+    "No se repite": None,
+    "Diariamente": "FREQ=DAILY",
+    "Días laborables": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "Semanalmente": "FREQ=WEEKLY",
+    "Mensualmente": "FREQ=MONTHLY",
+    "Anualmente": "FREQ=YEARLY",
+}
+
+def normalize_rrule(rrule: str | None) -> str | None:
+    """Strips an optional 'RRULE:' prefix and whitespace. Returns None for empty rules."""
+    if not rrule:
+        return None
+    rrule = rrule.strip()
+    if rrule.upper().startswith("RRULE:"):
+        rrule = rrule[len("RRULE:"):]
+    return rrule or None
+
+def _parse_rule(rrule: str, dtstart_local: datetime.datetime):
+    """Parses an RRULE against a timezone-aware local DTSTART (UNTIL must then be in UTC)."""
+    return rrulestr(normalize_rrule(rrule), dtstart=dtstart_local)
+
+def validate_rrule(rrule: str) -> bool:
+    """Returns True if the given RRULE string can be expanded by expand_occurrences()."""
+    dtstart_local = time_utils.from_utc(datetime.datetime.now(datetime.timezone.utc)).replace(microsecond=0)
+    try:
+        _parse_rule(rrule, dtstart_local)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+def expand_occurrences(rrule: str, dtstart_utc: datetime.datetime,
+                       window_start_utc: datetime.datetime, window_end_utc: datetime.datetime) -> list[datetime.datetime]:
+    """Expands an RRULE into the UTC occurrences that fall inside [window_start, window_end].
+
+    The rule is evaluated in the configured local timezone so that a weekly
+    reminder at 09:00 stays at 09:00 across DST changes.
+    """
+    # dateutil drops sub-second precision from DTSTART; do it up front so the first
+    # occurrence is not excluded from a window that starts exactly at DTSTART.
+    dtstart_local = time_utils.from_utc(dtstart_utc).replace(microsecond=0)
+    rule = _parse_rule(rrule, dtstart_local)
+    local_tz = time_utils.get_current_timezone()
+    window_start_local = window_start_utc.astimezone(local_tz).replace(microsecond=0)
+    occurrences = rule.between(window_start_local, window_end_utc.astimezone(local_tz), inc=True)
+    return [time_utils.to_utc(occurrence) for occurrence in occurrences]
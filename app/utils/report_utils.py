@@ -1,6 +1,5 @@
 import openpyxl
 from openpyxl.styles import Font, PatternFill
-import datetime
 from app.utils import time_utils
 
 def generate_excel_report(report_data, file_path):
@@ -20,40 +19,15 @@ def generate_excel_report(report_data, file_path):
         cell.fill = header_fill
         sheet.column_dimensions[openpyxl.utils.get_column_letter(col_idx + 1)].width = 20 # Default width
 
-    # Write data
-    for card in report_data:
-        due_date_formatted = ""
-        if card.get("due_date"):
-            try:
-                dt_obj = datetime.datetime.fromisoformat(card["due_date"].replace("Z", "+00:00"))
-                due_date_formatted = time_utils.format_datetime(time_utils.from_utc(dt_obj))
-            except (ValueError, TypeError):
-                due_date_formatted = card["due_date"]
-
-        created_at_formatted = ""
-        if card.get("created_at"):
-            try:
-                dt_obj = datetime.datetime.fromisoformat(card["created_at"].replace("Z", "+00:00"))
-                created_at_formatted = time_utils.format_datetime(time_utils.from_utc(dt_obj))
-            except (ValueError, TypeError):
-                created_at_formatted = card["created_at"]
-
-        started_at_formatted = ""
-        if card.get("started_at"):
-            try:
-                dt_obj = datetime.datetime.fromisoformat(card["started_at"].replace("Z", "+00:00"))
-                started_at_formatted = time_utils.format_datetime(time_utils.from_utc(dt_obj))
-            except (ValueError, TypeError):
-                started_at_formatted = card["started_at"]
-
-        finished_at_formatted = ""
-        if card.get("finished_at"):
-            try:
-                dt_obj = datetime.datetime.fromisoformat(card["finished_at"].replace("Z", "+00:00"))
-                finished_at_formatted = time_utils.format_datetime(time_utils.from_utc(dt_obj))
-            except (ValueError, TypeError):
-                finished_at_formatted = card["finished_at"]
+    # Format the timestamp columns in one pass each (timezone resolved once per column)
+    due_dates = time_utils.format_epoch_ms_batch([card.get("due_date_ms") for card in report_data])
+    created_ats = time_utils.format_epoch_ms_batch([card.get("created_at_ms") for card in report_data])
+    started_ats = time_utils.format_epoch_ms_batch([card.get("started_at_ms") for card in report_data])
+    finished_ats = time_utils.format_epoch_ms_batch([card.get("finished_at_ms") for card in report_data])
 
+    # Write data
+    for card, due_date_formatted, created_at_formatted, started_at_formatted, finished_at_formatted in zip(
+            report_data, due_dates, created_ats, started_ats, finished_ats):
         row_data = [
             card.get("id", ""),
             card.get("title", ""),
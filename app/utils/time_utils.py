@@ -3,36 +3,147 @@ from zoneinfo import ZoneInfo
 from PyQt6.QtCore import QDateTime, Qt, QTimeZone
 from app.db.settings_manager import SettingsManager # Changed import
 
+try:
+    import numpy as np
+except ImportError: # Batch helpers fall back to plain lists
+    np = None
+
+UTC = ZoneInfo("UTC")
+
+_DAY_MS = 24 * 60 * 60 * 1000
+
+class _TimezoneContext:
+    """Caches the configured ZoneInfo until the 'timezone' setting changes."""
+
+    def __init__(self):
+        self._settings = None
+        self._zone = None
+
+    def get(self) -> ZoneInfo:
+        settings = SettingsManager.get_instance()
+        if settings is not self._settings:
+            # First use, or the settings singleton was re-initialized
+            settings.add_listener(self._on_setting_changed)
+            self._settings = settings
+            self._zone = None
+        if self._zone is None:
+            self._zone = ZoneInfo(settings.get_timezone())
+        return self._zone
+
+    def invalidate(self):
+        self._zone = None
+
+    def _on_setting_changed(self, key, value):
+        if key == "timezone":
+            self.invalidate()
+
+_timezone_context = _TimezoneContext()
+
 def get_current_timezone():
-    """Returns the configured timezone as a ZoneInfo object."""
-    tz_name = SettingsManager.get_instance().get_timezone() # Use singleton
-    return ZoneInfo(tz_name)
+    """Returns the configured timezone as a ZoneInfo object (cached)."""
+    return _timezone_context.get()
+
+def invalidate_timezone_cache():
+    """Drops the cached timezone so the next lookup re-reads the setting."""
+    _timezone_context.invalidate()
 
 def to_utc(dt_obj: datetime.datetime) -> datetime.datetime:
     """Converts a timezone-aware datetime object to UTC."""
     if isinstance(dt_obj, datetime.date) and not isinstance(dt_obj, datetime.datetime):
         dt_obj = datetime.datetime.combine(dt_obj, datetime.time.min)
 
-    if dt_obj.tzinfo is None:
-        # Assume local timezone if not timezone-aware
-        local_tz = datetime.datetime.now().astimezone().tzinfo
-        dt_obj = dt_obj.replace(tzinfo=local_tz)
-    return dt_obj.astimezone(ZoneInfo("UTC"))
+    # Naive datetimes are interpreted as system local time by astimezone()
+    return dt_obj.astimezone(UTC)
 
 def from_utc(dt_obj: datetime.datetime) -> datetime.datetime:
     """Converts a UTC datetime object to the configured local timezone."""
     if dt_obj.tzinfo is None:
-        dt_obj = dt_obj.replace(tzinfo=ZoneInfo("UTC"))
+        dt_obj = dt_obj.replace(tzinfo=UTC)
     return dt_obj.astimezone(get_current_timezone())
 
+def to_epoch_ms(value) -> int | None:
+    """Converts a datetime, date, ISO-8601 string or epoch-ms int to UTC epoch milliseconds.
+
+    Naive datetimes and dates are interpreted as local time, like in to_utc().
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if value.tzinfo is None:
+            # Strings written by the database layer are UTC
+            value = value.replace(tzinfo=UTC)
+    return int(round(to_utc(value).timestamp() * 1000))
+
+def now_epoch_ms() -> int:
+    """Returns the current time as UTC epoch milliseconds."""
+    return int(round(datetime.datetime.now(UTC).timestamp() * 1000))
+
+def from_epoch_ms(epoch_ms: int | None) -> datetime.datetime | None:
+    """Converts UTC epoch milliseconds to a datetime in the configured local timezone."""
+    if epoch_ms is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch_ms / 1000, tz=get_current_timezone())
+
+def format_epoch_ms(epoch_ms: int | None, fmt: str | None = None) -> str:
+    """Formats UTC epoch milliseconds for display (configured timezone and format)."""
+    if epoch_ms is None:
+        return ""
+    dt_obj = from_epoch_ms(epoch_ms)
+    return dt_obj.strftime(fmt) if fmt else format_datetime(dt_obj)
+
+def to_epoch_ms_batch(values) -> list[int | None]:
+    """Converts a column of datetimes/ISO strings/ints to UTC epoch milliseconds."""
+    return [to_epoch_ms(value) for value in values]
+
+def from_epoch_ms_batch(values) -> list[datetime.datetime | None]:
+    """Converts a column of UTC epoch milliseconds to local datetimes.
+
+    The timezone is resolved once for the whole column. None entries are preserved.
+    """
+    tz = get_current_timezone()
+    fromtimestamp = datetime.datetime.fromtimestamp
+    return [None if ms is None else fromtimestamp(ms / 1000, tz=tz) for ms in values]
+
+def format_epoch_ms_batch(values, fmt: str | None = None) -> list[str]:
+    """Formats a column of UTC epoch milliseconds; None entries become ''."""
+    fmt = fmt or SettingsManager.get_instance().get_datetime_format()
+    return ["" if dt_obj is None else dt_obj.strftime(fmt) for dt_obj in from_epoch_ms_batch(values)]
+
+def epoch_ms_to_local_datetime64(values):
+    """Vectorized conversion of UTC epoch milliseconds to naive local datetime64[ms].
+
+    UTC offsets are looked up once per calendar day spanned by the column; only
+    values on days that contain an offset transition (DST) are resolved one by
+    one. Requires numpy.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for epoch_ms_to_local_datetime64()")
+    epoch_ms = np.asarray(values, dtype=np.int64)
+    if epoch_ms.size == 0:
+        return epoch_ms.astype("datetime64[ms]")
+    tz = get_current_timezone()
+
+    def offset_ms(ms):
+        return datetime.datetime.fromtimestamp(int(ms) // 1000, tz=tz).utcoffset() // datetime.timedelta(milliseconds=1)
+
+    days = epoch_ms // _DAY_MS
+    first_day = int(days.min())
+    # Offset at the start of each day, plus the start of the day after the last one
+    day_offsets = np.array([offset_ms(day * _DAY_MS) for day in range(first_day, int(days.max()) + 2)], dtype=np.int64)
+    day_index = days - first_day
+    offsets = day_offsets[day_index]
+
+    transition = day_offsets[day_index] != day_offsets[day_index + 1]
+    if transition.any():
+        offsets[transition] = [offset_ms(ms) for ms in epoch_ms[transition]]
+    return (epoch_ms + offsets).astype("datetime64[ms]")
+
 def qdatetime_from_datetime(dt_obj: datetime.datetime) -> QDateTime:
     """Converts a datetime object to a timezone-aware QDateTime object."""
-    if dt_obj.tzinfo is None:
-        # Assume local timezone if not timezone-aware
-        local_tz = datetime.datetime.now().astimezone().tzinfo
-        dt_obj = dt_obj.replace(tzinfo=local_tz)
-
-    # Convert to the configured local timezone
+    # Convert to the configured local timezone (naive input is system local time)
     local_dt = dt_obj.astimezone(get_current_timezone())
 
     # Create QDateTime from local_dt components
@@ -52,7 +163,7 @@ def datetime_from_qdatetime(qdt_obj: QDateTime) -> datetime.datetime:
         utc_qdt = qdt_obj.toUTC()
         dt_obj = datetime.datetime(utc_qdt.date().year(), utc_qdt.date().month(), utc_qdt.date().day(),
                                    utc_qdt.time().hour(), utc_qdt.time().minute(), utc_qdt.time().second(),
-                                   utc_qdt.time().msec() * 1000, tzinfo=ZoneInfo("UTC"))
+                                   utc_qdt.time().msec() * 1000, tzinfo=UTC)
         return dt_obj.astimezone(get_current_timezone())
     else:
         # If QDateTime is not timezone-aware, assume it's in the configured local timezone
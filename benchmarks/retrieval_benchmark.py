@@ -0,0 +1,64 @@
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from app.db.database import create_schema
+from app.search.retrieval_index import RetrievalIndex, build_grounded_prompt
+
+NOTES = 2000
+WORDS_PER_NOTE = 300
+VOCABULARY = 5000
+DIM = 768 # nomic-embed-text
+QUERIES = 100
+
+def _per_call_ms(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1000
+
+def _embed(texts):
+    """Bag-of-words vectors: a stand-in for the provider's embeddings endpoint."""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.split():
+            vectors[i, hash(word) % DIM] += 1
+    return vectors
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    words = [f"palabra{i}" for i in range(VOCABULARY)]
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    notes = [" ".join(rng.choice(words, WORDS_PER_NOTE)) for _ in range(NOTES)]
+    with conn:
+        conn.executemany("INSERT INTO notes (content) VALUES (?)", [(note,) for note in notes])
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = RetrievalIndex(conn, directory, _embed)
+        start = time.perf_counter()
+        index.sync()
+        build_s = time.perf_counter() - start
+        stats = index.stats()
+        with conn:
+            conn.execute("UPDATE notes SET content = content || ' editada' WHERE id = 7")
+        edit_ms = _per_call_ms(index.sync, 1)
+
+        question = " ".join(rng.choice(words, 8))
+        prompt = build_grounded_prompt(question, index.search(question))
+        pasted = sum(len(note) for note in notes) + len(question)
+
+        print(f"Retrieval index ({NOTES} notes, {stats['chunks']} chunks, {DIM} dims):")
+        print(f"  initial sync                     {build_s:8.2f} s")
+        print(f"  sync after one edit              {edit_ms:8.2f} ms")
+        print(f"  hybrid search (top 5)            {_per_call_ms(lambda: index.search(question), QUERIES):8.2f} ms/query")
+        print(f"  prompt size: all notes pasted    {pasted:8d} chars")
+        print(f"  prompt size: grounded            {len(prompt):8d} chars")
+
+if __name__ == "__main__":
+    run_benchmark()
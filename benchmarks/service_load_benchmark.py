@@ -0,0 +1,64 @@
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PyQt6.QtCore import QEventLoop, QTimer, QUrl
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.ui.profile_factory import create_service_profile
+from app.utils.profile_storage import profile_storage_usage
+
+# Usage: python benchmarks/service_load_benchmark.py [url ...]
+DEFAULT_URLS = ["https://web.whatsapp.com", "https://outlook.office.com/mail/", "https://mail.google.com"]
+LOAD_TIMEOUT_MS = 60000
+
+def _timed_load(profile, url):
+    """Loads url in a new view on profile; returns (seconds until loadFinished, ok)."""
+    view = QWebEngineView()
+    view.setPage(QWebEnginePage(profile, view))
+    loop = QEventLoop()
+    result = {'ok': False}
+    def finished(ok):
+        result['ok'] = ok
+        loop.quit()
+    view.loadFinished.connect(finished)
+    QTimer.singleShot(LOAD_TIMEOUT_MS, loop.quit)
+    start = time.perf_counter()
+    view.setUrl(QUrl(url))
+    loop.exec()
+    elapsed = time.perf_counter() - start
+    view.deleteLater()
+    return elapsed, result['ok']
+
+def run_benchmark(urls):
+    app = QApplication(sys.argv)
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    SettingsManager.initialize(conn)
+    settings = SettingsManager.get_instance()
+
+    print(f"{'url':<40} {'cache':<6} {'cold':>8} {'warm':>8} {'cache MB':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        for cache_type in ["none", "disk"]:
+            settings.set_webview_cache_type(cache_type)
+            for index, url in enumerate(urls):
+                profile_path = os.path.join(root, f"{cache_type}_{index}")
+                profile = create_service_profile(profile_path, settings)
+                cold, cold_ok = _timed_load(profile, url)
+                # Warm start: a new view on the same profile, as after a discard or an app restart
+                warm, warm_ok = _timed_load(profile, url)
+                cache_mb = profile_storage_usage(profile_path)['cache_bytes'] / (1024 * 1024)
+                flag = "" if cold_ok and warm_ok else "  (load failed or timed out)"
+                print(f"{url[:40]:<40} {cache_type:<6} {cold * 1000:6.0f}ms {warm * 1000:6.0f}ms {cache_mb:8.1f}{flag}")
+    conn.close()
+    app.quit()
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1:] or DEFAULT_URLS)
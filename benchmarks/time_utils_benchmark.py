@@ -0,0 +1,45 @@
+import sys
+import os
+import sqlite3
+import timeit
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.utils import time_utils
+
+N = 100_000
+REPEAT = 3
+
+def _best(stmt):
+    """Best wall time (seconds) of REPEAT runs of stmt()."""
+    return min(timeit.repeat(stmt, number=1, repeat=REPEAT))
+
+def run_benchmark():
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    SettingsManager.initialize(conn)
+    SettingsManager.get_instance().set_timezone("Europe/Madrid")
+
+    base_ms = time_utils.now_epoch_ms()
+    # Spread over ~2 years so DST transitions are included
+    epoch_values = [base_ms + i * 631_000 for i in range(N)]
+    iso_values = [time_utils.from_epoch_ms(ms).isoformat() for ms in epoch_values]
+
+    results = [
+        ("from_epoch_ms (per value)", _best(lambda: [time_utils.from_epoch_ms(ms) for ms in epoch_values])),
+        ("from_epoch_ms_batch", _best(lambda: time_utils.from_epoch_ms_batch(epoch_values))),
+        ("format_epoch_ms (per value)", _best(lambda: [time_utils.format_epoch_ms(ms) for ms in epoch_values])),
+        ("format_epoch_ms_batch", _best(lambda: time_utils.format_epoch_ms_batch(epoch_values))),
+        ("to_epoch_ms_batch (ISO strings)", _best(lambda: time_utils.to_epoch_ms_batch(iso_values))),
+    ]
+    if time_utils.np is not None:
+        results.append(("epoch_ms_to_local_datetime64", _best(lambda: time_utils.epoch_ms_to_local_datetime64(epoch_values))))
+
+    print(f"{N} conversions, best of {REPEAT}:")
+    for label, seconds in results:
+        print(f"  {label:<35} {seconds * 1000:9.1f} ms  ({seconds / N * 1e6:6.2f} us/value)")
+    conn.close()
+
+if __name__ == "__main__":
+    run_benchmark()
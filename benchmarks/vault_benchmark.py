@@ -0,0 +1,44 @@
+import sys
+import os
+import sqlite3
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.database import create_schema
+from app.security.vault import Vault
+from app.security.vault_manager import VaultManager
+
+PASSPHRASE = "benchmark passphrase"
+READS = 200
+LEGACY_READS = 10 # Each one runs scrypt
+
+def _per_read_ms(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1000
+
+def run_benchmark():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    manager = VaultManager(conn)
+
+    start = time.perf_counter()
+    manager.unlock(PASSPHRASE)
+    unlock_ms = (time.perf_counter() - start) * 1000
+    manager.save_secret("OPENAI_API_KEY", "sk-" + "x" * 48)
+
+    vault = Vault(conn)
+    salt = os.urandom(16)
+    nonce, enc_data = vault._encrypt(vault._derive_key(PASSPHRASE, salt), "sk-" + "x" * 48)
+    legacy_read = lambda: vault._decrypt(vault._derive_key(PASSPHRASE, salt), nonce, enc_data)
+
+    print("Vault secret read latency:")
+    print(f"  unlock (one scrypt)              {unlock_ms:8.2f} ms")
+    print(f"  per-secret scrypt read (old)     {_per_read_ms(legacy_read, LEGACY_READS):8.2f} ms/read")
+    print(f"  HKDF subkey read (current)       {_per_read_ms(lambda: manager.get_secret('OPENAI_API_KEY'), READS):8.3f} ms/read")
+    conn.close()
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -5,7 +5,8 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import QStandardPaths
 from app.ui.main_window import MainWindow
-from app.db.database import create_schema
+from app.db.database import create_schema, get_db_connection
+from app.services.service_manager import ServiceManager, CATALOG_HASH_SETTING
 from app.core.di_container import DIContainer
 from app.core.error_handler import AppErrorHandler
 # import resources_rc
@@ -19,7 +20,6 @@ def setup_qt_environment():
     This function centralizes all Qt-related environment configuration:
     - Disables GPU acceleration to avoid QtWebEngine crashes
     - Disables WebGL for better performance
-    - Limits disk cache to reduce I/O overhead
     - Forces software rendering for compatibility
     """
     # GPU and rendering configuration
@@ -32,7 +32,7 @@ def setup_qt_environment():
         "--use-angle=swiftshader",
         "--disable-webgl",              # Disable WebGL for performance (Item 8)
         "--disable-webgl2",             # Disable WebGL 2.0
-        "--disk-cache-size=0",          # Limit cache to reduce I/O (Item 8)
+        # No global --disk-cache-size: it overrides the per-profile HTTP cache (see profile_factory)
     ]
     
     os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = " ".join(flags)
@@ -45,32 +45,19 @@ def setup_qt_environment():
 # Initialize Qt environment before any Qt imports
 setup_qt_environment()
 
-def update_service_scripts(conn):
+def update_service_scripts(db_path, catalog_hash):
     """
     Updates the unread_script for existing services in the database
     with the latest scripts from the catalog.json file.
+    Runs on a background thread, so it uses its own connection.
     """
-    logging.info("Checking for service script updates...")
-    from app.services.service_manager import ServiceManager
-    service_manager = ServiceManager(conn)
-    catalog_services = service_manager.load_catalog()
-    catalog_scripts = {service['name']: service.get('unread_script') for service in catalog_services}
-
-    db_services = service_manager.get_all_services()
-    
-    for service in db_services:
-        service_name = service['name']
-        # Handle cases like "WhatsApp (Work)" matching "WhatsApp"
-        base_service_name = service_name.split(' (')[0]
-        
-        if base_service_name in catalog_scripts:
-            new_script = catalog_scripts[base_service_name]
-            # Only update if the script is different
-            if service['unread_script'] != new_script:
-                logging.info(f"Updating script for '{service_name}'...")
-                cursor = conn.cursor()
-                cursor.execute("UPDATE services SET unread_script = ? WHERE id = ?", (new_script, service['id']))
-                conn.commit()
+    logging.info("Syncing service scripts with the catalog...")
+    conn = get_db_connection(db_path)
+    try:
+        updated = ServiceManager(conn).sync_unread_scripts(catalog_hash)
+        logging.info(f"Updated scripts for {updated} service(s).")
+    finally:
+        conn.close()
 
 def main():
     # Initialize Error Handler and Logging first
@@ -98,9 +85,11 @@ def main():
     # Ensure the database schema is created on startup
     create_schema(container.conn)
 
-    # Update service scripts from catalog in background thread
-    update_thread = threading.Thread(target=update_service_scripts, args=(container.conn,), daemon=True)
-    update_thread.start()
+    # Update service scripts from catalog in background thread, only when catalog.json changed
+    catalog_hash = ServiceManager.catalog_hash()
+    if catalog_hash and catalog_hash != container.settings_manager.get_setting(CATALOG_HASH_SETTING):
+        update_thread = threading.Thread(target=update_service_scripts, args=(container.db_path, catalog_hash), daemon=True)
+        update_thread.start()
 
     app = QApplication(sys.argv)
     
@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from app.ai.job_queue import AIJobQueue, AIQueueFullError, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+class FakeProvider:
+    """run(job) for AIJobQueue: streams the prompt in two chunks, waiting on a gate per prompt."""
+
+    def __init__(self):
+        self.calls = []
+        self.gates = {}
+        self.started = threading.Event()
+
+    def gate(self, prompt):
+        return self.gates.setdefault(prompt, threading.Event())
+
+    def run(self, job):
+        self.calls.append(job.prompt)
+        self.started.set()
+        yield job.prompt[:1]
+        while not self.gate(job.prompt).wait(0.01):
+            if job.cancel_event.is_set():
+                return
+        if job.prompt == "fail":
+            raise ValueError("boom")
+        yield job.prompt[1:]
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+def test_identical_prompts_share_one_request(provider):
+    queue = AIJobQueue(provider.run, workers=2)
+    first_chunks, second_chunks = [], []
+    first = queue.submit("k", "hola", 10, on_chunk=first_chunks.append)
+    provider.started.wait(2)
+    second = queue.submit("k", "hola", 10, on_chunk=second_chunks.append) # Joins mid-stream
+    provider.gate("hola").set()
+    assert first.result(2) == second.result(2) == "hola"
+    assert provider.calls == ["hola"]
+    assert first_chunks == second_chunks == ["h", "ola"]
+    assert second.coalesced and not first.coalesced
+    stats = queue.stats()
+    assert (stats['submitted'], stats['coalesced'], stats['completed']) == (2, 1, 1)
+    queue.shutdown()
+
+def test_interactive_jobs_run_before_background(provider):
+    queue = AIJobQueue(provider.run, workers=1)
+    blocker = queue.submit("b", "blocker", 10)
+    provider.started.wait(2)
+    background = queue.submit("bg", "background", 10, priority=PRIORITY_BACKGROUND)
+    interactive = queue.submit("i", "interactive", 10, priority=PRIORITY_INTERACTIVE)
+    assert queue.stats()['queued_background'] == 1 and queue.stats()['queued_interactive'] == 1
+    for prompt in ("blocker", "background", "interactive"):
+        provider.gate(prompt).set()
+    for handle in (blocker, background, interactive):
+        handle.result(2)
+    assert provider.calls == ["blocker", "interactive", "background"]
+    queue.shutdown()
+
+def test_cancel_detaches_and_stops_unshared_jobs(provider):
+    queue = AIJobQueue(provider.run, workers=1)
+    running = queue.submit("r", "running", 10)
+    provider.started.wait(2)
+    queued = queue.submit("q", "queued", 10)
+    queued.cancel()
+    with pytest.raises(CancelledError):
+        queued.result(1)
+
+    shared = queue.submit("r", "running", 10)
+    shared.cancel() # Another caller still waits: the request keeps going
+    provider.gate("running").set()
+    assert running.result(2) == "running"
+    assert "queued" not in provider.calls
+
+    provider.started.clear()
+    slow = queue.submit("s", "slow", 10)
+    provider.started.wait(2)
+    slow.cancel() # Last caller: the stream is told to stop
+    assert slow.job.cancel_event.is_set()
+    queue.shutdown()
+    assert queue.stats()['cancelled'] == 2
+
+def test_errors_reach_every_caller(provider):
+    queue = AIJobQueue(provider.run, workers=1)
+    handles = [queue.submit("f", "fail", 10) for _ in range(2)]
+    provider.gate("fail").set()
+    for handle in handles:
+        with pytest.raises(ValueError):
+            handle.result(2)
+    assert queue.stats()['failed'] == 1
+    queue.shutdown()
+
+def test_queue_is_bounded(provider):
+    queue = AIJobQueue(provider.run, workers=1, max_pending=2)
+    queue.submit("r", "running", 10)
+    provider.started.wait(2)
+    queue.submit("a", "a", 10)
+    queue.submit("b", "b", 10)
+    queue.submit("a", "a", 10) # Coalescing needs no new slot
+    with pytest.raises(AIQueueFullError):
+        queue.submit("c", "c", 10)
+    stats = queue.stats()
+    assert (stats['queued'], stats['running']) == (2, 1)
+    for gate in ("running", "a", "b"):
+        provider.gate(gate).set()
+    queue.shutdown(cancel_pending=False)
+    stats = queue.stats()
+    assert stats['completed'] == 3 and stats['run_avg_ms'] > 0 and stats['wait_p95_ms'] >= 0
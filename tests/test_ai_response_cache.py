@@ -0,0 +1,83 @@
+import sqlite3
+import pytest
+
+from app.db.database import create_schema
+from app.ai.response_cache import ResponseCache, make_cache_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    yield conn
+    conn.close()
+
+def test_key_depends_on_provider_and_model():
+    keys = {make_cache_key("Resume esta nota", 1500, provider, model)
+            for provider, model in [("OpenAI", "gpt-4o"), ("OpenAI", "gpt-3.5-turbo"), ("Local", "gpt-4o")]}
+    assert len(keys) == 3
+    assert make_cache_key("p", 100, "a", "b") != make_cache_key("p", 200, "a", "b")
+
+def test_disk_tier_survives_restart(conn):
+    cache = ResponseCache(conn)
+    cache.put("k", "OpenAI", "gpt-4o", "Resumen " * 100)
+    assert cache.get("k") == "Resumen " * 100
+    stored = conn.execute("SELECT size FROM ai_response_cache WHERE key = 'k'").fetchone()[0]
+    assert stored < len("Resumen " * 100) # Compressed
+
+    restarted = ResponseCache(conn)
+    assert restarted.get("k") == "Resumen " * 100
+    assert restarted.get("k") == "Resumen " * 100
+    assert restarted.get("other") is None
+    stats = restarted.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+def test_memory_tier_is_lru_bounded_by_bytes(conn):
+    cache = ResponseCache(conn, memory_max_bytes=400)
+    for key in "abcd":
+        cache.put(key, "p", "m", key * 100)
+    cache.get("a") # b becomes the least recently used
+    cache.put("e", "p", "m", "e" * 100)
+    stats = cache.stats()
+    assert stats['memory_bytes'] <= 400
+    assert "b" not in cache._memory and "a" in cache._memory
+
+    cache.put("huge", "p", "m", "x" * 300) # Over the per-entry share: disk only
+    assert "huge" not in cache._memory
+    assert cache.get("huge") == "x" * 300
+
+def test_expired_entries_are_dropped(conn):
+    clock = Clock()
+    cache = ResponseCache(conn, ttl_seconds=60, clock=clock)
+    cache.put("k", "p", "m", "value")
+    clock.now += 61
+    assert ResponseCache(conn, ttl_seconds=60, clock=clock).get("k") is None
+    assert conn.execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0] == 0
+
+def test_disk_budget_evicts_least_recently_used(conn):
+    clock = Clock()
+    cache = ResponseCache(conn, clock=clock)
+    for key in "abc":
+        clock.now += 1
+        cache.put(key, "p", "m", key + str(clock.now))
+    clock.now += 1
+    ResponseCache(conn, clock=clock).get("a") # Disk access refreshes a
+    sizes = dict(conn.execute("SELECT key, size FROM ai_response_cache").fetchall())
+    cache.set_limits(disk_max_bytes=sizes["a"] + sizes["c"])
+    assert sorted(row[0] for row in conn.execute("SELECT key FROM ai_response_cache")) == ["a", "c"]
+
+def test_clear_empties_both_tiers(conn):
+    cache = ResponseCache(conn)
+    cache.put("k", "p", "m", "value")
+    cache.get("k")
+    cache.clear()
+    assert cache.get("k") is None
+    assert cache.stats() == {'memory_hits': 0, 'disk_hits': 0, 'misses': 1, 'memory_entries': 0,
+                             'memory_bytes': 0, 'disk_entries': 0, 'disk_bytes': 0}
@@ -0,0 +1,122 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.ai import semantic_cache
+from app.ai.semantic_cache import SemanticCache
+
+DIM = 64
+SCOPE = "Local\0default\01500"
+
+class FakeEmbedder:
+    """Bag-of-words embeddings: prompts sharing most words get a high cosine similarity."""
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            vector = np.zeros(self.dim)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+            vectors.append(vector.tolist())
+        return vectors
+
+PROMPT = "resume la nota de la reunión de ventas del lunes con el equipo comercial"
+PARAPHRASE = "resume la nota de la reunión de ventas del lunes con el equipo"
+UNRELATED = "extrae las tareas pendientes del correo del proveedor"
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(tmp_path, FakeEmbedder(), threshold=0.9)
+
+def test_paraphrase_hits_and_unrelated_misses(cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    key, similarity = cache.lookup(cache.embed_prompt(PARAPHRASE), SCOPE)
+    assert key == "key-1" and similarity >= 0.9
+    assert cache.lookup(cache.embed_prompt(UNRELATED), SCOPE) is None
+    assert cache.lookup(cache.embed_prompt(PROMPT), "OpenAI\0gpt-4o\01500") is None # Other scope
+    stats = cache.stats()
+    assert (stats['entries'], stats['lookups'], stats['hits']) == (1, 3, 1)
+    assert stats['avg_hit_similarity'] == pytest.approx(similarity, abs=1e-4)
+
+def test_threshold_is_tunable(cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    vector = cache.embed_prompt("resume la nota de ventas")
+    assert cache.lookup(vector, SCOPE) is None
+    cache.threshold = 0.5
+    assert cache.lookup(vector, SCOPE)[0] == "key-1"
+
+def test_matrix_is_persisted_and_memory_mapped(tmp_path, cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    cache.add(cache.embed_prompt(UNRELATED), "key-2", SCOPE)
+    reloaded = SemanticCache(tmp_path, FakeEmbedder(), threshold=0.9)
+    assert isinstance(reloaded._vectors, np.memmap)
+    assert reloaded._vectors.dtype == np.float32 and reloaded._vectors.shape == (semantic_cache.INITIAL_CAPACITY, DIM)
+    assert list(reloaded._rows) == ["key-1", "key-2"]
+    assert reloaded.lookup(reloaded.embed_prompt(UNRELATED), SCOPE)[0] == "key-2"
+
+def test_oldest_rows_are_evicted(tmp_path):
+    cache = SemanticCache(tmp_path, FakeEmbedder(), threshold=0.99, max_entries=2)
+    prompts = ["uno dos tres", "cuatro cinco seis", "siete ocho nueve"]
+    for index, prompt in enumerate(prompts):
+        cache.add(cache.embed_prompt(prompt), f"key-{index}", SCOPE)
+    assert list(cache._rows) == ["key-1", "key-2"]
+    assert cache.lookup(cache.embed_prompt(prompts[0]), SCOPE) is None
+    reloaded = SemanticCache(tmp_path, FakeEmbedder(), threshold=0.99, max_entries=2)
+    assert list(reloaded._rows) == ["key-1", "key-2"]
+
+def test_stale_rows_are_discarded(cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    key, similarity = cache.lookup(cache.embed_prompt(PARAPHRASE), SCOPE)
+    cache.discard_stale(key, similarity) # Its answer left the exact cache
+    assert cache.stats()['entries'] == 0 and cache.stats()['hits'] == 0
+
+def test_embedding_model_change_resets_the_matrix(tmp_path, cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    other = SemanticCache(tmp_path, FakeEmbedder(dim=32), threshold=0.9)
+    vector = other.embed_prompt(PROMPT)
+    assert other.lookup(vector, SCOPE) is None # Different dimensions are never compared
+    other.add(vector, "key-2", SCOPE)
+    assert list(other._rows) == ["key-2"] and other._vectors.shape[1] == 32
+
+def test_adds_write_one_row_in_place(tmp_path, cache):
+    """The matrix only grows (doubling) when its spare rows run out; entries are appended."""
+    vectors_file = tmp_path / semantic_cache.VECTORS_FILE
+    for index in range(semantic_cache.INITIAL_CAPACITY):
+        cache.add(cache.embed_prompt(f"pregunta {index}"), f"key-{index}", SCOPE)
+        if index == 0:
+            file_id = vectors_file.stat().st_ino
+    assert vectors_file.stat().st_ino == file_id # Never rewritten
+    assert len((tmp_path / semantic_cache.ENTRIES_FILE).read_text().splitlines()) == semantic_cache.INITIAL_CAPACITY
+
+    cache.add(cache.embed_prompt("una más"), "key-extra", SCOPE)
+    assert cache._vectors.shape[0] == 2 * semantic_cache.INITIAL_CAPACITY
+    assert cache.lookup(cache.embed_prompt("pregunta 3"), SCOPE)[0] == "key-3"
+
+def test_freed_rows_are_reused_and_the_log_is_replayed(tmp_path, cache):
+    cache.add(cache.embed_prompt(PROMPT), "key-1", SCOPE)
+    cache.add(cache.embed_prompt(UNRELATED), "key-2", SCOPE)
+    key, similarity = cache.lookup(cache.embed_prompt(PROMPT), SCOPE)
+    cache.discard_stale(key, similarity)
+    cache.add(cache.embed_prompt("traduce el contrato al inglés"), "key-3", SCOPE)
+    assert cache._rows == {"key-2": 1, "key-3": 0}
+
+    with open(tmp_path / semantic_cache.ENTRIES_FILE, "a", encoding="utf-8") as f:
+        f.write('{"row": 5, "ke') # Torn line from a crash
+    reloaded = SemanticCache(tmp_path, FakeEmbedder(), threshold=0.9)
+    assert reloaded._rows == {"key-2": 1, "key-3": 0}
+    assert reloaded.lookup(reloaded.embed_prompt(PROMPT), SCOPE) is None
+    assert reloaded.lookup(reloaded.embed_prompt(UNRELATED), SCOPE)[0] == "key-2"
+
+def test_entries_log_is_compacted(tmp_path):
+    cache = SemanticCache(tmp_path, FakeEmbedder(), threshold=0.99, max_entries=1)
+    for index in range(semantic_cache.INITIAL_CAPACITY * 2):
+        cache.add(cache.embed_prompt(f"pregunta {index}"), f"key-{index}", SCOPE)
+    lines = (tmp_path / semantic_cache.ENTRIES_FILE).read_text().splitlines()
+    assert len(lines) <= semantic_cache.INITIAL_CAPACITY + 2
+    assert SemanticCache(tmp_path, FakeEmbedder(), max_entries=1)._rows == cache._rows
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.ai.local_ai_provider import LocalAIProvider
+from app.ai.sse import iter_chat_deltas, iter_sse_data
+
+def _event(content):
+    return f"data: {json.dumps({'choices': [{'delta': {'content': content}}]})}\n\n".encode()
+
+class StubSSEServer:
+    """OpenAI-compatible /chat/completions stub that streams `chunks` with `delay` between them."""
+
+    def __init__(self, chunks, delay=0.0, status=200):
+        self.chunks = chunks
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self.disconnected = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                stub.requests.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                if stub.status != 200:
+                    return
+                try:
+                    for chunk in stub.chunks:
+                        self.wfile.write(b": keep-alive\n\n" + _event(chunk))
+                        self.wfile.flush()
+                        time.sleep(stub.delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    stub.disconnected.set()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def test_sse_parsing():
+    lines = [": comment", "event: message", "data: uno", "data: dos", "", "data:tres", "", "data: cuatro"]
+    assert list(iter_sse_data(lines)) == ["uno\ndos", "tres", "cuatro"]
+    events = ['data: {"choices": [{"delta": {"role": "assistant"}}]}', "",
+              'data: {"choices": [{"delta": {"content": "Hola"}}]}', "", "data: [DONE]", "",
+              'data: {"choices": [{"delta": {"content": "ignorado"}}]}', ""]
+    assert list(iter_chat_deltas(events)) == ["Hola"]
+    with pytest.raises(RuntimeError, match="overloaded"):
+        list(iter_chat_deltas(['data: {"error": {"message": "overloaded"}}', ""]))
+
+def test_local_provider_streams_chunks():
+    with StubSSEServer(["Resumen", ": punto ", "clave ñ"]) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        assert list(provider.stream_text("Resume", max_tokens=50)) == ["Resumen", ": punto ", "clave ñ"]
+        assert stub.requests[0]["stream"] is True
+        assert stub.requests[0]["max_tokens"] == 50
+
+def test_cancellation_closes_the_stream():
+    with StubSSEServer(["palabra "] * 200, delay=0.01) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        cancel = threading.Event()
+        received = []
+        for chunk in provider.stream_text("Escribe mucho", cancel_event=cancel):
+            received.append(chunk)
+            if len(received) == 3:
+                cancel.set()
+        assert len(received) == 3
+        assert stub.disconnected.wait(5)
+
+def test_http_errors_are_raised():
+    with StubSSEServer([], status=500) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        with pytest.raises(requests.exceptions.HTTPError):
+            list(provider.stream_text("Hola"))
+
+def test_chunks_arrive_as_they_are_sent():
+    with StubSSEServer(["a", "b", "c"], delay=1.0) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        start = time.perf_counter()
+        arrivals = [(chunk, time.perf_counter() - start) for chunk in provider.stream_text("Hola")]
+        assert [chunk for chunk, _ in arrivals] == ["a", "b", "c"]
+        assert arrivals[0][1] < 0.5 # Not held back until the buffer fills or the stream ends
+        assert arrivals[1][1] < 1.5
+
+def test_silent_stream_times_out():
+    with StubSSEServer(["a", "b"], delay=3.0) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=0.5)
+        received = []
+        with pytest.raises(TimeoutError):
+            for chunk in provider.stream_text("Hola"):
+                received.append(chunk)
+        assert received == ["a"]
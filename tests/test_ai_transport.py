@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from app.ai.local_ai_provider import LocalAIProvider
+from app.ai.transport import LatencyTracker
+
+class StubCompletionServer:
+    """Keep-alive /chat/completions stub that echoes the prompt and records connections and concurrency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if self.path.endswith("/embeddings"):
+                    # Out of order on purpose: clients must sort by index
+                    data = [{'index': i, 'embedding': [float(len(text)), 1.0]} for i, text in enumerate(body['input'])]
+                    return self._reply(200, {'data': data[::-1]})
+                prompt = body['messages'][-1]['content']
+                with stub._lock:
+                    stub.client_ports.add(self.client_address[1])
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight -= 1
+                self._reply(500 if prompt == "fail" else 200, {'choices': [{'message': {'content': f"eco: {prompt}"}}]})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def test_sync_requests_reuse_one_connection():
+    with StubCompletionServer() as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        assert [provider.generate_text(f"p{i}") for i in range(3)] == ["eco: p0", "eco: p1", "eco: p2"]
+        assert len(stub.client_ports) == 1
+        stats = provider.get_latency_stats()
+        assert stats['count'] == 3
+        assert 0 < stats['ttfb_avg_ms'] <= stats['total_avg_ms']
+        provider.transport.close()
+
+def test_generate_many_respects_concurrency_limit():
+    with StubCompletionServer(delay=0.05) as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        prompts = [f"p{i}" for i in range(8)]
+        results = provider.generate_many(prompts, max_tokens=20, concurrency=3)
+        assert results == [f"eco: {p}" for p in prompts]
+        assert stub.max_in_flight == 3
+        assert len(stub.client_ports) <= 3 # Connections are kept alive within the batch
+        assert [t['kind'] for t in provider.latency.get_timings()] == ["async"] * 8
+
+def test_failed_prompt_returns_its_exception():
+    with StubCompletionServer() as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        results = provider.generate_many(["a", "fail", "b"], concurrency=2)
+        assert results[0] == "eco: a" and results[2] == "eco: b"
+        assert isinstance(results[1], httpx.HTTPStatusError)
+
+def test_embeddings_endpoint():
+    with StubCompletionServer() as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        assert provider.embed(["a", "abc"]) == [[1.0, 1.0], [3.0, 1.0]]
+
+def test_latency_stats():
+    tracker = LatencyTracker(window=3)
+    assert tracker.get_stats()['count'] == 0
+    for total in (10, 20, 30, 40):
+        tracker.record(total / 2, total, 200)
+    stats = tracker.get_stats()
+    assert stats['count'] == 3
+    assert stats['total_avg_ms'] == pytest.approx(30)
+    assert (stats['total_p50_ms'], stats['total_p95_ms'], stats['ttfb_p50_ms']) == (30, 40, 15)
+
+def test_failures_are_raised_not_returned_as_text():
+    with StubCompletionServer() as stub:
+        provider = LocalAIProvider(base_url=stub.base_url, timeout=5)
+        with pytest.raises(requests.HTTPError):
+            provider.generate_text("fail")
+        port = stub.server.server_address[1]
+    provider = LocalAIProvider(base_url=f"http://127.0.0.1:{port}/v1", timeout=5) # Server gone
+    with pytest.raises(ConnectionError):
+        provider.generate_text("hola")
@@ -0,0 +1,44 @@
+import pytest
+
+from app.utils.content_blocking import BlockCounter, DomainMatcher, ESTIMATED_BYTES, load_blocklist, parse_blocklist
+
+@pytest.mark.parametrize("host, expected", [
+    ("doubleclick.net", True),
+    ("stats.g.doubleclick.net", True),
+    ("STATS.DoubleClick.net.", True),
+    ("notdoubleclick.net", False),
+    ("doubleclick.net.evil.com", False),
+    ("net", False),
+    ("", False),
+])
+def test_domain_matcher_matches_domain_and_subdomains(host, expected):
+    matcher = DomainMatcher(["doubleclick.net", "ads.linkedin.com"])
+    assert matcher.matches(host) is expected
+
+def test_domain_matcher_does_not_block_parent_domain():
+    matcher = DomainMatcher(["ads.linkedin.com"])
+    assert matcher.matches("px.ads.linkedin.com")
+    assert not matcher.matches("www.linkedin.com")
+    assert not matcher.matches("linkedin.com")
+
+def test_parse_blocklist_formats():
+    lines = ["# comment", "", "0.0.0.0 tracker.example", "127.0.0.1 localhost", "ads.example  # inline", "0.0.0.0"]
+    assert list(parse_blocklist(lines)) == ["tracker.example", "ads.example"]
+
+def test_bundled_blocklist_loads():
+    matcher = load_blocklist()
+    assert len(matcher) > 0
+    assert matcher.matches("www.google-analytics.com")
+    assert not matcher.matches("web.whatsapp.com")
+
+def test_block_counter():
+    counter = BlockCounter()
+    counter.record(1, 'script')
+    counter.record(1, 'image')
+    counter.record(2, 'unknown')
+    assert counter.get_stats() == {
+        1: {'requests': 2, 'bytes': ESTIMATED_BYTES['script'] + ESTIMATED_BYTES['image']},
+        2: {'requests': 1, 'bytes': ESTIMATED_BYTES['other']},
+    }
+    counter.reset(1)
+    assert list(counter.get_stats()) == [2]
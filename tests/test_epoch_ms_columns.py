@@ -0,0 +1,94 @@
+import datetime
+import sqlite3
+import pytest
+
+from app.db.checklist_manager import ChecklistManager
+from app.db.database import EPOCH_MS_COLUMNS, create_schema
+from app.db.kanban_manager import KanbanManager
+from app.db.settings_manager import SettingsManager
+from app.utils import time_utils
+
+UTC = datetime.timezone.utc
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    conn.execute("INSERT INTO kanban_columns (id, name, position) VALUES (1, 'Por hacer', 0)")
+    conn.commit()
+    yield conn
+    SettingsManager._instance = None
+    conn.close()
+
+def ms(text):
+    return int(datetime.datetime.fromisoformat(text).timestamp() * 1000)
+
+def test_existing_database_gets_the_columns():
+    """Rows written before the migration get their *_ms values, whatever their offset format."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE reminders (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL,
+                    due_at TEXT NOT NULL, is_completed INTEGER NOT NULL DEFAULT 0,
+                    is_notified INTEGER NOT NULL DEFAULT 0, pre_notified_at TEXT)""")
+    conn.executemany("INSERT INTO reminders (text, due_at) VALUES (?, ?)", [
+        ("utc", "2025-06-01T10:00:00+00:00"),
+        ("offset", "2025-06-01T12:00:00+02:00"),
+        ("zulu", "2025-06-01T10:00:00Z"),
+        ("naive", "2025-06-01 10:00:00"),
+    ])
+    conn.commit()
+
+    create_schema(conn)
+    create_schema(conn) # Idempotent
+    expected = ms("2025-06-01T10:00:00+00:00")
+    assert [row[0] for row in conn.execute("SELECT due_at_ms FROM reminders ORDER BY id")] == [expected] * 4
+
+    for table, columns in EPOCH_MS_COLUMNS.items():
+        names = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+        indexes = {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+        for column in columns:
+            assert f"{column}_ms" in names
+            assert f"idx_{table}_{column}_ms" in indexes
+
+def test_columns_follow_updates(conn):
+    card = conn.execute("INSERT INTO kanban_cards (column_id, title, due_date) VALUES (1, 'x', '2025-01-01T00:00:00+00:00')").lastrowid
+    conn.execute("UPDATE kanban_cards SET due_date = '2025-01-02T00:00:00+00:00' WHERE id = ?", (card,))
+    assert conn.execute("SELECT due_date_ms FROM kanban_cards").fetchone()[0] == ms("2025-01-02T00:00:00+00:00")
+    conn.execute("UPDATE kanban_cards SET due_date = NULL")
+    assert conn.execute("SELECT due_date_ms FROM kanban_cards").fetchone()[0] is None
+
+def test_range_queries_compare_instants(conn):
+    """Due dates stored with different offsets are compared as instants, not as text."""
+    for title, due in [("before", "2025-06-01T09:59:59+00:00"), ("start", "2025-06-01T12:00:00+02:00"),
+                       ("inside", "2025-06-01T11:00:00Z"), ("end", "2025-06-01T12:00:00+00:00"),
+                       ("after", "2025-06-01T08:00:01-04:00"), ("no date", None)]:
+        conn.execute("INSERT INTO kanban_cards (column_id, title, due_date) VALUES (1, ?, ?)", (title, due))
+    conn.commit()
+
+    start = datetime.datetime(2025, 6, 1, 10, tzinfo=UTC)
+    end = datetime.datetime(2025, 6, 1, 12, tzinfo=UTC)
+    expected = ["start", "inside", "end"]
+    kanban = KanbanManager(conn)
+    assert [row['title'] for row in kanban.get_cards_due_between(start, end)] == expected
+    assert [row['title'] for row in kanban.get_cards_due_between(start.isoformat(), end.isoformat())] == expected
+    assert [row['title'] for row in kanban.get_cards_due_between(time_utils.to_epoch_ms(start),
+                                                                 time_utils.to_epoch_ms(end))] == expected
+
+def test_checklist_due_scans(conn):
+    checklist = conn.execute("INSERT INTO checklists (name) VALUES ('Viaje')").lastrowid
+    now = datetime.datetime.now(UTC)
+    for text, due, checked in [("overdue", now - datetime.timedelta(hours=1), 0),
+                               ("soon", now + datetime.timedelta(minutes=10), 0),
+                               ("later", now + datetime.timedelta(days=2), 0),
+                               ("done", now - datetime.timedelta(hours=1), 1)]:
+        conn.execute("INSERT INTO checklist_items (checklist_id, text, is_checked, due_at) VALUES (?, ?, ?, ?)",
+                     (checklist, text, checked, due.isoformat()))
+    conn.commit()
+
+    manager = ChecklistManager(conn)
+    assert [item['text'] for item in manager.get_actual_due_checklist_items()] == ["overdue"]
+    assert [item['text'] for item in manager.get_pre_due_checklist_items([30])] == ["soon"]
+    between = manager.get_items_due_between(now - datetime.timedelta(days=1), now + datetime.timedelta(days=1))
+    assert [item['text'] for item in between] == ["overdue", "soon"]
@@ -0,0 +1,70 @@
+import os
+import pytest
+
+from app.services import profile_operations
+from app.utils.profile_storage import CACHE_DIR_NAME
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+@pytest.fixture
+def source_profile(tmp_path):
+    profile = tmp_path / "service_whatsapp"
+    _write(str(profile / CACHE_DIR_NAME / "Cache_Data" / "f_000001"), b"bundle.js")
+    _write(str(profile / CACHE_DIR_NAME / "Code Cache" / "js" / "abc"), b"bytecode")
+    _write(str(profile / "Cookies"), b"session")
+    return str(profile)
+
+def test_clone_copies_cache_only(source_profile, tmp_path):
+    """The HTTP and code caches are cloned; cookies and site data are not."""
+    target = str(tmp_path / "service_whatsapp_2")
+    progress = []
+    stats = profile_operations.clone_profile_cache(source_profile, target, progress=lambda d, t: progress.append((d, t)))
+
+    assert stats['files'] == 2 and stats['bytes'] == len(b"bundle.js") + len(b"bytecode")
+    assert stats['reflink'] + stats['copy'] == 2
+    assert progress[-1] == (2, 2)
+    with open(os.path.join(target, CACHE_DIR_NAME, "Cache_Data", "f_000001"), "rb") as f:
+        assert f.read() == b"bundle.js"
+    assert not os.path.exists(os.path.join(target, "Cookies"))
+
+    # The clone is independent of the source (never a hardlink)
+    source_file = os.path.join(source_profile, CACHE_DIR_NAME, "Cache_Data", "f_000001")
+    assert os.stat(source_file).st_nlink == 1
+
+def test_clone_without_source_cache_creates_empty_profile(tmp_path):
+    target = str(tmp_path / "new")
+    stats = profile_operations.clone_profile_cache(str(tmp_path / "missing"), target)
+    assert stats['files'] == 0
+    assert os.path.isdir(target)
+
+def test_rename_and_remove_profile(source_profile, tmp_path):
+    renamed = str(tmp_path / "service_work")
+    assert profile_operations.rename_profile(source_profile, renamed)
+    assert not os.path.exists(source_profile) and os.path.exists(os.path.join(renamed, "Cookies"))
+
+    os.makedirs(source_profile)
+    with pytest.raises(FileExistsError):
+        profile_operations.rename_profile(renamed, source_profile)
+
+    assert profile_operations.remove_profile(renamed)
+    assert not os.path.exists(renamed)
+    assert not profile_operations.remove_profile(renamed)
+
+def test_profile_task_failures_are_shown_and_rolled_back(source_profile, tmp_path, qtbot, monkeypatch):
+    from PyQt6.QtWidgets import QMessageBox
+    from app.ui.profile_task_worker import run_profile_task
+
+    warnings, rollbacks = [], []
+    monkeypatch.setattr(QMessageBox, "warning", lambda parent, title, text: warnings.append(text))
+    os.makedirs(tmp_path / "service_taken")
+    worker = run_profile_task(None, "Renombrando...", profile_operations.rename_profile,
+                              source_profile, str(tmp_path / "service_taken"),
+                              on_success=lambda _result: pytest.fail("rename should fail"), on_error=rollbacks.append)
+    with qtbot.waitSignal(worker.destroyed): # Deleted once finished, after the error was handled
+        pass
+    assert len(rollbacks) == 1 and "already exists" in rollbacks[0]
+    assert len(warnings) == 1 and rollbacks[0] in warnings[0]
+    assert os.path.exists(source_profile)
@@ -0,0 +1,77 @@
+import os
+
+from app.utils.profile_storage import (
+    CACHE_DIR_NAME, directory_size, profile_storage_usage, trim_profile_caches,
+)
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+def _make_profile(root, name, cache_bytes, storage_bytes, mtime):
+    profile = os.path.join(root, name)
+    cache_file = os.path.join(profile, CACHE_DIR_NAME, "Cache_Data", "data_1")
+    _write(cache_file, cache_bytes)
+    _write(os.path.join(profile, "IndexedDB", "db"), storage_bytes)
+    os.utime(cache_file, (mtime, mtime))
+    return profile
+
+def test_profile_storage_usage(tmp_path):
+    """Cache and site data are reported separately."""
+    profile = _make_profile(str(tmp_path), "mail", 300, 50, 1000)
+    assert directory_size(profile) == 350
+    assert profile_storage_usage(profile) == {'cache_bytes': 300, 'storage_bytes': 50}
+    assert profile_storage_usage(str(tmp_path / "missing")) == {'cache_bytes': 0, 'storage_bytes': 0}
+
+def test_trim_removes_oversized_and_oldest_caches(tmp_path):
+    """Oversized caches go first, then the least recently used until the budget is met."""
+    old = _make_profile(str(tmp_path), "old", 400, 10, 1000)
+    big = _make_profile(str(tmp_path), "big", 900, 10, 3000)
+    recent = _make_profile(str(tmp_path), "recent", 400, 10, 2000)
+
+    freed = trim_profile_caches([old, big, recent], max_profile_bytes=500, max_total_bytes=500)
+    assert freed == 1300
+    assert not os.path.exists(os.path.join(old, CACHE_DIR_NAME))
+    assert not os.path.exists(os.path.join(big, CACHE_DIR_NAME))
+    assert os.path.exists(os.path.join(recent, CACHE_DIR_NAME))
+    # Site data is never touched
+    assert all(os.path.exists(os.path.join(p, "IndexedDB", "db")) for p in [old, big, recent])
+
+def test_trim_skips_live_profiles(tmp_path):
+    """Caches of loaded profiles are counted but kept."""
+    live = _make_profile(str(tmp_path), "live", 900, 10, 1000)
+    idle = _make_profile(str(tmp_path), "idle", 100, 10, 2000)
+
+    freed = trim_profile_caches([live, idle], max_profile_bytes=500, max_total_bytes=500, live_profile_paths=[live])
+    assert freed == 100
+    assert os.path.exists(os.path.join(live, CACHE_DIR_NAME))
+
+def test_trim_orders_by_the_newest_cache_file(tmp_path):
+    """Chromium writes inside sub-directories: the cache directory's own time does not count."""
+    used = _make_profile(str(tmp_path), "used", 400, 10, 1000)
+    unused = _make_profile(str(tmp_path), "unused", 400, 10, 2000)
+    os.utime(os.path.join(used, CACHE_DIR_NAME), (500, 500))
+    os.utime(os.path.join(unused, CACHE_DIR_NAME), (500, 500))
+    _write(os.path.join(used, CACHE_DIR_NAME, "Code Cache", "js", "entry"), 100) # Written now
+
+    freed = trim_profile_caches([used, unused], max_profile_bytes=1000, max_total_bytes=600)
+    assert freed == 400
+    assert os.path.exists(os.path.join(used, CACHE_DIR_NAME))
+    assert not os.path.exists(os.path.join(unused, CACHE_DIR_NAME))
+
+def test_trim_skips_profiles_opened_while_trimming(tmp_path):
+    """A callable live list is checked again before each deletion."""
+    opened = _make_profile(str(tmp_path), "opened", 400, 10, 1000)
+    idle = _make_profile(str(tmp_path), "idle", 400, 10, 2000)
+    live = []
+
+    def live_profile_paths():
+        live.append(opened) # The profile starts loading once trimming is under way
+        return live
+
+    freed = trim_profile_caches([opened, idle], max_profile_bytes=1000, max_total_bytes=0,
+                                live_profile_paths=live_profile_paths)
+    assert freed == 400
+    assert os.path.exists(os.path.join(opened, CACHE_DIR_NAME))
+    assert not os.path.exists(os.path.join(idle, CACHE_DIR_NAME))
@@ -0,0 +1,118 @@
+import pytest
+import sqlite3
+import datetime
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.db.reminders_manager import RemindersManager
+from app.utils import time_utils
+
+@pytest.fixture
+def reminders_manager_instance():
+    """Provides a RemindersManager backed by an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    yield RemindersManager(conn)
+    SettingsManager._instance = None
+    conn.close()
+
+def _utc_now():
+    return time_utils.to_utc(datetime.datetime.now())
+
+def test_recurring_reminder_is_stored_as_one_row(reminders_manager_instance):
+    """A weekly reminder is a single row with a bounded set of materialized occurrences."""
+    manager = reminders_manager_instance
+    start = (_utc_now() + datetime.timedelta(hours=1)).replace(microsecond=0)
+    reminder_id = manager.create_reminder("Reunión semanal", start, rrule="RRULE:FREQ=WEEKLY")
+
+    assert len(manager.get_all_reminders()) == 1
+    assert manager.get_reminder(reminder_id)['rrule'] == "FREQ=WEEKLY"
+
+    occurrences = manager.get_reminder_occurrences(reminder_id)
+    # 30-day window -> 5 weekly occurrences at most
+    assert 4 <= len(occurrences) <= 5
+    assert occurrences[0]['due_at'] == start.isoformat()
+
+def test_roll_recurrence_window_is_idempotent(reminders_manager_instance):
+    """Rolling the window twice does not duplicate occurrences."""
+    manager = reminders_manager_instance
+    manager.create_reminder("Diario", _utc_now() + datetime.timedelta(minutes=5), rrule="FREQ=DAILY")
+    count = len(manager.get_reminder_occurrences())
+
+    manager.roll_recurrence_window()
+    assert len(manager.get_reminder_occurrences()) == count
+
+    # A wider window materializes more occurrences
+    manager.roll_recurrence_window(window_days=60)
+    assert len(manager.get_reminder_occurrences()) > count
+
+def test_due_occurrences_are_notified_once(reminders_manager_instance):
+    """Due occurrences are returned by the scheduler query until marked as notified."""
+    manager = reminders_manager_instance
+    manager.create_reminder("Pasado", _utc_now() - datetime.timedelta(minutes=5), rrule="FREQ=DAILY")
+    manager.create_reminder("Único", _utc_now() - datetime.timedelta(minutes=5))
+
+    due = manager.get_actual_due_reminders()
+    assert len(due) == 2
+    recurring = [r for r in due if r['occurrence_id']]
+    assert len(recurring) == 1
+
+    manager.update_occurrence(recurring[0]['occurrence_id'], is_notified=1)
+    remaining = manager.get_actual_due_reminders()
+    assert len(remaining) == 1
+    assert remaining[0]['occurrence_id'] is None
+
+def test_clearing_rrule_removes_occurrences(reminders_manager_instance):
+    """Turning a recurring reminder into a one-shot one drops its occurrences."""
+    manager = reminders_manager_instance
+    reminder_id = manager.create_reminder("Semanal", _utc_now() + datetime.timedelta(hours=1), rrule="FREQ=WEEKLY")
+    manager.update_reminder(reminder_id, rrule='')
+
+    assert manager.get_reminder(reminder_id)['rrule'] is None
+    assert manager.get_reminder_occurrences(reminder_id) == []
+
+def test_invalid_rules_are_rejected(reminders_manager_instance):
+    manager = reminders_manager_instance
+    with pytest.raises(ValueError):
+        manager.create_reminder("Roto", _utc_now(), rrule="FREQ=SOMETIMES")
+    assert manager.get_all_reminders() == []
+
+    reminder_id = manager.create_reminder("Semanal", _utc_now() + datetime.timedelta(hours=1), rrule="FREQ=WEEKLY")
+    with pytest.raises(ValueError):
+        manager.update_reminder(reminder_id, rrule="FREQ=WEEKLY;BYDAY=XX")
+    assert manager.get_reminder(reminder_id)['rrule'] == "FREQ=WEEKLY"
+
+def test_rule_edits_replace_old_occurrences(reminders_manager_instance):
+    """Past occurrences of the old rule go away (unless completed) and none are created in the past."""
+    manager = reminders_manager_instance
+    start = (_utc_now() - datetime.timedelta(hours=2)).replace(microsecond=0)
+    reminder_id = manager.create_reminder("Diario", start, rrule="FREQ=DAILY")
+    notified, completed = [o['id'] for o in manager.get_reminder_occurrences(reminder_id)[:2]]
+    manager.update_occurrence(notified, is_notified=1) # Past, delivered but not done
+
+    manager.update_reminder(reminder_id, text="Diario (renombrado)")
+    assert notified in [o['id'] for o in manager.get_reminder_occurrences(reminder_id)] # Text edits keep them
+
+    manager.update_occurrence(completed, is_completed=1)
+    manager.update_reminder(reminder_id, due_at=start + datetime.timedelta(minutes=30))
+    occurrences = manager.get_reminder_occurrences(reminder_id)
+    ids = [o['id'] for o in occurrences]
+    assert notified not in ids and completed in ids
+    pending = [o for o in occurrences if not o['is_completed']]
+    assert pending and all(o['due_at_ms'] > time_utils.to_epoch_ms(start) + 3600_000 for o in pending)
+    assert manager.get_actual_due_reminders() == []
+
+def test_until_must_be_utc(reminders_manager_instance):
+    """RFC 5545: with a zoned DTSTART, UNTIL is given in UTC ('Z'); a floating UNTIL cannot be expanded."""
+    manager = reminders_manager_instance
+    start = _utc_now() + datetime.timedelta(hours=1)
+    until = (start + datetime.timedelta(days=3)).strftime("%Y%m%dT%H%M%SZ")
+    reminder_id = manager.create_reminder("Tres días", start, rrule=f"FREQ=DAILY;UNTIL={until}")
+    assert len(manager.get_reminder_occurrences(reminder_id)) == 4
+
+    with pytest.raises(ValueError):
+        manager.create_reminder("Flotante", start, rrule=f"FREQ=DAILY;UNTIL={until[:-1]}")
+    assert [r['id'] for r in manager.get_all_reminders()] == [reminder_id]
@@ -0,0 +1,42 @@
+import os
+import pytest
+
+from app.metrics import resource_monitor
+from app.metrics.resource_monitor import ResourceMonitor
+
+pytestmark = pytest.mark.skipif(resource_monitor.psutil is None, reason="psutil not installed")
+
+def test_samples_renderer_processes(qtbot):
+    """Processes are sampled per service; the first read only sets the CPU baseline."""
+    pids = {1: os.getpid(), 2: 0}
+    monitor = ResourceMonitor(lambda: pids)
+    monitor.sample(now=0)
+    assert monitor.get_usage(1) is None
+
+    for now in range(1, 4):
+        sum(range(20000)) # Some CPU time between samples
+        monitor.sample(now=now)
+    usage = monitor.get_usage(1)
+    assert usage['samples'] == 3
+    assert usage['rss_last'] > 0 and usage['rss_peak'] >= usage['rss_last']
+    assert usage['cpu_avg'] >= 0
+    assert monitor.get_usage(2) is None # No process (discarded view)
+    assert monitor.is_cpu_heavy(1, 0)
+    assert not monitor.is_cpu_heavy(1, 10_000)
+
+def test_forgets_services_that_went_away(qtbot):
+    pids = {1: os.getpid()}
+    monitor = ResourceMonitor(lambda: pids)
+    monitor.sample(now=0)
+    monitor.sample(now=1)
+    assert set(monitor.get_all_usage()) == {1}
+
+    pids.clear()
+    monitor.sample(now=2)
+    assert monitor.get_all_usage() == {}
+
+def test_window_is_bounded(qtbot):
+    monitor = ResourceMonitor(lambda: {1: os.getpid()})
+    for now in range(resource_monitor.WINDOW_SAMPLES + 10):
+        monitor.sample(now=now)
+    assert monitor.get_usage(1)['samples'] == resource_monitor.WINDOW_SAMPLES
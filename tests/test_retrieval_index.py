@@ -0,0 +1,158 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.db.database import create_schema
+from app.search.retrieval_index import RetrievalIndex, build_grounded_prompt, chunk_text, fts_query
+
+DIM = 64
+
+class FakeEmbedder:
+    """Bag-of-words embeddings: texts sharing most words get a high cosine similarity."""
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, texts):
+        if self.fail:
+            raise ConnectionError("embeddings endpoint down")
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = np.zeros(self.dim)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+            vectors.append(vector.tolist())
+        return vectors
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    conn.execute("INSERT INTO kanban_columns (id, name, position) VALUES (1, 'Por hacer', 0)")
+    conn.commit()
+    return conn
+
+def add_note(conn, content):
+    with conn:
+        return conn.execute("INSERT INTO notes (content) VALUES (?)", (content,)).lastrowid
+
+def add_card(conn, title, description):
+    with conn:
+        return conn.execute("INSERT INTO kanban_cards (column_id, title, description) VALUES (1, ?, ?)",
+                            (title, description)).lastrowid
+
+def test_chunks_overlap_and_queries_are_safe():
+    words = [f"w{i}" for i in range(250)]
+    chunks = chunk_text(" ".join(words), words=100, overlap=20)
+    assert [c.split()[0] for c in chunks] == ["w0", "w80", "w160"]
+    assert chunks[-1].split()[-1] == "w249"
+    assert chunk_text("  ") == []
+    assert fts_query('¿Qué dijo "Ana" de la factura?') == '"qué" OR "dijo" OR "ana" OR "factura"'
+    assert fts_query("a b") is None
+
+def test_only_changed_documents_are_reindexed(tmp_path, conn):
+    embed = FakeEmbedder()
+    index = RetrievalIndex(conn, tmp_path, embed)
+    note = add_note(conn, "Reunión con el proveedor de servidores sobre la renovación del contrato")
+    add_card(conn, "Preparar presupuesto", "Presupuesto anual del departamento de marketing")
+    assert index.sync() == {'changes': 2, 'embedded': 2}
+
+    with conn:
+        conn.execute("UPDATE notes SET content = ? WHERE id = ?", ("Contrato de servidores firmado", note))
+        conn.execute("UPDATE kanban_cards SET column_id = 1") # Not a text edit: not queued
+    embed.calls.clear()
+    assert index.sync() == {'changes': 1, 'embedded': 1}
+    assert embed.calls == [["Contrato de servidores firmado"]]
+
+    with conn:
+        conn.execute("DELETE FROM notes WHERE id = ?", (note,))
+    index.sync()
+    stats = index.stats()
+    assert (stats['chunks'], stats['embedded'], stats['queued_changes']) == (1, 1, 0)
+
+def test_hybrid_search_ranks_relevant_chunks(tmp_path, conn):
+    index = RetrievalIndex(conn, tmp_path, FakeEmbedder())
+    add_note(conn, "La factura del hosting vence el viernes y hay que pagarla por transferencia")
+    add_note(conn, "Ideas para el taller de diseño con el equipo de producto")
+    card = add_card(conn, "Renovar dominio", "El dominio de la web caduca en marzo")
+    index.sync()
+
+    results = index.search("¿cuándo vence la factura del hosting?", k=2)
+    assert results[0]['source'] == 'note' and "factura" in results[0]['content']
+    assert results[0]['lexical'] == 1.0 and results[0]['similarity'] > 0
+    assert results[0]['score'] >= results[-1]['score']
+
+    results = index.search("dominio caduca", k=1, alpha=0.0) # Keywords only
+    assert (results[0]['source'], results[0]['doc_id']) == ('card', card)
+
+def test_vectors_are_memory_mapped_and_rows_reused(tmp_path, conn):
+    index = RetrievalIndex(conn, tmp_path, FakeEmbedder())
+    notes = [add_note(conn, f"nota número {i} sobre el proyecto alfa") for i in range(3)]
+    index.sync()
+    with conn:
+        conn.execute("DELETE FROM notes WHERE id = ?", (notes[0],))
+    index.sync()
+    add_note(conn, "nota nueva sobre el proyecto beta")
+    index.sync()
+    rows = sorted(row for (row,) in conn.execute("SELECT vector_row FROM retrieval_chunks"))
+    assert rows == [0, 1, 2] # The freed row was reused
+
+    reloaded = RetrievalIndex(conn, tmp_path, FakeEmbedder())
+    assert reloaded.search("proyecto beta", k=1)[0]['content'] == "nota nueva sobre el proyecto beta"
+    assert isinstance(reloaded._vectors, np.memmap)
+    assert reloaded._vectors.dtype == np.float32 and reloaded._vectors.shape[1] == DIM
+
+def test_embedding_failures_fall_back_to_keywords(tmp_path, conn):
+    embed = FakeEmbedder()
+    embed.fail = True
+    index = RetrievalIndex(conn, tmp_path, embed)
+    add_note(conn, "Llamar al gestor por la declaración trimestral")
+    assert index.sync() == {'changes': 1, 'embedded': 0}
+    assert index.search("declaración trimestral")[0]['similarity'] == 0
+    embed.fail = False
+    assert index.sync() == {'changes': 0, 'embedded': 1} # Embedded on the next sync
+    assert index.search("declaración trimestral")[0]['similarity'] > 0
+
+def test_lost_matrix_is_rebuilt(tmp_path, conn):
+    index = RetrievalIndex(conn, tmp_path, FakeEmbedder())
+    add_note(conn, "copia de seguridad del portátil")
+    index.sync()
+    (tmp_path / "vectors.npy").unlink()
+    reloaded = RetrievalIndex(conn, tmp_path, FakeEmbedder())
+    assert reloaded.stats()['embedded'] == 0
+    assert reloaded.sync()['embedded'] == 1
+
+def test_existing_documents_are_queued_when_the_index_is_created():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT NOT NULL, created_at TEXT, updated_at TEXT)")
+    conn.execute("INSERT INTO notes (content) VALUES ('nota antigua')")
+    create_schema(conn)
+    create_schema(conn) # Idempotent: not queued twice
+    assert conn.execute("SELECT source, doc_id FROM retrieval_queue").fetchall() == [('note', 1)]
+
+def test_grounded_prompt_stays_within_budget():
+    results = [{'source': 'note', 'doc_id': i, 'content': "x" * 100} for i in range(10)]
+    prompt = build_grounded_prompt("¿Qué hay pendiente?", results, max_chars=350)
+    assert prompt.count("[Nota") == 3 and prompt.endswith("Pregunta: ¿Qué hay pendiente?")
+    assert build_grounded_prompt("hola", []) == "hola"
+
+def test_sync_without_embeddings_stays_local(tmp_path, conn):
+    embed = FakeEmbedder()
+    index = RetrievalIndex(conn, tmp_path, embed)
+    add_note(conn, "Revisar el contrato de alquiler de la oficina")
+    assert index.sync(with_embeddings=False) == {'changes': 1, 'embedded': 0}
+    assert embed.calls == []
+    assert index.search("contrato alquiler", alpha=0.0)[0]['lexical'] == 1.0
+    assert index.sync() == {'changes': 0, 'embedded': 1} # Once enabled
+
+def test_index_waits_for_the_schema(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    index = RetrievalIndex(conn, tmp_path, FakeEmbedder()) # Created before create_schema, as on startup
+    create_schema(conn)
+    assert index.stats()['chunks'] == 0
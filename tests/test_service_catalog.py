@@ -0,0 +1,67 @@
+import json
+import os
+import sqlite3
+import pytest
+
+from app.db.database import create_schema
+from app.services import service_manager
+from app.services.service_manager import ServiceManager, CATALOG_HASH_SETTING
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps([{"name": "WhatsApp", "url": "https://web.whatsapp.com", "unread_script": "v1"}]))
+    monkeypatch.setattr(service_manager, "CATALOG_FILE", str(path))
+    monkeypatch.setattr(service_manager, "_catalog_cache", None)
+    return path
+
+@pytest.fixture
+def manager():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    yield ServiceManager(conn)
+    conn.close()
+
+def test_catalog_is_parsed_once_until_it_changes(catalog_file, monkeypatch):
+    parses = []
+    real_loads = json.loads
+    monkeypatch.setattr(service_manager.json, "loads", lambda *a, **k: parses.append(1) or real_loads(*a, **k))
+
+    first = ServiceManager.load_catalog()
+    assert ServiceManager.load_catalog() == first
+    first_hash = ServiceManager.catalog_hash()
+    assert len(parses) == 1
+
+    # Touched without changes: re-hashed, not re-parsed
+    stat = os.stat(catalog_file)
+    os.utime(catalog_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    ServiceManager.load_catalog()
+    assert len(parses) == 1 and ServiceManager.catalog_hash() == first_hash
+
+    catalog_file.write_text(json.dumps([{"name": "Teams", "url": "https://teams.microsoft.com"}]))
+    os.utime(catalog_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert [s["name"] for s in ServiceManager.load_catalog()] == ["Teams"]
+    assert ServiceManager.catalog_hash() != first_hash
+
+def test_missing_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(service_manager, "CATALOG_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(service_manager, "_catalog_cache", None)
+    assert ServiceManager.load_catalog() == []
+    assert ServiceManager.catalog_hash() is None
+
+def test_sync_unread_scripts(catalog_file, manager):
+    """Outdated scripts (instances included) are updated in one batch and the catalog hash is recorded."""
+    for name, script in [("WhatsApp", "old"), ("WhatsApp (Work)", None), ("Custom", "mine")]:
+        manager.conn.execute("INSERT INTO services (name, url, profile_path, unread_script) VALUES (?, ?, ?, ?)",
+                             (name, "https://example.com", f"profiles/{name}", script))
+    manager.conn.commit()
+
+    catalog_hash = ServiceManager.catalog_hash()
+    assert manager.sync_unread_scripts(catalog_hash) == 2
+    scripts = dict(manager.conn.execute("SELECT name, unread_script FROM services").fetchall())
+    assert scripts == {"WhatsApp": "v1", "WhatsApp (Work)": "v1", "Custom": "mine"}
+    stored = manager.conn.execute("SELECT value FROM settings WHERE key = ?", (CATALOG_HASH_SETTING,)).fetchone()[0]
+    assert stored == catalog_hash
+
+    assert manager.sync_unread_scripts(catalog_hash) == 0
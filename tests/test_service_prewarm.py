@@ -0,0 +1,66 @@
+import pytest
+import sqlite3
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.metrics.metrics_manager import MetricsManager
+from app.ui.service_prewarmer import ServicePrewarmer
+
+@pytest.fixture
+def managers():
+    """Provides a fresh SettingsManager and MetricsManager backed by an in-memory database with three web services."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    for name in ["Mail", "Chat", "Docs"]:
+        conn.execute("INSERT INTO services (name, url, profile_path, is_internal, is_active) VALUES (?, ?, ?, 0, 1)",
+                     (name, f"https://{name.lower()}.example", f"profiles/{name.lower()}"))
+    conn.commit()
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    settings_manager = SettingsManager.get_instance()
+    MetricsManager._master_instance = None
+    metrics_manager = MetricsManager.get_instance(conn)
+    yield settings_manager, metrics_manager
+    MetricsManager._master_instance = None
+    SettingsManager._instance = None
+    conn.close()
+
+class FakeWebViewManager:
+    """Records pre-warm requests without creating any views."""
+    def __init__(self):
+        self.requested = []
+
+    def prewarm_service(self, url, profile_path):
+        self.requested.append(url)
+        return None
+
+def test_service_priority_orders_by_usage(managers):
+    """Services are ranked by recent usage; unused services come last."""
+    _, metrics = managers
+    metrics._log_usage(metrics._service_ids["Chat"], 5000)
+    metrics._log_usage(metrics._service_ids["Docs"], 1000)
+    ranked = [s['url'] for s in metrics.get_service_priority()]
+    assert ranked == ["https://chat.example", "https://docs.example", "https://mail.example"]
+
+def test_prewarmer_selects_pinned_then_used(managers, qtbot):
+    """Pinned services go first, unused services are skipped and the count is capped."""
+    settings, metrics = managers
+    metrics._log_usage(metrics._service_ids["Chat"], 5000)
+    metrics._log_usage(metrics._service_ids["Docs"], 1000)
+    mail_id = metrics._service_ids["Mail"]
+    settings.set_service_pinned(mail_id, True)
+    settings.set_prewarm_service_count(2)
+
+    webviews = FakeWebViewManager()
+    ServicePrewarmer(webviews, metrics, settings).start()
+    assert webviews.requested == ["https://mail.example", "https://chat.example"]
+
+def test_prewarmer_disabled(managers, qtbot):
+    """A count of zero disables pre-warming."""
+    settings, metrics = managers
+    metrics._log_usage(metrics._service_ids["Chat"], 5000)
+    settings.set_prewarm_service_count(0)
+    webviews = FakeWebViewManager()
+    ServicePrewarmer(webviews, metrics, settings).start()
+    assert webviews.requested == []
@@ -0,0 +1,73 @@
+import pytest
+import sqlite3
+import datetime
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.utils import time_utils
+
+@pytest.fixture
+def settings_manager_instance():
+    """Initializes the settings singleton on an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    yield SettingsManager.get_instance()
+    SettingsManager._instance = None
+    conn.close()
+
+def test_timezone_is_cached_and_invalidated_on_change(settings_manager_instance):
+    """The ZoneInfo is reused until the timezone setting changes."""
+    settings_manager_instance.set_timezone("Europe/Madrid")
+    first = time_utils.get_current_timezone()
+    assert first.key == "Europe/Madrid"
+    assert time_utils.get_current_timezone() is first
+
+    settings_manager_instance.set_timezone("America/New_York")
+    assert time_utils.get_current_timezone().key == "America/New_York"
+
+def test_batch_conversions_match_scalar(settings_manager_instance):
+    """Batch helpers return the same values as the per-value functions."""
+    settings_manager_instance.set_timezone("Europe/Madrid")
+    base_ms = time_utils.to_epoch_ms("2025-03-29T12:00:00+00:00")
+    values = [base_ms + i * 3_600_000 for i in range(48)] + [None]  # crosses the DST change
+
+    assert time_utils.from_epoch_ms_batch(values) == [time_utils.from_epoch_ms(ms) for ms in values]
+    assert time_utils.format_epoch_ms_batch(values, "%H:%M") == [time_utils.format_epoch_ms(ms, "%H:%M") for ms in values]
+    iso_values = [dt.isoformat() for dt in time_utils.from_epoch_ms_batch(values[:-1])]
+    assert time_utils.to_epoch_ms_batch(iso_values) == values[:-1]
+
+def test_datetime64_conversion_handles_dst(settings_manager_instance):
+    """The vectorized path applies the correct offset on both sides of a DST change."""
+    np = pytest.importorskip("numpy")
+    settings_manager_instance.set_timezone("Europe/Madrid")
+    base_ms = time_utils.to_epoch_ms("2025-03-29T12:00:00+00:00")
+    values = [base_ms + i * 900_000 for i in range(200)]
+
+    result = time_utils.epoch_ms_to_local_datetime64(values)
+    expected = np.array([time_utils.from_epoch_ms(ms).replace(tzinfo=None) for ms in values], dtype="datetime64[ms]")
+    assert (result == expected).all()
+
+def test_to_epoch_ms_accepts_every_stored_format(settings_manager_instance):
+    """ISO strings with any offset, naive UTC strings, aware datetimes and ints map to the same instant."""
+    expected = 1748772000000 # 2025-06-01T10:00:00Z
+    utc = datetime.timezone.utc
+    for value in ["2025-06-01T10:00:00+00:00", "2025-06-01T12:00:00+02:00", "2025-06-01T10:00:00Z",
+                  "2025-06-01T10:00:00", "2025-06-01 10:00:00.000",
+                  datetime.datetime(2025, 6, 1, 10, tzinfo=utc), expected]:
+        assert time_utils.to_epoch_ms(value) == expected, value
+    assert time_utils.to_epoch_ms(None) is None and time_utils.to_epoch_ms("") is None
+
+    naive_local = datetime.datetime(2025, 6, 1, 12, 0)
+    assert time_utils.to_epoch_ms(naive_local) == int(naive_local.astimezone(utc).timestamp() * 1000)
+    assert time_utils.to_epoch_ms(naive_local.date()) == time_utils.to_epoch_ms(datetime.datetime(2025, 6, 1))
+
+def test_epoch_ms_round_trip_in_configured_timezone(settings_manager_instance):
+    settings_manager_instance.set_timezone("Europe/Madrid")
+    local = time_utils.from_epoch_ms(1748772000000)
+    assert (local.hour, local.utcoffset()) == (12, datetime.timedelta(hours=2))
+    assert time_utils.to_epoch_ms(local) == 1748772000000
+    assert time_utils.format_epoch_ms(1748772000000, "%Y-%m-%d %H:%M") == "2025-06-01 12:00"
+    assert time_utils.from_epoch_ms(None) is None and time_utils.format_epoch_ms(None) == ""
+    assert abs(time_utils.now_epoch_ms() - datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000) < 1000
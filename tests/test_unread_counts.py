@@ -0,0 +1,76 @@
+import pytest
+import sqlite3
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.metrics.metrics_manager import MetricsManager
+from app.metrics import session_analytics
+from app.ui.unread_aggregator import UnreadAggregator, unread_count_from_result
+from app.utils import time_utils
+
+DAY_MS = session_analytics.DAY_MS
+
+@pytest.fixture
+def metrics_manager_instance():
+    """Provides a fresh MetricsManager (UTC timezone) backed by an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    MetricsManager._master_instance = None
+    yield MetricsManager.get_instance(conn)
+    MetricsManager._master_instance = None
+    SettingsManager._instance = None
+    conn.close()
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 0), (False, 0), (True, 1), (7, 7), (3.0, 3), (-1, 0), ("12", 12), ("", 0),
+])
+def test_unread_count_from_result(value, expected):
+    """Legacy boolean scripts and numeric scripts both map to a count."""
+    assert unread_count_from_result(value) == expected
+
+def test_aggregator_coalesces_and_emits_changes_only():
+    """Several reports in one frame produce one emission with the changed services only."""
+    aggregator = UnreadAggregator()
+    emitted, totals = [], []
+    aggregator.counts_changed.connect(emitted.append)
+    aggregator.total_changed.connect(totals.append)
+
+    aggregator.report(1, 2)
+    aggregator.report(1, 3)
+    aggregator.report(2, True)
+    aggregator.flush()
+    assert emitted == [{1: 3, 2: 1}]
+    assert totals == [4]
+
+    aggregator.report(1, 3) # unchanged
+    aggregator.flush()
+    assert len(emitted) == 1
+
+    aggregator.remove_service(1)
+    assert totals == [4, 1]
+
+def test_unread_increments_per_day():
+    """Only rises between consecutive samples of the same service count as new messages."""
+    per_day = session_analytics.unread_increments_per_day(
+        [1, 1, 1, 2, 2, 1],
+        [0, 10, 20, 15, DAY_MS + 5, DAY_MS + 30],
+        [0, 2, 1, 5, 9, 4],
+    )
+    # service 1: +2 on day 0, then 1 -> 4 (+3) on day 1; service 2: baseline 5, +4 on day 1
+    assert per_day == {0: 2, 1: 7}
+
+def test_message_volume_from_recorded_counts(metrics_manager_instance):
+    """Recorded unread counts are persisted on flush and aggregated into a daily volume."""
+    manager = metrics_manager_instance
+    notes_id = manager._service_ids["Notas"]
+    for count in [0, 3, 0, 2]:
+        manager.record_unread_counts({notes_id: count})
+    assert manager.conn.execute("SELECT COUNT(*) FROM unread_samples").fetchone()[0] == 0
+
+    volume = manager.get_message_volume(1)
+    assert manager.conn.execute("SELECT COUNT(*) FROM unread_samples").fetchone()[0] == 4
+    today = time_utils.from_epoch_ms(time_utils.now_epoch_ms()).date().isoformat()
+    assert volume == {today: 5}
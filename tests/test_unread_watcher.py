@@ -0,0 +1,45 @@
+import json
+import re
+import pytest
+
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError) # Also missing system libraries
+
+from app.ui.unread_aggregator import UnreadAggregator
+from app.ui.unread_watcher import UNREAD_DEBOUNCE_MS, UnreadBridge, build_watcher_script
+
+def embedded_script(watcher):
+    """Returns the unread_script literal the watcher evaluates, decoded as JavaScript would."""
+    match = re.search(r"var unreadScript = (.*);\n", watcher)
+    return json.loads(match.group(1))
+
+def test_watcher_wraps_the_unread_script():
+    watcher = build_watcher_script("document.querySelectorAll('.unread').length")
+    assert embedded_script(watcher) == "document.querySelectorAll('.unread').length"
+    assert f"setTimeout(check, {UNREAD_DEBOUNCE_MS})" in watcher
+    assert "channel.objects.unreadBridge" in watcher
+    assert "__infoMensajeroUnreadWatcher" in watcher # Installed once per document
+
+    assert "setTimeout(check, 200)" in build_watcher_script("1", debounce_ms=200)
+
+def test_unread_script_is_escaped():
+    script = 'var t = "(3) Chat"; // </script>\nparseInt(t.match(/\\((\\d+)\\)/)[1])'
+    watcher = build_watcher_script(script)
+    assert embedded_script(watcher) == script
+    assert watcher.count("\n") == build_watcher_script("1").count("\n") # No raw newlines injected
+
+@pytest.mark.parametrize("value", [3, 0, True, False, None, "12"])
+def test_bridge_reports_values_with_the_service_id(qtbot, value):
+    bridge = UnreadBridge(42)
+    with qtbot.waitSignal(bridge.unread_changed) as blocker:
+        bridge.report(value)
+    assert blocker.args == [42, value]
+
+def test_bridge_reports_reach_the_badge_counts(qtbot):
+    aggregator = UnreadAggregator()
+    bridges = [UnreadBridge(1), UnreadBridge(2)]
+    for bridge in bridges:
+        bridge.unread_changed.connect(aggregator.report)
+    bridges[0].report("4")
+    bridges[1].report(True)
+    aggregator.flush()
+    assert (aggregator.get_count(1), aggregator.get_count(2), aggregator.get_total()) == (4, 1, 5)
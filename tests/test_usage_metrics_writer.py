@@ -0,0 +1,67 @@
+import pytest
+import sqlite3
+import datetime
+
+from app.db.database import create_schema
+from app.metrics.metrics_manager import MetricsManager
+
+@pytest.fixture
+def metrics_manager_instance():
+    """Provides a fresh MetricsManager backed by an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    MetricsManager._master_instance = None
+    yield MetricsManager.get_instance(conn)
+    MetricsManager._master_instance = None
+    conn.close()
+
+def _row_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM usage_metrics").fetchone()[0]
+
+def test_usage_is_buffered_until_flush(metrics_manager_instance):
+    """Logging usage does not touch the database until flush()."""
+    manager = metrics_manager_instance
+    notes_id = manager._service_ids["Notas"]
+    for _ in range(50):
+        manager._log_usage(notes_id, 2000)
+    assert _row_count(manager.conn) == 0
+
+    manager.flush()
+    assert _row_count(manager.conn) == 1
+    assert manager.get_usage_report() == [{'service_name': "Notas", 'milliseconds': 100000}]
+
+def test_flush_upserts_into_existing_day(metrics_manager_instance):
+    """Consecutive flushes add to the same (service, day) row."""
+    manager = metrics_manager_instance
+    kanban_id = manager._service_ids["Kanban"]
+    manager._log_usage(kanban_id, 1500)
+    manager.flush()
+    manager._log_usage(kanban_id, 2500)
+    manager.flush()
+
+    rows = manager.conn.execute("SELECT milliseconds FROM usage_metrics WHERE service_id = ?", (kanban_id,)).fetchall()
+    assert [row[0] for row in rows] == [4000]
+
+def test_shutdown_flushes_active_session(metrics_manager_instance):
+    """shutdown() logs the running session and writes it."""
+    manager = metrics_manager_instance
+    manager.start_tracking("Gantt")
+    manager.session_start_time -= datetime.timedelta(seconds=5)
+    manager.shutdown()
+
+    report = manager.get_usage_report()
+    assert report[0]['service_name'] == "Gantt"
+    assert report[0]['milliseconds'] >= 5000
+
+def test_unique_index_migration_merges_duplicates():
+    """Existing duplicate (service, day) rows are merged before the unique index is created."""
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    conn.execute("DROP INDEX idx_usage_metrics_service_day")
+    conn.execute("INSERT INTO services (name, url, profile_path) VALUES ('Correo', 'https://mail.example.com', 'correo')")
+    conn.executemany("INSERT INTO usage_metrics (service_id, milliseconds, day) VALUES (1, ?, '2025-01-01')", [(1000,), (2000,)])
+    create_schema(conn)
+
+    assert conn.execute("SELECT milliseconds FROM usage_metrics").fetchall() == [(3000,)]
+    conn.close()
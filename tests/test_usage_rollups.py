@@ -0,0 +1,97 @@
+import pytest
+import sqlite3
+import datetime
+
+from app.db.database import create_schema, USAGE_ROLLUP_TABLES
+from app.metrics.metrics_manager import MetricsManager
+
+@pytest.fixture
+def metrics_manager_instance():
+    """Provides a fresh MetricsManager backed by an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    create_schema(conn)
+    MetricsManager._master_instance = None
+    yield MetricsManager.get_instance(conn)
+    MetricsManager._master_instance = None
+    conn.close()
+
+def _add_usage(manager, service_name, day, milliseconds):
+    """Queues usage for an arbitrary day, as _log_usage does for today."""
+    key = (manager._service_ids[service_name], day.isoformat())
+    manager._pending_usage[key] = manager._pending_usage.get(key, 0) + milliseconds
+
+def _rollups_match_raw_data(conn):
+    for table, period_sql in USAGE_ROLLUP_TABLES.items():
+        expected = conn.execute(
+            f"SELECT {period_sql}, service_id, SUM(milliseconds) FROM usage_metrics GROUP BY 1, 2 ORDER BY 1, 2"
+        ).fetchall()
+        actual = conn.execute(f"SELECT period_start, service_id, milliseconds FROM {table} ORDER BY 1, 2").fetchall()
+        if [tuple(r) for r in expected] != [tuple(r) for r in actual]:
+            return False
+    return True
+
+def test_flush_maintains_rollups(metrics_manager_instance):
+    """Weekly, monthly and per-service rollups match a full re-aggregation after several flushes."""
+    manager = metrics_manager_instance
+    today = datetime.date.today()
+    for offset in range(0, 400, 3):
+        _add_usage(manager, "Notas", today - datetime.timedelta(days=offset), 60000)
+        if offset % 2:
+            _add_usage(manager, "Kanban", today - datetime.timedelta(days=offset), 30000)
+        if offset % 50 == 0:
+            manager.flush()
+    manager.flush()
+
+    assert _rollups_match_raw_data(manager.conn)
+    totals = {t['service_name']: t for t in manager.get_service_totals()}
+    assert totals["Notas"]['milliseconds'] == 134 * 60000
+    assert totals["Notas"]['last_day'] == today.isoformat()
+
+def test_trend_granularity_follows_range(metrics_manager_instance):
+    """Long ranges are bucketed by week or month and include the whole first period."""
+    manager = metrics_manager_instance
+    today = datetime.date.today()
+    for offset in range(365):
+        _add_usage(manager, "Notas", today - datetime.timedelta(days=offset), 1000)
+
+    daily = manager.get_usage_trend(30)
+    assert len(daily) == 30
+
+    weekly = manager.get_usage_trend(90)
+    assert all(datetime.date.fromisoformat(day).weekday() == 0 for day in weekly)
+
+    monthly = manager.get_usage_trend(365)
+    assert all(day.endswith("-01") for day in monthly)
+    assert sum(monthly.values()) == 365 * 1000
+
+    notes_id = manager._service_ids["Notas"]
+    assert manager.get_usage_trend(365, service_id=notes_id) == monthly
+    assert manager.get_usage_trend(365, service_id=manager._service_ids["Kanban"]) == {}
+
+def test_breakdown_reads_rollups(metrics_manager_instance):
+    """The per-service breakdown for a range sums the rollup rows."""
+    manager = metrics_manager_instance
+    today = datetime.date.today()
+    _add_usage(manager, "Notas", today, 5000)
+    _add_usage(manager, "Kanban", today, 9000)
+
+    breakdown = manager.get_usage_breakdown(90)
+    assert [(b['service_name'], b['milliseconds']) for b in breakdown] == [("Kanban", 9000), ("Notas", 5000)]
+
+def test_rollups_are_backfilled_on_migration():
+    """Databases created before the rollup tables existed get them populated from usage_metrics."""
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    conn.execute("INSERT INTO services (name, url, profile_path) VALUES ('Correo', 'https://mail.example.com', 'correo')")
+    conn.executemany("INSERT INTO usage_metrics (service_id, milliseconds, day) VALUES (1, ?, ?)",
+                     [(1000, '2025-01-06'), (2000, '2025-01-12'), (4000, '2025-02-01')])
+    for table in list(USAGE_ROLLUP_TABLES) + ["usage_metrics_by_service"]:
+        conn.execute(f"DROP TABLE {table}")
+    create_schema(conn)
+
+    assert _rollups_match_raw_data(conn)
+    assert conn.execute("SELECT period_start, milliseconds FROM usage_metrics_weekly").fetchall() == [('2025-01-06', 3000), ('2025-01-27', 4000)]
+    assert conn.execute("SELECT milliseconds, first_day, last_day FROM usage_metrics_by_service").fetchall() == [(7000, '2025-01-06', '2025-02-01')]
+    conn.close()
@@ -0,0 +1,71 @@
+import pytest
+import sqlite3
+import datetime
+import numpy as np
+
+from app.db.database import create_schema
+from app.db.settings_manager import SettingsManager
+from app.metrics.metrics_manager import MetricsManager
+from app.metrics import session_analytics
+from app.utils import time_utils
+
+HOUR_MS = session_analytics.HOUR_MS
+
+@pytest.fixture
+def metrics_manager_instance():
+    """Provides a fresh MetricsManager (UTC timezone) backed by an in-memory database."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    SettingsManager._instance = None
+    SettingsManager.initialize(conn)
+    MetricsManager._master_instance = None
+    yield MetricsManager.get_instance(conn)
+    MetricsManager._master_instance = None
+    SettingsManager._instance = None
+    conn.close()
+
+def test_heatmap_splits_sessions_at_hour_boundaries():
+    """A session from Monday 09:30 to 11:15 contributes 30/60/15 minutes to three hour cells."""
+    monday_ms = int(datetime.datetime(2025, 1, 6, tzinfo=datetime.timezone.utc).timestamp() * 1000)
+    start = monday_ms + 9 * HOUR_MS + 30 * 60000
+    grid = session_analytics.hourly_heatmap([start], [105 * 60000])
+
+    assert grid[0, 9] == 30 * 60000
+    assert grid[0, 10] == 60 * 60000
+    assert grid[0, 11] == 15 * 60000
+    assert grid.sum() == 105 * 60000
+
+def test_switch_counts_ignore_repeated_service():
+    """Consecutive sessions on the same service are not a switch."""
+    starts = np.arange(6) * HOUR_MS
+    per_day, per_hour = session_analytics.switch_counts(starts, [1, 1, 2, 1, 1, 3])
+    assert per_day == {0: 3}
+    assert per_hour[2] == 1 and per_hour[3] == 1 and per_hour[5] == 1 and per_hour.sum() == 3
+
+def test_sessions_are_logged_in_batches(metrics_manager_instance):
+    """Tracking sessions are buffered and written to usage_sessions by flush()."""
+    manager = metrics_manager_instance
+    for name in ["Notas", "Kanban", "Notas"]:
+        manager.start_tracking(name)
+    manager.stop_tracking_current()
+    assert manager.conn.execute("SELECT COUNT(*) FROM usage_sessions").fetchone()[0] == 0
+
+    manager.flush()
+    rows = manager.conn.execute("SELECT service_id, start_ms, duration_ms FROM usage_sessions ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == [manager._service_ids[n] for n in ["Notas", "Kanban", "Notas"]]
+    assert abs(rows[0][1] - time_utils.now_epoch_ms()) < 60000
+    assert sum(manager.get_switch_frequency(1)['per_day'].values()) == 2
+
+def test_compaction_drops_old_sessions(metrics_manager_instance):
+    """Sessions beyond the retention window are deleted; recent ones feed the heatmap."""
+    manager = metrics_manager_instance
+    now_ms = time_utils.now_epoch_ms()
+    notes_id = manager._service_ids["Notas"]
+    manager._pending_sessions = [
+        (notes_id, now_ms - 200 * 24 * HOUR_MS, 60000),
+        (notes_id, now_ms - 2 * HOUR_MS, 60000),
+    ]
+    assert manager.compact_sessions(retention_days=90) == 1
+    assert manager.get_hourly_heatmap(7).sum() == 60000
+    assert manager.get_hourly_heatmap(7, service_id=manager._service_ids["Kanban"]).sum() == 0
@@ -0,0 +1,125 @@
+import io
+import sqlite3
+import pytest
+
+from app.db.database import create_schema
+from app.security import vault_archive
+from app.security.vault_archive import export_secrets, import_secrets
+from app.security.vault_manager import VaultManager
+
+PASSPHRASE = "my_super_secret_password"
+ARCHIVE_PASSPHRASE = "archive passphrase"
+
+def _manager():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    return manager
+
+def _archive(secrets):
+    buffer = io.BytesIO()
+    export_secrets(secrets, ARCHIVE_PASSPHRASE, buffer)
+    return buffer.getvalue()
+
+def test_export_import_between_vaults(tmp_path):
+    source = _manager()
+    source.save_secret("OPENAI_API_KEY", "sk-123")
+    source.save_secret("github", "ghp_ñandú")
+    path = str(tmp_path / "backup.imvault")
+    calls = []
+    assert source.export_vault(path, ARCHIVE_PASSPHRASE, progress=lambda done, total: calls.append((done, total))) == 2
+    assert calls == [(1, 1)]
+    assert b"sk-123" not in open(path, "rb").read()
+
+    target = _manager()
+    target.save_secret("github", "old")
+    assert target.import_vault(path, ARCHIVE_PASSPHRASE) == 2
+    assert target.get_all_secret_ids() == ["OPENAI_API_KEY", "github"]
+    assert target.get_secret("github") == "ghp_ñandú"
+
+def test_import_can_keep_existing_secrets(tmp_path):
+    path = tmp_path / "backup.imvault"
+    path.write_bytes(_archive([("github", "new"), ("slack", "xoxb")]))
+    target = _manager()
+    target.save_secret("github", "old")
+    assert target.import_vault(str(path), ARCHIVE_PASSPHRASE, replace=False) == 1 # Only "slack" is new
+    assert target.get_secret("github") == "old"
+    assert target.get_secret("slack") == "xoxb"
+
+def test_vault_stays_unlocked_while_a_task_runs(tmp_path):
+    manager = _manager()
+    manager.save_secret("github", "ghp")
+    manager.begin_task()
+    with pytest.raises(PermissionError):
+        manager.lock()
+    with pytest.raises(PermissionError):
+        manager.rotate_data_key(PASSPHRASE)
+    assert manager.unlock(PASSPHRASE) # Only checks the passphrase
+    path = str(tmp_path / "backup.imvault")
+    assert manager.export_vault(path, ARCHIVE_PASSPHRASE) == 1
+    assert manager.get_secret("github") == "ghp"
+
+    manager.end_task()
+    manager.lock()
+    assert manager.is_locked()
+    with pytest.raises(PermissionError):
+        manager.begin_task()
+
+def test_wrong_passphrase_and_damaged_archives_are_rejected(monkeypatch):
+    monkeypatch.setattr(vault_archive, "CHUNK_SECRETS", 2)
+    data = _archive([(f"id{i}", "value") for i in range(5)]) # Three records
+    with pytest.raises(ValueError):
+        import_secrets("wrong", io.BytesIO(data))
+
+    tampered = bytearray(data)
+    tampered[-1] ^= 1
+    cut_record = len(data) - 40 # Inside the final record
+    for damaged in (bytes(tampered), data[:cut_record], data + b"x", b"not an archive"):
+        with pytest.raises(ValueError):
+            import_secrets(ARCHIVE_PASSPHRASE, io.BytesIO(damaged))
+
+def test_dropping_the_final_record_is_detected(monkeypatch):
+    monkeypatch.setattr(vault_archive, "CHUNK_SECRETS", 1)
+    data = _archive([("a", "1"), ("b", "2")])
+    start = vault_archive._HEADER_LENGTH
+    first_end = start + 5 + 12 + int.from_bytes(data[start:start + 4], "big")
+    # Keep only the first record and mark it final: the AAD no longer matches
+    forged = bytearray(data[:first_end])
+    forged[start + 4] = 1
+    with pytest.raises(ValueError, match="passphrase or corrupted"):
+        import_secrets(ARCHIVE_PASSPHRASE, io.BytesIO(bytes(forged)))
+
+def test_failed_import_leaves_vault_untouched(tmp_path):
+    path = tmp_path / "backup.imvault"
+    path.write_bytes(_archive([("github", "new")]))
+    target = _manager()
+    target.save_secret("github", "old")
+    with pytest.raises(ValueError):
+        target.import_vault(str(path), "wrong")
+    assert target.get_secret("github") == "old"
+
+def test_large_archives_use_the_thread_pool(monkeypatch):
+    monkeypatch.setattr(vault_archive, "CHUNK_SECRETS", 10)
+    monkeypatch.setattr(vault_archive, "PARALLEL_MIN_CHUNKS", 2)
+    monkeypatch.setattr(vault_archive.os, "cpu_count", lambda: 2)
+    secrets = [(f"id{i:03}", f"value {i}") for i in range(45)]
+    pools = []
+    start_pool = vault_archive._start_pool
+    monkeypatch.setattr(vault_archive, "_start_pool", lambda count: pools.append(start_pool(count)) or pools[-1])
+    calls = []
+    data = _archive(secrets)
+    assert import_secrets(ARCHIVE_PASSPHRASE, io.BytesIO(data), progress=lambda d, t: calls.append((d, t))) == secrets
+    assert calls[-1] == (5, 5)
+    assert len(pools) == 2 and all(pool is not None for pool in pools)
+
+def test_excessive_key_derivation_parameters_are_rejected(monkeypatch):
+    data = bytearray(_archive([("a", "1")]))
+    params_at = vault_archive._HEADER_LENGTH - vault_archive._PARAMS.size
+    for n, r, p in ((2 ** 30, 8, 1), (2 ** 14, 255, 1), (2 ** 14, 8, 200), (3000, 8, 1)):
+        data[params_at:vault_archive._HEADER_LENGTH] = vault_archive._PARAMS.pack(n, r, p)
+        derive = lambda *args: pytest.fail("scrypt must not run")
+        monkeypatch.setattr(vault_archive, "_derive_archive_key", derive)
+        with pytest.raises(ValueError, match="key derivation parameters"):
+            import_secrets(ARCHIVE_PASSPHRASE, io.BytesIO(bytes(data)))
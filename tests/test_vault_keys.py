@@ -0,0 +1,194 @@
+import base64
+import os
+import sqlite3
+import pytest
+
+from app.db.database import create_schema, _ensure_packed_credentials
+from app.security.vault import (
+    Vault, pack_credential, unpack_credential, FORMAT_HKDF, FORMAT_LEGACY_SCRYPT, KEK_SALT_KEY, MASTER_SALT_KEY, TEST_SECRET_ID, WRAPPED_DEK_KEY,
+)
+from app.security.vault_manager import VaultManager
+
+PASSPHRASE = "my_super_secret_password"
+
+@pytest.fixture
+def conn():
+    """Provides an in-memory SQLite database connection with schema created."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    yield conn
+    conn.close()
+
+def _save_legacy_secret(conn, secret_id, plaintext, passphrase):
+    """Writes a row the way the per-secret scrypt vault did."""
+    vault = Vault(conn)
+    salt = os.urandom(16)
+    nonce, enc_data = vault._encrypt(vault._derive_key(passphrase, salt), plaintext)
+    conn.execute("INSERT INTO credentials (id, data) VALUES (?, ?)",
+                 (secret_id, pack_credential(FORMAT_LEGACY_SCRYPT, salt, nonce, enc_data)))
+    conn.commit()
+
+def _versions(conn):
+    return {row['id']: row['data'][0] for row in conn.execute("SELECT id, data FROM credentials")}
+
+def test_reads_do_not_run_scrypt(conn, monkeypatch):
+    """The passphrase is stretched once at unlock; secret reads only derive HKDF subkeys."""
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    manager.save_secret("api_key", "sk-123")
+
+    def fail(*args):
+        raise AssertionError("scrypt called after unlock")
+    monkeypatch.setattr(Vault, "_derive_key", fail)
+    assert manager.get_secret("api_key") == "sk-123"
+    assert _versions(conn) == {TEST_SECRET_ID: FORMAT_HKDF, "api_key": FORMAT_HKDF}
+
+def test_subkeys_are_bound_to_secret_id(conn):
+    """A row copied under another id does not decrypt."""
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    manager.save_secret("a", "value")
+    conn.execute("INSERT INTO credentials (id, data) SELECT 'b', data FROM credentials WHERE id = 'a'")
+    assert manager.get_secret("b") is None
+
+def test_legacy_vault_is_migrated_on_unlock(conn):
+    _save_legacy_secret(conn, TEST_SECRET_ID, "ok", PASSPHRASE)
+    _save_legacy_secret(conn, "token", "abc", PASSPHRASE)
+
+    manager = VaultManager(conn)
+    assert not manager.unlock("wrong")
+    assert list(_versions(conn).values()) == [FORMAT_LEGACY_SCRYPT] * 2
+
+    assert manager.unlock(PASSPHRASE)
+    assert manager.get_secret("token") == "abc"
+    assert list(_versions(conn).values()) == [FORMAT_HKDF] * 2
+
+    # A fresh session unlocks the migrated vault
+    other = VaultManager(conn)
+    assert not other.unlock("wrong")
+    assert other.unlock(PASSPHRASE) and other.get_secret("token") == "abc"
+
+def test_lock_zeroizes_data_key(conn):
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    master_key = manager._data_key
+    assert any(master_key)
+    manager.lock()
+    assert manager.is_locked()
+    assert not any(master_key)
+
+def test_change_master_passphrase(conn):
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    manager.save_secret("token", "abc")
+    manager.change_master_passphrase(PASSPHRASE, "new passphrase")
+    assert manager.get_secret("token") == "abc"
+
+    other = VaultManager(conn)
+    assert not other.unlock(PASSPHRASE)
+    assert other.unlock("new passphrase") and other.get_secret("token") == "abc"
+
+def test_passphrase_change_rewraps_data_key_only(conn):
+    """Changing the passphrase leaves every secret row untouched."""
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    manager.save_secret("token", "abc")
+    rows_before = conn.execute("SELECT * FROM credentials ORDER BY id").fetchall()
+    manager.change_master_passphrase(PASSPHRASE, "new passphrase")
+    assert [tuple(r) for r in conn.execute("SELECT * FROM credentials ORDER BY id")] == [tuple(r) for r in rows_before]
+
+def test_pre_envelope_vault_is_wrapped_on_unlock(conn):
+    """A vault whose key was derived directly from the passphrase keeps it as data key."""
+    vault = Vault(conn)
+    salt = os.urandom(16)
+    key = vault.derive_master_key(PASSPHRASE, salt)
+    with conn:
+        conn.execute("INSERT INTO vault_config (key, value) VALUES (?, ?)", (MASTER_SALT_KEY, salt))
+        vault._write_secret(TEST_SECRET_ID, "ok", key)
+        vault._write_secret("token", "abc", key)
+
+    manager = VaultManager(conn)
+    assert not manager.unlock("wrong")
+    assert manager.unlock(PASSPHRASE) and manager.get_secret("token") == "abc"
+    keys = {row[0] for row in conn.execute("SELECT key FROM vault_config")}
+    assert keys == {KEK_SALT_KEY, WRAPPED_DEK_KEY}
+    assert VaultManager(conn).unlock(PASSPHRASE)
+
+def test_rotate_data_key_in_batches(conn):
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    for i in range(7):
+        manager.save_secret(f"secret{i}", f"value{i}")
+    old_blobs = dict(conn.execute("SELECT id, data FROM credentials").fetchall())
+
+    progress = []
+    manager._vault.rotate_data_key(manager._data_key, PASSPHRASE, batch_size=3,
+                                   progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(3, 8), (6, 8), (8, 8)]
+    assert all(blob != old_blobs[secret_id] for secret_id, blob in conn.execute("SELECT id, data FROM credentials"))
+
+    other = VaultManager(conn)
+    assert other.unlock(PASSPHRASE)
+    assert [other.get_secret(f"secret{i}") for i in range(7)] == [f"value{i}" for i in range(7)]
+
+def test_old_credentials_layout_is_packed(conn):
+    """base64 TEXT rows (with or without the version column) become packed raw-bytes rows."""
+    vault = Vault(conn)
+    salt, key = os.urandom(16), os.urandom(32)
+    nonce, enc_data = vault._encrypt(key, "value")
+    b64 = lambda data: base64.b64encode(data).decode()
+    conn.execute("DROP TABLE credentials")
+    conn.execute("CREATE TABLE credentials (id TEXT PRIMARY KEY, enc_blob BLOB NOT NULL, nonce BLOB NOT NULL, salt BLOB NOT NULL)")
+    conn.execute("INSERT INTO credentials VALUES ('token', ?, ?, ?)", (b64(enc_data), b64(nonce), b64(salt)))
+
+    _ensure_packed_credentials(conn.cursor())
+    columns = [c[1] for c in conn.execute("PRAGMA table_info(credentials)")]
+    assert columns == ["id", "data"]
+    version, packed_salt, packed_nonce, packed_enc = unpack_credential(conn.execute("SELECT data FROM credentials").fetchone()[0])
+    assert (version, packed_salt, packed_nonce) == (FORMAT_LEGACY_SCRYPT, salt, nonce)
+    assert vault._decrypt(key, packed_nonce, packed_enc) == "value"
+    assert len(packed_enc) == len(enc_data) # No base64 overhead
+
+def test_unreadable_old_rows_are_quarantined(conn):
+    """One malformed row must not stop the migration (and the app) from starting."""
+    vault = Vault(conn)
+    nonce, enc_data = vault._encrypt(os.urandom(32), "value")
+    b64 = lambda data: base64.b64encode(data).decode()
+    conn.execute("DROP TABLE credentials")
+    conn.execute("CREATE TABLE credentials (id TEXT PRIMARY KEY, enc_blob BLOB NOT NULL, nonce BLOB NOT NULL, salt BLOB NOT NULL)")
+    conn.executemany("INSERT INTO credentials VALUES (?, ?, ?, ?)", [
+        ("good", b64(enc_data), b64(nonce), b64(os.urandom(16))),
+        ("truncated", b64(enc_data), b64(nonce), b64(os.urandom(16))[:-3]),
+        ("short_nonce", b64(enc_data), b64(nonce[:4]), b64(os.urandom(16))),
+    ])
+
+    _ensure_packed_credentials(conn.cursor())
+    assert [row[0] for row in conn.execute("SELECT id FROM credentials")] == ["good"]
+    quarantined = conn.execute("SELECT id, nonce FROM credentials_quarantine ORDER BY id").fetchall()
+    assert [tuple(row) for row in quarantined] == [("short_nonce", b64(nonce[:4])), ("truncated", b64(nonce))]
+
+def test_secret_ids_come_from_covering_index(conn):
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM credentials WHERE id != ? ORDER BY id", (TEST_SECRET_ID,)).fetchall()
+    assert "COVERING INDEX" in plan[0][-1]
+
+def test_rotation_requires_the_current_passphrase(conn):
+    manager = VaultManager(conn)
+    manager.unlock(PASSPHRASE)
+    manager.save_secret("token", "abc")
+    blobs = dict(conn.execute("SELECT key, value FROM vault_config").fetchall())
+    with pytest.raises(ValueError, match="Incorrect vault passphrase"):
+        manager.rotate_data_key("my_super_secret_pasword") # Typo
+    assert dict(conn.execute("SELECT key, value FROM vault_config").fetchall()) == blobs
+    assert manager.get_secret("token") == "abc"
+
+def test_rotation_leaves_unmigrated_legacy_rows_alone(conn):
+    _save_legacy_secret(conn, TEST_SECRET_ID, "ok", PASSPHRASE)
+    _save_legacy_secret(conn, "orphan", "xyz", "another passphrase") # Skipped by the migration
+    manager = VaultManager(conn)
+    assert manager.unlock(PASSPHRASE)
+    manager.save_secret("token", "abc")
+    orphan = conn.execute("SELECT data FROM credentials WHERE id = 'orphan'").fetchone()[0]
+    manager.rotate_data_key(PASSPHRASE)
+    assert manager.get_secret("token") == "abc"
+    assert conn.execute("SELECT data FROM credentials WHERE id = 'orphan'").fetchone()[0] == orphan
@@ -0,0 +1,182 @@
+import pytest
+
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError) # Also missing system libraries
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from app.ui.webview_lifecycle import LifecycleState, WebViewLifecycleManager
+
+class FakeSettings:
+    def __init__(self, freeze=5, discard=60, max_live=10, pinned=()):
+        self.freeze, self.discard, self.max_live, self.pinned = freeze, discard, max_live, set(pinned)
+
+    def get_webview_freeze_minutes(self):
+        return self.freeze
+
+    def get_webview_discard_minutes(self):
+        return self.discard
+
+    def get_max_live_webviews(self):
+        return self.max_live
+
+    def get_pinned_service_ids(self):
+        return self.pinned
+
+class FakePage:
+    def __init__(self, audible=False, unread_watcher=False):
+        self.state = LifecycleState.Active
+        self.audible = audible
+        self.properties = {'unread_watcher': unread_watcher}
+
+    def lifecycleState(self):
+        return self.state
+
+    def setLifecycleState(self, state):
+        self.state = state
+
+    def recentlyAudible(self):
+        return self.audible
+
+    def property(self, name):
+        return self.properties.get(name)
+
+    def renderProcessPid(self):
+        return 0
+
+class FakeView:
+    def __init__(self, service_id, **page_options):
+        self.service_id = service_id
+        self.visible = False
+        self._page = FakePage(**page_options)
+
+    def page(self):
+        return self._page
+
+    def property(self, name):
+        return self.service_id if name == 'service_id' else None
+
+    def isVisible(self):
+        return self.visible
+
+class FakeStack(QObject):
+    currentChanged = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.views = []
+
+    def widget(self, index):
+        return self.views[index]
+
+    def show(self, view):
+        self.currentChanged.emit(self.views.index(view))
+
+class FakeMonitor:
+    def __init__(self, heavy=()):
+        self.heavy = set(heavy)
+
+    def is_cpu_heavy(self, service_id, percent):
+        return service_id in self.heavy
+
+@pytest.fixture
+def make_manager(qtbot, monkeypatch):
+    """Builds a manager over fake views registered at t=0."""
+    monkeypatch.setattr("app.ui.webview_lifecycle.time.monotonic", lambda: 0)
+
+    def make(views, settings=None, resource_monitor=None):
+        stack = FakeStack()
+        stack.views = list(views)
+        manager = WebViewLifecycleManager(stack, settings or FakeSettings(), resource_monitor=resource_monitor)
+        manager.check_timer.stop()
+        for view in views:
+            manager.register(view)
+        return manager, stack
+    return make
+
+def states(views):
+    return [view.page().lifecycleState() for view in views]
+
+def test_idle_views_are_frozen_then_discarded(make_manager):
+    views = [FakeView(1), FakeView(2)]
+    manager, _ = make_manager(views)
+    manager.enforce(now=4 * 60)
+    assert states(views) == [LifecycleState.Active] * 2
+
+    manager.enforce(now=5 * 60)
+    assert states(views) == [LifecycleState.Frozen] * 2
+
+    manager.enforce(now=60 * 60)
+    assert states(views) == [LifecycleState.Discarded] * 2
+
+def test_current_visible_pinned_and_audible_views_are_exempt(make_manager):
+    current, visible, pinned, audible, idle = (FakeView(1), FakeView(2), FakeView(3),
+                                               FakeView(4, audible=True), FakeView(5))
+    visible.visible = True
+    manager, stack = make_manager([current, visible, pinned, audible, idle], FakeSettings(pinned={3}))
+    stack.show(current)
+    manager.enforce(now=120 * 60)
+    assert states([current, visible, pinned, audible]) == [LifecycleState.Active] * 4
+    assert idle.page().lifecycleState() == LifecycleState.Discarded
+
+def test_idle_time_counts_from_leaving_the_view(make_manager, monkeypatch):
+    first, second = FakeView(1), FakeView(2)
+    manager, stack = make_manager([first, second])
+    stack.show(first)
+    monkeypatch.setattr("app.ui.webview_lifecycle.time.monotonic", lambda: 10 * 60)
+    stack.show(second)
+    manager.enforce(now=14 * 60)
+    assert first.page().lifecycleState() == LifecycleState.Active # Only 4 minutes in the background
+    manager.enforce(now=15 * 60)
+    assert first.page().lifecycleState() == LifecycleState.Frozen
+
+def test_busy_views_are_frozen_early(make_manager):
+    busy, quiet = FakeView(1), FakeView(2)
+    manager, _ = make_manager([busy, quiet], resource_monitor=FakeMonitor(heavy={1}))
+    manager.enforce(now=manager.BUSY_FREEZE_SECONDS - 1)
+    assert states([busy, quiet]) == [LifecycleState.Active] * 2
+    manager.enforce(now=manager.BUSY_FREEZE_SECONDS)
+    assert states([busy, quiet]) == [LifecycleState.Frozen, LifecycleState.Active]
+
+def test_live_view_cap_discards_least_recently_used(make_manager):
+    views = [FakeView(i) for i in range(1, 5)]
+    manager, stack = make_manager(views, FakeSettings(freeze=999, discard=999, max_live=2))
+    stack.show(views[3])
+    manager.enforce(now=1)
+    assert states(views) == [LifecycleState.Discarded, LifecycleState.Discarded,
+                             LifecycleState.Active, LifecycleState.Active]
+
+def test_recently_used_watched_views_keep_running(make_manager):
+    watched, plain = FakeView(1, unread_watcher=True), FakeView(2)
+    manager, _ = make_manager([watched, plain], FakeSettings(max_live=1))
+    manager.enforce(now=120 * 60)
+    assert states([watched, plain]) == [LifecycleState.Active, LifecycleState.Discarded]
+
+    manager.settings_manager.max_live = 0 # The cap still applies
+    manager.enforce(now=120 * 60)
+    assert watched.page().lifecycleState() == LifecycleState.Discarded
+
+def test_idle_watched_views_beyond_the_live_set_are_frozen(make_manager):
+    """Only the most recently used watched views stay live; the rest follow the idle rules."""
+    views = [FakeView(i, unread_watcher=True) for i in range(1, WebViewLifecycleManager.WATCHED_LIVE_VIEWS + 2)]
+    current = FakeView(99)
+    manager, stack = make_manager(views + [current])
+    for view in views[1:] + [current]:
+        stack.show(view) # views[0] is the least recently used
+    manager.enforce(now=5 * 60)
+    assert views[0].page().lifecycleState() == LifecycleState.Frozen
+    assert states(views[1:]) == [LifecycleState.Active] * WebViewLifecycleManager.WATCHED_LIVE_VIEWS
+    manager.enforce(now=60 * 60)
+    assert views[0].page().lifecycleState() == LifecycleState.Discarded
+
+def test_busy_views_with_an_unread_watcher_are_still_frozen(make_manager):
+    watched = FakeView(1, unread_watcher=True)
+    manager, _ = make_manager([watched], resource_monitor=FakeMonitor(heavy={1}))
+    manager.enforce(now=manager.BUSY_FREEZE_SECONDS)
+    assert watched.page().lifecycleState() == LifecycleState.Frozen
+
+def test_state_changes_are_reported(make_manager, qtbot):
+    view = FakeView(7)
+    manager, _ = make_manager([view])
+    with qtbot.waitSignal(manager.state_changed) as blocker:
+        manager.enforce(now=5 * 60)
+    assert blocker.args == [7, 'Frozen']